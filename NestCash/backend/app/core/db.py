@@ -4,24 +4,34 @@ from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from beanie import init_beanie
 from dotenv import load_dotenv
 
+from app.core.profiling import PROFILING_ENABLED, profiling_listener
+
 from app.models.user import UserDocument
+from app.models.user_search import UserSearchEntry
 from app.models.item import Item
 from app.models.transaction import Transaction
-from app.models.account import AllUserAccountsDocument
+from app.models.transaction_rollup import TransactionMonthlyRollup
+from app.models.account import AllUserAccountsDocument, UserAccountsDocument
 from app.models.category import Category
 from app.models.knowledge import KnowledgeCategory, Lesson, UserProgress
 from app.models.forum_models import (
     ForumPostDocument, CommentDocument, LikeDocument, FollowDocument,
-    UserForumSettingsDocument
+    UserForumSettingsDocument, ForumTimelineEntry
 )
 from app.models.notification import NotificationDocument
 from app.models.limit import Limit
 from app.models.challenge import ChallengeDocument, UserChallengeDocument
-from app.models.badge import BadgeType, UserBadge, BadgeProgress
+from app.models.badge import BadgeType, UserBadge, BadgeProgress, UserBadgeCounters
 from app.models.habit import Habit, HabitLog
+from app.models.job import JobOutboxDocument
+from app.models.seed_state import SeedStateDocument
+from app.models.lease import LeaseDocument
 
 load_dotenv()
 
+# Felülírható pl. a benchmarkokhoz (külön, eldobható adatbázis)
+MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "nestcash")
+
 _client: AsyncIOMotorClient | None = None
 _db: AsyncIOMotorDatabase | None = None
 
@@ -29,19 +39,21 @@ async def init_db():
     """App startup-kor meghívva: kapcsolat + Beanie init."""
     global _client, _db
     mongo_uri = os.getenv("MONGODB_URI")
-    _client = AsyncIOMotorClient(mongo_uri)
-    _db = _client["nestcash"]
+    # Profilozáskor a Mongo parancsok a kéréshez rendelődnek (app.core.profiling)
+    _client = AsyncIOMotorClient(mongo_uri, event_listeners=[profiling_listener] if PROFILING_ENABLED else [])
+    _db = _client[MONGODB_DB_NAME]
     # Csak azokat a modelleket inicializáljuk, amiket Beanie-vel kezelünk
     await init_beanie(
         database=_db, 
         document_models=[
-            UserDocument, Item, Transaction, AllUserAccountsDocument, Category,
+            UserDocument, UserSearchEntry, Item, Transaction, TransactionMonthlyRollup, AllUserAccountsDocument, UserAccountsDocument, Category,
             KnowledgeCategory, Lesson, UserProgress,
             ForumPostDocument, CommentDocument, LikeDocument, FollowDocument,
-            NotificationDocument, UserForumSettingsDocument, Limit,
+            NotificationDocument, UserForumSettingsDocument, ForumTimelineEntry, Limit,
             ChallengeDocument, UserChallengeDocument,
-            BadgeType, UserBadge, BadgeProgress,
-            Habit, HabitLog
+            BadgeType, UserBadge, BadgeProgress, UserBadgeCounters,
+            Habit, HabitLog,
+            JobOutboxDocument, SeedStateDocument, LeaseDocument
             ]
             ) 
 
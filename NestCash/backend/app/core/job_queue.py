@@ -0,0 +1,368 @@
+# app/core/job_queue.py
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+from pymongo import ReturnDocument
+
+from app.core.leases import PROCESS_ID, acquire_lease
+from app.models.job import JobOutboxDocument, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class Job:
+    name: str
+    payload: Dict[str, Any]
+    attempts: int = 0
+    outbox_id: Optional[PydanticObjectId] = None
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class JobQueue:
+    """
+    Folyamaton belüli asyncio feladatsor a kérés utáni mellékhatásokhoz
+    (badge kiértékelés, limit figyelmeztetés, értesítések).
+
+    - korlátos méretű sor, fix számú worker
+    - hiba esetén újrapróbálás exponenciális várakozással
+    - opcionális Mongo outbox: a feladat a sorba tétel előtt kiíródik, sikeres
+      futás után törlődik. Minden feladatot egy folyamat tart (owner +
+      lease_expires_at), a lease-t amíg él, megújítja; más folyamat csak
+      lejárt lease-ű feladatot vehet át, atomi find_one_and_update-tel
+    - időszakos feladatok: a sor futása alatt adott időközönként sorba kerülnek;
+      több folyamat (worker) közül csak a "schedule:<név>" lease tartója teszi sorba
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        maxsize: int = 1000,
+        max_attempts: int = 3,
+        retry_delay: float = 0.5,
+        use_outbox: bool = False,
+        lease_seconds: float = 300.0
+    ):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.use_outbox = use_outbox
+        self.lease_seconds = lease_seconds
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks = []
+        self._retry_tasks = set()
+        self._schedules: List[Tuple[str, Dict[str, Any], float]] = []
+        self._schedule_tasks = []
+        self._outbox_task: Optional[asyncio.Task] = None
+
+        # Metrikák
+        self._counters = defaultdict(int)
+        self._durations = defaultdict(lambda: deque(maxlen=500))
+        self._wait_times = deque(maxlen=500)
+
+    # ----------- Regisztráció -----------
+
+    def register(self, name: str) -> Callable[[JobHandler], JobHandler]:
+        """Dekorátor: handler regisztrálása egy feladatnévhez"""
+        def decorator(handler: JobHandler) -> JobHandler:
+            self._handlers[name] = handler
+            return handler
+        return decorator
+
+    def schedule(self, name: str, payload: Dict[str, Any], interval_seconds: float) -> None:
+        """Időszakos feladat: a sor futása alatt interval_seconds másodpercenként sorba kerül"""
+        self._schedules.append((name, payload, interval_seconds))
+        if self.is_running:
+            self._schedule_tasks.append(asyncio.create_task(self._periodic(name, payload, interval_seconds)))
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._worker_tasks)
+
+    # ----------- Életciklus -----------
+
+    async def start(self) -> None:
+        """Workerek indítása (app startup); outbox módban a gazdátlan feladatok átvétele"""
+        if self.is_running:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(index)) for index in range(self.workers)
+        ]
+        self._schedule_tasks = [
+            asyncio.create_task(self._periodic(name, payload, interval))
+            for name, payload, interval in self._schedules
+        ]
+
+        if self.use_outbox:
+            recovered = await self._claim_orphaned()
+            if recovered:
+                logger.info(f"Recovered {recovered} orphaned jobs from outbox")
+            self._outbox_task = asyncio.create_task(self._maintain_outbox())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Sor kiürítése (legfeljebb timeout másodpercig), majd workerek leállítása"""
+        if not self.is_running:
+            return
+
+        # Időszakos feladatok és az outbox átvétel leállítása, hogy a kiürítés alatt ne jöjjön új
+        background = [*self._schedule_tasks, *([self._outbox_task] if self._outbox_task else [])]
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        self._schedule_tasks = []
+        self._outbox_task = None
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Job queue stopped with {self._queue.qsize()} jobs still queued")
+
+        for task in [*self._worker_tasks, *self._retry_tasks]:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, *self._retry_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._retry_tasks = set()
+
+        if self.use_outbox:
+            await self._release_claims()
+
+    # ----------- Sorba tétel -----------
+
+    async def enqueue(self, name: str, payload: Dict[str, Any]) -> None:
+        """
+        Feladat sorba tétele
+
+        Ha a sor nem fut (pl. szkriptből hívva), a feladat azonnal, helyben lefut.
+        Teli sornál a hívó megvárja a szabad helyet (backpressure).
+        """
+        if name not in self._handlers:
+            raise ValueError(f"Unknown job: {name}")
+
+        if not self.is_running:
+            await self._run(Job(name=name, payload=payload))
+            return
+
+        job = Job(name=name, payload=payload)
+        if self.use_outbox:
+            # Ez a folyamat teszi a saját sorába, így rögtön az övé
+            document = JobOutboxDocument(
+                name=name,
+                payload=payload,
+                status=JobStatus.RUNNING,
+                owner=PROCESS_ID,
+                lease_expires_at=self._lease_expiry()
+            )
+            await document.insert()
+            job.outbox_id = document.id
+
+        self._counters["enqueued"] += 1
+        await self._queue.put(job)
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+
+    async def _periodic(self, name: str, payload: Dict[str, Any], interval_seconds: float) -> None:
+        # A lease másfél intervallumig él: a tartó minden körben megújítja, más
+        # folyamat csak akkor veszi át, ha a tartó legalább egy kört kihagyott
+        lease_name = f"schedule:{name}"
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                if not await acquire_lease(lease_name, PROCESS_ID, interval_seconds * 1.5):
+                    self._counters["schedule_skipped"] += 1
+                    continue
+                await self.enqueue(name, dict(payload))
+            except Exception as e:
+                logger.error(f"Failed to enqueue scheduled job {name}: {e}")
+
+    # ----------- Feldolgozás -----------
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                self._wait_times.append((time.perf_counter() - job.enqueued_at) * 1000)
+                await self._run(job)
+            except Exception as e:
+                # Egy hibás feladat nem állíthatja le végleg a workert
+                logger.error(f"Unexpected error running job {job.name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.attempts += 1
+        start = time.perf_counter()
+
+        try:
+            handler = self._handlers.get(job.name)
+            if handler is None:
+                # Pl. átnevezett, vagy újabb verzió által írt és itt átvett outbox feladat;
+                # újrapróbálással sem lesz handler, ezért rögtön FAILED
+                self._counters["failed"] += 1
+                logger.error(f"No handler registered for job {job.name}")
+                await self._update_outbox(job, JobStatus.FAILED, KeyError(f"No handler registered for job {job.name}"))
+                return
+            await handler(job.payload)
+        except Exception as e:
+            self._durations[job.name].append((time.perf_counter() - start) * 1000)
+            await self._handle_failure(job, e)
+            return
+
+        self._durations[job.name].append((time.perf_counter() - start) * 1000)
+        self._counters["succeeded"] += 1
+        if job.outbox_id:
+            await JobOutboxDocument.get_motor_collection().delete_one({"_id": job.outbox_id})
+
+    async def _handle_failure(self, job: Job, error: Exception) -> None:
+        if job.attempts < self.max_attempts and self.is_running:
+            self._counters["retried"] += 1
+            logger.warning(f"Job {job.name} failed (attempt {job.attempts}), retrying: {error}")
+            # A feladat a miénk marad (RUNNING), a lease-t a karbantartó ciklus újítja
+            await self._update_outbox(job, JobStatus.RUNNING, error)
+
+            delay = self.retry_delay * (2 ** (job.attempts - 1))
+            task = asyncio.create_task(self._requeue_later(job, delay))
+            self._retry_tasks.add(task)
+            task.add_done_callback(self._retry_tasks.discard)
+            return
+
+        self._counters["failed"] += 1
+        logger.error(f"Job {job.name} failed after {job.attempts} attempts: {error}")
+        await self._update_outbox(job, JobStatus.FAILED, error)
+
+    async def _requeue_later(self, job: Job, delay: float) -> None:
+        await asyncio.sleep(delay)
+        job.enqueued_at = time.perf_counter()
+        await self._queue.put(job)
+
+    async def _update_outbox(self, job: Job, status: JobStatus, error: Exception) -> None:
+        if not job.outbox_id:
+            return
+        fields = {
+            "status": status.value,
+            "attempts": job.attempts,
+            "last_error": str(error),
+            "updated_at": datetime.utcnow()
+        }
+        if status == JobStatus.FAILED:
+            fields.update(owner=None, lease_expires_at=None)
+        try:
+            await JobOutboxDocument.get_motor_collection().update_one({"_id": job.outbox_id}, {"$set": fields})
+        except Exception as e:
+            logger.error(f"Error updating job outbox: {e}")
+
+    # ----------- Outbox tulajdonjog -----------
+
+    async def _claim_orphaned(self) -> int:
+        """
+        Gazdátlan outbox feladatok átvétele egyenként, atomi find_one_and_update-tel
+
+        Gazdátlan: PENDING lease nélkül, vagy lejárt lease-ű (a tartó folyamat
+        leállt / elakadt). Egy élő folyamat feladatait nem vesszük át. Legfeljebb
+        a sor feléig töltünk, hogy a kérésekből jövő feladatoknak maradjon hely.
+        """
+        collection = JobOutboxDocument.get_motor_collection()
+        claimed = 0
+        while self._queue.qsize() < self.maxsize // 2:
+            now = datetime.utcnow()
+            document = await collection.find_one_and_update(
+                {
+                    "status": {"$in": [JobStatus.PENDING.value, JobStatus.RUNNING.value]},
+                    "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lte": now}}],
+                },
+                {"$set": {
+                    "status": JobStatus.RUNNING.value,
+                    "owner": PROCESS_ID,
+                    "lease_expires_at": self._lease_expiry(),
+                    "updated_at": now
+                }},
+                sort=[("created_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if document is None:
+                break
+            await self._queue.put(Job(
+                name=document["name"],
+                payload=document.get("payload", {}),
+                attempts=document.get("attempts", 0),
+                outbox_id=document["_id"]
+            ))
+            claimed += 1
+        return claimed
+
+    async def _maintain_outbox(self) -> None:
+        """Saját feladatok lease-ének megújítása és a más folyamatoktól árván maradt feladatok átvétele"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await JobOutboxDocument.get_motor_collection().update_many(
+                    {"owner": PROCESS_ID, "status": JobStatus.RUNNING.value},
+                    {"$set": {"lease_expires_at": self._lease_expiry()}}
+                )
+                recovered = await self._claim_orphaned()
+                if recovered:
+                    logger.info(f"Recovered {recovered} orphaned jobs from outbox")
+            except Exception as e:
+                logger.error(f"Error maintaining job outbox leases: {e}")
+
+    async def _release_claims(self) -> None:
+        """Leálláskor a le nem futott saját feladatok visszaadása, hogy más azonnal átvehesse"""
+        try:
+            await JobOutboxDocument.get_motor_collection().update_many(
+                {"owner": PROCESS_ID, "status": JobStatus.RUNNING.value},
+                {"$set": {"status": JobStatus.PENDING.value, "owner": None, "lease_expires_at": None}}
+            )
+        except Exception as e:
+            logger.error(f"Error releasing job outbox claims: {e}")
+
+    # ----------- Metrikák -----------
+
+    def metrics(self) -> Dict[str, Any]:
+        """Sor mélység, számlálók és feladatonkénti futásidő (ms)"""
+        def summary(values) -> Dict[str, float]:
+            if not values:
+                return {"count": 0}
+            ordered = sorted(values)
+            return {
+                "count": len(ordered),
+                "avg_ms": round(sum(ordered) / len(ordered), 2),
+                "p50_ms": round(ordered[len(ordered) // 2], 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+                "max_ms": round(ordered[-1], 2),
+            }
+
+        return {
+            "running": self.is_running,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_maxsize": self.maxsize,
+            "pending_retries": len(self._retry_tasks),
+            "outbox_enabled": self.use_outbox,
+            "scheduled": {name: interval for name, _, interval in self._schedules},
+            "counters": dict(self._counters),
+            "queue_wait": summary(self._wait_times),
+            "job_duration": {name: summary(values) for name, values in self._durations.items()},
+        }
+
+
+job_queue = JobQueue(
+    workers=int(os.getenv("JOB_QUEUE_WORKERS", "4")),
+    maxsize=int(os.getenv("JOB_QUEUE_MAXSIZE", "1000")),
+    max_attempts=int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "3")),
+    use_outbox=os.getenv("JOB_QUEUE_OUTBOX", "false").lower() in ("1", "true", "yes"),
+    lease_seconds=float(os.getenv("JOB_QUEUE_LEASE_SECONDS", "300")),
+)
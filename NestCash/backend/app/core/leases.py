@@ -0,0 +1,114 @@
+# app/core/leases.py
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.models.lease import LeaseDocument
+
+# Ennek a folyamatnak az azonosítója (több uvicorn worker / gép esetén egyedi)
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def new_owner_id() -> str:
+    """Egyedi tulajdonos azonosító egy futáshoz (pl. egy újraépítéshez)"""
+    return f"{PROCESS_ID}:{uuid.uuid4().hex[:8]}"
+
+
+async def acquire_lease(name: str, owner: str, ttl_seconds: float) -> bool:
+    """
+    Zár megszerzése vagy megújítása
+
+    Sikeres, ha a zár szabad, lejárt, vagy már ennek a tulajdonosnak a
+    kezében van. Átvételkor a korábbi dirty_keys törlődik, a generation nő
+    (lásd lease_generations).
+    """
+    now = datetime.utcnow()
+    try:
+        await LeaseDocument.get_motor_collection().update_one(
+            {"name": name, "$or": [{"expires_at": {"$lte": now}}, {"owner": owner}]},
+            {
+                "$set": {
+                    "owner": owner,
+                    "expires_at": now + timedelta(seconds=ttl_seconds),
+                    "acquired_at": now,
+                    "dirty_keys": [],
+                },
+                "$inc": {"generation": 1},
+            },
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Más tartja: a szűrő nem illeszkedett, az upsert pedig ütközött a név indexen
+        return False
+
+
+async def renew_lease(name: str, owner: str, ttl_seconds: float) -> bool:
+    """Lejárat kitolása (hosszú futás közben); False, ha már nem ez a tulajdonos"""
+    result = await LeaseDocument.get_motor_collection().update_one(
+        {"name": name, "owner": owner},
+        {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)}}
+    )
+    return result.matched_count == 1
+
+
+async def release_lease(name: str, owner: str, only_if_clean: bool = False) -> bool:
+    """
+    Zár elengedése
+
+    only_if_clean=True esetén csak akkor, ha a zár alatt nem jelöltek
+    módosult kulcsot (különben a tulajdonosnak még dolga van). A dokumentum
+    megmarad (lejárt állapotban), hogy a generation ne vesszen el.
+    """
+    query = {"name": name, "owner": owner}
+    if only_if_clean:
+        query["dirty_keys"] = {"$size": 0}
+    result = await LeaseDocument.get_motor_collection().update_one(
+        query, {"$set": {"expires_at": datetime.utcnow()}}
+    )
+    return result.matched_count == 1
+
+
+async def mark_dirty(names: List[str], key: str) -> bool:
+    """
+    Kulcs jelölése módosultként minden megadott, érvényes záron
+
+    Returns:
+        True, ha legalább egy zár éppen érvényes volt
+    """
+    result = await LeaseDocument.get_motor_collection().update_many(
+        {"name": {"$in": names}, "expires_at": {"$gt": datetime.utcnow()}},
+        {"$addToSet": {"dirty_keys": key}}
+    )
+    return result.matched_count > 0
+
+
+async def take_dirty_keys(name: str, owner: str) -> List[str]:
+    """A zár alatt módosult kulcsok kivétele (a listát kiüríti)"""
+    document = await LeaseDocument.get_motor_collection().find_one_and_update(
+        {"name": name, "owner": owner},
+        {"$set": {"dirty_keys": []}},
+        projection={"dirty_keys": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    return document.get("dirty_keys", []) if document else []
+
+
+async def lease_generations(names: List[str]) -> Dict[str, int]:
+    """
+    A zárak eddigi megszerzéseinek száma (a sosem megszerzett záré 0)
+
+    Egy művelet előtt és után lekérve kiderül, hogy közben megszerezte-e
+    valaki a zárat, akkor is, ha azóta már el is engedte.
+    """
+    generations = {name: 0 for name in names}
+    async for lease in LeaseDocument.get_motor_collection().find(
+        {"name": {"$in": names}}, {"name": 1, "generation": 1}
+    ):
+        generations[lease["name"]] = lease.get("generation", 0)
+    return generations
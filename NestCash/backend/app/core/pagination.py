@@ -0,0 +1,83 @@
+# app/core/pagination.py
+import base64
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import json_util
+from fastapi import HTTPException
+
+# Rendezési specifikáció: [(mező, irány), ...]; az utolsó elem egyedi (pl. _id),
+# így a sorrend teljes és a lapozás nem ugrik át / nem ismétel elemet
+SortSpec = Sequence[Tuple[str, int]]
+
+# Becsült darabszámnál eddig számolunk pontosan, fölötte ennyit adunk vissza
+COUNT_ESTIMATE_CAP = 10000
+
+
+class TotalMode(str, Enum):
+    EXACT = "exact"          # Pontos count() (alapértelmezett, a korábbi viselkedés)
+    ESTIMATE = "estimate"    # Legfeljebb COUNT_ESTIMATE_CAP-ig számolt alsó becslés
+    NONE = "none"            # Nincs számolás, total_count = -1
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Átlátszatlan lapozási token az utolsó elem rendezési értékeiből"""
+    return base64.urlsafe_b64encode(json_util.dumps(list(values)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> List[Any]:
+    """Token visszafejtése a rendezési értékek listájára; hibás token esetén 400"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            raise ValueError("cursor payload must be a list")
+        return values
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_filter(sort: SortSpec, values: Optional[Sequence[Any]]) -> Dict[str, Any]:
+    """Az utolsó elem utáni rekordok szűrője a megadott rendezéshez"""
+    if not values:
+        return {}
+    if len(values) != len(sort):
+        raise HTTPException(status_code=400, detail="Pagination cursor does not match sort order")
+
+    branches = []
+    for index, (field, direction) in enumerate(sort):
+        branch = {prefix_field: values[i] for i, (prefix_field, _) in enumerate(sort[:index])}
+        branch[field] = {"$lt" if direction < 0 else "$gt": values[index]}
+        branches.append(branch)
+    return {"$or": branches}
+
+
+def with_keyset(query_filter: Dict[str, Any], sort: SortSpec, after: Optional[str]) -> Dict[str, Any]:
+    """Szűrő kiegészítése az after token feltételével (a meglévő $or-t nem írja felül)"""
+    if not after:
+        return query_filter
+    condition = keyset_filter(sort, decode_cursor(after))
+    return {"$and": [query_filter, condition]} if query_filter else condition
+
+
+def next_cursor(items: Sequence[Any], sort: SortSpec, has_more: bool) -> Optional[str]:
+    """Token a következő oldalhoz az utolsó elemből (Beanie dokumentum vagy dict)"""
+    if not has_more or not items:
+        return None
+    last = items[-1]
+    values = []
+    for field, _ in sort:
+        if isinstance(last, dict):
+            values.append(last[field])
+        else:
+            values.append(last.id if field == "_id" else getattr(last, field))
+    return encode_cursor(values)
+
+
+async def count_total(document_cls, query_filter: Dict[str, Any], mode: TotalMode = TotalMode.EXACT) -> int:
+    """Találatok száma a kért pontossággal"""
+    if mode == TotalMode.NONE:
+        return -1
+    if mode == TotalMode.ESTIMATE:
+        return await document_cls.get_motor_collection().count_documents(query_filter, limit=COUNT_ESTIMATE_CAP)
+    return await document_cls.find(query_filter).count()
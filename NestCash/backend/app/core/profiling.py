@@ -0,0 +1,200 @@
+# app/core/profiling.py
+import os
+import json
+import time
+import logging
+import threading
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import bson
+from pymongo import monitoring
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: kikapcsolva se middleware, se Mongo listener nem fut
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Ha meg van adva, leálláskor ide íródik a JSON riport
+PROFILING_REPORT_PATH = os.getenv("PROFILING_REPORT_PATH")
+# Egy kérésen belül ennyiszer ismétlődő (parancs, kollekció) pár N+1 gyanús
+N_PLUS_ONE_THRESHOLD = int(os.getenv("PROFILING_N_PLUS_ONE_THRESHOLD", "10"))
+
+_SAMPLE_SIZE = 500
+
+
+@dataclass
+class RequestProfile:
+    """Egy kérés adatbázis használata (a Mongo listener tölti)"""
+    db_calls: int = 0
+    db_time_ms: float = 0.0
+    documents: int = 0
+    bytes: int = 0
+    commands: Counter = field(default_factory=Counter)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def _reply_documents(reply: Dict[str, Any]) -> int:
+    """A válaszban visszaadott dokumentumok száma (find/getMore/aggregate batch, egyébként n)"""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if "value" in reply:  # findAndModify
+        return 1 if reply["value"] is not None else 0
+    return int(reply.get("n", 0) or 0)
+
+
+class ProfilingCommandListener(monitoring.CommandListener):
+    """
+    Mongo parancsok hozzárendelése az aktuális kéréshez
+
+    A Motor a contextvars kontextust átviszi a végrehajtó szálra, így a
+    listener a kéréshez tartozó RequestProfile-t látja. A bájtszám a
+    dekódolt válasz újrakódolt mérete (közelítés, csak profilozáskor fut).
+    Egy kérés párhuzamos lekérdezései több szálról írnak, ezért zárral.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        profile = _current_profile.get()
+        if profile is not None:
+            collection = event.command.get(event.command_name)
+            target = collection if isinstance(collection, str) else event.database_name
+            with self._lock:
+                profile.commands[f"{event.command_name}:{target}"] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        profile = _current_profile.get()
+        if profile is None:
+            return
+        documents = _reply_documents(event.reply)
+        size = len(bson.encode(event.reply))
+        with self._lock:
+            profile.db_calls += 1
+            profile.db_time_ms += event.duration_micros / 1000
+            profile.documents += documents
+            profile.bytes += size
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        profile = _current_profile.get()
+        if profile is not None:
+            with self._lock:
+                profile.db_calls += 1
+                profile.db_time_ms += event.duration_micros / 1000
+
+
+class PerfRegistry:
+    """Route-onkénti összesítés: kérésszám, futásidő, DB round trip, dokumentum, bájt, N+1 gyanú"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._started_at = datetime.utcnow()
+        self._routes: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+            "requests": 0,
+            "errors": 0,
+            "wall_ms": deque(maxlen=_SAMPLE_SIZE),
+            "db_calls_total": 0,
+            "db_calls_max": 0,
+            "db_time_ms_total": 0.0,
+            "documents_total": 0,
+            "bytes_total": 0,
+            "n_plus_one_requests": 0,
+            "commands": Counter(),
+        })
+
+    def record(self, route: str, status_code: int, wall_ms: float, profile: RequestProfile) -> None:
+        stats = self._routes[route]
+        stats["requests"] += 1
+        if status_code >= 500:
+            stats["errors"] += 1
+        stats["wall_ms"].append(wall_ms)
+        stats["db_calls_total"] += profile.db_calls
+        stats["db_calls_max"] = max(stats["db_calls_max"], profile.db_calls)
+        stats["db_time_ms_total"] += profile.db_time_ms
+        stats["documents_total"] += profile.documents
+        stats["bytes_total"] += profile.bytes
+        stats["commands"].update(profile.commands)
+        if any(count >= N_PLUS_ONE_THRESHOLD for count in profile.commands.values()):
+            stats["n_plus_one_requests"] += 1
+
+    def report(self) -> Dict[str, Any]:
+        """JSON-ként exportálható riport, a legtöbb DB round trip-et igénylő route-tal kezdve"""
+        def summary(values) -> Dict[str, float]:
+            if not values:
+                return {"count": 0}
+            ordered = sorted(values)
+            return {
+                "count": len(ordered),
+                "avg_ms": round(sum(ordered) / len(ordered), 2),
+                "p50_ms": round(ordered[len(ordered) // 2], 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+                "max_ms": round(ordered[-1], 2),
+            }
+
+        routes = []
+        for route, stats in self._routes.items():
+            requests = stats["requests"]
+            routes.append({
+                "route": route,
+                "requests": requests,
+                "errors": stats["errors"],
+                "wall_time": summary(stats["wall_ms"]),
+                "db_calls_avg": round(stats["db_calls_total"] / requests, 2),
+                "db_calls_max": stats["db_calls_max"],
+                "db_time_ms_avg": round(stats["db_time_ms_total"] / requests, 2),
+                "documents_avg": round(stats["documents_total"] / requests, 1),
+                "bytes_avg": round(stats["bytes_total"] / requests),
+                "n_plus_one_requests": stats["n_plus_one_requests"],
+                "top_commands": [
+                    {"command": command, "per_request": round(count / requests, 2)}
+                    for command, count in stats["commands"].most_common(5)
+                ],
+            })
+        routes.sort(key=lambda item: item["db_calls_avg"], reverse=True)
+
+        return {
+            "enabled": PROFILING_ENABLED,
+            "since": self._started_at.isoformat(),
+            "generated_at": datetime.utcnow().isoformat(),
+            "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+            "routes": routes,
+        }
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as report_file:
+            json.dump(self.report(), report_file, ensure_ascii=False, indent=2)
+        logger.info(f"Performance report written to {path}")
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """Kérésenkénti mérés; a route a sablon útvonal (pl. /forum/posts/{post_id}), nem a konkrét URL"""
+
+    async def dispatch(self, request: Request, call_next):
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            wall_ms = (time.perf_counter() - start) * 1000
+            _current_profile.reset(token)
+            route = request.scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            perf_registry.record(f"{request.method} {path}", status_code, wall_ms, profile)
+
+
+perf_registry = PerfRegistry()
+profiling_listener = ProfilingCommandListener()
@@ -7,6 +7,7 @@ from bson import ObjectId
 
 from app.models.user import User
 from app.core.db import get_db
+from app.core.user_cache import user_cache
 
 SECRET_KEY = "your-super-secret-key"
 ALGORITHM = "HS256"
@@ -27,16 +28,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_d
     except JWTError:
         raise credentials_exception
 
+    # Gyakori eset: a felhasználó a cache-ben van, nincs DB körút
+    cached_user = user_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
+
     user_data = await db["users"].find_one({"_id": ObjectId(user_id)})
     if user_data is None:
         raise credentials_exception
 
     # MongoDB dokumentum átalakítása Pydantic modellé
     # Make sure to convert ObjectId to string and store it as id (not _id)
-    return User(
+    user = User(
         id=str(user_data["_id"]),  # Use 'id' instead of '_id'
         username=user_data["username"],
         email=user_data["email"],
         mobile=user_data.get("mobile"),
         registration_date=user_data.get("registration_date"),
-    )
\ No newline at end of file
+    )
+    user_cache.set(user_id, user)
+    return user
@@ -0,0 +1,85 @@
+# app/core/user_cache.py
+import os
+import time
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# A hitelesített felhasználó (principal) ennyi ideig szolgálható ki DB nélkül;
+# több worker esetén a más folyamatban történt profil módosítás legfeljebb
+# ennyi ideig lehet elavult. 0 = kikapcsolva
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+
+class UserCache:
+    """
+    Folyamaton belüli LRU + TTL cache a get_current_user által felépített
+    User objektumokhoz, a token `sub` mezője (user id) szerint kulcsolva.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_size: int = USER_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, user_id: str) -> Optional[User]:
+        """Érvényes bejegyzés vagy None (a találat a lista végére kerül)"""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self._counters["expired"] += 1
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self._counters["hits"] += 1
+        return user
+
+    def set(self, user_id: str, user: User) -> None:
+        if not self.enabled:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Egy felhasználó (pl. profil módosítás után) vagy a teljes cache törlése"""
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(str(user_id), None)
+        self._counters["invalidations"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Találati arány és számlálók a kérések hitelesítéséhez"""
+        hits = self._counters["hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "max_size": self.max_size,
+            "size": len(self._entries),
+            "lookups": lookups,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "counters": dict(self._counters),
+        }
+
+
+user_cache = UserCache()
@@ -2,6 +2,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.db import init_db
+from app.core.job_queue import job_queue
+from app.core.profiling import PROFILING_ENABLED, PROFILING_REPORT_PATH, ProfilingMiddleware, perf_registry
+from app.services.challenge_service import CHALLENGE_PROGRESS_INTERVAL_SECONDS
 from app.routes import auth
 from app.routes import transactions
 from app.routes import accounts
@@ -21,6 +24,8 @@ from app.routes import challenges
 from app.routes import badges
 from app.routes import badge_admin
 from app.routes import habits
+from app.routes import jobs
+from app.routes import perf
 
 app = FastAPI(
     title="NestCash API",
@@ -37,6 +42,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Kérésenkénti profilozás (PROFILING_ENABLED=true), riport: GET /_perf
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Router-ek hozzáadása
 app.include_router(auth.router)
 app.include_router(transactions.router)
@@ -55,11 +64,21 @@ app.include_router(challenges.router)
 app.include_router(badges.router)
 app.include_router(badge_admin.router)
 app.include_router(habits.router)
+app.include_router(jobs.router)
+if PROFILING_ENABLED:
+    app.include_router(perf.router)
 
 @app.on_event("startup")
 async def startup_event():
     await init_db()
 
+    # Egyedi like index (a korábbi duplikátumok eltávolítása után); hiba esetén az app elindul
+    try:
+        from app.services.forum_interaction_service import ForumInteractionService
+        await ForumInteractionService.ensure_unique_like_index()
+    except Exception as e:
+        print(f"Unique like index migration failed: {e}")
+
     # Badge rendszer inicializálása
     try:
         from app.services.badge_init import initialize_badge_system
@@ -67,6 +86,28 @@ async def startup_event():
     except Exception as e:
         print(f"Badge system initialization failed: {e}")
 
+    # Háttérfeladat-sor indítása (tranzakció utáni mellékhatások, időszakos feladatok)
+    if CHALLENGE_PROGRESS_INTERVAL_SECONDS > 0:
+        job_queue.schedule("challenges.recompute_progress", {}, CHALLENGE_PROGRESS_INTERVAL_SECONDS)
+    await job_queue.start()
+
+    # Felhasználó kereső index feltöltése a háttérben, ha még nem történt meg
+    # (addig a keresés a users kollekción fut)
+    try:
+        await job_queue.enqueue("user_search.backfill", {})
+    except Exception as e:
+        print(f"User search backfill scheduling failed: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+
+    if PROFILING_ENABLED and PROFILING_REPORT_PATH:
+        try:
+            perf_registry.write_report(PROFILING_REPORT_PATH)
+        except Exception as e:
+            print(f"Writing performance report failed: {e}")
+
 @app.get("/")
 async def root():
     return {
@@ -2,6 +2,7 @@ from __future__ import annotations
 from beanie import Document
 from pydantic import BaseModel, Field, computed_field
 from typing import Dict, Optional
+from pymongo import IndexModel
 
 class SubAccountDetails(BaseModel):
     balance: float
@@ -36,4 +37,24 @@ class AllUserAccountsDocument(Document):
     accounts_by_user: Dict[str, UserAccounts] = Field(default_factory=dict, alias="accounts")
 
     class Settings:
-        name = "accounts"
\ No newline at end of file
+        name = "accounts"
+
+class UserAccountsDocument(Document):
+    """Felhasználónkénti számla dokumentum (per_user tárolási mód)"""
+    user_id: str = Field(..., description="Felhasználó ID")
+    likvid: AccountDetails = Field(default_factory=AccountDetails)
+    befektetes: AccountDetails = Field(default_factory=AccountDetails)
+    megtakaritas: AccountDetails = Field(default_factory=AccountDetails)
+
+    def to_user_accounts(self) -> UserAccounts:
+        return UserAccounts(
+            likvid=self.likvid,
+            befektetes=self.befektetes,
+            megtakaritas=self.megtakaritas,
+        )
+
+    class Settings:
+        name = "user_accounts"
+        indexes = [
+            IndexModel([("user_id", 1)], unique=True),
+        ]
@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
+from pymongo import IndexModel
 
 class BadgeCategory(str, Enum):
     TRANSACTION = "transaction"  # Tranzakció alapú
@@ -114,6 +115,28 @@ class BadgeProgress(Document):
             [("user_id", 1), ("badge_code", 1), ("progress_percentage", -1)]
         ]
 
+class UserBadgeCounters(Document):
+    """Felhasználónkénti futó számlálók a badge feltételek O(1) ellenőrzéséhez"""
+    
+    user_id: PydanticObjectId = Field(..., description="Felhasználó ID")
+    transaction_count: int = Field(default=0, description="Összes tranzakció száma")
+    total_spent: float = Field(default=0.0, description="Összes kiadás (abszolút érték)")
+    saved_by_account: Dict[str, float] = Field(default_factory=dict, description="Befizetések főszámlánként")
+    post_count: int = Field(default=0, description="Fórum posztok száma")
+    version: int = Field(default=0, description="Minden írás növeli; az újraépítés ezzel ellenőrzi, hogy közben nem változott")
+    initialized: bool = Field(default=True, description="False: a dokumentumot egy $inc hozta létre, még nincs újraépítve")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    @property
+    def total_saved(self) -> float:
+        return self.saved_by_account.get("megtakaritas", 0.0)
+    
+    class Settings:
+        name = "user_badge_counters"
+        indexes = [
+            IndexModel([("user_id", 1)], unique=True)
+        ]
+
 # Response modellek
 class BadgeTypeRead(BaseModel):
     id: str
@@ -96,7 +96,8 @@ class ChallengeDocument(Document):
             "created_at",
             "participant_count",
             [("challenge_type", 1), ("difficulty", 1)],
-            [("status", 1), ("created_at", -1)]
+            [("status", 1), ("created_at", -1)],
+            [("status", 1), ("created_at", -1), ("_id", -1)]  # Keyset lapozás
         ]
 
 # === USER CHALLENGE PARTICIPATION ===
@@ -116,6 +117,7 @@ class UserChallengeDocument(Document):
     
     # Haladás követés
     progress: ChallengeProgress = Field(..., description="Haladás adatok")
+    progress_calculated_at: Optional[datetime] = Field(None, description="A haladás utolsó újraszámításának ideje")
     daily_progress: Dict[str, float] = Field(default_factory=dict, description="Napi haladás {YYYY-MM-DD: érték}")
     
     # Személyes célok és beállítások
@@ -139,7 +141,8 @@ class UserChallengeDocument(Document):
             "joined_at",
             [("user_id", 1), ("status", 1)],
             [("challenge_id", 1), ("status", 1)],
-            [("user_id", 1), ("challenge_id", 1)]  # Unique constraint
+            [("user_id", 1), ("challenge_id", 1)],  # Unique constraint
+            [("user_id", 1), ("joined_at", -1), ("_id", -1)]  # Keyset lapozás
         ]
 
 # === PYDANTIC SCHEMAS ===
@@ -198,6 +201,7 @@ class ChallengeListResponse(BaseModel):
     total_count: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # Következő oldal tokenje (after paraméter)
 
 # User Challenge schemas
 class UserChallengeJoin(BaseModel):
@@ -236,4 +240,5 @@ class UserChallengeListResponse(BaseModel):
     user_challenges: List[UserChallengeRead]
     total_count: int
     skip: int
-    limit: int
\ No newline at end of file
+    limit: int
+    next_cursor: Optional[str] = None  # Következő oldal tokenje (after paraméter)
\ No newline at end of file
@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import List, Optional, Dict
 from pydantic import BaseModel, Field
 from beanie import Document, PydanticObjectId
+from pymongo import IndexModel, TEXT
 from enum import Enum
 
 class PrivacyLevel(str, Enum):
@@ -50,6 +51,18 @@ class ForumPostDocument(Document):
     
     class Settings:
         name = "forum_posts"
+        indexes = [
+            [("user_id", 1), ("created_at", -1), ("_id", -1)],  # Szerzőnkénti idővonal (hybrid pull)
+            [("created_at", -1), ("_id", -1)],  # Keyset lapozás (newest)
+            [("like_count", -1), ("created_at", -1), ("_id", -1)],  # Keyset lapozás (popular)
+            [("comment_count", -1), ("created_at", -1), ("_id", -1)],  # Keyset lapozás (most_commented)
+            IndexModel(
+                [("title", TEXT), ("content", TEXT)],
+                weights={"title": 3, "content": 1},
+                default_language="hungarian",  # Magyar szótövezés; a v3 text index ékezet-érzéketlen
+                name="post_text_search"
+            ),
+        ]
 
 # === COMMENT DOCUMENT ===
 class CommentDocument(Document):
@@ -62,6 +75,9 @@ class CommentDocument(Document):
     
     class Settings:
         name = "forum_comments"
+        indexes = [
+            [("post_id", 1), ("created_at", 1)],
+        ]
 
 # === LIKE DOCUMENT ===
 class LikeDocument(Document):
@@ -72,6 +88,14 @@ class LikeDocument(Document):
     
     class Settings:
         name = "forum_likes"
+        # Az egyedi (post_id, user_id) indexet (egy felhasználó egy posztot csak
+        # egyszer like-olhat, az atomikus toggle alapja) nem az init_beanie hozza
+        # létre, hanem induláskor a ForumInteractionService.ensure_unique_like_index,
+        # a korábbi duplikátumok eltávolítása után
+        indexes = [
+            [("post_id", 1), ("created_at", -1)],
+            [("user_id", 1), ("post_id", 1)],
+        ]
 
 # === FOLLOW DOCUMENT ===
 class FollowDocument(Document):
@@ -83,6 +107,30 @@ class FollowDocument(Document):
     
     class Settings:
         name = "forum_follows"
+        indexes = [
+            [("follower_id", 1), ("following_id", 1)],
+            [("following_id", 1), ("follower_id", 1)],  # Fan-out: egy szerző követői
+        ]
+
+# === TIMELINE ENTRY DOCUMENT ===
+class ForumTimelineEntry(Document):
+    """Előre kiszámolt követési feed bejegyzés (fan-out on write)"""
+    owner_id: PydanticObjectId   # Kinek a feedjében jelenik meg
+    post_id: PydanticObjectId
+    author_id: PydanticObjectId
+    category: PostCategory
+    created_at: datetime         # A poszt létrehozási ideje (rendezési kulcs)
+    updated_at: Optional[datetime] = None  # Utolsó írás (a rebuild ez alapján takarít)
+    
+    class Settings:
+        name = "forum_timelines"
+        indexes = [
+            IndexModel([("owner_id", 1), ("post_id", 1)], unique=True),
+            [("owner_id", 1), ("created_at", -1), ("post_id", -1)],
+            [("owner_id", 1), ("category", 1), ("created_at", -1), ("post_id", -1)],
+            [("post_id", 1)],
+            [("owner_id", 1), ("author_id", 1)],
+        ]
 
 # === NOTIFICATION DOCUMENT ===
 class NotificationDocument(Document):
@@ -146,6 +194,7 @@ class PostListResponse(BaseModel):
     total_count: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # Következő oldal (after paraméter), ha van
 
 class CommentCreate(BaseModel):
     content: str = Field(..., min_length=1, max_length=1000)
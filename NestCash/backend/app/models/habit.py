@@ -44,6 +44,7 @@ class Habit(Document):
     streak_count: int = Field(default=0, description="Jelenlegi sorozat")
     best_streak: int = Field(default=0, description="Legjobb sorozat")
     last_completed: Optional[str] = Field(None, description="Utoljára teljesítve (YYYY-MM-DD)")
+    streak_run_start: Optional[str] = Field(None, description="A last_completed napon végződő sorozat első napja (YYYY-MM-DD)")
     
     # Timestampek
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -129,6 +130,7 @@ class HabitLog(Document):
             "habit_id",
             "date",
             [("user_id", 1), ("habit_id", 1), ("date", -1)],
+            [("habit_id", 1), ("completed", 1), ("date", 1)],  # Streak karbantartás
             [("user_id", 1), ("date", -1)]
         ]
 
@@ -0,0 +1,31 @@
+# app/models/job.py
+from beanie import Document
+from pydantic import Field
+from typing import Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+
+class JobStatus(str, Enum):
+    PENDING = "pending"    # Senki nem dolgozik rajta, bármelyik folyamat átveheti
+    RUNNING = "running"    # Egy folyamat sorában van (owner), lease_expires_at-ig
+    FAILED = "failed"
+
+class JobOutboxDocument(Document):
+    """Háttérfeladat tartós tárolása (outbox), hogy újraindítás után se vesszen el"""
+    name: str = Field(..., description="Feladat neve (regisztrált handler)")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="Feladat paraméterei")
+    status: JobStatus = Field(default=JobStatus.PENDING)
+    attempts: int = Field(default=0, description="Eddigi próbálkozások száma")
+    last_error: Optional[str] = None
+    owner: Optional[str] = Field(None, description="A feladatot tartó folyamat (app.core.leases.PROCESS_ID)")
+    lease_expires_at: Optional[datetime] = Field(None, description="Lejárat után más folyamat átveheti")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "job_outbox"
+        indexes = [
+            [("status", 1), ("created_at", 1)],
+            [("status", 1), ("lease_expires_at", 1)],
+            [("owner", 1), ("status", 1)],
+        ]
@@ -49,6 +49,9 @@ class Lesson(Document):
 
     class Settings:
         name = "lessons"
+        indexes = [
+            [("category_id", 1), ("is_published", 1), ("order", 1)],  # Katalógus $lookup
+        ]
 
 class KnowledgeCategory(Document):
     name: str = Field(..., description="Kategória neve")
@@ -97,6 +100,10 @@ class UserProgress(Document):
 
     class Settings:
         name = "user_progress"
+        indexes = [
+            "user_id",
+            [("total_lessons_completed", -1)],  # Admin top felhasználók
+        ]
 
 # Response modellek
 class LessonSummary(BaseModel):
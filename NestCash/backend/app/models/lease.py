@@ -0,0 +1,21 @@
+# app/models/lease.py
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from typing import List
+from datetime import datetime
+
+class LeaseDocument(Document):
+    """Lejáró, folyamatok között közös zár (egyszerre egy tulajdonos, lejárat után átvehető)"""
+    name: str = Field(..., description="A zár neve (pl. rollup_rebuild:all)")
+    owner: str = Field(..., description="A zárat tartó folyamat / futás azonosítója")
+    expires_at: datetime = Field(..., description="Eddig érvényes; utána más átveheti")
+    acquired_at: datetime = Field(default_factory=datetime.utcnow)
+    dirty_keys: List[str] = Field(default_factory=list, description="A zár alatt módosult kulcsok (pl. user_id-k)")
+    generation: int = Field(default=0, description="Hányszor szerezték meg a zárat (elengedéskor megmarad)")
+
+    class Settings:
+        name = "leases"
+        indexes = [
+            IndexModel([("name", 1)], unique=True),
+        ]
@@ -3,7 +3,14 @@ from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field
 from beanie import Document, PydanticObjectId
+from pymongo import IndexModel
 from enum import Enum
+import os
+
+# Lejárt értesítések kezelése:
+#   "cleanup" - a /notifications/cleanup/expired végpont (pl. cronjobból) törli őket
+#   "ttl"     - TTL index az expires_at mezőn, a MongoDB maga törli őket
+NOTIFICATION_EXPIRY_MODE = os.getenv("NOTIFICATION_EXPIRY_MODE", "cleanup").lower()
 
 class NotificationType(str, Enum):
     TRANSACTION_ADDED = "transaction_added"
@@ -53,7 +60,10 @@ class NotificationDocument(Document):
             "type",
             "priority",
             [("user_id", 1), ("is_read", 1), ("created_at", -1)],  # Összetett index
-        ]
+            [("user_id", 1), ("expires_at", 1), ("is_read", 1)],  # Aktív/olvasatlan statisztikákhoz
+            [("user_id", 1), ("created_at", -1), ("_id", -1)],  # Keyset lapozás
+        ] + ([IndexModel([("expires_at", 1)], expireAfterSeconds=0, name="expires_at_ttl")]
+             if NOTIFICATION_EXPIRY_MODE == "ttl" else [])
 
 # Response modellek
 class NotificationRead(BaseModel):
@@ -101,6 +111,7 @@ class NotificationListResponse(BaseModel):
     unread_count: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # Következő oldal tokenje (after paraméter)
 
 class NotificationStats(BaseModel):
     total_count: int
@@ -0,0 +1,19 @@
+# app/models/seed_state.py
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from typing import Optional
+from datetime import datetime
+
+class SeedStateDocument(Document):
+    """Induláskori adatfeltöltés állapota (definíciók hash-e, utoljára feldolgozott pont)"""
+    name: str = Field(..., description="A feltöltés neve (pl. badge_types)")
+    content_hash: Optional[str] = Field(None, description="A legutóbb alkalmazott definíciók hash-e")
+    cursor: Optional[datetime] = Field(None, description="Eddig az időpontig feldolgozva (inkrementális feltöltésnél)")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "seed_state"
+        indexes = [
+            IndexModel([("name", 1)], unique=True),
+        ]
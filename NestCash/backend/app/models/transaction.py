@@ -155,6 +155,7 @@ class Transaction(Document):
             "honap",
             "het",
             [("user_id", 1), ("date", -1)],  # Kompozit index
+            [("user_id", 1), ("date", -1), ("_id", -1)],  # Keyset lapozás
             [("user_id", 1), ("honap", 1)],   # Havi lekérdezésekhez
             [("user_id", 1), ("kategoria", 1)],  # Kategória szerinti lekérdezésekhez
         ]
\ No newline at end of file
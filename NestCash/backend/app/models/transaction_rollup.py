@@ -0,0 +1,30 @@
+# app/models/transaction_rollup.py
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from typing import Optional
+from datetime import datetime
+from pymongo import IndexModel
+
+class TransactionMonthlyRollup(Document):
+    """Tranzakciók havi összesítője felhasználónként, kategóriánként és alszámlánként"""
+    user_id: PydanticObjectId
+    honap: str = Field(..., description="Hónap (YYYY-MM)")
+    kategoria: Optional[str] = Field(None, description="Kategória")
+    main_account: str = Field(..., description="Főszámla")
+    sub_account_name: str = Field(..., description="Alszámla neve")
+
+    income_total: float = Field(default=0.0, description="Bevételek összege")
+    expense_total: float = Field(default=0.0, description="Kiadások összege (abszolút érték)")
+    income_count: int = Field(default=0, description="Bevételi tranzakciók száma")
+    expense_count: int = Field(default=0, description="Kiadási tranzakciók száma")
+    transaction_count: int = Field(default=0, description="Összes tranzakció száma")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "transaction_monthly_rollups"
+        indexes = [
+            IndexModel(
+                [("user_id", 1), ("honap", 1), ("kategoria", 1), ("main_account", 1), ("sub_account_name", 1)],
+                unique=True
+            ),
+        ]
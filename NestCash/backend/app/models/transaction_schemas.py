@@ -132,6 +132,7 @@ class TransactionListResponse(BaseModel):
     skip: int
     limit: int
     has_more: Optional[bool] = None
+    next_cursor: Optional[str] = None  # Következő oldal tokenje (after paraméter)
     
     def __init__(self, **data):
         super().__init__(**data)
@@ -139,6 +140,20 @@ class TransactionListResponse(BaseModel):
         if self.has_more is None:
             self.has_more = (self.skip + len(self.transactions)) < self.total_count
 
+class TransactionImportError(BaseModel):
+    """Import során elutasított sor"""
+    line: int   # Sorszám a feltöltött fájlban (1-től, CSV-nél a fejléc az 1. sor)
+    error: str
+
+class TransactionImportResult(BaseModel):
+    """Tömeges import eredménye"""
+    imported: int
+    failed: int
+    batches: int
+    errors: List[TransactionImportError] = []  # Legfeljebb az első 100 hiba
+    elapsed_ms: float
+    rows_per_second: Optional[float] = None
+
 class TransactionSummary(BaseModel):
     """Tranzakció összesítő séma"""
     total_income: float
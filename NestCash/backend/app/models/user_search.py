@@ -0,0 +1,21 @@
+# app/models/user_search.py
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel
+from typing import List
+from datetime import datetime
+
+class UserSearchEntry(Document):
+    """Felhasználó kereső index bejegyzés (normalizált prefix és trigram tokenek)"""
+    user_id: PydanticObjectId = Field(..., description="A felhasználó ID-ja")
+    username: str = Field(..., description="Megjelenített felhasználónév")
+    username_normalized: str = Field(..., description="Kisbetűs, ékezet nélküli felhasználónév (rendezés, ellenőrzés)")
+    tokens: List[str] = Field(default_factory=list, description="p:<prefix> és t:<trigram> tokenek")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "user_search_index"
+        indexes = [
+            IndexModel([("user_id", 1)], unique=True),
+            [("tokens", 1), ("username_normalized", 1)],
+        ]
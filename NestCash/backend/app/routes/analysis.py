@@ -6,14 +6,21 @@ from collections import defaultdict, Counter
 import calendar
 from statistics import mean
 from bson import ObjectId
+import os
 
 from app.models.transaction import Transaction
 from app.models.user import User
-from app.models.account import AllUserAccountsDocument
+from app.services.account_service import AccountService
+from app.services.analysis_service import AnalysisService
+from app.services.rollup_service import RollupService
 from app.core.security import get_current_user
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
+# "pipeline" = MongoDB $facet aggregáció (alapértelmezett),
+# "python" = tranzakciók betöltése és Python-os számítás (referencia implementáció)
+ANALYSIS_ENGINE = os.getenv("ANALYSIS_ENGINE", "pipeline")
+
 # Pydantic modellek az elemzési eredményekhez
 from pydantic import BaseModel
 
@@ -83,29 +90,45 @@ async def get_comprehensive_analysis(
         end_date = datetime.now()
         start_date = end_date - timedelta(days=months_back * 30)
         
-        # Tranzakciók lekérése
-        transactions = await Transaction.find({
-            "user_id": ObjectId(current_user.id),
-            "date": {"$gte": start_date.strftime("%Y-%m-%d"), "$lte": end_date.strftime("%Y-%m-%d")}
-        }).to_list()
-        
-        if not transactions:
-            raise HTTPException(status_code=404, detail="Nincs elegendő tranzakció az elemzéshez")
+        if ANALYSIS_ENGINE == "pipeline":
+            # Minden részösszeg egyetlen aggregációval
+            facets = await AnalysisService.aggregate(
+                current_user.id, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+            )
+            if not facets["totals"]:
+                raise HTTPException(status_code=404, detail="Nincs elegendő tranzakció az elemzéshez")
 
-        # 1. Alapvető statisztikák
-        basic_stats = await _calculate_basic_stats(transactions)
-        
-        # 2. Cashflow elemzés
-        cashflow_analysis = await _analyze_cashflow(transactions)
-        
-        # 3. Kategória elemzés
-        category_analysis = await _analyze_categories(transactions)
-        
-        # 4. Időbeli elemzés
-        time_analysis = await _analyze_time_patterns(transactions)
-        
-        # 5. Kockázatelemzés
-        risk_analysis = await _analyze_risk(transactions, current_user.id)
+            basic_stats = _basic_stats_from_facets(facets)
+            cashflow_analysis = _cashflow_from_facets(facets)
+            category_analysis = _categories_from_facets(facets)
+            time_analysis = _time_patterns_from_facets(facets)
+            risk_analysis = await _analyze_risk_from_totals(
+                basic_stats.total_income, basic_stats.total_expense, current_user.id
+            )
+        else:
+            # Tranzakciók lekérése
+            transactions = await Transaction.find({
+                "user_id": ObjectId(current_user.id),
+                "date": {"$gte": start_date.strftime("%Y-%m-%d"), "$lte": end_date.strftime("%Y-%m-%d")}
+            }).to_list()
+
+            if not transactions:
+                raise HTTPException(status_code=404, detail="Nincs elegendő tranzakció az elemzéshez")
+
+            # 1. Alapvető statisztikák
+            basic_stats = await _calculate_basic_stats(transactions)
+
+            # 2. Cashflow elemzés
+            cashflow_analysis = await _analyze_cashflow(transactions)
+
+            # 3. Kategória elemzés
+            category_analysis = await _analyze_categories(transactions)
+
+            # 4. Időbeli elemzés
+            time_analysis = await _analyze_time_patterns(transactions)
+
+            # 5. Kockázatelemzés
+            risk_analysis = await _analyze_risk(transactions, current_user.id)
         
         # 6. Ajánlások generálása
         recommendations = await _generate_recommendations(
@@ -210,23 +233,23 @@ async def _analyze_cashflow(transactions: List[Transaction]) -> CashflowAnalysis
             net=data["income"] - data["expense"]
         ))
     
-    # Trend meghatározása
+    return CashflowAnalysis(
+        monthly_trends=monthly_trends,
+        weekly_trends=weekly_trends,
+        overall_trend=_overall_trend(monthly_trends)
+    )
+
+def _overall_trend(monthly_trends: List[CashflowTrend]) -> str:
+    """Trend meghatározása az utolsó 3 hónap nettó egyenlege alapján"""
     if len(monthly_trends) >= 3:
         recent_nets = [t.net for t in monthly_trends[-3:]]
         if all(recent_nets[i] <= recent_nets[i+1] for i in range(len(recent_nets)-1)):
-            trend = "növekvő"
+            return "növekvő"
         elif all(recent_nets[i] >= recent_nets[i+1] for i in range(len(recent_nets)-1)):
-            trend = "csökkenő"
+            return "csökkenő"
         else:
-            trend = "stabil"
-    else:
-        trend = "stabil"
-    
-    return CashflowAnalysis(
-        monthly_trends=monthly_trends,
-        weekly_trends=weekly_trends,
-        overall_trend=trend
-    )
+            return "stabil"
+    return "stabil"
 
 async def _analyze_categories(transactions: List[Transaction]) -> CategoryAnalysis:
     """Kategória elemzés"""
@@ -241,6 +264,10 @@ async def _analyze_categories(transactions: List[Transaction]) -> CategoryAnalys
         else:
             category_data[cat]["expense"] += abs(t.amount)
     
+    return _category_analysis_from_data(category_data)
+
+def _category_analysis_from_data(category_data: Dict[str, Dict[str, float]]) -> CategoryAnalysis:
+    """Kategória elemzés a kategóriánkénti bevétel/kiadás/darabszám összesítésből"""
     # Top 3 kiadási kategória
     expense_categories = [(cat, data["expense"]) for cat, data in category_data.items() if data["expense"] > 0]
     expense_categories.sort(key=lambda x: x[1], reverse=True)
@@ -311,15 +338,17 @@ async def _analyze_risk(transactions: List[Transaction], user_id: str) -> RiskAn
     # Alapadatok
     total_income = sum(t.amount for t in transactions if t.amount > 0)
     total_expense = sum(abs(t.amount) for t in transactions if t.amount < 0)
-    
+    return await _analyze_risk_from_totals(total_income, total_expense, user_id)
+
+async def _analyze_risk_from_totals(total_income: float, total_expense: float, user_id: str) -> RiskAnalysis:
+    """Kockázatelemzés az összesített bevétel/kiadás alapján"""
     # Számla egyenlegek lekérése
     emergency_fund = 0.0
     debt_amount = 0.0
     
     try:
-        all_accounts_doc = await AllUserAccountsDocument.find_one()
-        if all_accounts_doc and user_id in all_accounts_doc.accounts_by_user:
-            user_accounts = all_accounts_doc.accounts_by_user[user_id]
+        user_accounts = await AccountService.get_user_accounts(user_id)
+        if user_accounts:
             
             # Vészhelyzeti alap (megtakarítások)
             if hasattr(user_accounts, 'megtakaritas'):
@@ -382,6 +411,99 @@ async def _analyze_risk(transactions: List[Transaction], user_id: str) -> RiskAn
         risk_level=risk_level
     )
 
+# ----------- Aggregációs ($facet) eredmények átalakítása -----------
+# Ugyanazokat a modelleket adják vissza, mint a fenti Python-os függvények.
+
+def _weekday_name(mongo_day_of_week: int) -> str:
+    """MongoDB $dayOfWeek (1 = vasárnap) -> calendar.day_name"""
+    return calendar.day_name[(mongo_day_of_week + 5) % 7]
+
+def _basic_stats_from_facets(facets: Dict[str, Any]) -> BasicStats:
+    """Alapvető statisztikák az aggregáció eredményéből"""
+    if not facets["totals"]:
+        return BasicStats(
+            total_income=0, total_expense=0, net_balance=0,
+            daily_avg_expense=0, monthly_avg_expense=0,
+            most_active_day="Hétfő", most_active_hour=12, transaction_count=0
+        )
+
+    totals = facets["totals"][0]
+    total_income = totals["total_income"]
+    total_expense = totals["total_expense"]
+
+    days_in_period = (datetime.strptime(totals["max_date"], "%Y-%m-%d") -
+                     datetime.strptime(totals["min_date"], "%Y-%m-%d")).days + 1
+    daily_avg_expense = total_expense / max(days_in_period, 1)
+
+    weekday_counts = facets["weekday_counts"]
+    hour_counts = facets["hour_counts"]
+
+    return BasicStats(
+        total_income=total_income,
+        total_expense=total_expense,
+        net_balance=total_income - total_expense,
+        daily_avg_expense=daily_avg_expense,
+        monthly_avg_expense=daily_avg_expense * 30,
+        most_active_day=_weekday_name(weekday_counts[0]["_id"]) if weekday_counts else "Hétfő",
+        most_active_hour=hour_counts[0]["_id"] if hour_counts else 12,
+        transaction_count=totals["count"]
+    )
+
+def _cashflow_from_facets(facets: Dict[str, Any]) -> CashflowAnalysis:
+    """Cashflow elemzés az aggregáció eredményéből"""
+    monthly_trends = [
+        CashflowTrend(period=row["_id"], income=row["income"], expense=row["expense"],
+                      net=row["income"] - row["expense"])
+        for row in facets.get("monthly", [])
+    ]
+    weekly_trends = [
+        CashflowTrend(period=row["_id"], income=row["income"], expense=row["expense"],
+                      net=row["income"] - row["expense"])
+        for row in facets.get("weekly", [])
+    ]
+
+    return CashflowAnalysis(
+        monthly_trends=monthly_trends,
+        weekly_trends=weekly_trends,
+        overall_trend=_overall_trend(monthly_trends)
+    )
+
+def _categories_from_facets(facets: Dict[str, Any]) -> CategoryAnalysis:
+    """Kategória elemzés az aggregáció eredményéből"""
+    category_data = {
+        row["_id"]: {"income": row["income"], "expense": row["expense"], "count": row["count"]}
+        for row in facets.get("categories", [])
+    }
+    return _category_analysis_from_data(category_data)
+
+def _time_patterns_from_facets(facets: Dict[str, Any]) -> TimeAnalysis:
+    """Időbeli minták az aggregáció eredményéből"""
+    weekday_expenses = {
+        _weekday_name(row["_id"]): row["expense"] for row in facets.get("expense_by_weekday", [])
+    }
+    by_weekday = {day: weekday_expenses.get(day, 0) for day in calendar.day_name}
+    by_hour = {row["_id"]: row["count"] for row in facets.get("expense_by_hour", [])}
+
+    peak_spending_day = max(by_weekday.items(), key=lambda x: x[1])[0] if by_weekday else "Hétfő"
+    peak_spending_hour = max(by_hour.items(), key=lambda x: x[1])[0] if by_hour else 12
+
+    return TimeAnalysis(
+        by_weekday=by_weekday,
+        by_hour=by_hour,
+        peak_spending_day=peak_spending_day,
+        peak_spending_hour=peak_spending_hour
+    )
+
+def _period_bounds(months_back: int) -> tuple:
+    """Elemzési időszak (kezdet, vég) YYYY-MM-DD formátumban"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=months_back * 30)
+    return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+
+async def _load_facets(user_id: str, months_back: int) -> Dict[str, Any]:
+    start_date, end_date = _period_bounds(months_back)
+    return await AnalysisService.aggregate(user_id, start_date, end_date)
+
 async def _generate_recommendations(
     basic_stats: BasicStats,
     cashflow_analysis: CashflowAnalysis,
@@ -445,6 +567,9 @@ async def get_basic_stats(
     months_back: int = Query(6, ge=1, le=24)
 ):
     """Alapvető statisztikák lekérése"""
+    if ANALYSIS_ENGINE == "pipeline":
+        return _basic_stats_from_facets(await _load_facets(current_user.id, months_back))
+
     end_date = datetime.now()
     start_date = end_date - timedelta(days=months_back * 30)
     
@@ -461,6 +586,12 @@ async def get_risk_analysis(
     months_back: int = Query(12, ge=1, le=24)
 ):
     """Kockázatelemzés lekérése"""
+    if ANALYSIS_ENGINE == "pipeline":
+        # Csak összegek kellenek: havi összesítőből
+        start_date, end_date = _period_bounds(months_back)
+        totals = await RollupService.get_total(current_user.id, start_date, end_date)
+        return await _analyze_risk_from_totals(totals["income"], totals["expense"], current_user.id)
+
     end_date = datetime.now()
     start_date = end_date - timedelta(days=months_back * 30)
     
@@ -477,6 +608,20 @@ async def get_category_analysis(
     months_back: int = Query(6, ge=1, le=24)
 ):
     """Kategóriaelemzés lekérése"""
+    if ANALYSIS_ENGINE == "pipeline":
+        # Kategóriánkénti összegek a havi összesítőből
+        start_date, end_date = _period_bounds(months_back)
+        totals = await RollupService.get_totals(
+            current_user.id, start_date, end_date, group_by_category=True
+        )
+        category_data = defaultdict(lambda: {"income": 0, "expense": 0, "count": 0})
+        for cat, row in totals.items():
+            data = category_data[cat or "Egyéb"]
+            data["income"] += row["income"]
+            data["expense"] += row["expense"]
+            data["count"] += row["count"]
+        return _category_analysis_from_data(category_data)
+
     end_date = datetime.now()
     start_date = end_date - timedelta(days=months_back * 30)
     
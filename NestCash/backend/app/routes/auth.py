@@ -7,6 +7,8 @@ from bson import ObjectId
 
 from app.services.auth import authenticate_user, create_access_token
 from app.core.security import get_current_user
+from app.core.user_cache import user_cache
+from app.services.user_search_service import UserSearchService
 from app.models.user import User
 from app.models.reg import RegisterRequest
 from app.core.db import get_db
@@ -35,6 +37,11 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user.dict()
 
+@router.get("/cache-metrics")
+async def get_user_cache_metrics(current_user: User = Depends(get_current_user)):
+    """Hitelesítési user cache találati aránya és számlálói"""
+    return user_cache.metrics()
+
 @router.post("/register", status_code=201)
 async def register_user(
     data: RegisterRequest,
@@ -59,6 +66,7 @@ async def register_user(
             "registration_date": str(datetime.now()),
         }
     )
+    await UserSearchService.index_user(result.inserted_id, data.username, data.email)
 
     return {
         "id": str(result.inserted_id),
@@ -120,5 +128,16 @@ async def update_profile(
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+
+    # A cache-elt User objektum elavult (név, email, mobil)
+    user_cache.invalidate(current_user.id)
+    
+    # Név vagy email változásnál a kereső index bejegyzés is
+    if "username" in update_data or "email" in update_data:
+        await UserSearchService.index_user(
+            current_user_obj_id,
+            update_data.get("username", current_user.username),
+            update_data.get("email", current_user.email)
+        )
     
     return {"message": "Profile updated successfully", "updated_fields": list(update_data.keys())}
\ No newline at end of file
@@ -73,6 +73,7 @@ async def create_badge_type(
         
         new_badge_type = BadgeType(**badge_data.model_dump())
         await new_badge_type.insert()
+        badge_service.invalidate_catalogue()
         
         return BadgeTypeRead(
             id=str(new_badge_type.id),
@@ -117,6 +118,7 @@ async def update_badge_type(
         from datetime import datetime
         badge_type.updated_at = datetime.utcnow()
         await badge_type.save()
+        badge_service.invalidate_catalogue()
         
         return BadgeTypeRead(
             id=str(badge_type.id),
@@ -161,6 +163,7 @@ async def delete_badge_type(
             )
         
         await badge_type.delete()
+        badge_service.invalidate_catalogue()
         return {"message": "Badge típus sikeresen törölve"}
     except HTTPException:
         raise
@@ -11,6 +11,7 @@ from app.models.badge_schemas import (
     BadgeCategoryStats, BadgeLeaderboardResponse
 )
 from app.services.badge_service import badge_service
+from app.services.badge_leaderboard import badge_leaderboard_service
 
 router = APIRouter(prefix="/badges", tags=["badges"])
 
@@ -254,83 +255,36 @@ async def get_badge_leaderboard(
     current_user: User = Depends(get_current_user),
     limit: int = Query(10, ge=1, le=50, description="Leaderboard mérete")
 ):
-    """Badge leaderboard lekérése"""
+    """Badge leaderboard lekérése (időszakosan frissített pillanatképből)"""
     try:
-        from app.models.badge import UserBadge, BadgeType
-        from app.models.user import UserDocument
+        data = await badge_leaderboard_service.get_leaderboard(current_user.id, limit)
         
-        # Összes felhasználó badge-einek aggregálása
-        pipeline = [
-            {
-                "$group": {
-                    "_id": "$user_id",
-                    "total_badges": {"$sum": 1},
-                    "recent_badge": {"$last": "$$ROOT"}
-                }
-            },
-            {"$sort": {"total_badges": -1}},
-            {"$limit": limit}
-        ]
-        
-        # Egyszerűsített leaderboard - ezt ki lehetne bővíteni
-        user_badges = await UserBadge.find({}).to_list()
-        user_stats = {}
-        
-        for badge in user_badges:
-            user_id = str(badge.user_id)
-            if user_id not in user_stats:
-                user_stats[user_id] = {
-                    "total_badges": 0,
-                    "total_points": 0,
-                    "recent_badge": badge
-                }
-            user_stats[user_id]["total_badges"] += 1
-            if badge.earned_at > user_stats[user_id]["recent_badge"].earned_at:
-                user_stats[user_id]["recent_badge"] = badge
-        
-        # Rendezés badge szám szerint
-        sorted_users = sorted(user_stats.items(), 
-                             key=lambda x: x[1]["total_badges"], 
-                             reverse=True)[:limit]
-        
-        # Felhasználó adatok lekérése
-        user_ids = [user_id for user_id, _ in sorted_users]
-        users = await UserDocument.find({"_id": {"$in": [PydanticObjectId(uid) for uid in user_ids]}}).to_list()
-        user_dict = {str(user.id): user for user in users}
-        
-        # Leaderboard összeállítása
         leaderboard = []
-        user_rank = None
-        
-        for rank, (user_id, stats) in enumerate(sorted_users, 1):
-            user = user_dict.get(user_id)
-            if user:
-                if user_id == current_user.id:
-                    user_rank = rank
-                
-                leaderboard.append({
-                    "rank": rank,
-                    "user_id": user_id,
-                    "username": user.username,
-                    "total_badges": stats["total_badges"],
-                    "total_points": stats["total_points"],
-                    "recent_badge": UserBadgeRead(
-                        id=str(stats["recent_badge"].id),
-                        user_id=str(stats["recent_badge"].user_id),
-                        badge_code=stats["recent_badge"].badge_code,
-                        earned_at=stats["recent_badge"].earned_at,
-                        level=stats["recent_badge"].level,
-                        progress=stats["recent_badge"].progress,
-                        context_data=stats["recent_badge"].context_data,
-                        is_favorite=stats["recent_badge"].is_favorite,
-                        is_visible=stats["recent_badge"].is_visible
-                    ) if stats["recent_badge"] else None
-                })
+        for entry in data["leaderboard"]:
+            recent_badge = entry["recent_badge"]
+            leaderboard.append({
+                "rank": entry["rank"],
+                "user_id": entry["user_id"],
+                "username": entry["username"],
+                "total_badges": entry["total_badges"],
+                "total_points": entry["total_points"],
+                "recent_badge": UserBadgeRead(
+                    id=str(recent_badge["_id"]),
+                    user_id=str(recent_badge["user_id"]),
+                    badge_code=recent_badge["badge_code"],
+                    earned_at=recent_badge["earned_at"],
+                    level=recent_badge.get("level", 1),
+                    progress=recent_badge.get("progress", 100.0),
+                    context_data=recent_badge.get("context_data", {}),
+                    is_favorite=recent_badge.get("is_favorite", False),
+                    is_visible=recent_badge.get("is_visible", True)
+                ) if recent_badge else None
+            })
         
         return BadgeLeaderboardResponse(
             leaderboard=leaderboard,
-            user_rank=user_rank,
-            total_users=len(user_stats)
+            user_rank=data["user_rank"],
+            total_users=data["total_users"]
         )
         
     except Exception as e:
@@ -17,6 +17,7 @@ from app.models.challenge import (
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.challenge_service import ChallengeService
+from app.core.pagination import TotalMode, with_keyset, next_cursor, count_total
 
 router = APIRouter(prefix="/challenges", tags=["challenges"])
 logger = logging.getLogger(__name__)
@@ -31,7 +32,9 @@ async def list_challenges(
     difficulty: Optional[ChallengeDifficulty] = Query(None, description="Nehézség szerinti szűrés"),
     search: Optional[str] = Query(None, description="Keresés címben és leírásban"),
     only_available: bool = Query(True, description="Csak elérhető kihívások"),
-    sort_by: str = Query("newest", description="Rendezés: newest, popular, difficulty")
+    sort_by: str = Query("newest", description="Rendezés: newest, popular, difficulty"),
+    after: Optional[str] = Query(None, description="Lapozási token (előző válasz next_cursor mezője); ilyenkor a skip nem számít"),
+    total: TotalMode = Query(TotalMode.EXACT, description="total_count számítása: exact, estimate vagy none")
 ):
     """Kihívások listázása szűrési és rendezési lehetőségekkel"""
     try:
@@ -59,23 +62,29 @@ async def list_challenges(
             ]
         
         # Rendezés
+        # (_id a végén: egyértelmű sorrend a keyset lapozáshoz)
         if sort_by == "popular":
-            sort_criteria = [("participant_count", -1), ("created_at", -1)]
+            sort_criteria = [("participant_count", -1), ("created_at", -1), ("_id", -1)]
         elif sort_by == "difficulty":
             # Nehézség szerinti rendezés: easy, medium, hard, expert
             difficulty_order = {"easy": 1, "medium": 2, "hard": 3, "expert": 4}
-            sort_criteria = [("difficulty", 1), ("created_at", -1)]
+            sort_criteria = [("difficulty", 1), ("created_at", -1), ("_id", -1)]
         else:  # newest
-            sort_criteria = [("created_at", -1)]
+            sort_criteria = [("created_at", -1), ("_id", -1)]
         
-        # Lekérdezés végrehajtása
-        total_count = await ChallengeDocument.find(query_filter).count()
+        if after:
+            skip = 0
         
-        challenges_query = ChallengeDocument.find(query_filter)
-        for field, direction in sort_criteria:
-            challenges_query = challenges_query.sort([(field, direction)])
+        # Lekérdezés végrehajtása
+        total_count = await count_total(ChallengeDocument, query_filter, total)
         
-        challenges = await challenges_query.skip(skip).limit(limit).to_list()
+        challenges = await ChallengeDocument.find(with_keyset(query_filter, sort_criteria, after))\
+            .sort(sort_criteria)\
+            .skip(skip)\
+            .limit(limit + 1)\
+            .to_list()
+        has_more = len(challenges) > limit
+        challenges = challenges[:limit]
         
         # Felhasználó részvételének ellenőrzése
         challenge_ids = [challenge.id for challenge in challenges]
@@ -126,9 +135,12 @@ async def list_challenges(
             challenges=challenge_reads,
             total_count=total_count,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(challenges, sort_criteria, has_more)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing challenges: {e}")
         raise HTTPException(status_code=500, detail="Failed to list challenges")
@@ -372,7 +384,9 @@ async def list_my_challenges(
     limit: int = Query(20, ge=1, le=100),
     skip: int = Query(0, ge=0),
     status: Optional[ParticipationStatus] = Query(None, description="Státusz szerinti szűrés"),
-    challenge_type: Optional[ChallengeType] = Query(None, description="Típus szerinti szűrés")
+    challenge_type: Optional[ChallengeType] = Query(None, description="Típus szerinti szűrés"),
+    after: Optional[str] = Query(None, description="Lapozási token (előző válasz next_cursor mezője); ilyenkor a skip nem számít"),
+    total: TotalMode = Query(TotalMode.EXACT, description="total_count számítása: exact, estimate vagy none")
 ):
     """Felhasználó saját kihívásainak listája"""
     try:
@@ -383,13 +397,27 @@ async def list_my_challenges(
         if status:
             query_filter["status"] = status
         
+        # Típus szűrés a lekérdezésben, hogy a lapozás és a darabszám is stimmeljen
+        if challenge_type:
+            typed_challenge_ids = await ChallengeDocument.get_motor_collection().distinct(
+                "_id", {"challenge_type": challenge_type}
+            )
+            query_filter["challenge_id"] = {"$in": typed_challenge_ids}
+        
+        sort_criteria = [("joined_at", -1), ("_id", -1)]
+        if after:
+            skip = 0
+        
         # Lekérdezés
-        total_count = await UserChallengeDocument.find(query_filter).count()
-        user_challenges = await UserChallengeDocument.find(query_filter)\
-            .sort([("joined_at", -1)])\
+        total_count = await count_total(UserChallengeDocument, query_filter, total)
+        user_challenges = await UserChallengeDocument.find(with_keyset(query_filter, sort_criteria, after))\
+            .sort(sort_criteria)\
             .skip(skip)\
-            .limit(limit)\
+            .limit(limit + 1)\
             .to_list()
+        has_more = len(user_challenges) > limit
+        user_challenges = user_challenges[:limit]
+        cursor_token = next_cursor(user_challenges, sort_criteria, has_more)
         
         # Kihívás adatok lekérése
         challenge_ids = [uc.challenge_id for uc in user_challenges]
@@ -401,13 +429,6 @@ async def list_my_challenges(
         
         challenge_map = {str(c.id): c for c in challenges}
         
-        # Típus szűrés (ha meg van adva)
-        if challenge_type:
-            user_challenges = [
-                uc for uc in user_challenges 
-                if challenge_map.get(str(uc.challenge_id), {}).challenge_type == challenge_type
-            ]
-        
         # Válasz összeállítása
         user_challenge_reads = []
         for uc in user_challenges:
@@ -450,11 +471,14 @@ async def list_my_challenges(
         
         return UserChallengeListResponse(
             user_challenges=user_challenge_reads,
-            total_count=len(user_challenge_reads),
+            total_count=total_count,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=cursor_token
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing user challenges: {e}")
         raise HTTPException(status_code=500, detail="Failed to list user challenges")
@@ -555,10 +579,13 @@ async def update_challenge_progress(
         if not challenge:
             raise HTTPException(status_code=404, detail="Challenge not found")
         
-        # Haladás újraszámítása
-        updated_progress = await ChallengeService.calculate_challenge_progress(
-            current_user.id, challenge, participation
-        )
+        # Az ütemezett újraszámítás eredménye; ha nincs vagy túl régi, helyben számolunk
+        updated_progress = ChallengeService.precomputed_progress(challenge, participation)
+        if updated_progress is None:
+            updated_progress = await ChallengeService.calculate_challenge_progress(
+                current_user.id, challenge, participation
+            )
+            participation.progress_calculated_at = datetime.utcnow()
         
         participation.progress = updated_progress
         participation.updated_at = datetime.utcnow()
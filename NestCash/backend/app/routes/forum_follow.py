@@ -13,6 +13,8 @@ from app.models.user import UserDocument
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.forum_service import ForumService
+from app.services.forum_timeline_service import ForumTimelineService
+from app.services.user_search_service import UserSearchService
 
 router = APIRouter(prefix="/forum/follow", tags=["forum-follow"])
 logger = logging.getLogger(__name__)
@@ -26,48 +28,26 @@ async def search_users(
     skip: int = Query(0, ge=0)
 ):
     try:
-        # Keresés username és email alapján
-        search_filter = {
-            "$or": [
-                {"username": {"$regex": q, "$options": "i"}},
-                {"email": {"$regex": q, "$options": "i"}}
-            ],
-            "_id": {"$ne": ObjectId(current_user.id)}  # Saját magat ne jelenítse meg
-        }
-        
-        # Felhasználók lekérdezése
-        total_count = await UserDocument.find(search_filter).count()
-        users = await UserDocument.find(search_filter)\
-            .sort("username")\
-            .skip(skip)\
-            .limit(limit)\
-            .to_list()
-        
-        # Követési állapotok ellenőrzése
-        user_ids = [user.id for user in users]
-        
-        # Kik azok, akiket követünk
-        following = await FollowDocument.find({
-            "follower_id": ObjectId(current_user.id),
-            "following_id": {"$in": user_ids}
-        }).to_list()
-        following_ids = {follow.following_id for follow in following}
+        # Keresés a kereső indexben: felhasználónév prefix / részsztring, email prefix
+        # (saját magát nem jeleníti meg)
+        entries, total_count = await UserSearchService.search(
+            q, exclude_user_id=current_user.id, skip=skip, limit=limit
+        )
         
-        # Kik azok, akik minket követnek
-        followers = await FollowDocument.find({
-            "following_id": ObjectId(current_user.id),
-            "follower_id": {"$in": user_ids}
-        }).to_list()
-        follower_ids = {follow.follower_id for follow in followers}
+        # Követési állapotok egyetlen lekérdezéssel
+        follow_states = await ForumService().get_follow_states(
+            current_user.id, [entry["user_id"] for entry in entries]
+        )
         
         # Válasz összeállítása
         user_results = []
-        for user in users:
+        for entry in entries:
+            is_following, is_followed_by = follow_states[entry["user_id"]]
             user_results.append(UserSearch(
-                id=str(user.id),
-                username=user.username,
-                is_following=user.id in following_ids,
-                is_followed_by=user.id in follower_ids
+                id=str(entry["user_id"]),
+                username=entry["username"],
+                is_following=is_following,
+                is_followed_by=is_followed_by
             ))
         
         return UserSearchResponse(
@@ -116,6 +96,7 @@ async def follow_user(
             following_username=target_user.username
         )
         await new_follow.insert()
+        await ForumTimelineService.on_follow(current_user.id, user_id)
         
         # Értesítés küldése
         forum_service = ForumService()
@@ -161,6 +142,7 @@ async def unfollow_user(
         
         # Követés törlése
         await follow_relationship.delete()
+        await ForumTimelineService.on_unfollow(current_user.id, user_id)
         
         return {
             "message": "User unfollowed successfully",
@@ -2,7 +2,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional, List
 from beanie import PydanticObjectId
-from bson import ObjectId
 import logging
 from datetime import datetime
 
@@ -14,6 +13,7 @@ from app.models.forum_models import (
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.forum_service import ForumService
+from app.services.forum_interaction_service import ForumInteractionService
 
 router = APIRouter(prefix="/forum", tags=["forum-interactions"])
 logger = logging.getLogger(__name__)
@@ -39,51 +39,26 @@ async def toggle_like(
         if not await forum_service.can_user_see_post(current_user.id, post):
             raise HTTPException(status_code=403, detail="Not authorized to like this post")
         
-        # Ellenőrizzük, hogy már like-olta-e
-        existing_like = await LikeDocument.find_one({
-            "user_id": ObjectId(current_user.id),
-            "post_id": oid
-        })
+        # Atomikus toggle: egyedi (post_id, user_id) index + upsert, $inc a számlálón
+        is_liked, like_count = await ForumInteractionService.toggle_like(
+            oid, current_user.id, current_user.username
+        )
         
-        if existing_like:
-            # Like eltávolítása
-            await existing_like.delete()
-            post.like_count = max(0, post.like_count - 1)
-            await post.save()
-            
-            return {
-                "message": "Like removed",
-                "is_liked": False,
-                "like_count": post.like_count
-            }
-        else:
-            # Like hozzáadása
-            new_like = LikeDocument(
-                post_id=oid,
-                user_id=PydanticObjectId(current_user.id),
-                username=current_user.username
+        if is_liked:
+            # Értesítés a háttérsoron (ha nem saját poszt)
+            await ForumInteractionService.enqueue_notification(
+                post,
+                from_user_id=current_user.id,
+                from_username=current_user.username,
+                notification_type=NotificationType.LIKE,
+                message=f"{current_user.username} liked your post: {post.title[:50]}..."
             )
-            await new_like.insert()
-            
-            post.like_count += 1
-            await post.save()
-            
-            # Értesítés küldése (ha nem saját poszt)
-            if str(post.user_id) != current_user.id:
-                await forum_service.create_notification(
-                    user_id=str(post.user_id),
-                    from_user_id=current_user.id,
-                    from_username=current_user.username,
-                    notification_type=NotificationType.LIKE,
-                    post_id=str(post.id),
-                    message=f"{current_user.username} liked your post: {post.title[:50]}..."
-                )
-            
-            return {
-                "message": "Post liked",
-                "is_liked": True,
-                "like_count": post.like_count
-            }
+        
+        return {
+            "message": "Post liked" if is_liked else "Like removed",
+            "is_liked": is_liked,
+            "like_count": like_count
+        }
             
     except HTTPException:
         raise
@@ -176,22 +151,17 @@ async def create_comment(
             username=current_user.username,
             content=comment_data.content
         )
-        await new_comment.insert()
-        
-        # Poszt komment számának frissítése
-        post.comment_count += 1
-        await post.save()
+        # Beszúrás + a poszt komment számának atomikus növelése
+        await ForumInteractionService.add_comment(new_comment)
         
-        # Értesítés küldése (ha nem saját poszt)
-        if str(post.user_id) != current_user.id:
-            await forum_service.create_notification(
-                user_id=str(post.user_id),
-                from_user_id=current_user.id,
-                from_username=current_user.username,
-                notification_type=NotificationType.COMMENT,
-                post_id=str(post.id),
-                message=f"{current_user.username} commented on your post: {post.title[:50]}..."
-            )
+        # Értesítés a háttérsoron (ha nem saját poszt)
+        await ForumInteractionService.enqueue_notification(
+            post,
+            from_user_id=current_user.id,
+            from_username=current_user.username,
+            notification_type=NotificationType.COMMENT,
+            message=f"{current_user.username} commented on your post: {post.title[:50]}..."
+        )
         
         return CommentRead(
             id=str(new_comment.id),
@@ -222,23 +192,13 @@ async def delete_comment(
         raise HTTPException(status_code=400, detail="Invalid comment ID")
     
     try:
-        comment = await CommentDocument.get(oid)
-        if not comment:
+        # Csak saját komment törölhető; törlés és számláló csökkentés atomikusan
+        deleted = await ForumInteractionService.delete_comment(oid, current_user.id)
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Comment not found")
-        
-        # Csak saját komment törölhető
-        if str(comment.user_id) != current_user.id:
+        if not deleted:
             raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
         
-        # Poszt komment számának csökkentése
-        post = await ForumPostDocument.get(comment.post_id)
-        if post:
-            post.comment_count = max(0, post.comment_count - 1)
-            await post.save()
-        
-        # Komment törlése
-        await comment.delete()
-        
         return {"message": "Comment deleted successfully"}
         
     except HTTPException:
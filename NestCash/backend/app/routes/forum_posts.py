@@ -14,6 +14,13 @@ from app.models.forum_models import (
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.forum_service import ForumService
+from app.services.badge_service import badge_service
+from app.services.forum_timeline_service import ForumTimelineService, FORUM_FEED_MODE
+from app.services.forum_search_service import ForumSearchService, forum_search_index
+from app.core.job_queue import job_queue
+from app.core.pagination import (
+    TotalMode, encode_cursor, decode_cursor, with_keyset, next_cursor, count_total
+)
 
 router = APIRouter(prefix="/forum/posts", tags=["forum-posts"])
 logger = logging.getLogger(__name__)
@@ -38,6 +45,19 @@ async def create_post(
         )
         
         await new_post.insert()
+        await badge_service.apply_post_counter(current_user.id, 1)
+        await ForumTimelineService.add_post(new_post)
+        forum_search_index.index_post(new_post)
+        
+        # Közösségi badge-ek ellenőrzése háttérfeladatként
+        try:
+            await job_queue.enqueue("badges.check", {
+                "user_id": current_user.id,
+                "trigger_event": "forum_post_created",
+                "context": {"post_id": str(new_post.id)}
+            })
+        except Exception as e:
+            logger.error(f"Failed to enqueue badge check: {e}")
         
         return PostRead(
             id=str(new_post.id),
@@ -58,6 +78,62 @@ async def create_post(
         logger.error(f"Error creating post: {e}")
         raise HTTPException(status_code=500, detail="Failed to create post")
 
+# === KÖVETÉSI FEED IDŐVONALBÓL ===
+async def _list_timeline_posts(
+    current_user: User,
+    limit: int,
+    skip: int,
+    category: Optional[PostCategory],
+    after: Optional[str],
+    total: TotalMode
+) -> PostListResponse:
+    """Követési feed az idővonal kollekcióból; az after token megadásakor keyset lapozás (skip nélkül)"""
+    cursor = decode_cursor(after) if after else None
+    if cursor:
+        skip = 0
+    
+    posts, has_more = await ForumTimelineService.get_feed(
+        current_user.id, limit, skip=skip, cursor=cursor, category=category
+    )
+    
+    # Az idővonal és a behúzott nagy követőszámú szerzők posztjai együtt
+    total_count = await ForumTimelineService.count_feed(current_user.id, category, total)
+    
+    user_likes = []
+    if posts:
+        user_likes = await LikeDocument.find({
+            "user_id": ObjectId(current_user.id),
+            "post_id": {"$in": [post.id for post in posts]}
+        }).to_list()
+    liked_post_ids = {like.post_id for like in user_likes}
+    
+    read_posts = [
+        PostRead(
+            id=str(post.id),
+            user_id=str(post.user_id),
+            username=post.username or "Ismeretlen",
+            title=post.title or "",
+            content=post.content or "",
+            category=post.category,
+            privacy_level=post.privacy_level,
+            created_at=post.created_at,
+            updated_at=post.updated_at,
+            like_count=post.like_count or 0,
+            comment_count=post.comment_count or 0,
+            is_liked_by_me=post.id in liked_post_ids,
+            is_my_post=str(post.user_id) == current_user.id
+        )
+        for post in posts
+    ]
+    
+    return PostListResponse(
+        posts=read_posts,
+        total_count=total_count,
+        skip=skip,
+        limit=limit,
+        next_cursor=encode_cursor([posts[-1].created_at, posts[-1].id]) if has_more and posts else None
+    )
+
 # === POSZTOK LISTÁZÁSA ===
 @router.get("/", response_model=PostListResponse)
 async def list_posts(
@@ -67,9 +143,16 @@ async def list_posts(
     category: Optional[PostCategory] = Query(None),
     feed_type: FeedType = Query(FeedType.ALL),
     sort_by: SortBy = Query(SortBy.NEWEST),
-    search: Optional[str] = Query(None, description="Keresés címben és tartalomban")
+    search: Optional[str] = Query(None, description="Keresés címben és tartalomban (relevancia szerint rendezve)"),
+    after: Optional[str] = Query(None, description="Lapozási token (előző válasz next_cursor mezője); ilyenkor a skip nem számít"),
+    total: TotalMode = Query(TotalMode.EXACT, description="total_count számítása: exact, estimate vagy none")
 ):
     try:
+        # Követési feed az előre kiszámolt idővonalból
+        if (FORUM_FEED_MODE == "timeline" and feed_type == FeedType.FOLLOWING
+                and sort_by == SortBy.NEWEST and not search):
+            return await _list_timeline_posts(current_user, limit, skip, category, after, total)
+        
         # Alapszűrő építése
         query_filter = {}
         
@@ -105,33 +188,41 @@ async def list_posts(
                 # Alapértelmezett: csak publikus posztok
                 query_filter["privacy_level"] = "public"
         
-        # Keresés
-        if search:
-            query_filter["$or"] = [
-                {"title": {"$regex": search, "$options": "i"}},
-                {"content": {"$regex": search, "$options": "i"}}
-            ]
-        
         # Rendezés - JAVÍTÁS: helyes MongoDB rendezési formátum
+        # (_id a végén: egyértelmű sorrend a keyset lapozáshoz)
         if sort_by == SortBy.NEWEST:
-            sort_criteria = [("created_at", -1)]
+            sort_criteria = [("created_at", -1), ("_id", -1)]
         elif sort_by == SortBy.POPULAR:
-            sort_criteria = [("like_count", -1), ("created_at", -1)]
+            sort_criteria = [("like_count", -1), ("created_at", -1), ("_id", -1)]
         elif sort_by == SortBy.MOST_COMMENTED:
-            sort_criteria = [("comment_count", -1), ("created_at", -1)]
+            sort_criteria = [("comment_count", -1), ("created_at", -1), ("_id", -1)]
         else:
-            sort_criteria = [("created_at", -1)]  # alapértelmezett
+            sort_criteria = [("created_at", -1), ("_id", -1)]  # alapértelmezett
+        
+        if after:
+            if search:
+                raise HTTPException(status_code=400, detail="Cursor pagination is not supported with search; use skip")
+            skip = 0
         
         # Lekérdezés végrehajtása
         try:
-            total_count = await ForumPostDocument.find(query_filter).count()
-            
-            posts_query = ForumPostDocument.find(query_filter)
-            for field, direction in sort_criteria:
-                posts_query = posts_query.sort([(field, direction)])
-            
-            posts = await posts_query.skip(skip).limit(limit).to_list()
+            if search:
+                # Szöveges keresés relevancia szerint, a fenti (láthatósági) szűrőkkel együtt
+                posts, total_count = await ForumSearchService.search_posts(search, query_filter, skip, limit)
+                has_more = False
+            else:
+                total_count = await count_total(ForumPostDocument, query_filter, total)
+                
+                posts = await ForumPostDocument.find(with_keyset(query_filter, sort_criteria, after))\
+                    .sort(sort_criteria)\
+                    .skip(skip)\
+                    .limit(limit + 1)\
+                    .to_list()
+                has_more = len(posts) > limit
+                posts = posts[:limit]
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error executing database query: {e}")
             # Visszatérés üres eredménnyel hiba esetén
@@ -183,9 +274,12 @@ async def list_posts(
             posts=read_posts,
             total_count=total_count,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(posts, sort_criteria, has_more)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing posts: {e}")
         # JAVÍTÁS: részletesebb hibaüzenet a logban
@@ -266,10 +360,16 @@ async def update_post(
         # Frissítés
         update_data = post_data.model_dump(exclude_unset=True)
         if update_data:
+            previous_visibility = (post.category, post.privacy_level)
             update_data["updated_at"] = datetime.utcnow()
             for key, value in update_data.items():
                 setattr(post, key, value)
             await post.save()
+            forum_search_index.index_post(post)
+            
+            # Idővonalak frissítése, ha a kategória vagy a láthatóság változott
+            if (post.category, post.privacy_level) != previous_visibility:
+                await ForumTimelineService.update_post(post)
         
         # Like ellenőrzése a válaszhoz
         user_like = await LikeDocument.find_one({
@@ -325,6 +425,9 @@ async def delete_post(
         
         # Poszt törlése
         await post.delete()
+        await badge_service.apply_post_counter(current_user.id, -1)
+        await ForumTimelineService.remove_post(oid)
+        forum_search_index.remove_post(oid)
         
         return {"message": "Post deleted successfully"}
         
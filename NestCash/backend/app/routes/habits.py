@@ -1,6 +1,6 @@
 # app/routes/habits.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from typing import Dict, List, Optional
 from beanie import PydanticObjectId
 from datetime import datetime
 import logging
@@ -14,7 +14,7 @@ from app.models.habit_schemas import (
     HabitStatsResponse, UserHabitOverview, PredefinedHabitResponse,
     HabitBulkCreate, HabitBulkCreateResponse
 )
-from app.services.habit_service import HabitService
+from app.services.habit_service import HabitService, HabitPeriodCounts
 from app.services.badge_service import badge_service
 
 router = APIRouter(prefix="/habits", tags=["habits"])
@@ -102,10 +102,11 @@ async def get_habits(
         active_count = sum(1 for h in all_habits if h.is_active)
         archived_count = len(all_habits) - active_count
         
-        # Konvertálás HabitRead objektumokká
+        # Konvertálás HabitRead objektumokká (a mai/heti/havi számlálók egy aggregációval)
+        period_counts = await HabitService.get_period_counts(current_user.id, [habit.id for habit in habits])
         habit_reads = []
         for habit in habits:
-            habit_read = await _convert_habit_to_read(habit, current_user.id)
+            habit_read = await _convert_habit_to_read(habit, current_user.id, period_counts)
             habit_reads.append(habit_read)
         
         return HabitListResponse(
@@ -340,6 +341,9 @@ async def update_habit_log(
         if str(log.user_id) != current_user.id:
             raise HTTPException(status_code=403, detail="Nincs jogosultság ehhez a teljesítéshez")
         
+        previous_date = log.date
+        previous_completed = log.completed
+        
         # Frissítés
         update_data = log_data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
@@ -347,8 +351,12 @@ async def update_habit_log(
         
         await log.save()
         
-        # Streak újraszámítása
-        await HabitService.update_habit_streak(habit_id, current_user.id)
+        # Streak inkrementális frissítése (dátumváltozás: régi nap törlése + új nap felvétele)
+        if log.date != previous_date:
+            await HabitService.apply_log_change(habit_id, current_user.id, previous_date, previous_completed, False)
+            await HabitService.apply_log_change(habit_id, current_user.id, log.date, False, log.completed)
+        else:
+            await HabitService.apply_log_change(habit_id, current_user.id, log.date, previous_completed, log.completed)
         
         return HabitLogRead(
             id=str(log.id),
@@ -385,8 +393,8 @@ async def delete_habit_log(
         
         await log.delete()
         
-        # Streak újraszámítása
-        await HabitService.update_habit_streak(habit_id, current_user.id)
+        # Streak inkrementális frissítése
+        await HabitService.apply_log_change(habit_id, current_user.id, log.date, log.completed, False)
         
         return {"message": "Szokás teljesítés törölve"}
         
@@ -424,10 +432,8 @@ async def get_habit_stats(
         if str(habit.user_id) != current_user.id:
             raise HTTPException(status_code=403, detail="Nincs jogosultság ehhez a szokáshoz")
         
-        # Statisztikák számítása
-        overall_stats = await HabitService.get_habit_progress_stats(habit_id, current_user.id, days)
-        weekly_stats = await HabitService.get_weekly_stats(habit_id, current_user.id)
-        monthly_stats = await HabitService.get_monthly_stats(habit_id, current_user.id)
+        # Statisztikák számítása (egyetlen aggregáció)
+        overall_stats, weekly_stats, monthly_stats = await HabitService.get_habit_stats(habit, days)
         
         return HabitStatsResponse(
             habit_id=habit_id,
@@ -519,7 +525,7 @@ async def bulk_create_habits(
         
         habit_reads = []
         for habit in created_habits:
-            habit_read = await _convert_habit_to_read(habit, current_user.id)
+            habit_read = await _convert_habit_to_read(habit, current_user.id, {})  # Új szokás, még nincs log
             habit_reads.append(habit_read)
         
         return HabitBulkCreateResponse(
@@ -534,12 +540,23 @@ async def bulk_create_habits(
 
 # === HELPER FUNCTIONS ===
 
-async def _convert_habit_to_read(habit: Habit, user_id: str) -> HabitRead:
-    """Habit dokumentum konvertálása HabitRead objektummá"""
+async def _convert_habit_to_read(
+    habit: Habit,
+    user_id: str,
+    period_counts: Optional[Dict[str, HabitPeriodCounts]] = None
+) -> HabitRead:
+    """
+    Habit dokumentum konvertálása HabitRead objektummá
+    
+    period_counts: több szokás listázásakor előre, egy aggregációval lekért számlálók
+    """
     
     # Kiszámított mezők
-    is_completed_today, _ = await HabitService.check_habit_completion_today(str(habit.id), user_id)
-    usage_percentage = await HabitService.get_habit_usage_percentage(str(habit.id), user_id)
+    if period_counts is None:
+        period_counts = await HabitService.get_period_counts(user_id, [habit.id])
+    counts = period_counts.get(str(habit.id))
+    is_completed_today = bool(counts and counts.today_completed)
+    usage_percentage = HabitService.usage_percentage(habit, counts)
     
     return HabitRead(
         id=str(habit.id),
@@ -0,0 +1,14 @@
+# app/routes/jobs.py
+from fastapi import APIRouter, Depends
+from typing import Dict, Any
+
+from app.core.job_queue import job_queue
+from app.core.security import get_current_user
+from app.models.user import User
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/metrics")
+async def get_job_queue_metrics(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+    """Háttérfeladat-sor metrikái: sor mélység, számlálók, futásidők"""
+    return job_queue.metrics()
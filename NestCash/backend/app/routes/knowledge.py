@@ -4,15 +4,17 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
+from beanie import PydanticObjectId
 
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.knowledge import (
-    KnowledgeCategory, Lesson, UserProgress, LessonCompletion,
+    Lesson, UserProgress, LessonCompletion,
     CategoryWithLessons, LessonSummary, UserStats, QuizResult,
     QuizQuestion, DifficultyLevel
 )
 from app.services.badge_service import badge_service
+from app.services.knowledge_catalogue import knowledge_catalogue_service
 
 router = APIRouter(prefix="/knowledge", tags=["knowledge"])
 
@@ -33,57 +35,49 @@ async def get_categories_with_lessons(
 ):
     """Összes kategória lekérése a hozzájuk tartozó leckékkel és haladással"""
     
-    # Felhasználó haladásának lekérése
-    user_progress = await UserProgress.find_one({"user_id": current_user.id})
-    completed_lesson_ids = []
+    # Felhasználó haladásának lekérése (csak a teljesített leckék)
+    user_progress = await UserProgress.get_motor_collection().find_one(
+        {"user_id": PydanticObjectId(current_user.id)},
+        {"completed_lessons.lesson_id": 1, "completed_lessons.best_quiz_score": 1}
+    )
+    completed_lesson_ids = set()
     lesson_scores = {}
     
     if user_progress:
-        completed_lesson_ids = [str(comp.lesson_id) for comp in user_progress.completed_lessons]
-        lesson_scores = {str(comp.lesson_id): comp.best_quiz_score 
-                        for comp in user_progress.completed_lessons 
-                        if comp.best_quiz_score is not None}
-    
-    # Kategóriák lekérése
-    categories = await KnowledgeCategory.find({"is_active": True}).sort("order").to_list()
+        for comp in user_progress.get("completed_lessons", []):
+            lesson_id = str(comp["lesson_id"])
+            completed_lesson_ids.add(lesson_id)
+            if comp.get("best_quiz_score") is not None:
+                lesson_scores[lesson_id] = comp["best_quiz_score"]
+    
+    # Publikált katalógus a közös cache-ből (egy aggregáció, nem kategóriánkénti lekérdezés)
+    catalogue = await knowledge_catalogue_service.get_catalogue()
     result = []
     
-    for category in categories:
-        # Leckék lekérése a kategóriához
-        lesson_filter = {"category_id": category.id, "is_published": True}
-        if difficulty:
-            lesson_filter["difficulty"] = difficulty
-            
-        lessons = await Lesson.find(lesson_filter).sort("order").to_list()
-        
+    for category in catalogue:
         lesson_summaries = []
         completed_count = 0
         
-        for lesson in lessons:
-            lesson_id = str(lesson.id)
-            is_completed = lesson_id in completed_lesson_ids
+        for lesson in category["lessons"]:
+            if difficulty and lesson["difficulty"] != difficulty:
+                continue
+            is_completed = lesson["id"] in completed_lesson_ids
             if is_completed:
                 completed_count += 1
             
             lesson_summaries.append(LessonSummary(
-                id=lesson_id,
-                title=lesson.title,
-                description=lesson.description,
-                difficulty=lesson.difficulty,
-                estimated_minutes=lesson.estimated_minutes,
-                total_pages=len(lesson.pages),
-                has_quiz=len(lesson.quiz_questions) > 0,
+                **lesson,
                 is_completed=is_completed,
-                quiz_score=lesson_scores.get(lesson_id),
-                category_name=category.name
+                quiz_score=lesson_scores.get(lesson["id"]),
+                category_name=category["name"]
             ))
         
         result.append(CategoryWithLessons(
-            id=str(category.id),
-            name=category.name,
-            description=category.description,
-            icon=category.icon,
-            color=category.color,
+            id=category["id"],
+            name=category["name"],
+            description=category["description"],
+            icon=category["icon"],
+            color=category["color"],
             lessons=lesson_summaries,
             total_lessons=len(lesson_summaries),
             completed_lessons=completed_count
@@ -1,6 +1,7 @@
 # app/routes/knowledge_admin.py
 
 from fastapi import APIRouter, Depends, HTTPException
+import asyncio
 from typing import List, Optional
 from datetime import datetime
 
@@ -12,6 +13,8 @@ from app.models.knowledge import (
 )
 from pydantic import BaseModel
 
+from app.services.knowledge_catalogue import knowledge_catalogue_service
+
 router = APIRouter(prefix="/admin/knowledge", tags=["knowledge-admin"])
 
 # Request models
@@ -84,6 +87,7 @@ async def create_category(
     
     category = KnowledgeCategory(**category_data.dict())
     await category.insert()
+    knowledge_catalogue_service.invalidate()
     return category
 
 @router.put("/categories/{category_id}", response_model=KnowledgeCategory)
@@ -105,6 +109,7 @@ async def update_category(
         setattr(category, key, value)
     
     await category.save()
+    knowledge_catalogue_service.invalidate()
     return category
 
 @router.delete("/categories/{category_id}")
@@ -127,6 +132,7 @@ async def delete_category(
         )
     
     await category.delete()
+    knowledge_catalogue_service.invalidate()
     return {"message": "Category deleted successfully"}
 
 # === LECKE KEZELÉS ===
@@ -145,6 +151,7 @@ async def create_lesson(
     
     lesson = Lesson(**lesson_data.dict())
     await lesson.insert()
+    knowledge_catalogue_service.invalidate()
     return lesson
 
 @router.get("/lessons/{lesson_id}", response_model=Lesson)
@@ -186,6 +193,7 @@ async def update_lesson(
     
     lesson.updated_at = datetime.now()
     await lesson.save()
+    knowledge_catalogue_service.invalidate()
     return lesson
 
 @router.delete("/lessons/{lesson_id}")
@@ -200,6 +208,7 @@ async def delete_lesson(
         raise HTTPException(status_code=404, detail="Lesson not found")
     
     await lesson.delete()
+    knowledge_catalogue_service.invalidate()
     return {"message": "Lesson deleted successfully"}
 
 @router.get("/lessons", response_model=List[Lesson])
@@ -365,6 +374,8 @@ async def create_sample_data(
                     await lesson.insert()
                     created_lessons.append(lesson)
     
+    knowledge_catalogue_service.invalidate()
+    
     return {
         "message": "Sample data created successfully",
         "created_categories": len(created_categories),
@@ -388,6 +399,7 @@ async def clear_all_data(
     await Lesson.delete_all()
     await KnowledgeCategory.delete_all()
     await UserProgress.delete_all()
+    knowledge_catalogue_service.invalidate()
     
     return {"message": "All knowledge data has been deleted"}
 
@@ -397,38 +409,44 @@ async def clear_all_data(
 async def get_admin_stats(
     current_user: User = Depends(get_current_user)  # Később: get_admin_user
 ):
-    """Admin áttekintő statisztikák"""
-    
-    # Kategóriák száma
-    total_categories = await KnowledgeCategory.find({"is_active": True}).count()
-    
-    # Leckék száma
-    total_lessons = await Lesson.find({"is_published": True}).count()
-    published_lessons = await Lesson.find({"is_published": True}).count()
-    draft_lessons = await Lesson.find({"is_published": False}).count()
-    
-    # Felhasználói statisztikák
-    total_users_with_progress = await UserProgress.find().count()
-    
-    # Legnépszerűbb leckék (legtöbbet teljesített)
-    all_progress = await UserProgress.find().to_list()
-    lesson_completion_count = {}
-    
-    for progress in all_progress:
-        for completion in progress.completed_lessons:
-            lesson_id = str(completion.lesson_id)
-            if completion.pages_completed >= completion.total_pages:
-                lesson_completion_count[lesson_id] = lesson_completion_count.get(lesson_id, 0) + 1
-    
-    # Top 5 lecke
-    top_lessons = sorted(lesson_completion_count.items(), key=lambda x: x[1], reverse=True)[:5]
+    """Admin áttekintő statisztikák (aggregációkkal, a UserProgress dokumentumok betöltése nélkül)"""
+    
+    # Leckék száma publikáltság szerint, egy $group-pal
+    lessons_pipeline = [{"$group": {"_id": "$is_published", "count": {"$sum": 1}}}]
+    
+    # Legnépszerűbb leckék (legtöbbet teljesített): $unwind + $group a szerveren
+    popular_pipeline = [
+        {"$unwind": "$completed_lessons"},
+        {"$match": {"$expr": {"$gte": ["$completed_lessons.pages_completed", "$completed_lessons.total_pages"]}}},
+        {"$group": {"_id": "$completed_lessons.lesson_id", "completions": {"$sum": 1}}},
+        {"$sort": {"completions": -1, "_id": 1}},
+        {"$limit": 5},
+        {"$lookup": {
+            "from": Lesson.Settings.name,
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "lesson",
+        }},
+        {"$project": {"completions": 1, "title": {"$arrayElemAt": ["$lesson.title", 0]}}},
+    ]
+    
+    total_categories, lesson_counts, total_users_with_progress, top_lessons = await asyncio.gather(
+        KnowledgeCategory.find({"is_active": True}).count(),
+        Lesson.get_motor_collection().aggregate(lessons_pipeline).to_list(length=None),
+        UserProgress.get_motor_collection().count_documents({}),
+        UserProgress.get_motor_collection().aggregate(popular_pipeline, allowDiskUse=True).to_list(length=None),
+    )
+    
+    counts_by_status = {row["_id"]: row["count"] for row in lesson_counts}
+    published_lessons = counts_by_status.get(True, 0)
+    draft_lessons = counts_by_status.get(False, 0)
     
     return {
         "categories": {
             "total": total_categories
         },
         "lessons": {
-            "total": total_lessons,
+            "total": published_lessons + draft_lessons,
             "published": published_lessons,
             "drafts": draft_lessons
         },
@@ -436,8 +454,8 @@ async def get_admin_stats(
             "with_progress": total_users_with_progress
         },
         "popular_lessons": [
-            {"lesson_id": lesson_id, "completions": count} 
-            for lesson_id, count in top_lessons
+            {"lesson_id": str(row["_id"]), "title": row.get("title"), "completions": row["completions"]}
+            for row in top_lessons
         ]
     }
 
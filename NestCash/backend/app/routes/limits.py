@@ -10,7 +10,7 @@ from app.models.limit_schemas import (
     LimitCreate, LimitRead, LimitUpdate, LimitListResponse,
     LimitUsage, LimitCheckResult, LimitStatus
 )
-from app.models.transaction import Transaction
+from app.services.limit_service import LimitService
 from app.core.security import get_current_user
 from app.models.user import User
 
@@ -72,9 +72,11 @@ async def get_limits(
         limits = await query.sort(-Limit.created_at).to_list()
         
         # Számítások hozzáadása
+        spending_by_limit = await LimitService.get_spending_for_limits(current_user.id, limits)
+        
         limits_with_usage = []
         for limit in limits:
-            current_spending = await get_current_spending(current_user.id, limit)
+            current_spending = spending_by_limit[str(limit.id)]
             
             limit_read = LimitRead(
                 id=str(limit.id),
@@ -216,14 +218,19 @@ async def check_limits(
             Limit.is_active == True
         ).to_list()
         
-        for limit in active_limits:
-            current_spending = await get_current_spending(current_user.id, limit)
+        # Ellenőrizzük, hogy a limit vonatkozik-e erre a tranzakcióra
+        applicable_limits = [
+            limit for limit in active_limits
+            if applies_to_transaction(limit, category, main_account, sub_account_name)
+        ]
+        
+        # Az összes limit kiadása egyetlen aggregációval
+        spending_by_limit = await LimitService.get_spending_for_limits(current_user.id, applicable_limits)
+        
+        for limit in applicable_limits:
+            current_spending = spending_by_limit[str(limit.id)]
             projected_spending = current_spending + abs(amount)
             
-            # Ellenőrizzük, hogy a limit vonatkozik-e erre a tranzakcióra
-            if not applies_to_transaction(limit, category, main_account, sub_account_name):
-                continue
-            
             if projected_spending > limit.amount:
                 exceeded_limits.append(f"{limit.name} ({limit.amount} {limit.currency})")
             elif (limit.notification_threshold and 
@@ -260,8 +267,10 @@ async def get_limits_status(current_user: User = Depends(get_current_user)):
         exceeded_count = 0
         warning_count = 0
         
+        spending_by_limit = await LimitService.get_spending_for_limits(current_user.id, active_limits)
+        
         for limit in active_limits:
-            current_spending = await get_current_spending(current_user.id, limit)
+            current_spending = spending_by_limit[str(limit.id)]
             usage_percentage = (current_spending / limit.amount) * 100
             
             if current_spending > limit.amount:
@@ -284,30 +293,7 @@ async def get_limits_status(current_user: User = Depends(get_current_user)):
 
 async def get_current_spending(user_id: str, limit: Limit) -> float:
     """Aktuális kiadás számítása a limit alapján"""
-    period_start = limit.get_period_start()
-    period_end = limit.get_period_end()
-    
-    # Alapszűrő: felhasználó és időszak
-    query_filter = {
-        "user_id": PydanticObjectId(user_id),
-        "date": {
-            "$gte": period_start.strftime("%Y-%m-%d"),
-            "$lte": period_end.strftime("%Y-%m-%d")
-        },
-        "amount": {"$lt": 0}  # Csak kiadások
-    }
-    
-    # Típus specifikus szűrés
-    if limit.type == LimitType.CATEGORY and limit.category:
-        query_filter["kategoria"] = limit.category
-    elif limit.type == LimitType.ACCOUNT:
-        if limit.main_account:
-            query_filter["main_account"] = limit.main_account
-        if limit.sub_account_name:
-            query_filter["sub_account_name"] = limit.sub_account_name
-    
-    transactions = await Transaction.find(query_filter).to_list()
-    return abs(sum(t.amount for t in transactions))
+    return await LimitService._get_current_spending(user_id, limit)
 
 def applies_to_transaction(
     limit: Limit, 
@@ -16,6 +16,7 @@ from app.models.notification import (
     NotificationPriority
 )
 from app.services.notification_service import NotificationService
+from app.core.pagination import TotalMode, with_keyset, next_cursor, count_total
 from app.core.security import get_current_user
 from app.models.user import User
 
@@ -30,6 +31,8 @@ async def list_notifications(
     unread_only: Optional[bool] = Query(None, description="Csak olvasatlan értesítések"),
     notification_type: Optional[NotificationType] = Query(None, description="Értesítés típus szerinti szűrés"),
     priority: Optional[NotificationPriority] = Query(None, description="Prioritás szerinti szűrés"),
+    after: Optional[str] = Query(None, description="Lapozási token (előző válasz next_cursor mezője); ilyenkor a skip nem számít"),
+    total: TotalMode = Query(TotalMode.EXACT, description="total_count számítása: exact, estimate vagy none"),
 ):
     """
     Felhasználó értesítéseinek listázása
@@ -57,23 +60,21 @@ async def list_notifications(
             {"expires_at": None}
         ]
         
-        # Összesített számok
-        total_count = await NotificationDocument.find(query_filter).count()
-        unread_count = await NotificationDocument.find({
-            "user_id": ObjectId(current_user.id),
-            "is_read": False,
-            "$or": [
-                {"expires_at": {"$gt": now}},
-                {"expires_at": None}
-            ]
-        }).count()
+        # Összesített számok (az olvasatlanok száma a cache-elt statisztikából)
+        total_count = await count_total(NotificationDocument, query_filter, total)
+        unread_count = (await NotificationService.get_stats(current_user.id))["unread_count"]
         
         # Értesítések lekérdezése
-        notifications = await NotificationDocument.find(query_filter)\
-            .sort(-NotificationDocument.created_at)\
+        sort_criteria = [("created_at", -1), ("_id", -1)]
+        if after:
+            skip = 0
+        notifications = await NotificationDocument.find(with_keyset(query_filter, sort_criteria, after))\
+            .sort(sort_criteria)\
             .skip(skip)\
-            .limit(limit)\
+            .limit(limit + 1)\
             .to_list()
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
         
         # Konvertálás response modellekké
         notification_reads = []
@@ -101,9 +102,12 @@ async def list_notifications(
             total_count=total_count,
             unread_count=unread_count,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(notifications, sort_criteria, has_more)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing notifications: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to list notifications: {e}")
@@ -116,48 +120,8 @@ async def get_notification_stats(
     Értesítési statisztikák lekérése
     """
     try:
-        user_id = ObjectId(current_user.id)
-        now = datetime.utcnow()
-        
-        # Aktív értesítések (nem lejártak)
-        active_filter = {
-            "user_id": user_id,
-            "$or": [
-                {"expires_at": {"$gt": now}},
-                {"expires_at": None}
-            ]
-        }
-        
-        total_count = await NotificationDocument.find(active_filter).count()
-        unread_count = await NotificationDocument.find({
-            **active_filter,
-            "is_read": False
-        }).count()
-        
-        # Prioritás szerinti bontás
-        priority_counts = {}
-        for priority in NotificationPriority:
-            count = await NotificationDocument.find({
-                **active_filter,
-                "priority": priority
-            }).count()
-            priority_counts[priority.value] = count
-        
-        # Típus szerinti bontás
-        type_counts = {}
-        for notification_type in NotificationType:
-            count = await NotificationDocument.find({
-                **active_filter,
-                "type": notification_type
-            }).count()
-            type_counts[notification_type.value] = count
-        
-        return NotificationStats(
-            total_count=total_count,
-            unread_count=unread_count,
-            priority_counts=priority_counts,
-            type_counts=type_counts
-        )
+        stats = await NotificationService.get_stats(current_user.id)
+        return NotificationStats(**stats)
         
     except Exception as e:
         logger.error(f"Error getting notification stats: {e}")
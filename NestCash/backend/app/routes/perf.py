@@ -0,0 +1,31 @@
+# app/routes/perf.py
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from datetime import datetime
+from typing import Dict, Any
+
+from app.core.profiling import perf_registry
+from app.core.security import get_current_user
+from app.models.user import User
+
+router = APIRouter(prefix="/_perf", tags=["perf"])
+
+@router.get("")
+async def get_perf_report(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+    """Route-onkénti profil: futásidő, DB round trip-ek, dokumentumok, bájtok, N+1 gyanú"""
+    return perf_registry.report()
+
+@router.get("/export")
+async def export_perf_report(current_user: User = Depends(get_current_user)):
+    """Ugyanaz a riport letölthető JSON fájlként"""
+    filename = f"nestcash-perf-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+    return JSONResponse(
+        perf_registry.report(),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.delete("")
+async def reset_perf_report(current_user: User = Depends(get_current_user)):
+    """Számlálók nullázása (új mérési ablak)"""
+    perf_registry.reset()
+    return {"message": "Performance counters reset"}
@@ -1,6 +1,7 @@
 # app/routes/random_data.py
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Dict, Any
+from collections import defaultdict
 from datetime import datetime, timedelta
 import random
 from beanie import PydanticObjectId
@@ -9,7 +10,9 @@ from app.models.transaction import Transaction
 from app.models.transaction_schemas import TransactionRead
 from app.models.user import User
 from app.core.security import get_current_user
-from app.routes.transactions import update_sub_account_balance
+from app.services.account_service import AccountService
+from app.services.rollup_service import RollupService
+from app.services.badge_service import badge_service
 
 router = APIRouter(prefix="/random", tags=["random-data"])
 
@@ -182,21 +185,11 @@ async def generate_random_transactions(
             # Tranzakció létrehozása
             new_transaction = Transaction(
                 **transaction_data,
+                id=PydanticObjectId(),
                 user_id=PydanticObjectId(current_user.id),
                 currency="HUF"
             )
             
-            await new_transaction.insert()
-            
-            # Alszámla egyenleg frissítése
-            if update_balances:
-                await update_sub_account_balance(
-                    current_user.id,
-                    main_account,
-                    sub_account,
-                    amount
-                )
-            
             generated_transactions.append(new_transaction)
         
         # Kiadási tranzakciók generálása
@@ -224,23 +217,25 @@ async def generate_random_transactions(
             # Tranzakció létrehozása
             new_transaction = Transaction(
                 **transaction_data,
+                id=PydanticObjectId(),
                 user_id=PydanticObjectId(current_user.id),
                 currency="HUF"
             )
             
-            await new_transaction.insert()
-            
-            # Alszámla egyenleg frissítése
-            if update_balances:
-                await update_sub_account_balance(
-                    current_user.id,
-                    main_account,
-                    sub_account,
-                    -amount  # Kiadás levonása
-                )
-            
             generated_transactions.append(new_transaction)
         
+        # Egyetlen insert_many, majd alszámlánként egy nettó egyenleg módosítás
+        await Transaction.insert_many(generated_transactions)
+        if update_balances:
+            balance_changes = defaultdict(float)
+            for transaction in generated_transactions:
+                balance_changes[(transaction.main_account, transaction.sub_account_name)] += transaction.amount
+            await AccountService.apply_balance_changes(current_user.id, balance_changes)
+
+        # Havi összesítők frissítése egyetlen bulk írással
+        await RollupService.apply_transactions(generated_transactions)
+        await badge_service.apply_transaction_counters(current_user.id, generated_transactions)
+
         # TransactionRead formátumra konvertálás
         result_transactions = []
         for doc in generated_transactions:
@@ -302,6 +297,8 @@ async def clear_all_transactions(
     try:
         # Összes tranzakció törlése a felhasználóhoz
         result = await Transaction.find({"user_id": PydanticObjectId(current_user.id)}).delete()
+        await RollupService.clear_user(current_user.id)
+        await badge_service.reset_transaction_counters(current_user.id)
         
         return {
             "message": f"Sikeresen törölve {result.deleted_count} tranzakció",
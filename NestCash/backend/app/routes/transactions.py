@@ -1,5 +1,7 @@
 # app/routes/transactions.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import datetime
 from typing import Optional, List
 from beanie import PydanticObjectId
 from bson import ObjectId
@@ -10,12 +12,19 @@ from app.models.transaction_schemas import (
     TransactionCreate,
     TransactionRead,
     TransactionListResponse,
+    TransactionImportResult,
 )
 from app.core.security import get_current_user
 from app.models.user import User
-from app.models.account import AllUserAccountsDocument, SubAccountDetails # Import AllUserAccountsDocument és SubAccountDetails
+from app.services.account_service import AccountService
+from app.services.rollup_service import RollupService
 from app.services.limit_service import LimitService
 from app.services.badge_service import badge_service
+from app.services.transaction_import_service import TransactionImportService, IMPORT_BATCH_SIZE
+from app.services.transaction_export_service import TransactionExportService, build_export_filter, MEDIA_TYPES
+from app.core.job_queue import job_queue
+from app.core.pagination import TotalMode, with_keyset, next_cursor, count_total
+from app.services import transaction_jobs  # noqa: F401  # A háttérfeladatok regisztrálásához
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 logger = logging.getLogger(__name__)
@@ -50,21 +59,13 @@ async def create_transaction(
             )
 
     # Alszámla devaizájának lekérzése
-    all_accounts_doc = await AllUserAccountsDocument.find_one()
-    if not all_accounts_doc or current_user.id not in all_accounts_doc.accounts_by_user:
-        raise HTTPException(status_code=404, detail="Accounts not found for user")
-    
-    user_accounts = all_accounts_doc.accounts_by_user[current_user.id]
-    main_account_details = getattr(user_accounts, transaction_data.main_account, None)
-
-    if not main_account_details or transaction_data.sub_account_name not in main_account_details.alszamlak:
-        # Ha az alszámla nem létezik, feltételezzük, hogy "HUF" az alapértelmezett deviza
-        # vagy hibát dobunk, attól függően, hogy milyen üzleti logika a kívánatos.
-        # Jelenleg a update_sub_account_balance létrehozza, ha nem létezik.
-        # Itt is beállíthatjuk az alapértelmezett értéket.
-        currency_to_save = "HUF" 
-    else:
-        currency_to_save = main_account_details.alszamlak[transaction_data.sub_account_name].currency
+    # Ha az alszámla nem létezik, "HUF" az alapértelmezett deviza
+    # (az update_sub_account_balance létrehozza, ha nem létezik).
+    currency_to_save = await AccountService.get_sub_account_currency(
+        current_user.id,
+        transaction_data.main_account,
+        transaction_data.sub_account_name
+    )
 
     new_transaction = Transaction(
         **transaction_data.model_dump(exclude={"amount"}),
@@ -72,25 +73,6 @@ async def create_transaction(
         amount=amount_to_save, # Beállítjuk a már előjellel ellátott összeget
         currency=currency_to_save # Hozzáadjuk a devizát
     )
-    # Badge ellenőrzés a tranzakció létrehozása után
-    try:
-        earned_badges = await badge_service.check_and_award_badges(
-            user_id=current_user.id,
-            trigger_event="transaction_created",
-            context={
-                "transaction_id": str(new_transaction.id),
-                "amount": abs(new_transaction.amount),
-                "type": new_transaction.type,
-                "category": new_transaction.kategoria
-            }
-        )
-        
-        # Itt lehetne értesítést küldeni a megszerzett badge-ekről
-        if earned_badges:
-            logger.info(f"User {current_user.id} earned {len(earned_badges)} badges")
-            
-    except Exception as e:
-        logger.error(f"Badge check failed: {e}")
     # If it's a transfer, process it (ezt a részt felül kell vizsgálni a TransactionCreate séma alapján)
     # Jelenleg a TransactionCreate séma nem tartalmazza a forrás és cél számla mezőket transzferhez.
     # Ha transzfert is szeretnénk kezelni, a TransactionCreate sémát ki kell egészíteni a szükséges mezőkkel,
@@ -128,6 +110,29 @@ async def create_transaction(
     )
 
     await new_transaction.insert()
+    await RollupService.apply_transaction(new_transaction)
+    await badge_service.apply_transaction_counters(current_user.id, [new_transaction])
+
+    # Badge ellenőrzés és limit figyelmeztetés a válasz után, háttérfeladatként
+    try:
+        await job_queue.enqueue("transaction.badges", {
+            "user_id": current_user.id,
+            "context": {
+                "transaction_id": str(new_transaction.id),
+                "amount": abs(new_transaction.amount),
+                "type": new_transaction.type,
+                "category": new_transaction.kategoria
+            }
+        })
+        if transaction_data.type == 'expense' and limit_check.warnings:
+            await job_queue.enqueue("transaction.limit_warnings", {
+                "user_id": current_user.id,
+                "warnings": limit_check.warnings,
+                "transaction_id": str(new_transaction.id)
+            })
+    except Exception as e:
+        logger.error(f"Failed to enqueue post-transaction jobs: {e}")
+
     return TransactionRead(
         id=str(new_transaction.id),
         user_id=str(new_transaction.user_id),
@@ -157,23 +162,36 @@ async def create_transaction(
 
 # Segédfüggvény alszámla egyenleg frissítéséhez
 async def update_sub_account_balance(user_id: str, main_account_key: str, sub_account_name: str, amount_change: float):
-    all_accounts_doc = await AllUserAccountsDocument.find_one()
-
-    if not all_accounts_doc or user_id not in all_accounts_doc.accounts_by_user:
-        raise HTTPException(status_code=404, detail="Accounts not found for user")
+    # A tényleges írást az AccountService végzi (per_user módban atomi $inc)
+    await AccountService.apply_balance_change(user_id, main_account_key, sub_account_name, amount_change)
 
-    user_accounts = all_accounts_doc.accounts_by_user[user_id]
-    main_account = getattr(user_accounts, main_account_key, None)
 
-    if not main_account:
-        raise HTTPException(status_code=400, detail=f"Main account {main_account_key} not found.")
-
-    if sub_account_name not in main_account.alszamlak:
-        # If sub-account doesn't exist, create it. Assuming HUF as default currency.
-        main_account.alszamlak[sub_account_name] = SubAccountDetails(balance=0.0, currency="HUF")
+# ----------- POST /transactions/import -----------
+@router.post("/import", response_model=TransactionImportResult)
+async def import_transactions(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Ha nincs megadva, a Content-Type alapján"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=100, le=50000),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Tömeges import a kérés törzséből (NDJSON vagy fejléces CSV), folyamatos olvasással.
+    A hibás sorok kimaradnak, a válasz tartalmazza a sorszámukat.
+    """
+    import_format = format
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "csv" if "csv" in content_type else "ndjson"
 
-    main_account.alszamlak[sub_account_name].balance += amount_change
-    await all_accounts_doc.save()
+    try:
+        return await TransactionImportService.import_stream(
+            current_user.id, request.stream(), import_format, batch_size
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error importing transactions for user {current_user.id}: {e}")
+        raise HTTPException(status_code=500, detail="Transaction import failed")
 
 
 # ----------- GET list ----------
@@ -187,34 +205,43 @@ async def list_transactions(
     category: Optional[str] = Query(None, alias="kategoria"),
     income_only: Optional[bool] = Query(None, description="Return only bevetel (osszeg>0)"),
     expense_only: Optional[bool] = Query(None, description="Return only kiadas (osszeg<0)"),
+    after: Optional[str] = Query(None, description="Cursor from the previous page (next_cursor); skip is ignored"),
+    total: TotalMode = Query(TotalMode.EXACT, description="total_count: exact, estimate or none"),
 ):
     try:
         # alapfilter: csak a bevetel vagy csak a kiadas
         query_filter = {"user_id": ObjectId(current_user.id)}
 
         if income_only:
-            query_filter["osszeg"] = {"$gt": 0}
+            query_filter["amount"] = {"$gt": 0}
         if expense_only:
-            query_filter["osszeg"] = {"$lt": 0}
+            query_filter["amount"] = {"$lt": 0}
 
         # Dátum szerinti szűrés
         if from_date and to_date:
-            query_filter["datum"] = {"$gte": from_date, "$lte": to_date}
+            query_filter["date"] = {"$gte": from_date, "$lte": to_date}
         elif from_date:
-            query_filter["datum"] = {"$gte": from_date}
+            query_filter["date"] = {"$gte": from_date}
         elif to_date:
-            query_filter["datum"] = {"$lte": to_date}
+            query_filter["date"] = {"$lte": to_date}
 
         # Kategória szűrés
         if category:
             query_filter["kategoria"] = category
 
-        total_count = await Transaction.find(query_filter).count()
-        transactions = await Transaction.find(query_filter)\
-            .sort(-Transaction.datum)\
+        total_count = await count_total(Transaction, query_filter, total)
+
+        # Keyset lapozás a (user_id, date, _id) indexen; after esetén a skip nem számít
+        sort_criteria = [("date", -1), ("_id", -1)]
+        if after:
+            skip = 0
+        transactions = await Transaction.find(with_keyset(query_filter, sort_criteria, after))\
+            .sort(sort_criteria)\
             .skip(skip)\
-            .limit(limit)\
+            .limit(limit + 1)\
             .to_list()
+        has_more = len(transactions) > limit
+        transactions = transactions[:limit]
 
         # Konvertálás TransactionRead modellekké
         read_transactions = [
@@ -254,8 +281,12 @@ async def list_transactions(
             transactions=read_transactions,
             total_count=total_count, # total helyett total_count
             skip=skip,
-            limit=limit
+            limit=limit,
+            has_more=has_more,
+            next_cursor=next_cursor(transactions, sort_criteria, has_more)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing transactions: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to list transactions: {e}")
@@ -291,6 +322,35 @@ async def get_summary(current_user: User = Depends(get_current_user)):
         logger.error(f"Error generating summary: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate summary")
 
+# ----------- GET /export ----------
+@router.get("/export")
+async def export_transactions(
+    current_user: User = Depends(get_current_user),
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    from_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    to_date: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
+    category: Optional[List[str]] = Query(None, alias="kategoria", description="Több is megadható"),
+):
+    """
+    A felhasználó teljes (szűrt) tranzakció története CSV vagy Parquet formában,
+    darabonként streamelve a Motor cursorból (nincs 500-as limit, a memória állandó).
+    """
+    for value in (from_date, to_date):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    query_filter = build_export_filter(current_user.id, from_date, to_date, category)
+    content = TransactionExportService.stream(query_filter, format)
+    filename = f"transactions_{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # ----------- GET /{id} -----------
 @router.get("/{tx_id}", response_model=TransactionRead)
 async def get_transaction(tx_id: str, current_user: User = Depends(get_current_user)):
@@ -389,30 +449,25 @@ async def update_transaction(
 
     # Alszámla devizájának frissítése, ha a fő- vagy alszámla változik
     # Fontos: Ha a fő- vagy alszámla változik, akkor a devizát is újra kell kérni
-    # a `transactions.py` file elején definiált `AllUserAccountsDocument`-ből
     if 'main_account' in update_data or 'sub_account_name' in update_data:
-        all_accounts_doc = await AllUserAccountsDocument.find_one()
-        if not all_accounts_doc or current_user.id not in all_accounts_doc.accounts_by_user:
-            raise HTTPException(status_code=404, detail="Accounts not found for user")
-        
-        user_accounts = all_accounts_doc.accounts_by_user[current_user.id]
-        
         # A frissített fő- és alszámla nevek, vagy az eredeti dokumentumból
         updated_main_account = update_data.get('main_account', doc.main_account)
         updated_sub_account_name = update_data.get('sub_account_name', doc.sub_account_name)
 
-        main_account_details = getattr(user_accounts, updated_main_account, None)
+        update_data['currency'] = await AccountService.get_sub_account_currency(
+            current_user.id, updated_main_account, updated_sub_account_name
+        )
 
-        if not main_account_details or updated_sub_account_name not in main_account_details.alszamlak:
-            # Ha az alszámla nem létezik, feltételezzük, hogy "HUF" az alapértelmezett deviza
-            update_data['currency'] = "HUF" 
-        else:
-            update_data['currency'] = main_account_details.alszamlak[updated_sub_account_name].currency
+    # A rollup frissítéséhez kell a módosítás előtti állapot
+    previous = doc.model_copy()
 
     for key, value in update_data.items():
         setattr(doc, key, value)
 
     await doc.save()
+    await RollupService.replace_transaction(previous, doc)
+    await badge_service.apply_transaction_counters(current_user.id, [previous], sign=-1)
+    await badge_service.apply_transaction_counters(current_user.id, [doc])
     return TransactionRead(**doc.model_dump())
 
 # ----------- DELETE /{id} -----------
@@ -432,4 +487,6 @@ async def delete_transaction(tx_id: str, current_user: User = Depends(get_curren
         raise HTTPException(status_code=403, detail="Not authorized to delete this transaction")
 
     await doc.delete()
+    await RollupService.apply_transaction(doc, sign=-1)
+    await badge_service.apply_transaction_counters(current_user.id, [doc], sign=-1)
     return {"message": "Transaction deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,311 @@
+# app/services/account_service.py
+import os
+import logging
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import ReplaceOne
+
+from app.models.account import (
+    AllUserAccountsDocument, UserAccountsDocument, UserAccounts,
+    AccountDetails, SubAccountDetails
+)
+
+logger = logging.getLogger(__name__)
+
+# Tárolási mód: "global" = egyetlen közös `accounts` dokumentum (régi működés),
+# "per_user" = felhasználónként külön dokumentum a `user_accounts` kollekcióban.
+# A per_user módra váltás előtt le kell futtatni a migrációt (lásd lent).
+ACCOUNT_STORAGE_MODE = os.getenv("ACCOUNT_STORAGE_MODE", "global")
+
+MAIN_ACCOUNT_KEYS = ("likvid", "befektetes", "megtakaritas")
+
+
+def _empty_user_accounts() -> UserAccounts:
+    return UserAccounts(
+        likvid=AccountDetails(alszamlak={}),
+        befektetes=AccountDetails(alszamlak={}),
+        megtakaritas=AccountDetails(alszamlak={}),
+    )
+
+
+def _validate_keys(main_account: str, sub_account_name: str) -> None:
+    """Fő- és alszámla név ellenőrzése a MongoDB mezőútvonalakhoz"""
+    if main_account not in MAIN_ACCOUNT_KEYS:
+        raise HTTPException(status_code=400, detail="Invalid main account type")
+    if not sub_account_name or "." in sub_account_name or sub_account_name.startswith("$"):
+        raise HTTPException(status_code=400, detail="Invalid sub-account name")
+
+
+class AccountService:
+    """Felhasználói számlák tárolását és egyenleg frissítését kezelő szolgáltatás"""
+
+    @staticmethod
+    def is_per_user() -> bool:
+        return ACCOUNT_STORAGE_MODE == "per_user"
+
+    @staticmethod
+    async def get_user_accounts(user_id: str, create: bool = False) -> Optional[UserAccounts]:
+        """
+        Felhasználó számláinak lekérése
+
+        Args:
+            user_id: Felhasználó ID
+            create: Ha nincs még számlája, hozzon-e létre üreset
+
+        Returns:
+            UserAccounts vagy None, ha nem létezik (és create=False)
+        """
+        if AccountService.is_per_user():
+            doc = await UserAccountsDocument.find_one({"user_id": user_id})
+            if doc:
+                return doc.to_user_accounts()
+            if not create:
+                return None
+
+            empty = _empty_user_accounts()
+            # Upsert, hogy párhuzamos első hívások se hozzanak létre duplikátumot
+            await UserAccountsDocument.get_motor_collection().update_one(
+                {"user_id": user_id},
+                {"$setOnInsert": {
+                    "user_id": user_id,
+                    **{key: getattr(empty, key).model_dump() for key in MAIN_ACCOUNT_KEYS}
+                }},
+                upsert=True
+            )
+            return empty
+
+        all_accounts_doc = await AllUserAccountsDocument.find_one()
+        if all_accounts_doc and user_id in all_accounts_doc.accounts_by_user:
+            return all_accounts_doc.accounts_by_user[user_id]
+        if not create:
+            return None
+
+        if not all_accounts_doc:
+            all_accounts_doc = AllUserAccountsDocument(
+                accounts_by_user={user_id: _empty_user_accounts()}
+            )
+            await all_accounts_doc.insert()
+        else:
+            all_accounts_doc.accounts_by_user[user_id] = _empty_user_accounts()
+            await all_accounts_doc.save()
+
+        return all_accounts_doc.accounts_by_user[user_id]
+
+    @staticmethod
+    async def get_sub_account_currency(user_id: str, main_account: str, sub_account_name: str) -> str:
+        """Alszámla devizájának lekérése (alapértelmezés: HUF)"""
+        user_accounts = await AccountService.get_user_accounts(user_id)
+        if not user_accounts:
+            raise HTTPException(status_code=404, detail="Accounts not found for user")
+
+        main_account_details = getattr(user_accounts, main_account, None)
+        if not main_account_details or sub_account_name not in main_account_details.alszamlak:
+            return "HUF"
+        return main_account_details.alszamlak[sub_account_name].currency
+
+    @staticmethod
+    async def set_sub_account(user_id: str, main_account: str, sub_account_name: str, details: SubAccountDetails) -> None:
+        """Alszámla létrehozása vagy felülírása"""
+        _validate_keys(main_account, sub_account_name)
+
+        if AccountService.is_per_user():
+            await AccountService.get_user_accounts(user_id, create=True)
+            await UserAccountsDocument.get_motor_collection().update_one(
+                {"user_id": user_id},
+                {"$set": {f"{main_account}.alszamlak.{sub_account_name}": details.model_dump()}}
+            )
+            return
+
+        await AccountService.get_user_accounts(user_id, create=True)
+        all_accounts_doc = await AllUserAccountsDocument.find_one()
+        getattr(all_accounts_doc.accounts_by_user[user_id], main_account).alszamlak[sub_account_name] = details
+        await all_accounts_doc.save()
+
+    @staticmethod
+    async def delete_sub_account(user_id: str, main_account: str, sub_account_name: str) -> None:
+        """Alszámla törlése"""
+        _validate_keys(main_account, sub_account_name)
+        path = f"{main_account}.alszamlak.{sub_account_name}"
+
+        if AccountService.is_per_user():
+            if not await UserAccountsDocument.find_one({"user_id": user_id}):
+                raise HTTPException(status_code=404, detail="Accounts not found for user")
+            result = await UserAccountsDocument.get_motor_collection().update_one(
+                {"user_id": user_id, path: {"$exists": True}},
+                {"$unset": {path: ""}}
+            )
+            if result.modified_count == 0:
+                raise HTTPException(status_code=404, detail="Sub-account not found")
+            return
+
+        all_accounts_doc = await AllUserAccountsDocument.find_one()
+        if not all_accounts_doc or user_id not in all_accounts_doc.accounts_by_user:
+            raise HTTPException(status_code=404, detail="Accounts not found for user")
+
+        alszamlak = getattr(all_accounts_doc.accounts_by_user[user_id], main_account).alszamlak
+        if sub_account_name not in alszamlak:
+            raise HTTPException(status_code=404, detail="Sub-account not found")
+        del alszamlak[sub_account_name]
+        await all_accounts_doc.save()
+
+    @staticmethod
+    async def apply_balance_change(user_id: str, main_account: str, sub_account_name: str, amount_change: float) -> None:
+        """
+        Alszámla egyenlegének módosítása
+
+        per_user módban egyetlen atomi $inc művelet, így párhuzamos írók
+        nem írják felül egymás módosításait. Ha az alszámla még nem létezik,
+        HUF devizával jön létre (mint a global módban).
+        """
+        if main_account not in MAIN_ACCOUNT_KEYS:
+            raise HTTPException(status_code=400, detail=f"Main account {main_account} not found.")
+
+        if not AccountService.is_per_user():
+            all_accounts_doc = await AllUserAccountsDocument.find_one()
+            if not all_accounts_doc or user_id not in all_accounts_doc.accounts_by_user:
+                raise HTTPException(status_code=404, detail="Accounts not found for user")
+
+            alszamlak = getattr(all_accounts_doc.accounts_by_user[user_id], main_account).alszamlak
+            if sub_account_name not in alszamlak:
+                alszamlak[sub_account_name] = SubAccountDetails(balance=0.0, currency="HUF")
+            alszamlak[sub_account_name].balance += amount_change
+            await all_accounts_doc.save()
+            return
+
+        _validate_keys(main_account, sub_account_name)
+        collection = UserAccountsDocument.get_motor_collection()
+        path = f"{main_account}.alszamlak.{sub_account_name}"
+
+        # Két kör elég: ha a létrehozást egy párhuzamos kérés nyeri, a második körben már $inc megy
+        for _ in range(2):
+            result = await collection.update_one(
+                {"user_id": user_id, path: {"$exists": True}},
+                {"$inc": {f"{path}.balance": amount_change}}
+            )
+            if result.matched_count:
+                return
+
+            result = await collection.update_one(
+                {"user_id": user_id, path: {"$exists": False}},
+                {"$set": {path: {"balance": amount_change, "currency": "HUF"}}}
+            )
+            if result.matched_count:
+                return
+
+            if not await collection.count_documents({"user_id": user_id}, limit=1):
+                raise HTTPException(status_code=404, detail="Accounts not found for user")
+
+        raise HTTPException(status_code=409, detail="Balance update conflict, please retry")
+
+    @staticmethod
+    async def apply_balance_changes(user_id: str, changes: Dict[Tuple[str, str], float]) -> None:
+        """
+        Több alszámla egyenlegének módosítása egyszerre (pl. tömeges import)
+
+        Args:
+            changes: {(főszámla, alszámla): nettó változás}
+
+        global módban egyetlen betöltés + mentés; per_user módban a meglévő
+        alszámlák egyetlen $inc művelettel frissülnek, a még nem létezők
+        egyenként jönnek létre (apply_balance_change).
+        """
+        changes = {key: change for key, change in changes.items() if change}
+        if not changes:
+            return
+        for main_account, sub_account_name in changes:
+            _validate_keys(main_account, sub_account_name)
+
+        if not AccountService.is_per_user():
+            all_accounts_doc = await AllUserAccountsDocument.find_one()
+            if not all_accounts_doc or user_id not in all_accounts_doc.accounts_by_user:
+                raise HTTPException(status_code=404, detail="Accounts not found for user")
+
+            user_accounts = all_accounts_doc.accounts_by_user[user_id]
+            for (main_account, sub_account_name), change in changes.items():
+                alszamlak = getattr(user_accounts, main_account).alszamlak
+                if sub_account_name not in alszamlak:
+                    alszamlak[sub_account_name] = SubAccountDetails(balance=0.0, currency="HUF")
+                alszamlak[sub_account_name].balance += change
+            await all_accounts_doc.save()
+            return
+
+        user_accounts = await AccountService.get_user_accounts(user_id)
+        if not user_accounts:
+            raise HTTPException(status_code=404, detail="Accounts not found for user")
+
+        existing = {}
+        missing = {}
+        for (main_account, sub_account_name), change in changes.items():
+            target = existing if sub_account_name in getattr(user_accounts, main_account).alszamlak else missing
+            target[(main_account, sub_account_name)] = change
+
+        if existing:
+            paths = {key: f"{key[0]}.alszamlak.{key[1]}" for key in existing}
+            query = {"user_id": user_id}
+            query.update({path: {"$exists": True} for path in paths.values()})
+            result = await UserAccountsDocument.get_motor_collection().update_one(
+                query,
+                {"$inc": {f"{paths[key]}.balance": change for key, change in existing.items()}}
+            )
+            if not result.matched_count:
+                # Közben törölt alszámla: egyenkénti módosítás
+                missing.update(existing)
+
+        for (main_account, sub_account_name), change in missing.items():
+            await AccountService.apply_balance_change(user_id, main_account, sub_account_name, change)
+
+    @staticmethod
+    async def migrate_global_to_per_user(batch_size: int = 1000) -> int:
+        """
+        A közös `accounts` dokumentum szétbontása felhasználónkénti dokumentumokra.
+
+        Idempotens: a már létező per_user dokumentumokat felülírja a global
+        dokumentum tartalmával, így többször is lefuttatható a váltás előtt.
+
+        Returns:
+            A migrált felhasználók száma
+        """
+        all_accounts_doc = await AllUserAccountsDocument.find_one()
+        if not all_accounts_doc:
+            logger.info("No global accounts document found, nothing to migrate")
+            return 0
+
+        collection = UserAccountsDocument.get_motor_collection()
+        operations = []
+        migrated = 0
+
+        for user_id, user_accounts in all_accounts_doc.accounts_by_user.items():
+            operations.append(ReplaceOne(
+                {"user_id": user_id},
+                {
+                    "user_id": user_id,
+                    **{key: getattr(user_accounts, key).model_dump() for key in MAIN_ACCOUNT_KEYS}
+                },
+                upsert=True
+            ))
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                migrated += len(operations)
+                operations = []
+
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            migrated += len(operations)
+
+        logger.info(f"Migrated {migrated} users to per-user account documents")
+        return migrated
+
+
+# Manuális futtatáshoz (migráció):
+#   python -m app.services.account_service
+if __name__ == "__main__":
+    import asyncio
+    from app.core.db import init_db
+
+    async def main():
+        await init_db()
+        count = await AccountService.migrate_global_to_per_user()
+        print(f"Migrated {count} users. Set ACCOUNT_STORAGE_MODE=per_user to switch.")
+
+    asyncio.run(main())
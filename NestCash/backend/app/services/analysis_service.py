@@ -0,0 +1,114 @@
+# app/services/analysis_service.py
+from typing import Dict, Any
+from bson import ObjectId
+import logging
+
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# A tranzakció dátuma "YYYY-MM-DD" string, ebből képzünk dátumot a pipeline-ban
+_PARSED_DATE = {"$dateFromString": {"dateString": "$date", "format": "%Y-%m-%d"}}
+# Régi dokumentumokban hiányozhat az óra, a modell alapértéke 12
+_HOUR = {"$ifNull": ["$hour", 12]}
+_CATEGORY = {"$cond": [{"$eq": [{"$ifNull": ["$kategoria", ""]}, ""]}, "Egyéb", "$kategoria"]}
+_INCOME = {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}
+_EXPENSE = {"$cond": [{"$gt": ["$amount", 0]}, 0, {"$abs": "$amount"}]}
+
+
+class AnalysisService:
+    """Pénzügyi elemzés MongoDB aggregációval (egy lekérdezés, dokumentum hidratálás nélkül)"""
+
+    @staticmethod
+    def build_pipeline(user_id: str, start_date: str, end_date: str) -> list:
+        """
+        Az elemzéshez szükséges összes részösszeg egyetlen $facet pipeline-ban
+
+        Args:
+            user_id: Felhasználó ID
+            start_date: Kezdő dátum (YYYY-MM-DD)
+            end_date: Záró dátum (YYYY-MM-DD)
+        """
+        return [
+            {"$match": {
+                "user_id": ObjectId(user_id),
+                "date": {"$gte": start_date, "$lte": end_date}
+            }},
+            {"$project": {
+                "date": 1,
+                "amount": 1,
+                "hour": _HOUR,
+                "category": _CATEGORY,
+                "income": _INCOME,
+                "expense": _EXPENSE,
+                "is_expense": {"$lt": ["$amount", 0]},
+                # 1 = vasárnap ... 7 = szombat
+                "weekday": {"$dayOfWeek": _PARSED_DATE},
+                "month": {"$dateToString": {"format": "%Y-%m", "date": _PARSED_DATE}},
+                # %U: vasárnappal kezdődő hét, mint a Python strftime("%U")
+                "week": {"$dateToString": {"format": "%Y-W%U", "date": _PARSED_DATE}},
+            }},
+            {"$facet": {
+                "totals": [
+                    {"$group": {
+                        "_id": None,
+                        "total_income": {"$sum": "$income"},
+                        "total_expense": {"$sum": "$expense"},
+                        "count": {"$sum": 1},
+                        "min_date": {"$min": "$date"},
+                        "max_date": {"$max": "$date"},
+                    }}
+                ],
+                # A holtversenyt az első tranzakció (_id) dönti el, mint a Counter.most_common
+                "weekday_counts": [
+                    {"$group": {"_id": "$weekday", "count": {"$sum": 1}, "first_id": {"$min": "$_id"}}},
+                    {"$sort": {"count": -1, "first_id": 1}}
+                ],
+                "hour_counts": [
+                    {"$group": {"_id": "$hour", "count": {"$sum": 1}, "first_id": {"$min": "$_id"}}},
+                    {"$sort": {"count": -1, "first_id": 1}}
+                ],
+                "monthly": [
+                    {"$group": {"_id": "$month", "income": {"$sum": "$income"}, "expense": {"$sum": "$expense"}}},
+                    {"$sort": {"_id": 1}}
+                ],
+                "weekly": [
+                    {"$group": {"_id": "$week", "income": {"$sum": "$income"}, "expense": {"$sum": "$expense"}}},
+                    {"$sort": {"_id": -1}},
+                    {"$limit": 12},
+                    {"$sort": {"_id": 1}}
+                ],
+                "categories": [
+                    {"$group": {
+                        "_id": "$category",
+                        "income": {"$sum": "$income"},
+                        "expense": {"$sum": "$expense"},
+                        "count": {"$sum": 1},
+                        "first_id": {"$min": "$_id"},
+                    }},
+                    {"$sort": {"first_id": 1}}
+                ],
+                "expense_by_weekday": [
+                    {"$match": {"is_expense": True}},
+                    {"$group": {"_id": "$weekday", "expense": {"$sum": "$expense"}}}
+                ],
+                "expense_by_hour": [
+                    {"$match": {"is_expense": True}},
+                    {"$group": {"_id": "$hour", "count": {"$sum": 1}, "first_id": {"$min": "$_id"}}},
+                    {"$sort": {"first_id": 1}}
+                ],
+            }},
+        ]
+
+    @staticmethod
+    async def aggregate(user_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        """
+        Elemzési részösszegek lekérése egy round trip-ben
+
+        Returns:
+            A $facet eredménye; üres "totals" lista, ha nincs tranzakció
+        """
+        pipeline = AnalysisService.build_pipeline(user_id, start_date, end_date)
+        results = await Transaction.get_motor_collection().aggregate(pipeline).to_list(length=1)
+        return results[0] if results else {"totals": []}
+
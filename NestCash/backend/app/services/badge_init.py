@@ -1,326 +1,437 @@
 # app/services/badge_init.py
+import json
+import hashlib
 import logging
-from datetime import datetime
-from app.models.badge import BadgeType, BadgeCategory, BadgeRarity
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core.leases import acquire_lease, new_owner_id, release_lease, renew_lease
+from app.models.badge import BadgeType, BadgeCategory, BadgeRarity, UserBadge
+from app.models.seed_state import SeedStateDocument
+from app.models.user import UserDocument
 
 logger = logging.getLogger(__name__)
 
-async def initialize_default_badges():
-    """Alapértelmezett badge típusok inicializálása"""
-    
-    default_badges = [
-        # === TRANZAKCIÓ ALAPÚ BADGE-EK ===
-        {
-            "code": "first_transaction",
-            "name": "Első lépés",
-            "description": "Első tranzakció rögzítése",
-            "icon": "🌟",
-            "category": BadgeCategory.TRANSACTION,
-            "rarity": BadgeRarity.COMMON,
-            "condition_type": "transaction_count",
-            "condition_config": {"target_count": 1},
-            "points": 10
-        },
-        {
-            "code": "transaction_veteran",
-            "name": "Veterán",
-            "description": "100 tranzakció rögzítése",
-            "icon": "🏆",
-            "category": BadgeCategory.TRANSACTION,
-            "rarity": BadgeRarity.UNCOMMON,
-            "condition_type": "transaction_count",
-            "condition_config": {"target_count": 100},
-            "points": 50
-        },
-        {
-            "code": "big_spender",
-            "name": "Nagy költekező",
-            "description": "1 millió forint kiadás",
-            "icon": "💸",
-            "category": BadgeCategory.MILESTONE,
-            "rarity": BadgeRarity.RARE,
-            "condition_type": "spending_milestone",
-            "condition_config": {"target_amount": 1000000},
-            "points": 100
-        },
-        
-        # === MEGTAKARÍTÁSI BADGE-EK ===
-        {
-            "code": "first_savings",
-            "name": "Takarékos kezdet",
-            "description": "Első megtakarítás",
-            "icon": "🐷",
-            "category": BadgeCategory.SAVINGS,
-            "rarity": BadgeRarity.COMMON,
-            "condition_type": "saving_milestone",
-            "condition_config": {"target_amount": 10000, "account_type": "megtakaritas"},
-            "points": 20
-        },
-        {
-            "code": "savings_master",
-            "name": "Megtakarítási mester",
-            "description": "500 ezer forint megtakarítás",
-            "icon": "💰",
-            "category": BadgeCategory.SAVINGS,
-            "rarity": BadgeRarity.EPIC,
-            "condition_type": "saving_milestone",
-            "condition_config": {"target_amount": 500000, "account_type": "megtakaritas"},
-            "points": 200
-        },
-        
-        # === TUDÁS ALAPÚ BADGE-EK ===
-        {
-            "code": "knowledge_beginner",
-            "name": "Tudásszomjas",
-            "description": "Első lecke teljesítése",
-            "icon": "📚",
-            "category": BadgeCategory.KNOWLEDGE,
-            "rarity": BadgeRarity.COMMON,
-            "condition_type": "knowledge_lessons",
-            "condition_config": {"target_lessons": 1, "min_quiz_score": 70},
-            "points": 15
-        },
-        {
-            "code": "knowledge_expert",
-            "name": "Pénzügyi szakértő",
-            "description": "10 lecke teljesítése",
-            "icon": "🎓",
-            "category": BadgeCategory.KNOWLEDGE,
-            "rarity": BadgeRarity.UNCOMMON,
-            "condition_type": "knowledge_lessons",
-            "condition_config": {"target_lessons": 10, "min_quiz_score": 70},
-            "points": 75
-        },
-        {
-            "code": "quiz_perfectionist",
-            "name": "Perfekcionista",
-            "description": "5 lecke 100%-os eredménnyel",
-            "icon": "💯",
-            "category": BadgeCategory.KNOWLEDGE,
-            "rarity": BadgeRarity.RARE,
-            "condition_type": "knowledge_lessons",
-            "condition_config": {"target_lessons": 5, "min_quiz_score": 100},
-            "points": 150
-        },
-        
-        # === SOROZAT ALAPÚ BADGE-EK ===
-        {
-            "code": "streak_week",
-            "name": "Heti rutin",
-            "description": "7 napos tanulási sorozat",
-            "icon": "🔥",
-            "category": BadgeCategory.STREAK,
-            "rarity": BadgeRarity.COMMON,
-            "condition_type": "knowledge_streak",
-            "condition_config": {"target_streak": 7},
-            "points": 30
-        },
-        {
-            "code": "streak_month",
-            "name": "Havi bajnok",
-            "description": "30 napos tanulási sorozat",
-            "icon": "🚀",
-            "category": BadgeCategory.STREAK,
-            "rarity": BadgeRarity.RARE,
-            "condition_config": {"target_streak": 30},
-            "condition_type": "knowledge_streak",
-            "points": 200
-        },
-        {
-            "code": "streak_legendary",
-            "name": "Legendás kitartás",
-            "description": "100 napos tanulási sorozat",
-            "icon": "👑",
-            "category": BadgeCategory.STREAK,
-            "rarity": BadgeRarity.LEGENDARY,
-            "condition_type": "knowledge_streak",
-            "condition_config": {"target_streak": 100},
-            "points": 500
-        },
-        
-        # === KÖZÖSSÉGI BADGE-EK ===
-        {
-            "code": "social_first_post",
-            "name": "Közösségi tag",
-            "description": "Első poszt megosztása",
-            "icon": "💬",
-            "category": BadgeCategory.SOCIAL,
-            "rarity": BadgeRarity.COMMON,
-            "condition_type": "social_posts",
-            "condition_config": {"target_posts": 1},
-            "points": 15
-        },
-        {
-            "code": "social_active",
-            "name": "Aktív közösségi tag",
-            "description": "10 poszt megosztása",
-            "icon": "🗣️",
-            "category": BadgeCategory.SOCIAL,
-            "rarity": BadgeRarity.UNCOMMON,
-            "condition_type": "social_posts",
-            "condition_config": {"target_posts": 10},
-            "points": 50
-        },
-        
-        # === MÉRFÖLDKŐ BADGE-EK ===
-        {
-            "code": "welcome_badge",
-            "name": "Üdvözlet!",
-            "description": "Regisztráció a NestCash-be",
-            "icon": "👋",
-            "category": BadgeCategory.MILESTONE,
-            "rarity": BadgeRarity.COMMON,
-            "condition_type": "milestone_days",
-            "condition_config": {"target_days": 0},
-            "points": 5
-        },
-        {
-            "code": "loyal_user",
-            "name": "Hűséges felhasználó",
-            "description": "30 napja regisztrált",
-            "icon": "💙",
-            "category": BadgeCategory.MILESTONE,
-            "rarity": BadgeRarity.UNCOMMON,
-            "condition_type": "milestone_days",
-            "condition_config": {"target_days": 30},
-            "points": 40
-        },
-        {
-            "code": "annual_user",
-            "name": "Éves tag",
-            "description": "1 éve használja a NestCash-t",
-            "icon": "🎉",
-            "category": BadgeCategory.MILESTONE,
-            "rarity": BadgeRarity.EPIC,
-            "condition_type": "milestone_days",
-            "condition_config": {"target_days": 365},
-            "points": 300
-        },
-        
-        # === KÜLÖNLEGES BADGE-EK ===
-        {
-            "code": "early_adopter",
-            "name": "Korai elfogadó",
-            "description": "A NestCash első felhasználói között",
-            "icon": "🌅",
-            "category": BadgeCategory.SPECIAL,
-            "rarity": BadgeRarity.LEGENDARY,
-            "condition_type": "milestone_days",
-            "condition_config": {"target_days": 0},  # Manuálisan adható
-            "points": 1000
-        },
-        {
-            "code": "beta_tester",
-            "name": "Béta tesztelő",
-            "description": "Segített a fejlesztésben",
-            "icon": "🧪",
-            "category": BadgeCategory.SPECIAL,
-            "rarity": BadgeRarity.EPIC,
-            "condition_type": "milestone_days",
-            "condition_config": {"target_days": 0},  # Manuálisan adható
-            "points": 500
-        },
-        
-        # === SZINTES BADGE-EK ===
-        {
-            "code": "transaction_master",
-            "name": "Tranzakció mester",
-            "description": "Tranzakciók rögzítésének mestere",
-            "icon": "📊",
-            "category": BadgeCategory.TRANSACTION,
-            "rarity": BadgeRarity.RARE,
-            "condition_type": "transaction_count",
-            "condition_config": {"target_count": 50},
-            "points": 25,
-            "has_levels": True,
-            "max_level": 10,  # 50, 100, 200, 400... tranzakció
-            "is_repeatable": True
-        },
-        {
-            "code": "savings_champion",
-            "name": "Megtakarítási bajnok",
-            "description": "Folyamatos megtakarítás",
-            "icon": "🏅",
-            "category": BadgeCategory.SAVINGS,
-            "rarity": BadgeRarity.UNCOMMON,
-            "condition_type": "saving_milestone",
-            "condition_config": {"target_amount": 50000, "account_type": "megtakaritas"},
-            "points": 50,
-            "has_levels": True,
-            "max_level": 5,  # 50k, 100k, 250k, 500k, 1M
-            "is_repeatable": True
-        }
+WELCOME_BADGE_CODE = "welcome_badge"
+# Egy bulk_write hívásba kerülő üdvözlő badge upsert-ek száma
+WELCOME_BATCH_SIZE = 1000
+# Az üdvözlő badge feltöltés ennyivel a legutóbbi pont előttről indul újra
+# (a kliens oldali ObjectId-k több folyamatnál nem szigorúan monoton növők)
+WELCOME_CURSOR_OVERLAP = timedelta(minutes=10)
+# Egyszerre csak egy folyamat osztja ki az üdvözlő badge-eket (több worker indulásakor)
+WELCOME_LEASE_NAME = "seed:welcome_badges"
+WELCOME_LEASE_SECONDS = 300
+
+# Alapértelmezett badge típusok; módosításuk a következő induláskor érvényesül
+DEFAULT_BADGES = [
+    # === TRANZAKCIÓ ALAPÚ BADGE-EK ===
+    {
+        "code": "first_transaction",
+        "name": "Első lépés",
+        "description": "Első tranzakció rögzítése",
+        "icon": "🌟",
+        "category": BadgeCategory.TRANSACTION,
+        "rarity": BadgeRarity.COMMON,
+        "condition_type": "transaction_count",
+        "condition_config": {"target_count": 1},
+        "points": 10
+    },
+    {
+        "code": "transaction_veteran",
+        "name": "Veterán",
+        "description": "100 tranzakció rögzítése",
+        "icon": "🏆",
+        "category": BadgeCategory.TRANSACTION,
+        "rarity": BadgeRarity.UNCOMMON,
+        "condition_type": "transaction_count",
+        "condition_config": {"target_count": 100},
+        "points": 50
+    },
+    {
+        "code": "big_spender",
+        "name": "Nagy költekező",
+        "description": "1 millió forint kiadás",
+        "icon": "💸",
+        "category": BadgeCategory.MILESTONE,
+        "rarity": BadgeRarity.RARE,
+        "condition_type": "spending_milestone",
+        "condition_config": {"target_amount": 1000000},
+        "points": 100
+    },
+
+    # === MEGTAKARÍTÁSI BADGE-EK ===
+    {
+        "code": "first_savings",
+        "name": "Takarékos kezdet",
+        "description": "Első megtakarítás",
+        "icon": "🐷",
+        "category": BadgeCategory.SAVINGS,
+        "rarity": BadgeRarity.COMMON,
+        "condition_type": "saving_milestone",
+        "condition_config": {"target_amount": 10000, "account_type": "megtakaritas"},
+        "points": 20
+    },
+    {
+        "code": "savings_master",
+        "name": "Megtakarítási mester",
+        "description": "500 ezer forint megtakarítás",
+        "icon": "💰",
+        "category": BadgeCategory.SAVINGS,
+        "rarity": BadgeRarity.EPIC,
+        "condition_type": "saving_milestone",
+        "condition_config": {"target_amount": 500000, "account_type": "megtakaritas"},
+        "points": 200
+    },
+
+    # === TUDÁS ALAPÚ BADGE-EK ===
+    {
+        "code": "knowledge_beginner",
+        "name": "Tudásszomjas",
+        "description": "Első lecke teljesítése",
+        "icon": "📚",
+        "category": BadgeCategory.KNOWLEDGE,
+        "rarity": BadgeRarity.COMMON,
+        "condition_type": "knowledge_lessons",
+        "condition_config": {"target_lessons": 1, "min_quiz_score": 70},
+        "points": 15
+    },
+    {
+        "code": "knowledge_expert",
+        "name": "Pénzügyi szakértő",
+        "description": "10 lecke teljesítése",
+        "icon": "🎓",
+        "category": BadgeCategory.KNOWLEDGE,
+        "rarity": BadgeRarity.UNCOMMON,
+        "condition_type": "knowledge_lessons",
+        "condition_config": {"target_lessons": 10, "min_quiz_score": 70},
+        "points": 75
+    },
+    {
+        "code": "quiz_perfectionist",
+        "name": "Perfekcionista",
+        "description": "5 lecke 100%-os eredménnyel",
+        "icon": "💯",
+        "category": BadgeCategory.KNOWLEDGE,
+        "rarity": BadgeRarity.RARE,
+        "condition_type": "knowledge_lessons",
+        "condition_config": {"target_lessons": 5, "min_quiz_score": 100},
+        "points": 150
+    },
+
+    # === SOROZAT ALAPÚ BADGE-EK ===
+    {
+        "code": "streak_week",
+        "name": "Heti rutin",
+        "description": "7 napos tanulási sorozat",
+        "icon": "🔥",
+        "category": BadgeCategory.STREAK,
+        "rarity": BadgeRarity.COMMON,
+        "condition_type": "knowledge_streak",
+        "condition_config": {"target_streak": 7},
+        "points": 30
+    },
+    {
+        "code": "streak_month",
+        "name": "Havi bajnok",
+        "description": "30 napos tanulási sorozat",
+        "icon": "🚀",
+        "category": BadgeCategory.STREAK,
+        "rarity": BadgeRarity.RARE,
+        "condition_config": {"target_streak": 30},
+        "condition_type": "knowledge_streak",
+        "points": 200
+    },
+    {
+        "code": "streak_legendary",
+        "name": "Legendás kitartás",
+        "description": "100 napos tanulási sorozat",
+        "icon": "👑",
+        "category": BadgeCategory.STREAK,
+        "rarity": BadgeRarity.LEGENDARY,
+        "condition_type": "knowledge_streak",
+        "condition_config": {"target_streak": 100},
+        "points": 500
+    },
+
+    # === KÖZÖSSÉGI BADGE-EK ===
+    {
+        "code": "social_first_post",
+        "name": "Közösségi tag",
+        "description": "Első poszt megosztása",
+        "icon": "💬",
+        "category": BadgeCategory.SOCIAL,
+        "rarity": BadgeRarity.COMMON,
+        "condition_type": "social_posts",
+        "condition_config": {"target_posts": 1},
+        "points": 15
+    },
+    {
+        "code": "social_active",
+        "name": "Aktív közösségi tag",
+        "description": "10 poszt megosztása",
+        "icon": "🗣️",
+        "category": BadgeCategory.SOCIAL,
+        "rarity": BadgeRarity.UNCOMMON,
+        "condition_type": "social_posts",
+        "condition_config": {"target_posts": 10},
+        "points": 50
+    },
+
+    # === MÉRFÖLDKŐ BADGE-EK ===
+    {
+        "code": "welcome_badge",
+        "name": "Üdvözlet!",
+        "description": "Regisztráció a NestCash-be",
+        "icon": "👋",
+        "category": BadgeCategory.MILESTONE,
+        "rarity": BadgeRarity.COMMON,
+        "condition_type": "milestone_days",
+        "condition_config": {"target_days": 0},
+        "points": 5
+    },
+    {
+        "code": "loyal_user",
+        "name": "Hűséges felhasználó",
+        "description": "30 napja regisztrált",
+        "icon": "💙",
+        "category": BadgeCategory.MILESTONE,
+        "rarity": BadgeRarity.UNCOMMON,
+        "condition_type": "milestone_days",
+        "condition_config": {"target_days": 30},
+        "points": 40
+    },
+    {
+        "code": "annual_user",
+        "name": "Éves tag",
+        "description": "1 éve használja a NestCash-t",
+        "icon": "🎉",
+        "category": BadgeCategory.MILESTONE,
+        "rarity": BadgeRarity.EPIC,
+        "condition_type": "milestone_days",
+        "condition_config": {"target_days": 365},
+        "points": 300
+    },
+
+    # === KÜLÖNLEGES BADGE-EK ===
+    {
+        "code": "early_adopter",
+        "name": "Korai elfogadó",
+        "description": "A NestCash első felhasználói között",
+        "icon": "🌅",
+        "category": BadgeCategory.SPECIAL,
+        "rarity": BadgeRarity.LEGENDARY,
+        "condition_type": "milestone_days",
+        "condition_config": {"target_days": 0},  # Manuálisan adható
+        "points": 1000
+    },
+    {
+        "code": "beta_tester",
+        "name": "Béta tesztelő",
+        "description": "Segített a fejlesztésben",
+        "icon": "🧪",
+        "category": BadgeCategory.SPECIAL,
+        "rarity": BadgeRarity.EPIC,
+        "condition_type": "milestone_days",
+        "condition_config": {"target_days": 0},  # Manuálisan adható
+        "points": 500
+    },
+
+    # === SZINTES BADGE-EK ===
+    {
+        "code": "transaction_master",
+        "name": "Tranzakció mester",
+        "description": "Tranzakciók rögzítésének mestere",
+        "icon": "📊",
+        "category": BadgeCategory.TRANSACTION,
+        "rarity": BadgeRarity.RARE,
+        "condition_type": "transaction_count",
+        "condition_config": {"target_count": 50},
+        "points": 25,
+        "has_levels": True,
+        "max_level": 10,  # 50, 100, 200, 400... tranzakció
+        "is_repeatable": True
+    },
+    {
+        "code": "savings_champion",
+        "name": "Megtakarítási bajnok",
+        "description": "Folyamatos megtakarítás",
+        "icon": "🏅",
+        "category": BadgeCategory.SAVINGS,
+        "rarity": BadgeRarity.UNCOMMON,
+        "condition_type": "saving_milestone",
+        "condition_config": {"target_amount": 50000, "account_type": "megtakaritas"},
+        "points": 50,
+        "has_levels": True,
+        "max_level": 5,  # 50k, 100k, 250k, 500k, 1M
+        "is_repeatable": True
+    }
+]
+
+
+def _plain(value: Any) -> Any:
+    """Enum értékek kibontása (a definíciók hash-eléséhez és a nyers Mongo íráshoz)"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def definitions_hash(definitions: List[Dict[str, Any]]) -> str:
+    """A badge definíciók tartalmi hash-e (kulcssorrendtől független)"""
+    canonical = json.dumps(_plain(definitions), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def _get_seed_state(name: str) -> Dict[str, Any]:
+    return await SeedStateDocument.get_motor_collection().find_one({"name": name}) or {}
+
+
+async def _set_seed_state(name: str, **fields) -> None:
+    await SeedStateDocument.get_motor_collection().update_one(
+        {"name": name},
+        {"$set": {**fields, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+def _badge_operations(badge_data: Dict[str, Any], now: datetime) -> List[UpdateOne]:
+    """
+    Egy badge definíció upsert-je
+
+    A definíció mezői mindig frissülnek; a condition_config (testreszabható)
+    és a modell alapértelmezései csak beszúráskor íródnak, illetve a
+    condition_config akkor, ha a meglévő üres.
+    """
+    document = _plain(BadgeType(**badge_data).model_dump(exclude={"id", "revision_id"}))
+    update_fields = {key: document[key] for key in badge_data if key != "condition_config"}
+    update_fields["updated_at"] = now
+    insert_fields = {key: value for key, value in document.items() if key not in update_fields}
+    insert_fields["created_at"] = now
+
+    return [
+        UpdateOne({"code": badge_data["code"]}, {"$set": update_fields, "$setOnInsert": insert_fields}, upsert=True),
+        UpdateOne(
+            {"code": badge_data["code"], "condition_config": {"$in": [{}, None]}},
+            {"$set": {"condition_config": document["condition_config"]}}
+        ),
     ]
-    
+
+
+async def initialize_default_badges(force: bool = False):
+    """
+    Alapértelmezett badge típusok inicializálása
+
+    Egyetlen bulk_write-tal; ha a definíciók hash-e nem változott és minden
+    badge megvan, nem ír semmit.
+    """
     try:
-        created_count = 0
-        updated_count = 0
-        
-        for badge_data in default_badges:
-            # Ellenőrizzük, hogy már létezik-e
-            existing_badge = await BadgeType.find_one({"code": badge_data["code"]})
-            
-            if existing_badge:
-                # Frissítjük a meglévőt (kivéve a condition_config-ot, hogy ne törjük el a testreszabásokat)
-                for key, value in badge_data.items():
-                    if key != "condition_config" or not existing_badge.condition_config:
-                        setattr(existing_badge, key, value)
-                
-                existing_badge.updated_at = datetime.utcnow()
-                await existing_badge.save()
-                updated_count += 1
-                
-            else:
-                # Új badge létrehozása
-                new_badge = BadgeType(**badge_data)
-                await new_badge.insert()
-                created_count += 1
-        
-        logger.info(f"Badge initialization completed: {created_count} created, {updated_count} updated")
+        content_hash = definitions_hash(DEFAULT_BADGES)
+        codes = [badge_data["code"] for badge_data in DEFAULT_BADGES]
+
+        if not force:
+            state = await _get_seed_state("badge_types")
+            if state.get("content_hash") == content_hash:
+                existing_count = await BadgeType.get_motor_collection().count_documents({"code": {"$in": codes}})
+                if existing_count == len(codes):
+                    logger.info("Badge definitions unchanged, skipping initialization")
+                    return True
+
+        now = datetime.utcnow()
+        operations = [
+            operation
+            for badge_data in DEFAULT_BADGES
+            for operation in _badge_operations(badge_data, now)
+        ]
+        result = await BadgeType.get_motor_collection().bulk_write(operations, ordered=True)
+        await _set_seed_state("badge_types", content_hash=content_hash)
+
+        # A badge katalógus cache-t újra kell tölteni
+        from app.services.badge_service import badge_service
+        badge_service.invalidate_catalogue()
+
+        logger.info(
+            f"Badge initialization completed: {result.upserted_count} created, "
+            f"{len(DEFAULT_BADGES) - result.upserted_count} updated"
+        )
         return True
-        
+
     except Exception as e:
         logger.error(f"Error initializing badges: {e}")
         return False
 
 async def award_welcome_badges():
-    """Üdvözlő badge-ek odaítélése minden regisztrált felhasználónak"""
+    """
+    Üdvözlő badge-ek odaítélése a regisztrált felhasználóknak
+
+    Csak a legutóbbi futás óta regisztrált felhasználókat nézzük (az _id
+    időbélyege alapján, kis átfedéssel); az upsert $setOnInsert-tel
+    idempotens, így a már meglévő badge nem duplikálódik. A párhuzamosan
+    induló workerek közül csak a zár tartója fut (két egyidejű upsert
+    ugyanarra a felhasználóra egyedi index nélkül két badge-et szúrna be).
+    """
+    owner = new_owner_id()
     try:
-        from app.models.user import UserDocument
-        from app.models.badge import UserBadge
-        from datetime import datetime
-        
-        # Minden felhasználó lekérése
-        users = await UserDocument.find({}).to_list()
-        
-        welcome_badge_code = "welcome_badge"
+        if not await acquire_lease(WELCOME_LEASE_NAME, owner, WELCOME_LEASE_SECONDS):
+            logger.info("Welcome badges are being awarded by another process, skipping")
+            return True
+
+        state = await _get_seed_state("welcome_badges")
+        user_filter = {}
+        if state.get("cursor"):
+            user_filter["_id"] = {"$gte": ObjectId.from_datetime(state["cursor"] - WELCOME_CURSOR_OVERLAP)}
+
+        started = datetime.utcnow()
+        collection = UserBadge.get_motor_collection()
         awarded_count = 0
-        
-        for user in users:
-            # Ellenőrizzük, hogy már megkapta-e
-            existing = await UserBadge.find_one({
-                "user_id": user.id,
-                "badge_code": welcome_badge_code
-            })
-            
-            if not existing:
-                welcome_badge = UserBadge(
-                    user_id=user.id,
-                    badge_code=welcome_badge_code,
-                    context_data={
-                        "registration_date": user.registration_date.isoformat(),
-                        "auto_awarded": True
-                    }
-                )
-                await welcome_badge.insert()
-                awarded_count += 1
-        
+        operations = []
+
+        async def flush():
+            nonlocal awarded_count, operations
+            result = await collection.bulk_write(operations, ordered=False)
+            awarded_count += result.upserted_count
+            operations = []
+            await renew_lease(WELCOME_LEASE_NAME, owner, WELCOME_LEASE_SECONDS)
+
+        async for user in UserDocument.get_motor_collection().find(user_filter, {"registration_date": 1}):
+            registration_date = user.get("registration_date")
+            welcome_badge = UserBadge(
+                user_id=user["_id"],
+                badge_code=WELCOME_BADGE_CODE,
+                context_data={
+                    "registration_date": registration_date.isoformat()
+                    if isinstance(registration_date, datetime) else str(registration_date),
+                    "auto_awarded": True
+                }
+            )
+            operations.append(UpdateOne(
+                {"user_id": user["_id"], "badge_code": WELCOME_BADGE_CODE},
+                {"$setOnInsert": welcome_badge.model_dump(exclude={"id", "revision_id"})},
+                upsert=True
+            ))
+            if len(operations) >= WELCOME_BATCH_SIZE:
+                await flush()
+        if operations:
+            await flush()
+
+        await _set_seed_state("welcome_badges", cursor=started)
         logger.info(f"Welcome badges awarded to {awarded_count} users")
         return True
-        
+
     except Exception as e:
         logger.error(f"Error awarding welcome badges: {e}")
         return False
+    finally:
+        try:
+            await release_lease(WELCOME_LEASE_NAME, owner)
+        except Exception as e:
+            logger.error(f"Error releasing welcome badge lease: {e}")
 
 # Convenience funkció az összes inicializáláshoz
 async def initialize_badge_system():
@@ -0,0 +1,147 @@
+# app/services/badge_leaderboard.py
+from typing import Dict, List, Optional, Any
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+
+from app.models.badge import BadgeType, UserBadge
+from app.models.user import UserDocument
+
+logger = logging.getLogger(__name__)
+
+# A leaderboard pillanatkép élettartama (másodperc)
+LEADERBOARD_TTL_SECONDS = int(os.getenv("BADGE_LEADERBOARD_TTL_SECONDS", "60"))
+
+# A pillanatképben részletesen (felhasználónévvel, legutóbbi badge-dzsel) tárolt helyezések száma
+LEADERBOARD_TOP_SIZE = 50
+
+
+@dataclass
+class LeaderboardSnapshot:
+    built_at: datetime
+    top: List[Dict[str, Any]] = field(default_factory=list)
+    ranks: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_users(self) -> int:
+        return len(self.ranks)
+
+
+def build_leaderboard_pipeline() -> List[Dict[str, Any]]:
+    """
+    Felhasználónkénti badge szám és pontszám, csökkenő sorrendben
+
+    A pontszám badge típusonként BadgeType.points * szint, a badge típusok
+    pontjait $lookup hozza be (felhasználó + badge kód csoportonként egyszer).
+    """
+    return [
+        {"$group": {
+            "_id": {"user_id": "$user_id", "badge_code": "$badge_code"},
+            "count": {"$sum": 1},
+            "levels": {"$sum": "$level"},
+        }},
+        {"$lookup": {
+            "from": BadgeType.Settings.name,
+            "localField": "_id.badge_code",
+            "foreignField": "code",
+            "as": "badge_type",
+        }},
+        {"$group": {
+            "_id": "$_id.user_id",
+            "total_badges": {"$sum": "$count"},
+            "total_points": {"$sum": {"$multiply": [
+                {"$ifNull": [{"$arrayElemAt": ["$badge_type.points", 0]}, 0]},
+                "$levels"
+            ]}},
+        }},
+        {"$sort": {"total_badges": -1, "total_points": -1, "_id": 1}},
+    ]
+
+
+class BadgeLeaderboardService:
+    """Badge leaderboard időszakosan frissített pillanatképből"""
+
+    def __init__(self, ttl_seconds: int = LEADERBOARD_TTL_SECONDS, top_size: int = LEADERBOARD_TOP_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.top_size = top_size
+        self._snapshot: Optional[LeaderboardSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Pillanatkép eldobása; a következő lekérés újraépíti"""
+        self._snapshot = None
+
+    def _is_fresh(self) -> bool:
+        return (self._snapshot is not None and
+                datetime.utcnow() - self._snapshot.built_at < timedelta(seconds=self.ttl_seconds))
+
+    async def get_snapshot(self) -> LeaderboardSnapshot:
+        """Friss pillanatkép; lejárt TTL esetén egyetlen kérés építi újra, a többi megvárja"""
+        if self._is_fresh():
+            return self._snapshot
+
+        async with self._lock:
+            if not self._is_fresh():
+                self._snapshot = await self.build_snapshot()
+        return self._snapshot
+
+    async def build_snapshot(self) -> LeaderboardSnapshot:
+        """Pillanatkép építése: egy aggregáció a helyezésekhez, egy a top felhasználók legutóbbi badge-éhez"""
+        snapshot = LeaderboardSnapshot(built_at=datetime.utcnow())
+
+        cursor = UserBadge.get_motor_collection().aggregate(build_leaderboard_pipeline(), allowDiskUse=True)
+        async for row in cursor:
+            rank = len(snapshot.ranks) + 1
+            snapshot.ranks[str(row["_id"])] = rank
+            if rank <= self.top_size:
+                snapshot.top.append({
+                    "rank": rank,
+                    "user_id": row["_id"],
+                    "total_badges": row["total_badges"],
+                    "total_points": row["total_points"],
+                })
+
+        if snapshot.top:
+            top_ids = [entry["user_id"] for entry in snapshot.top]
+
+            recent_badges = {}
+            recent_pipeline = [
+                {"$match": {"user_id": {"$in": top_ids}}},
+                {"$sort": {"earned_at": -1}},
+                {"$group": {"_id": "$user_id", "badge": {"$first": "$$ROOT"}}},
+            ]
+            async for row in UserBadge.get_motor_collection().aggregate(recent_pipeline):
+                recent_badges[row["_id"]] = row["badge"]
+
+            users = await UserDocument.get_motor_collection().find(
+                {"_id": {"$in": top_ids}}, {"username": 1}
+            ).to_list(length=None)
+            usernames = {user["_id"]: user["username"] for user in users}
+
+            for entry in snapshot.top:
+                entry["username"] = usernames.get(entry["user_id"])
+                entry["recent_badge"] = recent_badges.get(entry["user_id"])
+                entry["user_id"] = str(entry["user_id"])
+
+        logger.info(f"Badge leaderboard snapshot built with {snapshot.total_users} users")
+        return snapshot
+
+    async def get_leaderboard(self, user_id: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Leaderboard a pillanatképből
+
+        Returns:
+            {"leaderboard": top `limit` bejegyzés, "user_rank": a kérő helyezése vagy None,
+             "total_users": rangsorolt felhasználók száma}
+        """
+        snapshot = await self.get_snapshot()
+        return {
+            "leaderboard": [entry for entry in snapshot.top[:limit] if entry["username"]],
+            "user_rank": snapshot.ranks.get(user_id),
+            "total_users": snapshot.total_users,
+        }
+
+
+badge_leaderboard_service = BadgeLeaderboardService()
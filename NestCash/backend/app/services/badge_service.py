@@ -1,24 +1,47 @@
 # app/services/badge_service.py
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable
+from collections import defaultdict
 from beanie import PydanticObjectId
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta
 import logging
 
 from app.models.badge import (
     BadgeType, UserBadge, BadgeProgress, BadgeEarnedEvent,
-    BadgeCategory, BadgeRarity
+    BadgeCategory, BadgeRarity, UserBadgeCounters
 )
 from app.models.transaction import Transaction
 from app.models.knowledge import UserProgress
 from app.models.forum_models import ForumPostDocument, LikeDocument, FollowDocument
 from app.models.user import UserDocument
+from app.core.job_queue import job_queue
 
 logger = logging.getLogger(__name__)
 
+# Esemény típus -> badge feltétel típus mapping
+EVENT_CONDITION_TYPES = {
+    "transaction_created": ["transaction_count", "spending_milestone", "saving_milestone"],
+    "lesson_completed": ["knowledge_lessons", "knowledge_streak", "quiz_performance"],
+    "forum_post_created": ["social_posts", "social_engagement"],
+    "daily_login": ["streak_login", "milestone_days"],
+    "account_created": ["milestone_registration"]
+}
+
+# A badge katalógus cache élettartama (másodperc); admin módosításkor azonnal érvénytelenítjük
+CATALOGUE_TTL_SECONDS = 300
+
+# Ennyiszer próbáljuk újra a számlálók újraépítését, ha közben $inc érkezett
+COUNTER_REBUILD_ATTEMPTS = 3
+
 class BadgeService:
     """Badge rendszer szolgáltatásai"""
     
+    def __init__(self):
+        self._catalogue: Dict[str, List[BadgeType]] = {}
+        self._catalogue_loaded_at: Optional[datetime] = None
+    
     async def check_and_award_badges(self, user_id: str, trigger_event: str, context: Dict[str, Any] = None) -> List[BadgeEarnedEvent]:
         """
         Ellenőrzi és odaítéli a badge-eket egy esemény alapján
@@ -31,35 +54,41 @@ class BadgeService:
         Returns:
             Lista a megszerzett badge-ekről
         """
-        earned_badges = []
-        
         try:
-            # Aktív badge típusok lekérése az esemény típusa alapján
+            # Aktív badge típusok a cache-elt katalógusból
             relevant_badges = await self._get_relevant_badges(trigger_event)
+            if not relevant_badges:
+                return []
             
+            # A felhasználó már megszerzett badge-ei egyetlen lekérdezéssel
+            owned_badges = await UserBadge.find({
+                "user_id": ObjectId(user_id),
+                "badge_code": {"$in": [bt.code for bt in relevant_badges]}
+            }).to_list()
+            owned_by_code = {ub.badge_code: ub for ub in owned_badges}
+            
+            # Az ellenőrzésekhez szükséges adatok, eseményenként legfeljebb egyszer betöltve
+            evaluation_cache: Dict[str, Any] = {}
+            
+            awards = []
+            progress_updates = []
             for badge_type in relevant_badges:
                 # Ellenőrizzük, hogy a felhasználó már megszerezte-e
-                if not badge_type.is_repeatable:
-                    existing = await UserBadge.find_one({
-                        "user_id": ObjectId(user_id),
-                        "badge_code": badge_type.code
-                    })
-                    if existing:
-                        continue
+                if not badge_type.is_repeatable and badge_type.code in owned_by_code:
+                    continue
                 
                 # Feltétel ellenőrzése
                 is_earned, current_progress = await self._check_badge_condition(
-                    user_id, badge_type, context
+                    user_id, badge_type, context, evaluation_cache
                 )
                 
                 if is_earned:
-                    # Badge odaítélése
-                    earned_badge = await self._award_badge(user_id, badge_type, context)
-                    if earned_badge:
-                        earned_badges.append(earned_badge)
+                    awards.append(badge_type)
                 else:
-                    # Haladás frissítése
-                    await self._update_badge_progress(user_id, badge_type, current_progress)
+                    progress_updates.append((badge_type, current_progress))
+            
+            earned_badges = await self._award_badges(user_id, awards, owned_by_code, context)
+            await self._update_badge_progress_bulk(user_id, progress_updates)
             
             return earned_badges
             
@@ -67,31 +96,165 @@ class BadgeService:
             logger.error(f"Error checking badges for user {user_id}: {e}")
             return []
     
-    async def _get_relevant_badges(self, trigger_event: str) -> List[BadgeType]:
-        """Releváns badge típusok lekérése esemény alapján"""
+    # ----------- Katalógus cache -----------
+    
+    def invalidate_catalogue(self):
+        """Badge katalógus cache érvénytelenítése (badge típus módosításakor)"""
+        self._catalogue = {}
+        self._catalogue_loaded_at = None
+    
+    async def _load_catalogue(self):
+        """Aktív badge típusok betöltése, trigger eseményenként indexelve"""
+        badge_types = await BadgeType.find({"is_active": True}).to_list()
         
-        # Esemény típus -> badge feltétel típus mapping
-        event_mapping = {
-            "transaction_created": ["transaction_count", "spending_milestone", "saving_milestone"],
-            "lesson_completed": ["knowledge_lessons", "knowledge_streak", "quiz_performance"],
-            "forum_post_created": ["social_posts", "social_engagement"],
-            "daily_login": ["streak_login", "milestone_days"],
-            "account_created": ["milestone_registration"]
+        by_condition = defaultdict(list)
+        for badge_type in badge_types:
+            by_condition[badge_type.condition_type].append(badge_type)
+        
+        self._catalogue = {
+            trigger_event: [bt for condition_type in condition_types for bt in by_condition.get(condition_type, [])]
+            for trigger_event, condition_types in EVENT_CONDITION_TYPES.items()
         }
+        self._catalogue_loaded_at = datetime.utcnow()
+    
+    async def _get_relevant_badges(self, trigger_event: str) -> List[BadgeType]:
+        """Releváns badge típusok lekérése esemény alapján"""
+        if trigger_event not in EVENT_CONDITION_TYPES:
+            return []
         
-        condition_types = event_mapping.get(trigger_event, [])
+        if (self._catalogue_loaded_at is None or
+                datetime.utcnow() - self._catalogue_loaded_at > timedelta(seconds=CATALOGUE_TTL_SECONDS)):
+            await self._load_catalogue()
         
-        if not condition_types:
-            return []
+        return self._catalogue.get(trigger_event, [])
+    
+    # ----------- Futó számlálók -----------
+    
+    @staticmethod
+    def _counter_increments(transactions: Iterable[Transaction], sign: int) -> Dict[str, float]:
+        increments = defaultdict(float)
+        for transaction in transactions:
+            increments["transaction_count"] += sign
+            if transaction.amount < 0:
+                increments["total_spent"] += sign * abs(transaction.amount)
+            elif transaction.amount > 0:
+                increments[f"saved_by_account.{transaction.main_account}"] += sign * transaction.amount
+        return increments
+    
+    async def _increment_counters(self, user_id: str, increments: Dict[str, float]):
+        """
+        Számlálók növelése (upsert)
+
+        Ha még nincs dokumentum, az $inc létrehozza initialized=False jelöléssel;
+        az első olvasás ezt újraépíti a tranzakciókból. A version minden írással
+        nő, ebből látja az újraépítés, ha közben módosult a dokumentum.
+        """
+        try:
+            await UserBadgeCounters.get_motor_collection().update_one(
+                {"user_id": ObjectId(user_id)},
+                {
+                    "$inc": {**increments, "version": 1},
+                    "$set": {"updated_at": datetime.utcnow()},
+                    "$setOnInsert": {"initialized": False},
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error updating badge counters for user {user_id}: {e}")
+    
+    async def apply_transaction_counters(self, user_id: str, transactions: Iterable[Transaction], sign: int = 1):
+        """Tranzakció számlálók frissítése (sign=1: létrehozás, sign=-1: törlés)"""
+        increments = self._counter_increments(transactions, sign)
+        if increments:
+            await self._increment_counters(user_id, dict(increments))
+    
+    async def apply_post_counter(self, user_id: str, delta: int):
+        """Fórum poszt számláló frissítése"""
+        await self._increment_counters(user_id, {"post_count": delta})
+    
+    async def reset_transaction_counters(self, user_id: str):
+        """Tranzakció számlálók törlése (pl. összes tranzakció törlésekor); a következő ellenőrzés újraépíti"""
+        await UserBadgeCounters.get_motor_collection().delete_one({"user_id": ObjectId(user_id)})
+    
+    async def _aggregate_counters(self, user_id: str) -> Dict[str, Any]:
+        totals = await Transaction.get_motor_collection().aggregate([
+            {"$match": {"user_id": ObjectId(user_id)}},
+            {"$group": {
+                "_id": "$main_account",
+                "count": {"$sum": 1},
+                "spent": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, {"$abs": "$amount"}, 0]}},
+                "saved": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}},
+            }}
+        ]).to_list(length=None)
+        post_count = await ForumPostDocument.find({"user_id": ObjectId(user_id)}).count()
+        
+        return {
+            "user_id": ObjectId(user_id),
+            "transaction_count": sum(row["count"] for row in totals),
+            "total_spent": sum(row["spent"] for row in totals),
+            "saved_by_account": {row["_id"]: row["saved"] for row in totals if row["_id"]},
+            "post_count": post_count,
+            "initialized": True,
+            "updated_at": datetime.utcnow(),
+        }
+    
+    async def rebuild_counters(self, user_id: str) -> UserBadgeCounters:
+        """
+        Számlálók újraépítése a tranzakciókból és posztokból (aggregációval)
         
-        badges = await BadgeType.find({
-            "is_active": True,
-            "condition_type": {"$in": condition_types}
-        }).to_list()
+        Verzió-őrrel ír: a verziót az aggregáció ELŐTT olvassuk, és csak akkor
+        cseréljük a dokumentumot, ha azóta nem érkezett $inc. Ha érkezett,
+        újraszámolunk (az addig beérkezett írások már az aggregációban vannak).
+        """
+        collection = UserBadgeCounters.get_motor_collection()
+        user_filter = {"user_id": ObjectId(user_id)}
         
-        return badges
+        for _ in range(COUNTER_REBUILD_ATTEMPTS):
+            current = await collection.find_one(user_filter, {"version": 1})
+            counters = await self._aggregate_counters(user_id)
+            
+            if current is None:
+                counters["version"] = 1
+                try:
+                    await collection.insert_one(dict(counters))
+                    break
+                except DuplicateKeyError:
+                    continue  # Közben egy $inc létrehozta
+            
+            # A verzió mező nélküli (korábbi) dokumentumok is cserélhetők
+            version_filter = {"version": current["version"]} if "version" in current else {"version": {"$exists": False}}
+            counters["version"] = current.get("version", 0) + 1
+            result = await collection.replace_one({**user_filter, **version_filter}, counters)
+            if result.matched_count:
+                break
+        else:
+            logger.warning(f"Badge counters for user {user_id} kept changing during rebuild; will retry on next read")
+            counters["initialized"] = False
+        
+        return UserBadgeCounters(**{**counters, "user_id": PydanticObjectId(user_id)})
     
-    async def _check_badge_condition(self, user_id: str, badge_type: BadgeType, context: Dict[str, Any] = None) -> tuple[bool, float]:
+    async def _get_counters(self, user_id: str, cache: Dict[str, Any]) -> UserBadgeCounters:
+        if "counters" not in cache:
+            counters = await UserBadgeCounters.find_one({"user_id": ObjectId(user_id)})
+            if counters is None or not counters.initialized:
+                counters = await self.rebuild_counters(user_id)
+            cache["counters"] = counters
+        return cache["counters"]
+    
+    async def _get_user_progress(self, user_id: str, cache: Dict[str, Any]) -> Optional[UserProgress]:
+        if "user_progress" not in cache:
+            cache["user_progress"] = await UserProgress.find_one({"user_id": ObjectId(user_id)})
+        return cache["user_progress"]
+    
+    # ----------- Feltételek -----------
+    
+    async def _check_badge_condition(
+        self,
+        user_id: str,
+        badge_type: BadgeType,
+        context: Dict[str, Any] = None,
+        cache: Optional[Dict[str, Any]] = None
+    ) -> tuple[bool, float]:
         """
         Badge feltétel ellenőrzése
         
@@ -100,24 +263,25 @@ class BadgeService:
         """
         condition_type = badge_type.condition_type
         config = badge_type.condition_config
+        cache = cache if cache is not None else {}
         
         try:
             if condition_type == "transaction_count":
-                return await self._check_transaction_count(user_id, config)
+                return await self._check_transaction_count(user_id, config, cache)
             elif condition_type == "spending_milestone":
-                return await self._check_spending_milestone(user_id, config)
+                return await self._check_spending_milestone(user_id, config, cache)
             elif condition_type == "saving_milestone":
-                return await self._check_saving_milestone(user_id, config)
+                return await self._check_saving_milestone(user_id, config, cache)
             elif condition_type == "knowledge_lessons":
-                return await self._check_knowledge_lessons(user_id, config)
+                return await self._check_knowledge_lessons(user_id, config, cache)
             elif condition_type == "knowledge_streak":
-                return await self._check_knowledge_streak(user_id, config)
+                return await self._check_knowledge_streak(user_id, config, cache)
             elif condition_type == "social_posts":
-                return await self._check_social_posts(user_id, config)
+                return await self._check_social_posts(user_id, config, cache)
             elif condition_type == "streak_login":
-                return await self._check_login_streak(user_id, config)
+                return await self._check_login_streak(user_id, config, cache)
             elif condition_type == "milestone_days":
-                return await self._check_registration_milestone(user_id, config)
+                return await self._check_registration_milestone(user_id, config, cache)
             else:
                 logger.warning(f"Unknown badge condition type: {condition_type}")
                 return False, 0.0
@@ -126,13 +290,18 @@ class BadgeService:
             logger.error(f"Error checking badge condition {condition_type}: {e}")
             return False, 0.0
     
-    async def _check_transaction_count(self, user_id: str, config: Dict[str, Any]) -> tuple[bool, float]:
+    async def _check_transaction_count(self, user_id: str, config: Dict[str, Any], cache: Dict[str, Any]) -> tuple[bool, float]:
         """Tranzakció szám alapú badge ellenőrzése"""
         target_count = config.get("target_count", 0)
         transaction_type = config.get("transaction_type")
         category = config.get("category")
         time_period_days = config.get("time_period_days")
         
+        # Szűrés nélküli feltétel: futó számláló
+        if not (transaction_type or category or time_period_days):
+            current_count = (await self._get_counters(user_id, cache)).transaction_count
+            return current_count >= target_count, current_count
+        
         # Query építése
         query = {"user_id": ObjectId(user_id)}
         
@@ -150,49 +319,45 @@ class BadgeService:
         
         return current_count >= target_count, current_count
     
-    async def _check_spending_milestone(self, user_id: str, config: Dict[str, Any]) -> tuple[bool, float]:
+    async def _check_spending_milestone(self, user_id: str, config: Dict[str, Any], cache: Dict[str, Any]) -> tuple[bool, float]:
         """Kiadási mérföldkő ellenőrzése"""
         target_amount = config.get("target_amount", 0)
         time_period_days = config.get("time_period_days")
         
-        query = {
-            "user_id": ObjectId(user_id),
-            "amount": {"$lt": 0}  # Csak kiadások
-        }
-        
-        if time_period_days:
-            start_date = (datetime.now() - timedelta(days=time_period_days)).strftime("%Y-%m-%d")
-            query["date"] = {"$gte": start_date}
+        if not time_period_days:
+            total_spent = (await self._get_counters(user_id, cache)).total_spent
+            return total_spent >= target_amount, total_spent
         
-        transactions = await Transaction.find(query).to_list()
-        total_spent = abs(sum(t.amount for t in transactions))
+        start_date = (datetime.now() - timedelta(days=time_period_days)).strftime("%Y-%m-%d")
+        result = await Transaction.get_motor_collection().aggregate([
+            {"$match": {
+                "user_id": ObjectId(user_id),
+                "amount": {"$lt": 0},  # Csak kiadások
+                "date": {"$gte": start_date}
+            }},
+            {"$group": {"_id": None, "total": {"$sum": {"$abs": "$amount"}}}}
+        ]).to_list(length=1)
+        total_spent = result[0]["total"] if result else 0.0
         
         return total_spent >= target_amount, total_spent
     
-    async def _check_saving_milestone(self, user_id: str, config: Dict[str, Any]) -> tuple[bool, float]:
+    async def _check_saving_milestone(self, user_id: str, config: Dict[str, Any], cache: Dict[str, Any]) -> tuple[bool, float]:
         """Megtakarítási mérföldkő ellenőrzése"""
         target_amount = config.get("target_amount", 0)
         account_type = config.get("account_type", "megtakaritas")
         
-        # Itt a számla egyenlegeket kellene lekérdezni
-        # Egyszerűsített változat: megtakarítási számlára befizetések
-        query = {
-            "user_id": ObjectId(user_id),
-            "main_account": account_type,
-            "amount": {"$gt": 0}  # Pozitív összegek (befizetések)
-        }
-        
-        transactions = await Transaction.find(query).to_list()
-        total_saved = sum(t.amount for t in transactions)
+        # Egyszerűsített változat: a főszámlára történt befizetések futó összege
+        counters = await self._get_counters(user_id, cache)
+        total_saved = counters.saved_by_account.get(account_type, 0.0)
         
         return total_saved >= target_amount, total_saved
     
-    async def _check_knowledge_lessons(self, user_id: str, config: Dict[str, Any]) -> tuple[bool, float]:
+    async def _check_knowledge_lessons(self, user_id: str, config: Dict[str, Any], cache: Dict[str, Any]) -> tuple[bool, float]:
         """Tudásbeli lecke teljesítés ellenőrzése"""
         target_lessons = config.get("target_lessons", 0)
         min_quiz_score = config.get("min_quiz_score", 0)
         
-        user_progress = await UserProgress.find_one({"user_id": ObjectId(user_id)})
+        user_progress = await self._get_user_progress(user_id, cache)
         if not user_progress:
             return False, 0
         
@@ -206,38 +371,39 @@ class BadgeService:
         current_count = len(completed_lessons)
         return current_count >= target_lessons, current_count
     
-    async def _check_knowledge_streak(self, user_id: str, config: Dict[str, Any]) -> tuple[bool, float]:
+    async def _check_knowledge_streak(self, user_id: str, config: Dict[str, Any], cache: Dict[str, Any]) -> tuple[bool, float]:
         """Tudásbeli sorozat ellenőrzése"""
         target_streak = config.get("target_streak", 0)
         
-        user_progress = await UserProgress.find_one({"user_id": ObjectId(user_id)})
+        user_progress = await self._get_user_progress(user_id, cache)
         if not user_progress:
             return False, 0
         
         current_streak = user_progress.current_streak
         return current_streak >= target_streak, current_streak
     
-    async def _check_social_posts(self, user_id: str, config: Dict[str, Any]) -> tuple[bool, float]:
+    async def _check_social_posts(self, user_id: str, config: Dict[str, Any], cache: Dict[str, Any]) -> tuple[bool, float]:
         """Közösségi poszt ellenőrzése"""
         target_posts = config.get("target_posts", 0)
         time_period_days = config.get("time_period_days")
         
-        query = {"user_id": ObjectId(user_id)}
+        if not time_period_days:
+            current_count = (await self._get_counters(user_id, cache)).post_count
+            return current_count >= target_posts, current_count
         
-        if time_period_days:
-            start_date = datetime.now() - timedelta(days=time_period_days)
-            query["created_at"] = {"$gte": start_date}
+        start_date = datetime.now() - timedelta(days=time_period_days)
+        query = {"user_id": ObjectId(user_id), "created_at": {"$gte": start_date}}
         
         current_count = await ForumPostDocument.find(query).count()
         return current_count >= target_posts, current_count
     
-    async def _check_login_streak(self, user_id: str, config: Dict[str, Any]) -> tuple[bool, float]:
+    async def _check_login_streak(self, user_id: str, config: Dict[str, Any], cache: Dict[str, Any]) -> tuple[bool, float]:
         """Bejelentkezési sorozat ellenőrzése (egyszerűsített)"""
         target_streak = config.get("target_streak", 0)
         
         # Itt egy login_history táblát kellene használni
         # Egyszerűsített változat: knowledge streak alapján
-        user_progress = await UserProgress.find_one({"user_id": ObjectId(user_id)})
+        user_progress = await self._get_user_progress(user_id, cache)
         if not user_progress:
             return False, 0
         
@@ -245,37 +411,60 @@ class BadgeService:
         current_streak = user_progress.current_streak
         return current_streak >= target_streak, current_streak
     
-    async def _check_registration_milestone(self, user_id: str, config: Dict[str, Any]) -> tuple[bool, float]:
+    async def _check_registration_milestone(self, user_id: str, config: Dict[str, Any], cache: Dict[str, Any]) -> tuple[bool, float]:
         """Regisztrációs mérföldkő ellenőrzése"""
         target_days = config.get("target_days", 0)
         
-        user = await UserDocument.get(ObjectId(user_id))
+        if "user" not in cache:
+            cache["user"] = await UserDocument.get(ObjectId(user_id))
+        user = cache["user"]
         if not user:
             return False, 0
         
         days_since_registration = (datetime.now() - user.registration_date).days
         return days_since_registration >= target_days, days_since_registration
     
+    # ----------- Odaítélés és haladás (bulk írás) -----------
+    
     async def _award_badge(self, user_id: str, badge_type: BadgeType, context: Dict[str, Any] = None) -> Optional[BadgeEarnedEvent]:
-        """Badge odaítélése"""
-        try:
-            # Meglévő badge ellenőrzése szintes badge-ek esetén
-            existing_badge = None
-            if badge_type.has_levels:
-                existing_badge = await UserBadge.find_one({
-                    "user_id": ObjectId(user_id),
-                    "badge_code": badge_type.code
-                })
+        """Egy badge odaítélése (manuális odaítéléshez)"""
+        owned = {}
+        if badge_type.has_levels:
+            existing_badge = await UserBadge.find_one({
+                "user_id": ObjectId(user_id),
+                "badge_code": badge_type.code
+            })
+            if existing_badge:
+                owned[badge_type.code] = existing_badge
+        
+        earned = await self._award_badges(user_id, [badge_type], owned, context)
+        return earned[0] if earned else None
+    
+    async def _award_badges(
+        self,
+        user_id: str,
+        badge_types: List[BadgeType],
+        owned_by_code: Dict[str, UserBadge],
+        context: Dict[str, Any] = None
+    ) -> List[BadgeEarnedEvent]:
+        """Badge-ek odaítélése: új badge-ek egy insert_many-vel, szintlépések egy bulk_write-tal"""
+        earned_badges = []
+        new_badges = []
+        level_ups = []
+        now = datetime.utcnow()
+        
+        for badge_type in badge_types:
+            existing_badge = owned_by_code.get(badge_type.code) if badge_type.has_levels else None
             
-            if existing_badge and badge_type.has_levels:
+            if existing_badge:
                 # Szint növelése
                 if existing_badge.level < (badge_type.max_level or 99):
                     existing_badge.level += 1
-                    existing_badge.earned_at = datetime.utcnow()
-                    existing_badge.context_data = context or {}
-                    await existing_badge.save()
-                    
-                    return BadgeEarnedEvent(
+                    level_ups.append(UpdateOne(
+                        {"_id": existing_badge.id},
+                        {"$set": {"level": existing_badge.level, "earned_at": now, "context_data": context or {}}}
+                    ))
+                    earned_badges.append(BadgeEarnedEvent(
                         user_id=user_id,
                         badge_code=badge_type.code,
                         badge_name=badge_type.name,
@@ -284,17 +473,15 @@ class BadgeService:
                         points_earned=badge_type.points,
                         level=existing_badge.level,
                         is_new_badge=False
-                    )
+                    ))
             else:
                 # Új badge létrehozása
-                new_badge = UserBadge(
+                new_badges.append(UserBadge(
                     user_id=PydanticObjectId(user_id),
                     badge_code=badge_type.code,
                     context_data=context or {}
-                )
-                await new_badge.insert()
-                
-                return BadgeEarnedEvent(
+                ))
+                earned_badges.append(BadgeEarnedEvent(
                     user_id=user_id,
                     badge_code=badge_type.code,
                     badge_name=badge_type.name,
@@ -303,44 +490,58 @@ class BadgeService:
                     points_earned=badge_type.points,
                     level=1,
                     is_new_badge=True
-                )
-            
+                ))
+        
+        try:
+            if new_badges:
+                await UserBadge.insert_many(new_badges)
+            if level_ups:
+                await UserBadge.get_motor_collection().bulk_write(level_ups, ordered=False)
         except Exception as e:
-            logger.error(f"Error awarding badge {badge_type.code} to user {user_id}: {e}")
-            return None
+            logger.error(f"Error awarding badges to user {user_id}: {e}")
+            return []
+        
+        return earned_badges
     
     async def _update_badge_progress(self, user_id: str, badge_type: BadgeType, current_value: float):
         """Badge haladás frissítése"""
-        try:
+        await self._update_badge_progress_bulk(user_id, [(badge_type, current_value)])
+    
+    async def _update_badge_progress_bulk(self, user_id: str, updates: List[tuple]):
+        """Több badge haladásának frissítése egyetlen bulk_write-tal (upsert)"""
+        if not updates:
+            return
+        
+        now = datetime.utcnow()
+        operations = []
+        for badge_type, current_value in updates:
             target_value = badge_type.condition_config.get("target_count", 
                           badge_type.condition_config.get("target_amount",
                           badge_type.condition_config.get("target_lessons", 1)))
             
-            progress_percentage = min(100.0, (current_value / target_value) * 100)
-            
-            # Meglévő haladás keresése
-            existing_progress = await BadgeProgress.find_one({
-                "user_id": ObjectId(user_id),
-                "badge_code": badge_type.code
-            })
+            progress_percentage = min(100.0, (current_value / target_value) * 100) if target_value else 100.0
             
-            if existing_progress:
-                existing_progress.current_value = current_value
-                existing_progress.progress_percentage = progress_percentage
-                existing_progress.last_updated = datetime.utcnow()
-                await existing_progress.save()
-            else:
-                new_progress = BadgeProgress(
-                    user_id=PydanticObjectId(user_id),
-                    badge_code=badge_type.code,
-                    current_value=current_value,
-                    target_value=target_value,
-                    progress_percentage=progress_percentage
-                )
-                await new_progress.insert()
-                
+            operations.append(UpdateOne(
+                {"user_id": ObjectId(user_id), "badge_code": badge_type.code},
+                {
+                    "$set": {
+                        "current_value": current_value,
+                        "progress_percentage": progress_percentage,
+                        "last_updated": now
+                    },
+                    "$setOnInsert": {
+                        "target_value": target_value,
+                        "started_at": now,
+                        "metadata": {}
+                    }
+                },
+                upsert=True
+            ))
+        
+        try:
+            await BadgeProgress.get_motor_collection().bulk_write(operations, ordered=False)
         except Exception as e:
-            logger.error(f"Error updating badge progress for {badge_type.code}: {e}")
+            logger.error(f"Error updating badge progress for user {user_id}: {e}")
     
     async def get_user_badges(self, user_id: str, category: Optional[BadgeCategory] = None) -> List[Dict[str, Any]]:
         """Felhasználó badge-einek lekérése badge típus adatokkal"""
@@ -471,4 +672,29 @@ class BadgeService:
             return []
 
 # Globális badge service instance
-badge_service = BadgeService()
\ No newline at end of file
+badge_service = BadgeService()
+
+@job_queue.register("badges.check")
+async def run_badge_check(payload: Dict[str, Any]) -> None:
+    """Háttérben futó badge ellenőrzés tetszőleges eseményre"""
+    await badge_service.check_and_award_badges(
+        user_id=payload["user_id"],
+        trigger_event=payload["trigger_event"],
+        context=payload.get("context")
+    )
+
+# Manuális futtatáshoz (számlálók újraépítése minden felhasználóra):
+#   python -m app.services.badge_service
+if __name__ == "__main__":
+    import asyncio
+    from app.core.db import init_db
+
+    async def main():
+        await init_db()
+        user_ids = await Transaction.get_motor_collection().distinct("user_id")
+        user_ids += await ForumPostDocument.get_motor_collection().distinct("user_id")
+        for user_id in set(user_ids):
+            await badge_service.rebuild_counters(str(user_id))
+        print(f"Rebuilt badge counters for {len(set(user_ids))} users")
+
+    asyncio.run(main())
@@ -1,18 +1,32 @@
 # app/services/challenge_service.py
-from typing import List, Dict, Optional, Tuple
-from beanie import PydanticObjectId
+from typing import Any, List, Dict, Optional, Set, Tuple
+from collections import defaultdict
 from bson import ObjectId
+from pymongo import UpdateOne
 from datetime import datetime, timedelta
 import logging
+import time
+import os
 
 from app.models.challenge import (
     ChallengeDocument, UserChallengeDocument, ChallengeType, ChallengeDifficulty,
     ChallengeStatus, ParticipationStatus, ChallengeProgress
 )
 from app.models.transaction import Transaction
+from app.services.rollup_service import RollupService
+from app.core.job_queue import job_queue
 
 logger = logging.getLogger(__name__)
 
+# Az aktív részvételek haladásának ütemezett újraszámítása (másodperc; 0 = kikapcsolva)
+CHALLENGE_PROGRESS_INTERVAL_SECONDS = int(os.getenv("CHALLENGE_PROGRESS_INTERVAL_SECONDS", "600"))
+# Az /update-progress eddig fogadja el az előre kiszámolt haladást, utána helyben újraszámol
+CHALLENGE_PROGRESS_MAX_AGE_SECONDS = int(os.getenv(
+    "CHALLENGE_PROGRESS_MAX_AGE_SECONDS", str(CHALLENGE_PROGRESS_INTERVAL_SECONDS * 2)
+))
+# Egy bulk_write hívásba kerülő részvétel frissítések száma
+PROGRESS_BULK_SIZE = 1000
+
 class ChallengeService:
     """Kihívások kezelésére szolgáló service osztály"""
     
@@ -38,74 +52,57 @@ class ChallengeService:
             
             # Időszak meghatározása
             start_date = user_challenge.started_at or user_challenge.joined_at
-            end_date = start_date + timedelta(days=challenge.duration_days)
-            
-            # Tranzakciók lekérése az időszakra
-            query_filter = {
-                "user_id": ObjectId(user_id),
-                "date": {
-                    "$gte": start_date.strftime("%Y-%m-%d"),
-                    "$lte": end_date.strftime("%Y-%m-%d")
-                }
-            }
-            
-            # Típus alapú szűrés
-            if challenge.challenge_type == ChallengeType.SAVINGS:
-                # Megtakarítások számítása (pozitív összegek a megtakarítási számlán)
-                query_filter.update({
-                    "main_account": "megtakaritas",
-                    "amount": {"$gt": 0}
-                })
-            elif challenge.challenge_type == ChallengeType.EXPENSE_REDUCTION:
-                # Kiadások számítása
-                query_filter["amount"] = {"$lt": 0}
-                # Ha meg van adva kategória, azt is figyelembe vesszük
-                if challenge.track_categories:
-                    query_filter["kategoria"] = {"$in": challenge.track_categories}
-            elif challenge.challenge_type == ChallengeType.INVESTMENT:
-                # Befektetések számítása
-                query_filter.update({
-                    "main_account": "befektetes",
-                    "amount": {"$gt": 0}
-                })
+            period_start, period_end = ChallengeService._period(challenge, start_date)
             
             # Számla szűrés ha van
-            if challenge.track_accounts:
-                query_filter["sub_account_name"] = {"$in": challenge.track_accounts}
-            
-            transactions = await Transaction.find(query_filter).to_list()
+            sub_accounts = challenge.track_accounts or None
             
-            # Haladás számítása típus alapján
+            # Haladás számítása típus alapján: az összegek a havi összesítőből jönnek,
+            # nyers tranzakciók csak a napi bontást igénylő sorozat kihíváshoz kellenek
             current_value = 0.0
             
             if challenge.challenge_type == ChallengeType.SAVINGS:
-                current_value = sum(abs(t.amount) for t in transactions)
+                # Megtakarítások számítása (pozitív összegek a megtakarítási számlán)
+                totals = await RollupService.get_total(
+                    user_id, period_start, period_end,
+                    main_account="megtakaritas", sub_accounts=sub_accounts
+                )
+                current_value = totals["income"]
             elif challenge.challenge_type == ChallengeType.EXPENSE_REDUCTION:
                 # Kiadás csökkentésnél az előző időszakhoz viszonyítunk
+                # Ha meg van adva kategória, azt is figyelembe vesszük
+                totals = await RollupService.get_total(
+                    user_id, period_start, period_end,
+                    categories=challenge.track_categories or None, sub_accounts=sub_accounts
+                )
                 current_value = await ChallengeService._calculate_expense_reduction(
-                    user_id, challenge, start_date, transactions
+                    user_id, challenge, start_date, totals["expense"]
                 )
             elif challenge.challenge_type == ChallengeType.HABIT_STREAK:
+                query_filter = {
+                    "user_id": ObjectId(user_id),
+                    "date": {"$gte": period_start, "$lte": period_end}
+                }
+                if sub_accounts:
+                    query_filter["sub_account_name"] = {"$in": sub_accounts}
+                transactions = await Transaction.find(query_filter).to_list()
                 current_value = await ChallengeService._calculate_streak(
                     user_id, challenge, start_date, transactions
                 )
             elif challenge.challenge_type == ChallengeType.INVESTMENT:
-                current_value = sum(abs(t.amount) for t in transactions)
+                # Befektetések számítása
+                totals = await RollupService.get_total(
+                    user_id, period_start, period_end,
+                    main_account="befektetes", sub_accounts=sub_accounts
+                )
+                current_value = totals["income"]
             else:
-                current_value = sum(abs(t.amount) for t in transactions)
-            
-            # Célérték meghatározása
-            target_value = user_challenge.personal_target or challenge.target_amount or 0.0
-            
-            # Százalék számítása
-            percentage = min((current_value / target_value * 100) if target_value > 0 else 0, 100.0)
+                totals = await RollupService.get_total(
+                    user_id, period_start, period_end, sub_accounts=sub_accounts
+                )
+                current_value = totals["income"] + totals["expense"]
             
-            return ChallengeProgress(
-                current_value=current_value,
-                target_value=target_value,
-                unit="HUF" if challenge.challenge_type != ChallengeType.HABIT_STREAK else "nap",
-                percentage=percentage
-            )
+            return ChallengeService._build_progress(challenge, current_value, user_challenge.personal_target)
             
         except Exception as e:
             logger.error(f"Error calculating challenge progress: {e}")
@@ -116,39 +113,55 @@ class ChallengeService:
                 percentage=0.0
             )
     
+    @staticmethod
+    def _period(challenge: ChallengeDocument, start_date: datetime) -> Tuple[str, str]:
+        """A kihívás ablaka (YYYY-MM-DD, zárt intervallum) a kezdés napjától"""
+        end_date = start_date + timedelta(days=challenge.duration_days)
+        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+    
+    @staticmethod
+    def _previous_period(challenge: ChallengeDocument, start_date: datetime) -> Tuple[str, str]:
+        """Az ablak előtti, azonos hosszú időszak (kiadás csökkentés viszonyítási alapja)"""
+        prev_start = start_date - timedelta(days=challenge.duration_days)
+        prev_end = start_date - timedelta(days=1)
+        return prev_start.strftime("%Y-%m-%d"), prev_end.strftime("%Y-%m-%d")
+    
+    @staticmethod
+    def _build_progress(
+        challenge: ChallengeDocument,
+        current_value: float,
+        personal_target: Optional[float]
+    ) -> ChallengeProgress:
+        """Haladás a jelenlegi értékből; a cél a személyes cél vagy a kihívás célja"""
+        target_value = personal_target or challenge.target_amount or 0.0
+        percentage = min((current_value / target_value * 100) if target_value > 0 else 0, 100.0)
+        
+        return ChallengeProgress(
+            current_value=current_value,
+            target_value=target_value,
+            unit="HUF" if challenge.challenge_type != ChallengeType.HABIT_STREAK else "nap",
+            percentage=percentage
+        )
+    
     @staticmethod
     async def _calculate_expense_reduction(
         user_id: str, 
         challenge: ChallengeDocument, 
         start_date: datetime,
-        current_transactions: List[Transaction]
+        current_total: float
     ) -> float:
         """Kiadás csökkentés számítása az előző időszakhoz viszonyítva"""
         try:
-            # Előző időszak tranzakcióinak lekérése
-            prev_start = start_date - timedelta(days=challenge.duration_days)
-            prev_end = start_date - timedelta(days=1)
-            
-            prev_query = {
-                "user_id": ObjectId(user_id),
-                "date": {
-                    "$gte": prev_start.strftime("%Y-%m-%d"),
-                    "$lte": prev_end.strftime("%Y-%m-%d")
-                },
-                "amount": {"$lt": 0}
-            }
+            # Előző időszak kiadásai
+            prev_start, prev_end = ChallengeService._previous_period(challenge, start_date)
             
-            if challenge.track_categories:
-                prev_query["kategoria"] = {"$in": challenge.track_categories}
-            
-            prev_transactions = await Transaction.find(prev_query).to_list()
-            
-            # Összegek számítása
-            prev_total = sum(abs(t.amount) for t in prev_transactions)
-            current_total = sum(abs(t.amount) for t in current_transactions)
+            prev_totals = await RollupService.get_total(
+                user_id, prev_start, prev_end,
+                categories=challenge.track_categories or None
+            )
             
             # Megtakarítás (pozitív érték = jó)
-            return max(0, prev_total - current_total)
+            return max(0, prev_totals["expense"] - current_total)
             
         except Exception as e:
             logger.error(f"Error calculating expense reduction: {e}")
@@ -171,30 +184,33 @@ class ChallengeService:
                     daily_transactions[date_key] = []
                 daily_transactions[date_key].append(t)
             
-            # Streak számítása
-            current_streak = 0
-            current_date = start_date.date()
-            end_date = (start_date + timedelta(days=challenge.duration_days)).date()
-            
-            while current_date <= end_date and current_date <= datetime.now().date():
-                date_str = current_date.strftime("%Y-%m-%d")
-                
-                # Ellenőrizzük, hogy volt-e megfelelő aktivitás ezen a napon
-                if await ChallengeService._check_daily_goal_met(
-                    challenge, daily_transactions.get(date_str, [])
-                ):
-                    current_streak += 1
-                else:
-                    break  # Megszakad a sorozat
-                
-                current_date += timedelta(days=1)
+            # Napok, amelyeken volt megfelelő aktivitás
+            met_days = {
+                date_str for date_str, day_transactions in daily_transactions.items()
+                if await ChallengeService._check_daily_goal_met(challenge, day_transactions)
+            }
             
-            return float(current_streak)
+            return ChallengeService._streak_from_days(challenge, start_date, met_days)
             
         except Exception as e:
             logger.error(f"Error calculating streak: {e}")
             return 0.0
     
+    @staticmethod
+    def _streak_from_days(challenge: ChallengeDocument, start_date: datetime, met_days: Set[str]) -> float:
+        """Egymást követő teljesített napok száma a kezdéstől (legfeljebb a mai napig)"""
+        current_streak = 0
+        current_date = start_date.date()
+        end_date = (start_date + timedelta(days=challenge.duration_days)).date()
+        
+        while current_date <= end_date and current_date <= datetime.now().date():
+            if current_date.strftime("%Y-%m-%d") not in met_days:
+                break  # Megszakad a sorozat
+            current_streak += 1
+            current_date += timedelta(days=1)
+        
+        return float(current_streak)
+    
     @staticmethod
     async def _check_daily_goal_met(
         challenge: ChallengeDocument, 
@@ -204,54 +220,297 @@ class ChallengeService:
         if not daily_transactions:
             return False
         
+        return ChallengeService._daily_summary_meets_rules(
+            challenge,
+            count=len(daily_transactions),
+            total=sum(abs(t.amount) for t in daily_transactions),
+            categories={t.kategoria for t in daily_transactions if t.kategoria}
+        )
+    
+    @staticmethod
+    def _daily_summary_meets_rules(
+        challenge: ChallengeDocument,
+        count: int,
+        total: float,
+        categories: Set[str]
+    ) -> bool:
+        """Napi cél ellenőrzése a nap összesítéséből (darabszám, abszolút összeg, kategóriák)"""
+        if count == 0:
+            return False
+        
         # Szabályok alapján ellenőrzés
         for rule in challenge.rules:
             if rule.type == "min_transactions":
-                if len(daily_transactions) < rule.value:
+                if count < rule.value:
                     return False
             elif rule.type == "min_amount":
-                total = sum(abs(t.amount) for t in daily_transactions)
                 if total < rule.value:
                     return False
             elif rule.type == "required_category":
-                categories = {t.kategoria for t in daily_transactions if t.kategoria}
                 if rule.description not in categories:
                     return False
         
         return True
     
+    @staticmethod
+    def _statistics_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Résztvevők (aktív + teljesített) és teljesítők száma kihívásonként, egy csoportosítással"""
+        return [
+            {"$match": {
+                **match,
+                "status": {"$in": [ParticipationStatus.ACTIVE.value, ParticipationStatus.COMPLETED.value]}
+            }},
+            {"$group": {
+                "_id": "$challenge_id",
+                "participant_count": {"$sum": 1},
+                "completed_count": {"$sum": {"$cond": [
+                    {"$eq": ["$status", ParticipationStatus.COMPLETED.value]}, 1, 0
+                ]}},
+            }},
+        ]
+    
+    @staticmethod
+    def _statistics_fields(participant_count: int, completed_count: int, now: datetime) -> Dict[str, Any]:
+        return {
+            "participant_count": participant_count,
+            "completion_rate": (completed_count / participant_count * 100) if participant_count > 0 else 0,
+            "updated_at": now,
+        }
+    
     @staticmethod
     async def update_challenge_statistics(challenge_id: str):
         """Kihívás statisztikáinak frissítése"""
         try:
-            challenge = await ChallengeDocument.get(PydanticObjectId(challenge_id))
-            if not challenge:
-                return
-            
-            # Résztvevők száma
-            participant_count = await UserChallengeDocument.find({
-                "challenge_id": ObjectId(challenge_id),
-                "status": {"$in": [ParticipationStatus.ACTIVE, ParticipationStatus.COMPLETED]}
-            }).count()
-            
-            # Befejezési arány
-            completed_count = await UserChallengeDocument.find({
-                "challenge_id": ObjectId(challenge_id),
-                "status": ParticipationStatus.COMPLETED
-            }).count()
-            
-            completion_rate = (completed_count / participant_count * 100) if participant_count > 0 else 0
-            
-            # Frissítés
-            challenge.participant_count = participant_count
-            challenge.completion_rate = completion_rate
-            challenge.updated_at = datetime.utcnow()
-            
-            await challenge.save()
+            pipeline = ChallengeService._statistics_pipeline({"challenge_id": ObjectId(challenge_id)})
+            rows = await UserChallengeDocument.get_motor_collection().aggregate(pipeline).to_list(length=1)
+            row = rows[0] if rows else {"participant_count": 0, "completed_count": 0}
+            
+            await ChallengeDocument.get_motor_collection().update_one(
+                {"_id": ObjectId(challenge_id)},
+                {"$set": ChallengeService._statistics_fields(
+                    row["participant_count"], row["completed_count"], datetime.utcnow()
+                )}
+            )
             
         except Exception as e:
             logger.error(f"Error updating challenge statistics: {e}")
     
+    @staticmethod
+    async def update_all_challenge_statistics() -> int:
+        """Az összes kihívás statisztikája egy aggregációval és egy bulk_write-tal"""
+        now = datetime.utcnow()
+        operations = []
+        seen_ids = []
+        async for row in UserChallengeDocument.get_motor_collection().aggregate(
+            ChallengeService._statistics_pipeline({})
+        ):
+            seen_ids.append(row["_id"])
+            operations.append(UpdateOne(
+                {"_id": row["_id"]},
+                {"$set": ChallengeService._statistics_fields(row["participant_count"], row["completed_count"], now)}
+            ))
+        
+        collection = ChallengeDocument.get_motor_collection()
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+        # Akiknek már nincs aktív vagy teljesített résztvevője
+        await collection.update_many(
+            {"_id": {"$nin": seen_ids}, "participant_count": {"$gt": 0}},
+            {"$set": ChallengeService._statistics_fields(0, 0, now)}
+        )
+        return len(operations)
+    
+    # ----------- Ütemezett haladás újraszámítás -----------
+    
+    @staticmethod
+    async def _daily_activity_by_user(
+        user_ids: List[ObjectId],
+        period_start: str,
+        period_end: str,
+        sub_accounts: Optional[List[str]]
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Felhasználónkénti napi összesítés (darab, abszolút összeg, kategóriák) egy aggregációval"""
+        match = {
+            "user_id": {"$in": user_ids},
+            "date": {"$gte": period_start, "$lte": period_end}
+        }
+        if sub_accounts:
+            match["sub_account_name"] = {"$in": sub_accounts}
+        
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "date": "$date"},
+                "count": {"$sum": 1},
+                "total": {"$sum": {"$abs": "$amount"}},
+                "categories": {"$addToSet": "$kategoria"},
+            }},
+        ]
+        
+        activity = defaultdict(dict)
+        async for row in Transaction.get_motor_collection().aggregate(pipeline):
+            activity[str(row["_id"]["user_id"])][row["_id"]["date"]] = row
+        return activity
+    
+    @staticmethod
+    async def _window_values(
+        challenge: ChallengeDocument,
+        start_date: datetime,
+        user_ids: List[ObjectId]
+    ) -> Dict[str, float]:
+        """
+        Az ablak összes résztvevőjének jelenlegi értéke (user_id -> érték)
+        
+        Ugyanazt számolja, mint a calculate_challenge_progress, de egy
+        felhasználó helyett az ablak minden résztvevőjére egyszerre.
+        """
+        period_start, period_end = ChallengeService._period(challenge, start_date)
+        sub_accounts = challenge.track_accounts or None
+        challenge_type = challenge.challenge_type
+        
+        if challenge_type in (ChallengeType.SAVINGS, ChallengeType.INVESTMENT):
+            main_account = "megtakaritas" if challenge_type == ChallengeType.SAVINGS else "befektetes"
+            totals = await RollupService.get_totals_by_user(
+                user_ids, period_start, period_end,
+                main_account=main_account, sub_accounts=sub_accounts
+            )
+            return {user_id: values["income"] for user_id, values in totals.items()}
+        
+        if challenge_type == ChallengeType.EXPENSE_REDUCTION:
+            categories = challenge.track_categories or None
+            current = await RollupService.get_totals_by_user(
+                user_ids, period_start, period_end,
+                categories=categories, sub_accounts=sub_accounts
+            )
+            prev_start, prev_end = ChallengeService._previous_period(challenge, start_date)
+            previous = await RollupService.get_totals_by_user(
+                user_ids, prev_start, prev_end, categories=categories
+            )
+            return {
+                user_id: max(0, values["expense"] - current.get(user_id, {}).get("expense", 0.0))
+                for user_id, values in previous.items()
+            }
+        
+        if challenge_type == ChallengeType.HABIT_STREAK:
+            activity = await ChallengeService._daily_activity_by_user(
+                user_ids, period_start, period_end, sub_accounts
+            )
+            return {
+                user_id: ChallengeService._streak_from_days(challenge, start_date, {
+                    date_str for date_str, day in days.items()
+                    if ChallengeService._daily_summary_meets_rules(
+                        challenge, day["count"], day["total"], {c for c in day["categories"] if c}
+                    )
+                })
+                for user_id, days in activity.items()
+            }
+        
+        totals = await RollupService.get_totals_by_user(
+            user_ids, period_start, period_end, sub_accounts=sub_accounts
+        )
+        return {user_id: values["income"] + values["expense"] for user_id, values in totals.items()}
+    
+    @staticmethod
+    async def recompute_active_progress() -> Dict[str, Any]:
+        """
+        Az összes aktív részvétel haladásának újraszámítása (ütemezett háttérfeladat)
+        
+        A részvételeket kihívás és kezdőnap szerint ablakokba csoportosítjuk;
+        ablakonként egy aggregáció számol az ablak összes résztvevőjére, az
+        eredmények bulk_write-tal íródnak vissza. A teljesítés (jutalmak)
+        továbbra is az /update-progress hívásakor történik.
+        """
+        started = time.perf_counter()
+        collection = UserChallengeDocument.get_motor_collection()
+        
+        windows = defaultdict(list)
+        participation_count = 0
+        async for participation in collection.find(
+            {"status": ParticipationStatus.ACTIVE.value},
+            {"user_id": 1, "challenge_id": 1, "joined_at": 1, "started_at": 1, "personal_target": 1}
+        ):
+            start_date = participation.get("started_at") or participation["joined_at"]
+            windows[(participation["challenge_id"], start_date.date())].append(participation)
+            participation_count += 1
+        
+        challenges = {}
+        if windows:
+            challenge_ids = list({challenge_id for challenge_id, _ in windows})
+            challenges = {
+                challenge.id: challenge
+                for challenge in await ChallengeDocument.find({"_id": {"$in": challenge_ids}}).to_list()
+            }
+        
+        now = datetime.utcnow()
+        operations = []
+        failed_windows = 0
+        for (challenge_id, start_day), participations in windows.items():
+            challenge = challenges.get(challenge_id)
+            if not challenge:
+                continue
+            
+            start_date = datetime.combine(start_day, datetime.min.time())
+            try:
+                values = await ChallengeService._window_values(
+                    challenge, start_date, [participation["user_id"] for participation in participations]
+                )
+            except Exception as e:
+                failed_windows += 1
+                logger.error(f"Error recomputing progress for challenge {challenge_id} ({start_day}): {e}")
+                continue
+            
+            for participation in participations:
+                progress = ChallengeService._build_progress(
+                    challenge,
+                    values.get(str(participation["user_id"]), 0.0),
+                    participation.get("personal_target")
+                )
+                # A státusz feltétel miatt a közben lezárt részvétel nem kap régi haladást
+                operations.append(UpdateOne(
+                    {"_id": participation["_id"], "status": ParticipationStatus.ACTIVE.value},
+                    {"$set": {
+                        "progress": progress.model_dump(),
+                        "progress_calculated_at": now,
+                        "updated_at": now
+                    }}
+                ))
+        
+        for start in range(0, len(operations), PROGRESS_BULK_SIZE):
+            await collection.bulk_write(operations[start:start + PROGRESS_BULK_SIZE], ordered=False)
+        
+        statistics_updated = await ChallengeService.update_all_challenge_statistics()
+        
+        result = {
+            "participations": participation_count,
+            "windows": len(windows),
+            "failed_windows": failed_windows,
+            "updated": len(operations),
+            "challenges": statistics_updated,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info(f"Recomputed challenge progress: {result}")
+        return result
+    
+    @staticmethod
+    def precomputed_progress(
+        challenge: ChallengeDocument,
+        user_challenge: UserChallengeDocument
+    ) -> Optional[ChallengeProgress]:
+        """
+        Az ütemezett újraszámítás eredménye, ha elég friss (különben None)
+        
+        A célt és a százalékot a jelenlegi személyes célból számoljuk, így a
+        cél módosítása azonnal látszik.
+        """
+        calculated_at = user_challenge.progress_calculated_at
+        if not calculated_at or CHALLENGE_PROGRESS_MAX_AGE_SECONDS <= 0:
+            return None
+        if datetime.utcnow() - calculated_at > timedelta(seconds=CHALLENGE_PROGRESS_MAX_AGE_SECONDS):
+            return None
+        return ChallengeService._build_progress(
+            challenge, user_challenge.progress.current_value, user_challenge.personal_target
+        )
+    
     @staticmethod
     async def check_challenge_completion(user_challenge: UserChallengeDocument) -> bool:
         """Ellenőrzi, hogy a kihívás teljesítve van-e"""
@@ -304,16 +563,17 @@ class ChallengeService:
             # Felhasználó tranzakcióinak elemzése az utóbbi 30 napban
             recent_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
             
-            user_transactions = await Transaction.find({
-                "user_id": ObjectId(user_id),
-                "date": {"$gte": recent_date}
-            }).to_list()
+            today = datetime.now().strftime("%Y-%m-%d")
+            recent_totals = await RollupService.get_total(user_id, recent_date, today)
+            savings_totals = await RollupService.get_total(
+                user_id, recent_date, today, main_account="megtakaritas"
+            )
             
             # Aktivitás alapú ajánlások
             recommendations = []
             
             # Ha sok kiadása van, ajánljunk kiadás csökkentést
-            expense_total = sum(abs(t.amount) for t in user_transactions if t.amount < 0)
+            expense_total = recent_totals["expense"]
             if expense_total > 50000:  # 50k HUF felett
                 expense_challenges = await ChallengeDocument.find({
                     "challenge_type": ChallengeType.EXPENSE_REDUCTION,
@@ -323,8 +583,7 @@ class ChallengeService:
                 recommendations.extend(expense_challenges)
             
             # Ha kevés megtakarítása van, ajánljunk megtakarítási kihívást
-            savings_total = sum(t.amount for t in user_transactions 
-                              if t.amount > 0 and t.main_account == "megtakaritas")
+            savings_total = savings_totals["income"]
             if savings_total < 20000:  # 20k HUF alatt
                 savings_challenges = await ChallengeDocument.find({
                     "challenge_type": ChallengeType.SAVINGS,
@@ -344,4 +603,23 @@ class ChallengeService:
             
         except Exception as e:
             logger.error(f"Error getting recommended challenges: {e}")
-            return []
\ No newline at end of file
+            return []
+
+
+@job_queue.register("challenges.recompute_progress")
+async def recompute_challenge_progress(payload: Dict[str, Any]) -> None:
+    """Ütemezett feladat: aktív részvételek haladása és kihívás statisztikák"""
+    await ChallengeService.recompute_active_progress()
+
+
+# Manuális futtatáshoz (egyszeri újraszámítás):
+#   python -m app.services.challenge_service
+if __name__ == "__main__":
+    import asyncio
+    from app.core.db import init_db
+
+    async def main():
+        await init_db()
+        print(await ChallengeService.recompute_active_progress())
+
+    asyncio.run(main())
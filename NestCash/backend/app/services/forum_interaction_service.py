@@ -0,0 +1,238 @@
+# app/services/forum_interaction_service.py
+from typing import Any, Dict, Optional, Tuple
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+import logging
+
+from app.core.job_queue import job_queue
+from app.core.leases import acquire_lease, new_owner_id, release_lease
+from app.models.forum_models import (
+    ForumPostDocument, LikeDocument, CommentDocument, NotificationType
+)
+from app.services.forum_service import ForumService
+
+logger = logging.getLogger(__name__)
+
+# Az egyedi like index (ugyanaz a név, amit korábban az init_beanie adott neki)
+LIKE_UNIQUE_INDEX_NAME = "post_id_1_user_id_1"
+_LIKE_INDEX_LEASE = "migration:forum_like_index"
+_LIKE_INDEX_LEASE_SECONDS = 600
+
+
+def _counter_step(field: str, step: int) -> Any:
+    """
+    Atomikus számláló módosítás
+
+    Növelésnél sima $inc; csökkentésnél pipeline update, hogy a (korábbi,
+    nem konzisztens adatokból eredő) számláló ne menjen 0 alá.
+    """
+    if step > 0:
+        return {"$inc": {field: step}}
+    return [{"$set": {field: {"$max": [0, {"$add": [{"$ifNull": [f"${field}", 0]}, step]}]}}}]
+
+
+class ForumInteractionService:
+    """Like és komment írások: egyedi index + upsert, atomikus számlálók, késleltetett értesítés"""
+
+    @staticmethod
+    async def _step_post_counter(post_id: ObjectId, field: str, step: int) -> int:
+        """Számláló módosítása és az új érték visszaadása egyetlen hívással"""
+        post = await ForumPostDocument.get_motor_collection().find_one_and_update(
+            {"_id": post_id},
+            _counter_step(field, step),
+            projection={field: 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return post.get(field, 0) if post else 0
+
+    @staticmethod
+    async def _read_post_counter(post_id: ObjectId, field: str) -> int:
+        post = await ForumPostDocument.get_motor_collection().find_one({"_id": post_id}, {field: 1})
+        return post.get(field, 0) if post else 0
+
+    @staticmethod
+    async def toggle_like(post_id: ObjectId, user_id: str, username: str) -> Tuple[bool, int]:
+        """
+        Like be/ki kapcsolása
+
+        Először a like törlését próbáljuk; ha nem volt mit törölni, upsert-tel
+        szúrjuk be. A számláló csak akkor mozdul, ha a like dokumentum
+        ténylegesen törlődött / létrejött, így párhuzamos kéréseknél is pontos.
+
+        Returns:
+            (is_liked, like_count)
+        """
+        likes = LikeDocument.get_motor_collection()
+        like_filter = {"post_id": post_id, "user_id": ObjectId(user_id)}
+
+        removed = await likes.delete_one(like_filter)
+        if removed.deleted_count:
+            return False, await ForumInteractionService._step_post_counter(post_id, "like_count", -1)
+
+        try:
+            result = await likes.update_one(
+                like_filter,
+                {"$setOnInsert": {"username": username, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Egy párhuzamos kérés ugyanezt a like-ot épp most szúrta be (és számolta)
+            return True, await ForumInteractionService._read_post_counter(post_id, "like_count")
+
+        if result.upserted_id is None:
+            return True, await ForumInteractionService._read_post_counter(post_id, "like_count")
+        return True, await ForumInteractionService._step_post_counter(post_id, "like_count", 1)
+
+    @staticmethod
+    async def add_comment(comment: CommentDocument) -> int:
+        """Komment beszúrása és a poszt számlálójának atomikus növelése; az új számot adja vissza"""
+        await comment.insert()
+        return await ForumInteractionService._step_post_counter(comment.post_id, "comment_count", 1)
+
+    @staticmethod
+    async def delete_comment(comment_id: ObjectId, user_id: str) -> Optional[bool]:
+        """
+        Saját komment törlése
+
+        Returns:
+            None ha nincs ilyen komment, False ha nem a felhasználóé, True ha törölve
+        """
+        comment = await CommentDocument.get_motor_collection().find_one_and_delete(
+            {"_id": comment_id, "user_id": ObjectId(user_id)},
+            projection={"post_id": 1}
+        )
+        if comment is None:
+            exists = await CommentDocument.get_motor_collection().count_documents({"_id": comment_id}, limit=1)
+            return False if exists else None
+
+        await ForumInteractionService._step_post_counter(comment["post_id"], "comment_count", -1)
+        return True
+
+    @staticmethod
+    async def enqueue_notification(
+        post: ForumPostDocument,
+        from_user_id: str,
+        from_username: str,
+        notification_type: NotificationType,
+        message: str
+    ) -> None:
+        """Értesítés a poszt szerzőjének a háttérsoron keresztül (saját posztnál nincs)"""
+        if str(post.user_id) == from_user_id:
+            return
+        try:
+            await job_queue.enqueue("forum.notify", {
+                "user_id": str(post.user_id),
+                "from_user_id": from_user_id,
+                "from_username": from_username,
+                "notification_type": notification_type.value,
+                "post_id": str(post.id),
+                "message": message
+            })
+        except Exception as e:
+            logger.error(f"Failed to enqueue forum notification for post {post.id}: {e}")
+
+    @staticmethod
+    async def repair_counters() -> Dict[str, int]:
+        """
+        Duplikált like-ok eltávolítása és a számlálók újraszámolása
+
+        Az egyedi (post_id, user_id) index létrehozása előtt fut (lásd
+        ensure_unique_like_index), ha a korábbi read-modify-write útvonal
+        duplikátumokat vagy elcsúszott számlálókat hagyott hátra.
+        """
+        likes = LikeDocument.get_motor_collection()
+        duplicates = await likes.aggregate([
+            {"$group": {"_id": {"post_id": "$post_id", "user_id": "$user_id"},
+                        "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ], allowDiskUse=True).to_list(length=None)
+        extra_ids = [like_id for row in duplicates for like_id in row["ids"][1:]]
+        if extra_ids:
+            await likes.delete_many({"_id": {"$in": extra_ids}})
+
+        counts = {}
+        for collection, field in ((likes, "like_count"), (CommentDocument.get_motor_collection(), "comment_count")):
+            async for row in collection.aggregate([{"$group": {"_id": "$post_id", "count": {"$sum": 1}}}], allowDiskUse=True):
+                counts.setdefault(row["_id"], {"like_count": 0, "comment_count": 0})[field] = row["count"]
+
+        operations = []
+        async for post in ForumPostDocument.get_motor_collection().find({}, {"like_count": 1, "comment_count": 1}):
+            expected = counts.get(post["_id"], {"like_count": 0, "comment_count": 0})
+            if post.get("like_count") != expected["like_count"] or post.get("comment_count") != expected["comment_count"]:
+                operations.append(UpdateOne({"_id": post["_id"]}, {"$set": expected}))
+        if operations:
+            await ForumPostDocument.get_motor_collection().bulk_write(operations, ordered=False)
+
+        return {"duplicate_likes_removed": len(extra_ids), "posts_repaired": len(operations)}
+
+    @staticmethod
+    async def ensure_unique_like_index() -> bool:
+        """
+        Az egyedi (post_id, user_id) like index létrehozása induláskor, ha még nincs
+
+        Előtte a duplikátumokat eltávolítjuk (repair_counters), így a korábbi
+        adatokon sem akad el az indulás. Több worker közül csak a zár tartója
+        dolgozik; hiba esetén naplóz, és a következő induláskor újrapróbálja.
+
+        Returns:
+            True, ha az index létezik (vagy most jött létre)
+        """
+        likes = LikeDocument.get_motor_collection()
+        if (await likes.index_information()).get(LIKE_UNIQUE_INDEX_NAME, {}).get("unique"):
+            return True
+
+        owner = new_owner_id()
+        if not await acquire_lease(_LIKE_INDEX_LEASE, owner, _LIKE_INDEX_LEASE_SECONDS):
+            return False
+        try:
+            repaired = await ForumInteractionService.repair_counters()
+            await likes.create_index(
+                [("post_id", 1), ("user_id", 1)], unique=True, name=LIKE_UNIQUE_INDEX_NAME
+            )
+            logger.info(f"Unique like index created after repair: {repaired}")
+            return True
+        except Exception as e:
+            logger.error(f"Creating the unique like index failed, will retry on next startup: {e}")
+            return False
+        finally:
+            await release_lease(_LIKE_INDEX_LEASE, owner)
+
+
+@job_queue.register("forum.notify")
+async def send_forum_notification(payload: Dict[str, Any]) -> None:
+    """Háttérben létrehozott like / komment értesítés"""
+    await ForumService().create_notification(
+        user_id=payload["user_id"],
+        from_user_id=payload["from_user_id"],
+        from_username=payload["from_username"],
+        notification_type=NotificationType(payload["notification_type"]),
+        post_id=payload["post_id"],
+        message=payload["message"]
+    )
+
+
+# Manuális futtatáshoz (számlálók javítása; az egyedi like indexet induláskor
+# az ensure_unique_like_index hozza létre):
+#   python -m app.services.forum_interaction_service
+if __name__ == "__main__":
+    import os
+    import asyncio
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from dotenv import load_dotenv
+    from app.core.db import MONGODB_DB_NAME
+
+    async def main():
+        # Index létrehozás nélkül (nem az init_db-vel), hogy a duplikátumok ellenére is elinduljon
+        load_dotenv()
+        client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+        await init_beanie(
+            database=client[MONGODB_DB_NAME],
+            document_models=[ForumPostDocument, LikeDocument, CommentDocument],
+            skip_indexes=True
+        )
+        print(await ForumInteractionService.repair_counters())
+
+    asyncio.run(main())
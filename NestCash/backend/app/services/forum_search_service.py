@@ -0,0 +1,227 @@
+# app/services/forum_search_service.py
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import defaultdict
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+import unicodedata
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+
+from app.models.forum_models import ForumPostDocument
+
+logger = logging.getLogger(__name__)
+
+# Keresőmotor:
+#   "text"   - MongoDB text index (relevancia szerint rendezve); ha a szerver nem
+#              támogatja, automatikusan a memóriabeli indexre vált
+#   "memory" - folyamaton belüli fordított index (pl. helyi Mongo helyettesítőhöz)
+#
+# A memóriabeli index folyamatonként külön él: a saját worker módosításait
+# azonnal követi, a többi worker írásait csak a következő újraépítéskor
+# (FORUM_SEARCH_INDEX_TTL_SECONDS) látja. Több workeres telepítésnél a "text"
+# motor az ajánlott; a "memory" elsősorban egyfolyamatos futtatáshoz való.
+FORUM_SEARCH_ENGINE = os.getenv("FORUM_SEARCH_ENGINE", "text")
+
+# A memóriabeli index ennyi másodpercenként újraépül az adatbázisból
+FORUM_SEARCH_INDEX_TTL_SECONDS = float(os.getenv("FORUM_SEARCH_INDEX_TTL_SECONDS", "300"))
+
+# A láthatósági szűrés ekkora $in csomagokban fut a jelölteken
+MEMORY_SEARCH_FILTER_BATCH = 1000
+
+TITLE_WEIGHT = 3
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def fold_accents(text: str) -> str:
+    """Kisbetűsítés és ékezetek eltávolítása (á->a, ő->o, ű->u, ...)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Ékezet nélküli, kisbetűs szavak (legalább 2 karakter)"""
+    return [token for token in _TOKEN_PATTERN.findall(fold_accents(text or "")) if len(token) >= 2]
+
+
+class ForumSearchIndex:
+    """Folyamaton belüli fordított index a fórum posztokhoz (cím és tartalom)"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[ObjectId, int]] = defaultdict(dict)
+        self._documents: Dict[ObjectId, Set[str]] = {}
+        self._built = False
+        self._built_at = 0.0
+        # Újraépítés közbeni módosítások (post_id, cím, tartalom) - None cím = törlés
+        self._pending: Optional[List[Tuple[ObjectId, Optional[str], str]]] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def _is_fresh(self) -> bool:
+        return self._built and time.monotonic() - self._built_at < FORUM_SEARCH_INDEX_TTL_SECONDS
+
+    @staticmethod
+    def _add(postings, documents, post_id: ObjectId, title: str, content: str) -> None:
+        weights = defaultdict(int)
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(content):
+            weights[token] += 1
+        for token, weight in weights.items():
+            postings[token][post_id] = weight
+        documents[post_id] = set(weights)
+
+    @staticmethod
+    def _remove(postings, documents, post_id: ObjectId) -> None:
+        for token in documents.pop(post_id, set()):
+            token_postings = postings.get(token)
+            if token_postings is not None:
+                token_postings.pop(post_id, None)
+                if not token_postings:
+                    del postings[token]
+
+    def _apply(self, post_id: ObjectId, title: Optional[str], content: str) -> None:
+        """Módosítás az élő indexen, újraépítés közben a függő listán is"""
+        if self._pending is not None:
+            self._pending.append((post_id, title, content))
+        if not self._built:
+            return
+        self._remove(self._postings, self._documents, post_id)
+        if title is not None:
+            self._add(self._postings, self._documents, post_id, title, content)
+
+    async def ensure_built(self) -> None:
+        """Index felépítése az összes posztból (első kereséskor, majd TTL lejártakor újra)"""
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            # Új struktúrákba építünk, a régi index addig kiszolgálhat
+            postings: Dict[str, Dict[ObjectId, int]] = defaultdict(dict)
+            documents: Dict[ObjectId, Set[str]] = {}
+            self._pending = []
+            try:
+                cursor = ForumPostDocument.get_motor_collection().find({}, {"title": 1, "content": 1})
+                async for post in cursor:
+                    self._add(postings, documents, post["_id"], post.get("title", ""), post.get("content", ""))
+                # A beolvasás közben érkezett módosítások rájátszása
+                for post_id, title, content in self._pending:
+                    self._remove(postings, documents, post_id)
+                    if title is not None:
+                        self._add(postings, documents, post_id, title, content)
+            finally:
+                self._pending = None
+            self._postings, self._documents = postings, documents
+            self._built = True
+            self._built_at = time.monotonic()
+            logger.info(f"Forum search index built with {len(self._documents)} posts")
+
+    def index_post(self, post: ForumPostDocument) -> None:
+        """Új vagy módosított poszt (csak ha az index már fel van építve vagy épül)"""
+        self._apply(ObjectId(post.id), post.title, post.content)
+
+    def remove_post(self, post_id) -> None:
+        """Törölt poszt eltávolítása"""
+        self._apply(ObjectId(post_id), None, "")
+
+    def search(self, query: str) -> List[Tuple[ObjectId, float]]:
+        """Találatok (post_id, pontszám) csökkenő pontszám szerint; bármely szó egyezése elég"""
+        document_count = max(len(self._documents), 1)
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + document_count / len(postings))
+            for post_id, weight in postings.items():
+                scores[post_id] += weight * idf
+        return sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+
+
+forum_search_index = ForumSearchIndex()
+
+
+class ForumSearchService:
+    """Fórum posztok szöveges keresése relevancia szerint, a hívó szűrőinek (pl. láthatóság) megtartásával"""
+
+    @staticmethod
+    async def search_posts(
+        search: str,
+        query_filter: Dict[str, Any],
+        skip: int,
+        limit: int
+    ) -> Tuple[List[ForumPostDocument], int]:
+        """
+        Returns:
+            (a kért oldal posztjai relevancia szerint, összes találat száma)
+        """
+        if FORUM_SEARCH_ENGINE == "text":
+            try:
+                return await ForumSearchService._search_text_index(search, query_filter, skip, limit)
+            except OperationFailure as e:
+                logger.warning(f"Text search unavailable, falling back to in-process index: {e}")
+        return await ForumSearchService._search_memory_index(search, query_filter, skip, limit)
+
+    @staticmethod
+    async def _search_text_index(
+        search: str,
+        query_filter: Dict[str, Any],
+        skip: int,
+        limit: int
+    ) -> Tuple[List[ForumPostDocument], int]:
+        text_filter = {"$and": [query_filter, {"$text": {"$search": search}}]} if query_filter \
+            else {"$text": {"$search": search}}
+        collection = ForumPostDocument.get_motor_collection()
+
+        total_count = await collection.count_documents(text_filter)
+        cursor = collection.find(text_filter, {"score": {"$meta": "textScore"}})\
+            .sort([("score", {"$meta": "textScore"}), ("created_at", -1)])\
+            .skip(skip)\
+            .limit(limit)
+
+        posts = []
+        async for raw_post in cursor:
+            raw_post.pop("score", None)
+            posts.append(ForumPostDocument.model_validate(raw_post))
+        return posts, total_count
+
+    @staticmethod
+    async def _search_memory_index(
+        search: str,
+        query_filter: Dict[str, Any],
+        skip: int,
+        limit: int
+    ) -> Tuple[List[ForumPostDocument], int]:
+        await forum_search_index.ensure_built()
+        ranked = forum_search_index.search(search)
+        if not ranked:
+            return [], 0
+
+        # Láthatóság és egyéb szűrők az összes jelöltre (csonkolás előtt, hogy
+        # az összes találat száma pontos legyen), csomagonként egy lekérdezéssel
+        candidate_ids = [post_id for post_id, _ in ranked]
+        collection = ForumPostDocument.get_motor_collection()
+        visible_ids = set()
+        for start in range(0, len(candidate_ids), MEMORY_SEARCH_FILTER_BATCH):
+            id_filter = {"_id": {"$in": candidate_ids[start:start + MEMORY_SEARCH_FILTER_BATCH]}}
+            visible_filter = {"$and": [query_filter, id_filter]} if query_filter else id_filter
+            visible_ids.update(await collection.distinct("_id", visible_filter))
+
+        ordered_ids = [post_id for post_id in candidate_ids if post_id in visible_ids]
+        page_ids = ordered_ids[skip:skip + limit]
+        if not page_ids:
+            return [], len(ordered_ids)
+
+        posts_by_id = {
+            ObjectId(post.id): post
+            for post in await ForumPostDocument.find({"_id": {"$in": page_ids}}).to_list()
+        }
+        return [posts_by_id[post_id] for post_id in page_ids if post_id in posts_by_id], len(ordered_ids)
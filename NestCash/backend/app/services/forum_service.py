@@ -1,5 +1,5 @@
 # app/services/forum_service.py
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from beanie import PydanticObjectId
 from bson import ObjectId
 from datetime import datetime
@@ -9,6 +9,7 @@ from app.models.forum_models import (
     ForumPostDocument, FollowDocument, NotificationDocument, UserForumSettingsDocument,
     PrivacyLevel, NotificationType
 )
+from app.services.notification_service import NotificationService
 
 logger = logging.getLogger(__name__)
 
@@ -109,12 +110,46 @@ class ForumService:
             )
             
             await notification.insert()
+            # A /notifications/stats cache-t ez az út is frissítse
+            NotificationService.invalidate_stats(user_id)
             return True
             
         except Exception as e:
             logger.error(f"Error creating notification: {e}")
             return False
     
+    async def get_follow_states(
+        self,
+        user_id: str,
+        other_user_ids: List[ObjectId]
+    ) -> Dict[ObjectId, Tuple[bool, bool]]:
+        """
+        Követési állapotok több felhasználóra egyetlen lekérdezéssel
+
+        Returns:
+            {másik user_id: (őt követjük-e, ő követ-e minket)}
+        """
+        states = {other_id: (False, False) for other_id in other_user_ids}
+        if not other_user_ids:
+            return states
+
+        me = ObjectId(user_id)
+        cursor = FollowDocument.get_motor_collection().find(
+            {"$or": [
+                {"follower_id": me, "following_id": {"$in": other_user_ids}},
+                {"following_id": me, "follower_id": {"$in": other_user_ids}},
+            ]},
+            {"_id": 0, "follower_id": 1, "following_id": 1}
+        )
+        async for follow in cursor:
+            if follow["follower_id"] == me:
+                is_following, is_followed_by = states.get(follow["following_id"], (False, False))
+                states[follow["following_id"]] = (True, is_followed_by)
+            else:
+                is_following, is_followed_by = states.get(follow["follower_id"], (False, False))
+                states[follow["follower_id"]] = (is_following, True)
+        return states
+    
     async def get_user_forum_settings(self, user_id: str) -> UserForumSettingsDocument:
         """
         Felhasználó fórum beállításainak lekérése, vagy alapértelmezett létrehozása
@@ -0,0 +1,389 @@
+# app/services/forum_timeline_service.py
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+import logging
+import time
+import os
+
+from app.core.job_queue import job_queue
+from app.core.pagination import COUNT_ESTIMATE_CAP, TotalMode, count_total, keyset_filter
+from app.models.forum_models import (
+    ForumPostDocument, FollowDocument, ForumTimelineEntry, PostCategory, PrivacyLevel
+)
+
+logger = logging.getLogger(__name__)
+
+# Követési feed forrása:
+#   "query"    - a korábbi lekérdezés (követettek $in + láthatósági szűrő)
+#   "timeline" - előre kiszámolt idővonal (backfill után kapcsolható be)
+FORUM_FEED_MODE = os.getenv("FORUM_FEED_MODE", "query")
+
+# E fölötti követőszámú szerzőknél nincs fan-out, a posztjaikat olvasáskor húzzuk be
+FORUM_FANOUT_MAX_FOLLOWERS = int(os.getenv("FORUM_FANOUT_MAX_FOLLOWERS", "5000"))
+
+# Követéskor ennyi korábbi posztot másolunk az új követő idővonalára
+FORUM_FOLLOW_BACKFILL_POSTS = int(os.getenv("FORUM_FOLLOW_BACKFILL_POSTS", "100"))
+
+_FANOUT_BATCH_SIZE = 1000
+_HIGH_FANOUT_CACHE_SECONDS = 300
+
+# (lejárat, nagy követőszámú szerzők halmaza)
+_high_fanout_cache: Tuple[float, Set[ObjectId]] = (0.0, set())
+
+_TIMELINE_SORT = [("created_at", -1), ("post_id", -1)]
+_POST_SORT = [("created_at", -1), ("_id", -1)]
+
+# Más felhasználók idővonalára csak ezek a posztok kerülhetnek
+_SHARED_PRIVACY_LEVELS = [PrivacyLevel.PUBLIC.value, PrivacyLevel.FRIENDS.value]
+
+
+def _entry_operation(owner_id: ObjectId, post: Dict[str, Any]) -> UpdateOne:
+    """Idempotens idővonal beírás (újrapróbáláskor sem duplikál)"""
+    return UpdateOne(
+        {"owner_id": owner_id, "post_id": post["_id"]},
+        {
+            "$setOnInsert": {
+                "author_id": post["user_id"],
+                "category": post["category"],
+                "created_at": post["created_at"],
+            },
+            # Egy közben futó rebuild ne törölje (csak a régebbi bejegyzéseket takarítja)
+            "$set": {"updated_at": datetime.utcnow()},
+        },
+        upsert=True
+    )
+
+
+class ForumTimelineService:
+    """Követési feed: fan-out on write, nagy követőszámú szerzőknél olvasáskori behúzással"""
+
+    # ----------- Nagy követőszámú szerzők -----------
+
+    @staticmethod
+    async def get_high_fanout_authors() -> Set[ObjectId]:
+        """A küszöb fölötti követőszámú szerzők (rövid ideig cache-elve)"""
+        global _high_fanout_cache
+        expires_at, authors = _high_fanout_cache
+        if expires_at > time.monotonic():
+            return authors
+
+        pipeline = [
+            {"$group": {"_id": "$following_id", "followers": {"$sum": 1}}},
+            {"$match": {"followers": {"$gt": FORUM_FANOUT_MAX_FOLLOWERS}}},
+            {"$project": {"_id": 1}},
+        ]
+        rows = await FollowDocument.get_motor_collection().aggregate(pipeline).to_list(length=None)
+        authors = {row["_id"] for row in rows}
+        _high_fanout_cache = (time.monotonic() + _HIGH_FANOUT_CACHE_SECONDS, authors)
+        return authors
+
+    @staticmethod
+    async def _is_high_fanout(author_id: ObjectId) -> bool:
+        if author_id in await ForumTimelineService.get_high_fanout_authors():
+            return True
+        followers = await FollowDocument.find({"following_id": author_id}).count()
+        if followers > FORUM_FANOUT_MAX_FOLLOWERS:
+            # A cache frissüléséig is húzzuk be olvasáskor
+            _high_fanout_cache[1].add(author_id)
+            return True
+        return False
+
+    # ----------- Írási oldal -----------
+
+    @staticmethod
+    def _post_fields(post: ForumPostDocument) -> Dict[str, Any]:
+        return {
+            "_id": ObjectId(post.id),
+            "user_id": ObjectId(post.user_id),
+            "category": post.category.value if isinstance(post.category, PostCategory) else post.category,
+            "created_at": post.created_at,
+        }
+
+    @staticmethod
+    async def add_post(post: ForumPostDocument) -> None:
+        """
+        Új poszt: a szerző saját idővonalára azonnal, a követőkére háttérfeladatként
+
+        Privát posztot csak a szerző lát; nagy követőszámú szerzőnél a
+        követők idővonalát nem írjuk, olvasáskor húzzuk be a posztot.
+        """
+        fields = ForumTimelineService._post_fields(post)
+        await ForumTimelineEntry.get_motor_collection().bulk_write(
+            [_entry_operation(fields["user_id"], fields)], ordered=False
+        )
+
+        if post.privacy_level == PrivacyLevel.PRIVATE:
+            return
+
+        try:
+            await job_queue.enqueue("forum.fanout", {"post_id": str(post.id)})
+        except Exception as e:
+            logger.error(f"Failed to enqueue timeline fan-out for post {post.id}: {e}")
+
+    @staticmethod
+    async def fan_out(post_id: str) -> int:
+        """Poszt beírása a szerző összes követőjének idővonalára (kötegelt bulk_write)"""
+        post = await ForumPostDocument.get_motor_collection().find_one(
+            {"_id": ObjectId(post_id)},
+            {"user_id": 1, "category": 1, "created_at": 1, "privacy_level": 1}
+        )
+        if not post or post["privacy_level"] not in _SHARED_PRIVACY_LEVELS:
+            return 0
+        if await ForumTimelineService._is_high_fanout(post["user_id"]):
+            return 0
+
+        collection = ForumTimelineEntry.get_motor_collection()
+        followers = FollowDocument.get_motor_collection().find(
+            {"following_id": post["user_id"]}, {"follower_id": 1}
+        )
+
+        written = 0
+        batch = []
+        async for follow in followers:
+            batch.append(_entry_operation(follow["follower_id"], post))
+            if len(batch) >= _FANOUT_BATCH_SIZE:
+                await collection.bulk_write(batch, ordered=False)
+                written += len(batch)
+                batch = []
+        if batch:
+            await collection.bulk_write(batch, ordered=False)
+            written += len(batch)
+
+        return written
+
+    @staticmethod
+    async def update_post(post: ForumPostDocument) -> None:
+        """Kategória vagy láthatóság változott: a bejegyzések újraírása"""
+        await ForumTimelineService.remove_post(post.id)
+        await ForumTimelineService.add_post(post)
+
+    @staticmethod
+    async def remove_post(post_id) -> None:
+        """Törölt poszt eltávolítása minden idővonalról"""
+        await ForumTimelineEntry.get_motor_collection().delete_many({"post_id": ObjectId(post_id)})
+
+    @staticmethod
+    async def on_follow(follower_id: str, following_id: str) -> None:
+        """Új követés: a követett szerző legutóbbi posztjai az új követő idővonalára"""
+        author_id = ObjectId(following_id)
+        if await ForumTimelineService._is_high_fanout(author_id):
+            return
+
+        posts = await ForumPostDocument.get_motor_collection().find(
+            {"user_id": author_id, "privacy_level": {"$in": _SHARED_PRIVACY_LEVELS}},
+            {"user_id": 1, "category": 1, "created_at": 1}
+        ).sort(_POST_SORT).limit(FORUM_FOLLOW_BACKFILL_POSTS).to_list(length=None)
+
+        if posts:
+            await ForumTimelineEntry.get_motor_collection().bulk_write(
+                [_entry_operation(ObjectId(follower_id), post) for post in posts], ordered=False
+            )
+
+    @staticmethod
+    async def on_unfollow(follower_id: str, following_id: str) -> None:
+        """Követés megszűnése: a szerző posztjai lekerülnek a volt követő idővonaláról"""
+        await ForumTimelineEntry.get_motor_collection().delete_many({
+            "owner_id": ObjectId(follower_id),
+            "author_id": ObjectId(following_id)
+        })
+
+    # ----------- Olvasási oldal -----------
+
+    @staticmethod
+    async def _pulled_authors(owner_id: ObjectId) -> List[ObjectId]:
+        """A felhasználó által követett nagy követőszámú szerzők (posztjaikat olvasáskor húzzuk be)"""
+        high_fanout_authors = await ForumTimelineService.get_high_fanout_authors()
+        if not high_fanout_authors:
+            return []
+        follows = await FollowDocument.get_motor_collection().find(
+            {"follower_id": owner_id, "following_id": {"$in": list(high_fanout_authors)}},
+            {"following_id": 1}
+        ).to_list(length=None)
+        return [follow["following_id"] for follow in follows]
+
+    @staticmethod
+    def _pull_filter(pulled_authors: List[ObjectId], category: Optional[PostCategory]) -> Dict[str, Any]:
+        pull_query: Dict[str, Any] = {
+            "user_id": {"$in": pulled_authors},
+            "privacy_level": {"$in": _SHARED_PRIVACY_LEVELS},
+        }
+        if category:
+            pull_query["category"] = category.value
+        return pull_query
+
+    @staticmethod
+    async def count_feed(
+        user_id: str,
+        category: Optional[PostCategory] = None,
+        mode: TotalMode = TotalMode.EXACT
+    ) -> int:
+        """
+        A követési feed összes posztjának száma (ugyanazok a források, mint a get_feed-ben)
+
+        A behúzott szerzők idővonal bejegyzéseit (pl. a küszöb átlépése előtti
+        fan-out) nem számoljuk, mert a posztjaik a behúzott részben szerepelnek.
+        """
+        if mode == TotalMode.NONE:
+            return -1
+        owner_id = ObjectId(user_id)
+        pulled_authors = await ForumTimelineService._pulled_authors(owner_id)
+
+        timeline_filter: Dict[str, Any] = {"owner_id": owner_id}
+        if category:
+            timeline_filter["category"] = category.value
+        if pulled_authors:
+            timeline_filter["author_id"] = {"$nin": pulled_authors}
+        total = await count_total(ForumTimelineEntry, timeline_filter, mode)
+
+        if pulled_authors:
+            total += await count_total(
+                ForumPostDocument, ForumTimelineService._pull_filter(pulled_authors, category), mode
+            )
+        return min(total, COUNT_ESTIMATE_CAP) if mode == TotalMode.ESTIMATE else total
+
+    @staticmethod
+    async def get_feed(
+        user_id: str,
+        limit: int,
+        skip: int = 0,
+        cursor: Optional[List[Any]] = None,
+        category: Optional[PostCategory] = None
+    ) -> Tuple[List[ForumPostDocument], bool]:
+        """
+        Követési feed: indexelt tartomány-olvasás az idővonalon, összefésülve
+        a követett nagy követőszámú szerzők posztjaival
+
+        Args:
+            cursor: Az előző oldal utolsó posztjának [created_at, id] értéke
+
+        Returns:
+            (posztok létrehozás szerint csökkenő sorrendben, van-e további oldal)
+        """
+        owner_id = ObjectId(user_id)
+        window = skip + limit + 1
+
+        timeline_query = {"owner_id": owner_id, **keyset_filter(_TIMELINE_SORT, cursor)}
+        if category:
+            timeline_query["category"] = category.value
+        entries = await ForumTimelineEntry.get_motor_collection().find(
+            timeline_query, {"post_id": 1, "created_at": 1}
+        ).sort(_TIMELINE_SORT).limit(window).to_list(length=None)
+
+        # Hybrid pull: a követett nagy követőszámú szerzők posztjai közvetlenül
+        pulled_posts = []
+        pulled_authors = await ForumTimelineService._pulled_authors(owner_id)
+        if pulled_authors:
+            pull_query = {
+                **ForumTimelineService._pull_filter(pulled_authors, category),
+                **keyset_filter(_POST_SORT, cursor)
+            }
+            pulled_posts = await ForumPostDocument.find(pull_query)\
+                .sort(_POST_SORT)\
+                .limit(window)\
+                .to_list()
+
+        # Összefésülés (created_at, id) szerint, duplikátumok nélkül
+        candidates = {entry["post_id"]: (entry["created_at"], entry["post_id"]) for entry in entries}
+        for post in pulled_posts:
+            candidates[ObjectId(post.id)] = (post.created_at, ObjectId(post.id))
+        ordered = sorted(candidates.values(), reverse=True)
+
+        has_more = len(ordered) > skip + limit
+        page_ids = [post_id for _, post_id in ordered[skip:skip + limit]]
+
+        posts_by_id = {ObjectId(post.id): post for post in pulled_posts}
+        missing_ids = [post_id for post_id in page_ids if post_id not in posts_by_id]
+        if missing_ids:
+            for post in await ForumPostDocument.find({"_id": {"$in": missing_ids}}).to_list():
+                posts_by_id[ObjectId(post.id)] = post
+
+        # Időközben törölt posztok kimaradnak
+        return [posts_by_id[post_id] for post_id in page_ids if post_id in posts_by_id], has_more
+
+    # ----------- Backfill -----------
+
+    @staticmethod
+    async def rebuild(per_author_limit: int = FORUM_FOLLOW_BACKFILL_POSTS) -> None:
+        """
+        Összes idővonal újraépítése a követésekből és posztokból, szerver oldali $merge-dzsel
+
+        Szerzőnként legfeljebb per_author_limit posztot másolunk; a nagy
+        követőszámú szerzők posztjait kihagyjuk (azokat olvasáskor húzzuk be).
+        A meglévő bejegyzéseket helyben frissíti (updated_at = a rebuild kezdete),
+        és csak a végén törli azokat, amelyeket sem a rebuild, sem közben egy
+        élő írás nem érintett, így futás közben (vagy félbeszakadva) sem ürül ki
+        egyetlen feed sem.
+        """
+        started = datetime.utcnow()
+        high_fanout_authors = list(await ForumTimelineService.get_high_fanout_authors())
+        merge_stage = {"$merge": {
+            "into": ForumTimelineEntry.Settings.name,
+            "on": ["owner_id", "post_id"],
+            "whenMatched": "merge",
+            "whenNotMatched": "insert",
+        }}
+
+        # Saját posztok a szerző idővonalára
+        await ForumPostDocument.get_motor_collection().aggregate([
+            {"$project": {
+                "_id": 0, "owner_id": "$user_id", "post_id": "$_id",
+                "author_id": "$user_id", "category": 1, "created_at": 1,
+                "updated_at": {"$literal": started}
+            }},
+            merge_stage,
+        ]).to_list(length=None)
+
+        # Követett szerzők posztjai a követők idővonalára
+        await FollowDocument.get_motor_collection().aggregate([
+            {"$match": {"following_id": {"$nin": high_fanout_authors}}},
+            {"$lookup": {
+                "from": ForumPostDocument.Settings.name,
+                "let": {"author": "$following_id"},
+                "pipeline": [
+                    {"$match": {
+                        "$expr": {"$eq": ["$user_id", "$$author"]},
+                        "privacy_level": {"$in": _SHARED_PRIVACY_LEVELS}
+                    }},
+                    {"$sort": {"created_at": -1, "_id": -1}},
+                    {"$limit": per_author_limit},
+                    {"$project": {"category": 1, "created_at": 1}},
+                ],
+                "as": "posts",
+            }},
+            {"$unwind": "$posts"},
+            {"$project": {
+                "_id": 0, "owner_id": "$follower_id", "post_id": "$posts._id",
+                "author_id": "$following_id", "category": "$posts.category",
+                "created_at": "$posts.created_at", "updated_at": {"$literal": started}
+            }},
+            merge_stage,
+        ], allowDiskUse=True).to_list(length=None)
+
+        # A rebuild által nem érintett bejegyzések (megszűnt követés, törölt poszt);
+        # a $not a korábbi, updated_at nélküli bejegyzéseket is törli
+        result = await ForumTimelineEntry.get_motor_collection().delete_many(
+            {"updated_at": {"$not": {"$gte": started}}}
+        )
+        logger.info(f"Forum timelines rebuilt, {result.deleted_count} stale entries removed")
+
+
+@job_queue.register("forum.fanout")
+async def run_timeline_fan_out(payload: Dict[str, Any]) -> None:
+    """Háttérben futó fan-out egy új poszthoz"""
+    await ForumTimelineService.fan_out(payload["post_id"])
+
+
+# Manuális futtatáshoz (backfill, a FORUM_FEED_MODE=timeline bekapcsolása előtt):
+#   python -m app.services.forum_timeline_service
+if __name__ == "__main__":
+    import asyncio
+    from app.core.db import init_db
+
+    async def main():
+        await init_db()
+        await ForumTimelineService.rebuild()
+        print("Forum timelines rebuilt")
+
+    asyncio.run(main())
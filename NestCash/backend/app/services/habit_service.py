@@ -1,9 +1,11 @@
 # app/services/habit_service.py
 from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass
 from beanie import PydanticObjectId
 from datetime import datetime, date, timedelta
 import logging
 from collections import defaultdict
+from pymongo import UpdateOne
 
 from app.models.habit import Habit, HabitLog, TrackingType, FrequencyType, HabitCategory
 from app.models.habit_schemas import (
@@ -13,6 +15,22 @@ from app.models.habit_schemas import (
 
 logger = logging.getLogger(__name__)
 
+# A sorozat bejárásakor egyszerre ennyi log dátumot kérünk le
+STREAK_WALK_BATCH_SIZE = 64
+
+
+@dataclass
+class HabitPeriodCounts:
+    """Egy szokás mai, heti (hétfőtől) és havi teljesítései"""
+    today_logged: bool = False
+    today_completed: bool = False
+    today_value: float = 0.0       # A mai log(ok) értéke, teljesítéstől függetlenül
+    week_completed: int = 0
+    week_value: float = 0.0        # Teljesített logok értékeinek összege
+    month_completed: int = 0
+    month_value: float = 0.0
+
+
 class HabitService:
     """Szokások kezelését végző szolgáltatás"""
     
@@ -61,6 +79,8 @@ class HabitService:
                 "date": log_date
             })
             
+            was_completed = bool(existing_log and existing_log.completed)
+            
             if existing_log:
                 # Frissítjük a meglévő bejegyzést
                 existing_log.completed = completed
@@ -80,8 +100,8 @@ class HabitService:
                 )
                 await habit_log.insert()
             
-            # Streak frissítése
-            await HabitService.update_habit_streak(habit_id, user_id)
+            # Streak inkrementális frissítése
+            await HabitService.apply_log_change(habit_id, user_id, log_date, was_completed, completed)
             
             return habit_log
             
@@ -89,266 +109,395 @@ class HabitService:
             logger.error(f"Error logging habit completion: {e}")
             raise e
     
+    @staticmethod
+    def _parse_date(date_str: str) -> date:
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    
+    @staticmethod
+    def _streak_fields(last_completed: Optional[str], run_start: Optional[str], best_streak: int) -> Dict:
+        """Mentendő streak mezők; a jelenlegi sorozat csak akkor él, ha az utolsó teljesítés ma volt"""
+        current_streak = 0
+        if last_completed and last_completed == datetime.now().date().strftime("%Y-%m-%d"):
+            current_streak = (HabitService._parse_date(last_completed) - HabitService._parse_date(run_start)).days + 1
+        return {
+            "streak_count": current_streak,
+            "best_streak": best_streak,
+            "last_completed": last_completed,
+            "streak_run_start": run_start,
+        }
+    
+    @staticmethod
+    async def _save_streak(habit: Habit, fields: Dict) -> None:
+        """Csak a streak mezők írása (a szokás többi mezőjét nem írja felül)"""
+        for key, value in fields.items():
+            setattr(habit, key, value)
+        await Habit.get_motor_collection().update_one({"_id": habit.id}, {"$set": fields})
+    
+    @staticmethod
+    async def _count_adjacent_completed(habit_id: PydanticObjectId, day: date, direction: int) -> int:
+        """
+        Megszakítás nélkül teljesített napok száma a nap előtt (direction=-1)
+        vagy után (direction=1), magát a napot nem számolva. Az első hiányzó
+        napnál megáll, így a költség a sorozat hosszával arányos.
+        """
+        date_str = day.strftime("%Y-%m-%d")
+        cursor = HabitLog.get_motor_collection().find(
+            {"habit_id": habit_id, "completed": True, "date": {"$lt" if direction < 0 else "$gt": date_str}},
+            {"date": 1, "_id": 0}
+        ).sort("date", direction).batch_size(STREAK_WALK_BATCH_SIZE)
+        
+        count = 0
+        expected = day + timedelta(days=direction)
+        async for row in cursor:
+            if row["date"] == (expected - timedelta(days=direction)).strftime("%Y-%m-%d"):
+                continue  # Ugyanarra a napra duplikált log
+            if row["date"] != expected.strftime("%Y-%m-%d"):
+                break
+            count += 1
+            expected += timedelta(days=direction)
+        return count
+    
+    @staticmethod
+    async def compute_streak_fields(habit_id: PydanticObjectId) -> Dict:
+        """Teljes újraszámolás az összes teljesített napból (60 napos korlát nélkül)"""
+        cursor = HabitLog.get_motor_collection().find(
+            {"habit_id": habit_id, "completed": True},
+            {"date": 1, "_id": 0}
+        ).sort("date", 1)
+        
+        best_streak = 0
+        run_start = None
+        last_completed = None
+        async for row in cursor:
+            if row["date"] == last_completed:
+                continue
+            if last_completed is None or (HabitService._parse_date(row["date"]) - HabitService._parse_date(last_completed)).days != 1:
+                run_start = row["date"]
+            last_completed = row["date"]
+            best_streak = max(best_streak, (HabitService._parse_date(last_completed) - HabitService._parse_date(run_start)).days + 1)
+        
+        return HabitService._streak_fields(last_completed, run_start, best_streak)
+    
     @staticmethod
     async def update_habit_streak(habit_id: str, user_id: str) -> None:
-        """Szokás streak számítás frissítése"""
+        """Szokás streak teljes újraszámítása (backfill, illetve hiányzó inkrementális állapot esetén)"""
         try:
             habit = await Habit.get(PydanticObjectId(habit_id))
             if not habit or str(habit.user_id) != user_id:
                 return
-            
-            # Utolsó 60 nap logjai (biztonság kedvéért hosszabb időszak)
-            sixty_days_ago = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d")
-            logs = await HabitLog.find({
-                "user_id": PydanticObjectId(user_id),
-                "habit_id": PydanticObjectId(habit_id),
-                "date": {"$gte": sixty_days_ago}
-            }).sort("date", -1).to_list()
-            
-            if not logs:
-                habit.streak_count = 0
-                habit.best_streak = 0
-                habit.last_completed = None
-                await habit.save()
-                return
-            
-            # Jelenlegi streak számítása
-            current_streak = 0
-            today = datetime.now().date()
-            
-            # Rendezzük a logokat dátum szerint csökkenő sorrendbe
-            logs_by_date = {log.date: log for log in logs}
-            
-            # Kezdjük a mai nappal (vagy a legutóbbi nappal)
-            check_date = today
-            
-            while True:
-                date_str = check_date.strftime("%Y-%m-%d")
-                
-                if date_str in logs_by_date and logs_by_date[date_str].completed:
-                    current_streak += 1
-                    check_date -= timedelta(days=1)
-                else:
-                    break
-                
-                # Végtelen ciklus elkerülése
-                if current_streak > 365:
-                    break
-            
-            # Legjobb streak keresése
-            best_streak = 0
-            temp_streak = 0
-            
-            # Időrendben végigmegyünk a logokon
-            sorted_dates = sorted(logs_by_date.keys())
-            prev_date = None
-            
-            for date_str in sorted_dates:
-                current_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                log = logs_by_date[date_str]
-                
-                if log.completed:
-                    # Ha ez az első nap vagy egymást követő napok
-                    if prev_date is None or (current_date - prev_date).days == 1:
-                        temp_streak += 1
-                    else:
-                        # Megszakadt a sorozat
-                        temp_streak = 1
-                    
-                    best_streak = max(best_streak, temp_streak)
-                    prev_date = current_date
-                else:
-                    temp_streak = 0
-                    prev_date = None
-            
-            # Utoljára teljesített dátum keresése
-            last_completed = None
-            for log in sorted(logs, key=lambda x: x.date, reverse=True):
-                if log.completed:
-                    last_completed = log.date
-                    break
-            
-            # Habit frissítése
-            habit.streak_count = current_streak
-            habit.best_streak = best_streak
-            habit.last_completed = last_completed
-            await habit.save()
-            
+            await HabitService._save_streak(habit, await HabitService.compute_streak_fields(habit.id))
         except Exception as e:
             logger.error(f"Error updating habit streak: {e}")
     
     @staticmethod
-    async def get_habit_progress_stats(
+    async def apply_log_change(
         habit_id: str,
         user_id: str,
-        days: int = 30
-    ) -> HabitProgressStats:
-        """Szokás haladási statisztikák számítása"""
+        log_date: str,
+        was_completed: bool,
+        is_completed: bool
+    ) -> None:
+        """
+        Streak inkrementális frissítése egy log írása / törlése után
+        
+        Args:
+            log_date: A módosított log napja
+            was_completed: Teljesített volt-e a nap a módosítás előtt (új lognál False)
+            is_completed: Teljesített-e a nap a módosítás után (törlésnél False)
+        
+        Új legutolsó teljesítés O(1); visszadátumozott módosításnál csak a nap
+        körüli sorozatot járjuk be. A legjobb sorozat csak akkor számolódik
+        újra teljesen, ha épp a leghosszabb sorozat szakad meg.
+        """
         try:
-            start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+            habit = await Habit.get(PydanticObjectId(habit_id))
+            if not habit or str(habit.user_id) != user_id:
+                return
             
-            logs = await HabitLog.find({
-                "user_id": PydanticObjectId(user_id),
-                "habit_id": PydanticObjectId(habit_id),
-                "date": {"$gte": start_date}
-            }).to_list()
+            # Korábbi (backfill előtti) szokás: nincs inkrementális állapot
+            if habit.last_completed and not habit.streak_run_start:
+                await HabitService._save_streak(habit, await HabitService.compute_streak_fields(habit.id))
+                return
             
-            habit = await Habit.get(PydanticObjectId(habit_id))
+            last_completed = habit.last_completed
+            run_start = habit.streak_run_start
+            best_streak = habit.best_streak
             
-            total_days = len(logs)
-            completed_days = sum(1 for log in logs if log.completed)
-            completion_rate = (completed_days / total_days * 100) if total_days > 0 else 0
-            
-            # Numerikus szokásoknál átlagérték számítása
-            average_value = None
-            if habit and habit.tracking_type == TrackingType.NUMERIC:
-                values = [log.value for log in logs if log.value is not None and log.completed]
-                if values:
-                    average_value = sum(values) / len(values)
-            
-            return HabitProgressStats(
-                total_days=total_days,
-                completed_days=completed_days,
-                completion_rate=completion_rate,
-                current_streak=habit.streak_count if habit else 0,
-                best_streak=habit.best_streak if habit else 0,
-                average_value=average_value
-            )
+            if was_completed == is_completed:
+                # Nem változott a teljesített napok halmaza, csak a mai sorozatot frissítjük
+                await HabitService._save_streak(habit, HabitService._streak_fields(last_completed, run_start, best_streak))
+                return
             
-        except Exception as e:
-            logger.error(f"Error calculating habit progress stats: {e}")
-            return HabitProgressStats(
-                total_days=0,
-                completed_days=0,
-                completion_rate=0,
-                current_streak=0,
-                best_streak=0
+            day = HabitService._parse_date(log_date)
+            
+            # Gyors út: új legutolsó teljesített nap
+            if is_completed and (last_completed is None or log_date > last_completed):
+                if last_completed is None or (day - HabitService._parse_date(last_completed)).days != 1:
+                    run_start = log_date
+                last_completed = log_date
+                best_streak = max(best_streak, (day - HabitService._parse_date(run_start)).days + 1)
+                await HabitService._save_streak(habit, HabitService._streak_fields(last_completed, run_start, best_streak))
+                return
+
+            # Ugyanarra a napra több log is eshet: ha a módosítotton kívül van
+            # még teljesített log aznap, a teljesített napok halmaza nem változott
+            same_day_completed = await HabitLog.get_motor_collection().count_documents(
+                {"habit_id": habit.id, "completed": True, "date": log_date}, limit=2
             )
-    
-    @staticmethod
-    async def get_weekly_stats(
-        habit_id: str,
-        user_id: str,
-        weeks: int = 8
-    ) -> List[HabitWeeklyStats]:
-        """Heti statisztikák számítása"""
-        try:
-            habit = await Habit.get(PydanticObjectId(habit_id))
-            if not habit:
-                return []
+            if same_day_completed > (1 if is_completed else 0):
+                await HabitService._save_streak(habit, HabitService._streak_fields(last_completed, run_start, best_streak))
+                return
+
+            # Korlátos javítás a módosított nap körül
+            left = await HabitService._count_adjacent_completed(habit.id, day, -1)
+            right = await HabitService._count_adjacent_completed(habit.id, day, 1)
+            run_length = left + 1 + right
+            
+            if is_completed:
+                # A nap két sorozatot köthet össze: a legjobb csak nőhet
+                best_streak = max(best_streak, run_length)
+                if (day + timedelta(days=right)).strftime("%Y-%m-%d") == last_completed:
+                    run_start = (day - timedelta(days=left)).strftime("%Y-%m-%d")
+                await HabitService._save_streak(habit, HabitService._streak_fields(last_completed, run_start, best_streak))
+                return
             
-            # Utolsó N hét kezdete
-            today = datetime.now().date()
-            start_date = today - timedelta(weeks=weeks)
+            # Teljesített nap eltávolítása: a sorozat kettéválik
+            if run_length >= best_streak:
+                # Épp a leghosszabb sorozat szakadt meg; lehet, hogy nincs másik ilyen hosszú
+                await HabitService._save_streak(habit, await HabitService.compute_streak_fields(habit.id))
+                return
             
-            logs = await HabitLog.find({
-                "user_id": PydanticObjectId(user_id),
-                "habit_id": PydanticObjectId(habit_id),
-                "date": {"$gte": start_date.strftime("%Y-%m-%d")}
-            }).to_list()
-            
-            # Hetek szerinti csoportosítás
-            weekly_data = defaultdict(list)
-            
-            for log in logs:
-                log_date = datetime.strptime(log.date, "%Y-%m-%d").date()
-                # Hét kezdete (hétfő)
-                week_start = log_date - timedelta(days=log_date.weekday())
-                weekly_data[week_start].append(log)
-            
-            # Statisztikák összeállítása
-            weekly_stats = []
-            for week_start in sorted(weekly_data.keys()):
-                week_end = week_start + timedelta(days=6)
-                week_logs = weekly_data[week_start]
-                
-                completed_days = sum(1 for log in week_logs if log.completed)
-                total_value = None
-                
-                if habit.tracking_type == TrackingType.NUMERIC:
-                    values = [log.value for log in week_logs if log.value is not None and log.completed]
-                    if values:
-                        total_value = sum(values)
-                
-                weekly_stats.append(HabitWeeklyStats(
-                    week_start=week_start.strftime("%Y-%m-%d"),
-                    week_end=week_end.strftime("%Y-%m-%d"),
-                    completed_days=completed_days,
-                    total_value=total_value
-                ))
+            if log_date == last_completed:
+                if left:
+                    # Az utolsó sorozat egy nappal rövidebb, a kezdete nem változik
+                    last_completed = (day - timedelta(days=1)).strftime("%Y-%m-%d")
+                else:
+                    previous = await HabitLog.get_motor_collection().find_one(
+                        {"habit_id": habit.id, "completed": True, "date": {"$lt": log_date}},
+                        {"date": 1, "_id": 0},
+                        sort=[("date", -1)]
+                    )
+                    last_completed = previous["date"] if previous else None
+                    run_start = None
+                    if last_completed:
+                        last_day = HabitService._parse_date(last_completed)
+                        run_length_before = await HabitService._count_adjacent_completed(habit.id, last_day, -1)
+                        run_start = (last_day - timedelta(days=run_length_before)).strftime("%Y-%m-%d")
+            elif (day + timedelta(days=right)).strftime("%Y-%m-%d") == last_completed:
+                run_start = (day + timedelta(days=1)).strftime("%Y-%m-%d")
             
-            return weekly_stats
+            await HabitService._save_streak(habit, HabitService._streak_fields(last_completed, run_start, best_streak))
             
         except Exception as e:
-            logger.error(f"Error calculating weekly stats: {e}")
-            return []
+            logger.error(f"Error applying habit streak change: {e}")
     
     @staticmethod
-    async def get_monthly_stats(
-        habit_id: str,
-        user_id: str,
+    async def backfill_streaks(batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Összes szokás streak mezőinek teljes újraszámolása (inkrementális állapot
+        feltöltése, illetve ellenőrzése)
+        
+        Returns:
+            (feldolgozott szokások, eltérő és javított szokások száma)
+        """
+        processed = 0
+        corrected = 0
+        operations = []
+        cursor = Habit.get_motor_collection().find(
+            {}, {"streak_count": 1, "best_streak": 1, "last_completed": 1, "streak_run_start": 1}
+        )
+        async for raw in cursor:
+            processed += 1
+            fields = await HabitService.compute_streak_fields(raw["_id"])
+            if any(raw.get(key) != value for key, value in fields.items()):
+                corrected += 1
+                operations.append(UpdateOne({"_id": raw["_id"]}, {"$set": fields}))
+            if len(operations) >= batch_size:
+                await Habit.get_motor_collection().bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            await Habit.get_motor_collection().bulk_write(operations, ordered=False)
+        
+        logger.info(f"Habit streak backfill: {processed} habits, {corrected} corrected")
+        return processed, corrected
+    
+    @staticmethod
+    def _bucket_group(key) -> Dict:
+        """Log csoport összesítése: logok, teljesített napok, teljesített értékek összege és száma"""
+        is_completed = {"$eq": ["$completed", True]}
+        has_value = {"$and": [is_completed, {"$ne": [{"$ifNull": ["$value", None]}, None]}]}
+        return {
+            "_id": key,
+            "total_days": {"$sum": 1},
+            "completed_days": {"$sum": {"$cond": [is_completed, 1, 0]}},
+            "value_sum": {"$sum": {"$cond": [has_value, "$value", 0]}},
+            "value_count": {"$sum": {"$cond": [has_value, 1, 0]}},
+        }
+    
+    @staticmethod
+    async def get_habit_stats(
+        habit: Habit,
+        days: int = 30,
+        weeks: int = 8,
         months: int = 6
-    ) -> List[HabitMonthlyStats]:
-        """Havi statisztikák számítása"""
-        try:
-            habit = await Habit.get(PydanticObjectId(habit_id))
-            if not habit:
-                return []
-            
-            # Utolsó N hónap kezdete
-            today = datetime.now().date()
-            start_date = today.replace(day=1) - timedelta(days=30 * months)
-            
-            logs = await HabitLog.find({
-                "user_id": PydanticObjectId(user_id),
-                "habit_id": PydanticObjectId(habit_id),
-                "date": {"$gte": start_date.strftime("%Y-%m-%d")}
-            }).to_list()
-            
-            # Hónapok szerinti csoportosítás
-            monthly_data = defaultdict(list)
-            
-            for log in logs:
-                log_date = datetime.strptime(log.date, "%Y-%m-%d").date()
-                month_key = log_date.strftime("%Y-%m")
-                monthly_data[month_key].append(log)
-            
-            # Statisztikák összeállítása
-            monthly_stats = []
-            for month_key in sorted(monthly_data.keys()):
-                month_logs = monthly_data[month_key]
-                
-                # A hónap napjainak száma
-                year, month = map(int, month_key.split("-"))
-                if month == 12:
-                    next_month = datetime(year + 1, 1, 1)
-                else:
-                    next_month = datetime(year, month + 1, 1)
-                current_month = datetime(year, month, 1)
-                total_days_in_month = (next_month - current_month).days
-                
-                completed_days = sum(1 for log in month_logs if log.completed)
-                completion_rate = (completed_days / len(month_logs) * 100) if month_logs else 0
-                
-                total_value = None
-                if habit.tracking_type == TrackingType.NUMERIC:
-                    values = [log.value for log in month_logs if log.value is not None and log.completed]
-                    if values:
-                        total_value = sum(values)
-                
-                monthly_stats.append(HabitMonthlyStats(
-                    month=month_key,
-                    completed_days=completed_days,
-                    total_days=len(month_logs),
-                    completion_rate=completion_rate,
-                    total_value=total_value
-                ))
-            
-            return monthly_stats
-            
-        except Exception as e:
-            logger.error(f"Error calculating monthly stats: {e}")
-            return []
+    ) -> Tuple[HabitProgressStats, List[HabitWeeklyStats], List[HabitMonthlyStats]]:
+        """
+        Szokás összesített, heti és havi statisztikái egyetlen $facet aggregációval
+        
+        Az időablakok a korábbiakkal azonosak: utolsó `days` nap, utolsó
+        `weeks` hét (hétfői hétkezdettel csoportosítva), az aktuális hónap
+        eleje előtti 30 * `months` nap.
+        """
+        today = datetime.now().date()
+        overall_start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        weekly_start = (today - timedelta(weeks=weeks)).strftime("%Y-%m-%d")
+        monthly_start = (today.replace(day=1) - timedelta(days=30 * months)).strftime("%Y-%m-%d")
+        
+        log_date = {"$dateFromString": {"dateString": "$date", "format": "%Y-%m-%d"}}
+        week_start = {"$dateToString": {"format": "%Y-%m-%d", "date": {"$subtract": [
+            log_date, {"$multiply": [{"$subtract": [{"$isoDayOfWeek": log_date}, 1]}, 24 * 60 * 60 * 1000]}
+        ]}}}
+        
+        pipeline = [
+            {"$match": {
+                "user_id": habit.user_id,
+                "habit_id": habit.id,
+                "date": {"$gte": min(overall_start, weekly_start, monthly_start)}
+            }},
+            {"$facet": {
+                "overall": [
+                    {"$match": {"date": {"$gte": overall_start}}},
+                    {"$group": HabitService._bucket_group(None)},
+                ],
+                "weekly": [
+                    {"$match": {"date": {"$gte": weekly_start}}},
+                    {"$group": HabitService._bucket_group(week_start)},
+                    {"$sort": {"_id": 1}},
+                ],
+                "monthly": [
+                    {"$match": {"date": {"$gte": monthly_start}}},
+                    {"$group": HabitService._bucket_group({"$substrBytes": ["$date", 0, 7]})},
+                    {"$sort": {"_id": 1}},
+                ],
+            }},
+        ]
+        result = (await HabitLog.get_motor_collection().aggregate(pipeline).to_list(length=1))[0]
+        is_numeric = habit.tracking_type == TrackingType.NUMERIC
+        
+        def total_value(bucket: Dict) -> Optional[float]:
+            return bucket["value_sum"] if is_numeric and bucket["value_count"] else None
+        
+        overall = result["overall"][0] if result["overall"] else None
+        overall_stats = HabitProgressStats(
+            total_days=overall["total_days"] if overall else 0,
+            completed_days=overall["completed_days"] if overall else 0,
+            completion_rate=(overall["completed_days"] / overall["total_days"] * 100) if overall else 0,
+            current_streak=habit.streak_count,
+            best_streak=habit.best_streak,
+            average_value=(overall["value_sum"] / overall["value_count"])
+                if overall and is_numeric and overall["value_count"] else None
+        )
+        
+        weekly_stats = [
+            HabitWeeklyStats(
+                week_start=bucket["_id"],
+                week_end=(HabitService._parse_date(bucket["_id"]) + timedelta(days=6)).strftime("%Y-%m-%d"),
+                completed_days=bucket["completed_days"],
+                total_value=total_value(bucket)
+            )
+            for bucket in result["weekly"]
+        ]
+        
+        monthly_stats = [
+            HabitMonthlyStats(
+                month=bucket["_id"],
+                completed_days=bucket["completed_days"],
+                total_days=bucket["total_days"],
+                completion_rate=bucket["completed_days"] / bucket["total_days"] * 100,
+                total_value=total_value(bucket)
+            )
+            for bucket in result["monthly"]
+        ]
+        
+        return overall_stats, weekly_stats, monthly_stats
+    
+    @staticmethod
+    async def get_period_counts(
+        user_id: str,
+        habit_ids: Optional[List[PydanticObjectId]] = None
+    ) -> Dict[str, HabitPeriodCounts]:
+        """
+        Szokásonkénti mai, heti és havi teljesítések egyetlen aggregációval
+        
+        Args:
+            habit_ids: Csak ezekre a szokásokra (None = a felhasználó összes logja)
+        
+        Returns:
+            {habit_id: HabitPeriodCounts}; log nélküli szokás nem szerepel
+        """
+        today_date = datetime.now().date()
+        today = today_date.strftime("%Y-%m-%d")
+        week_start = (today_date - timedelta(days=today_date.weekday())).strftime("%Y-%m-%d")
+        month_start = today_date.replace(day=1).strftime("%Y-%m-%d")
+        
+        query_filter = {
+            "user_id": PydanticObjectId(user_id),
+            "date": {"$gte": min(week_start, month_start), "$lte": today}
+        }
+        if habit_ids is not None:
+            query_filter["habit_id"] = {"$in": list(habit_ids)}
+        
+        is_today = {"$eq": ["$date", today]}
+        is_completed = {"$eq": ["$completed", True]}
+        in_week = {"$and": [{"$gte": ["$date", week_start]}, is_completed]}
+        in_month = {"$and": [{"$gte": ["$date", month_start]}, is_completed]}
+        value = {"$ifNull": ["$value", 0]}
+        
+        pipeline = [
+            {"$match": query_filter},
+            {"$group": {
+                "_id": "$habit_id",
+                "today_logged": {"$max": is_today},
+                "today_completed": {"$max": {"$and": [is_today, is_completed]}},
+                "today_value": {"$sum": {"$cond": [is_today, value, 0]}},
+                "week_completed": {"$sum": {"$cond": [in_week, 1, 0]}},
+                "week_value": {"$sum": {"$cond": [in_week, value, 0]}},
+                "month_completed": {"$sum": {"$cond": [in_month, 1, 0]}},
+                "month_value": {"$sum": {"$cond": [in_month, value, 0]}},
+            }},
+        ]
+        
+        counts = {}
+        async for row in HabitLog.get_motor_collection().aggregate(pipeline):
+            habit_id = str(row.pop("_id"))
+            counts[habit_id] = HabitPeriodCounts(**row)
+        return counts
+    
+    @staticmethod
+    def usage_percentage(habit: Habit, counts: Optional[HabitPeriodCounts]) -> Optional[float]:
+        """Cél teljesítési százalék az időszaki számlálókból (ha van cél beállítva)"""
+        if not habit.has_goal or not habit.daily_target:
+            return None
+        counts = counts or HabitPeriodCounts()
+        is_boolean = habit.tracking_type == TrackingType.BOOLEAN
+        
+        if habit.goal_period == FrequencyType.DAILY:
+            # Napi cél esetén csak a mai napot nézzük
+            if not counts.today_logged:
+                return 0.0
+            if is_boolean:
+                return 100.0 if counts.today_completed else 0.0
+            return min(100.0, (counts.today_value / habit.daily_target) * 100)
+        
+        if habit.goal_period == FrequencyType.WEEKLY:
+            actual = counts.week_completed if is_boolean else counts.week_value
+            return min(100.0, (actual / habit.target_value) * 100)
+        
+        if habit.goal_period == FrequencyType.MONTHLY:
+            actual = counts.month_completed if is_boolean else counts.month_value
+            return min(100.0, (actual / habit.target_value) * 100)
+        
+        return None
     
     @staticmethod
     async def get_user_habit_overview(user_id: str) -> UserHabitOverview:
@@ -361,15 +510,9 @@ class HabitService:
             active_habits = sum(1 for h in habits if h.is_active)
             archived_habits = total_habits - active_habits
             
-            # Mai teljesítések
-            today = datetime.now().date().strftime("%Y-%m-%d")
-            today_logs = await HabitLog.find({
-                "user_id": PydanticObjectId(user_id),
-                "date": today,
-                "completed": True
-            }).to_list()
-            
-            completed_today = len(today_logs)
+            # Mai teljesítések (szokásonkénti időszaki számlálókból, egy aggregációval)
+            period_counts = await HabitService.get_period_counts(user_id)
+            completed_today = sum(1 for counts in period_counts.values() if counts.today_completed)
             
             # Átlagos streak számítása
             active_habit_streaks = [h.streak_count for h in habits if h.is_active]
@@ -435,62 +578,8 @@ class HabitService:
             if not habit or not habit.has_goal or not habit.daily_target:
                 return None
             
-            today = datetime.now().date().strftime("%Y-%m-%d")
-            
-            if habit.goal_period == FrequencyType.DAILY:
-                # Napi cél esetén csak a mai napot nézzük
-                log = await HabitLog.find_one({
-                    "user_id": PydanticObjectId(user_id),
-                    "habit_id": PydanticObjectId(habit_id),
-                    "date": today
-                })
-                
-                if not log:
-                    return 0.0
-                
-                if habit.tracking_type == TrackingType.BOOLEAN:
-                    return 100.0 if log.completed else 0.0
-                else:
-                    actual_value = log.value or 0
-                    return min(100.0, (actual_value / habit.daily_target) * 100)
-            
-            elif habit.goal_period == FrequencyType.WEEKLY:
-                # Heti cél esetén az aktuális hét teljesítését nézzük
-                today_date = datetime.now().date()
-                week_start = today_date - timedelta(days=today_date.weekday())
-                
-                logs = await HabitLog.find({
-                    "user_id": PydanticObjectId(user_id),
-                    "habit_id": PydanticObjectId(habit_id),
-                    "date": {"$gte": week_start.strftime("%Y-%m-%d"), "$lte": today}
-                }).to_list()
-                
-                if habit.tracking_type == TrackingType.BOOLEAN:
-                    completed_days = sum(1 for log in logs if log.completed)
-                    return min(100.0, (completed_days / habit.target_value) * 100)
-                else:
-                    total_value = sum(log.value or 0 for log in logs if log.completed)
-                    return min(100.0, (total_value / habit.target_value) * 100)
-            
-            elif habit.goal_period == FrequencyType.MONTHLY:
-                # Havi cél esetén az aktuális hónap teljesítését nézzük
-                today_date = datetime.now().date()
-                month_start = today_date.replace(day=1)
-                
-                logs = await HabitLog.find({
-                    "user_id": PydanticObjectId(user_id),
-                    "habit_id": PydanticObjectId(habit_id),
-                    "date": {"$gte": month_start.strftime("%Y-%m-%d"), "$lte": today}
-                }).to_list()
-                
-                if habit.tracking_type == TrackingType.BOOLEAN:
-                    completed_days = sum(1 for log in logs if log.completed)
-                    return min(100.0, (completed_days / habit.target_value) * 100)
-                else:
-                    total_value = sum(log.value or 0 for log in logs if log.completed)
-                    return min(100.0, (total_value / habit.target_value) * 100)
-            
-            return None
+            period_counts = await HabitService.get_period_counts(user_id, [habit.id])
+            return HabitService.usage_percentage(habit, period_counts.get(str(habit.id)))
             
         except Exception as e:
             logger.error(f"Error calculating habit usage percentage: {e}")
@@ -519,4 +608,18 @@ class HabitService:
             
         except Exception as e:
             logger.error(f"Error in bulk create habits: {e}")
-            return [], [str(e)]
\ No newline at end of file
+            return [], [str(e)]
+
+
+# Manuális futtatáshoz (streak mezők backfillje / ellenőrzése minden szokásra):
+#   python -m app.services.habit_service
+if __name__ == "__main__":
+    import asyncio
+    from app.core.db import init_db
+
+    async def main():
+        await init_db()
+        processed, corrected = await HabitService.backfill_streaks()
+        print(f"{processed} habits processed, {corrected} corrected")
+
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+# app/services/knowledge_catalogue.py
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+
+from app.models.knowledge import KnowledgeCategory, Lesson
+
+logger = logging.getLogger(__name__)
+
+# A publikált katalógus élettartama (másodperc); a knowledge_admin írásai azonnal érvénytelenítik,
+# több worker esetén a többi folyamat legfeljebb ennyi ideig lát régi katalógust
+KNOWLEDGE_CATALOGUE_TTL_SECONDS = int(os.getenv("KNOWLEDGE_CATALOGUE_TTL_SECONDS", "300"))
+
+
+def build_catalogue_pipeline() -> List[Dict[str, Any]]:
+    """
+    Aktív kategóriák sorrendben, a publikált leckék összefoglalójával
+
+    A leckékből csak a listához szükséges mezők jönnek át; az oldalak és
+    kvíz kérdések helyett azok száma / megléte.
+    """
+    return [
+        {"$match": {"is_active": True}},
+        {"$sort": {"order": 1, "_id": 1}},
+        {"$lookup": {
+            "from": Lesson.Settings.name,
+            "let": {"category_id": "$_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$category_id", "$$category_id"]}, "is_published": True}},
+                {"$sort": {"order": 1, "_id": 1}},
+                {"$project": {
+                    "title": 1,
+                    "description": 1,
+                    "difficulty": 1,
+                    "estimated_minutes": 1,
+                    "total_pages": {"$size": {"$ifNull": ["$pages", []]}},
+                    "has_quiz": {"$gt": [{"$size": {"$ifNull": ["$quiz_questions", []]}}, 0]},
+                }},
+            ],
+            "as": "lessons",
+        }},
+        {"$project": {"name": 1, "description": 1, "icon": 1, "color": 1, "lessons": 1}},
+    ]
+
+
+class KnowledgeCatalogueService:
+    """A publikált tudástár (kategóriák + lecke összefoglalók) közös, folyamaton belüli cache-e"""
+
+    def __init__(self, ttl_seconds: int = KNOWLEDGE_CATALOGUE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._catalogue: Optional[List[Dict[str, Any]]] = None
+        self._loaded_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Katalógus eldobása (kategória vagy lecke módosításakor); a következő lekérés újraépíti"""
+        self._catalogue = None
+        self._loaded_at = None
+
+    def _is_fresh(self) -> bool:
+        return (self._catalogue is not None and
+                datetime.utcnow() - self._loaded_at < timedelta(seconds=self.ttl_seconds))
+
+    async def get_catalogue(self) -> List[Dict[str, Any]]:
+        """Friss katalógus; lejárt TTL esetén egyetlen kérés építi újra, a többi megvárja"""
+        if self._is_fresh():
+            return self._catalogue
+
+        async with self._lock:
+            if not self._is_fresh():
+                self._catalogue = await self.build_catalogue()
+                self._loaded_at = datetime.utcnow()
+        return self._catalogue
+
+    async def build_catalogue(self) -> List[Dict[str, Any]]:
+        """Katalógus felépítése egyetlen aggregációval"""
+        catalogue = []
+        cursor = KnowledgeCategory.get_motor_collection().aggregate(build_catalogue_pipeline())
+        async for category in cursor:
+            catalogue.append({
+                "id": str(category["_id"]),
+                "name": category["name"],
+                "description": category.get("description"),
+                "icon": category.get("icon"),
+                "color": category.get("color"),
+                "lessons": [
+                    {
+                        "id": str(lesson["_id"]),
+                        "title": lesson["title"],
+                        "description": lesson.get("description"),
+                        "difficulty": lesson.get("difficulty", "beginner"),
+                        "estimated_minutes": lesson.get("estimated_minutes", 5),
+                        "total_pages": lesson["total_pages"],
+                        "has_quiz": lesson["has_quiz"],
+                    }
+                    for lesson in category["lessons"]
+                ],
+            })
+        logger.info(f"Knowledge catalogue built with {len(catalogue)} categories")
+        return catalogue
+
+
+knowledge_catalogue_service = KnowledgeCatalogueService()
@@ -1,12 +1,15 @@
 # app/services/limit_service.py
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Dict
 from beanie import PydanticObjectId
+from bson import ObjectId
 from datetime import datetime
 import logging
 
 from app.models.limit import Limit, LimitType
-from app.models.transaction import Transaction
 from app.models.limit_schemas import LimitCheckResult
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionMonthlyRollup
+from app.services.rollup_service import plan_period
 
 logger = logging.getLogger(__name__)
 
@@ -48,15 +51,17 @@ class LimitService:
             exceeded_limits = []
             warnings = []
             
-            for limit in active_limits:
-                # Ellenőrizzük, hogy vonatkozik-e a tranzakcióra
-                if not LimitService._applies_to_transaction(
-                    limit, category, main_account, sub_account_name
-                ):
-                    continue
-                
-                # Jelenlegi kiadás lekérdezése
-                current_spending = await LimitService._get_current_spending(user_id, limit)
+            # Csak a tranzakcióra vonatkozó limitek
+            applicable_limits = [
+                limit for limit in active_limits
+                if LimitService._applies_to_transaction(limit, category, main_account, sub_account_name)
+            ]
+            
+            # Jelenlegi kiadás lekérdezése az összes limithez egyszerre
+            spending_by_limit = await LimitService.get_spending_for_limits(user_id, applicable_limits)
+            
+            for limit in applicable_limits:
+                current_spending = spending_by_limit[str(limit.id)]
                 projected_spending = current_spending + abs(amount)
                 
                 # Limit túllépés ellenőrzése
@@ -100,9 +105,11 @@ class LimitService:
                 Limit.is_active == True
             ).to_list()
             
+            spending_by_limit = await LimitService.get_spending_for_limits(user_id, active_limits)
+            
             exceeded = []
             for limit in active_limits:
-                current_spending = await LimitService._get_current_spending(user_id, limit)
+                current_spending = spending_by_limit[str(limit.id)]
                 if current_spending > limit.amount:
                     exceeded.append(limit)
             
@@ -122,9 +129,11 @@ class LimitService:
                 Limit.notification_threshold != None
             ).to_list()
             
+            spending_by_limit = await LimitService.get_spending_for_limits(user_id, active_limits)
+            
             warnings = []
             for limit in active_limits:
-                current_spending = await LimitService._get_current_spending(user_id, limit)
+                current_spending = spending_by_limit[str(limit.id)]
                 usage_percentage = (current_spending / limit.amount) * 100
                 
                 if (current_spending <= limit.amount and 
@@ -140,35 +149,104 @@ class LimitService:
     @staticmethod
     async def _get_current_spending(user_id: str, limit: Limit) -> float:
         """Aktuális kiadás számítása egy limit alapján"""
+        spending_by_limit = await LimitService.get_spending_for_limits(user_id, [limit])
+        return spending_by_limit.get(str(limit.id), 0.0)
+    
+    @staticmethod
+    def _limit_condition(limit: Limit) -> List[dict]:
+        """A limit kategória/számla szűrője $expr feltételként (rollup és tranzakció mezőkre egyaránt)"""
+        conditions = []
+        if limit.type == LimitType.CATEGORY and limit.category:
+            conditions.append({"$eq": ["$kategoria", limit.category]})
+        elif limit.type == LimitType.ACCOUNT:
+            if limit.main_account:
+                conditions.append({"$eq": ["$main_account", limit.main_account]})
+            if limit.sub_account_name:
+                conditions.append({"$eq": ["$sub_account_name", limit.sub_account_name]})
+        return conditions
+    
+    @staticmethod
+    async def get_spending_for_limits(
+        user_id: str,
+        limits: List[Limit],
+        reference_date: Optional[datetime] = None
+    ) -> Dict[str, float]:
+        """
+        Aktuális kiadás az összes megadott limithez, limitenként külön lekérdezés nélkül
+        
+        Minden limit időszakát teljes hónapokra és részleges szakaszokra bontjuk
+        (plan_period; "raw" olvasási módban minden szakasz részleges). A teljes
+        hónapok (havi/éves limitek) egyetlen $group-pal jönnek a havi
+        összesítőből, a részleges szakaszok (napi/heti limitek) egyetlen $group-pal
+        a nyers kiadásokból; mindkettőben limitenként egy feltételes $sum mező van.
+        
+        Returns:
+            {limit id: aktuális kiadás}
+        """
+        spending = {str(limit.id): 0.0 for limit in limits}
+        if not limits:
+            return spending
+        
         try:
-            period_start = limit.get_period_start()
-            period_end = limit.get_period_end()
-            
-            # Alapszűrő
-            query_filter = {
-                "user_id": PydanticObjectId(user_id),
-                "date": {
-                    "$gte": period_start.strftime("%Y-%m-%d"),
-                    "$lte": period_end.strftime("%Y-%m-%d")
-                },
-                "amount": {"$lt": 0}  # Csak kiadások
-            }
+            rollup_sums = {}
+            raw_sums = {}
+            all_months = set()
+            all_ranges = set()
+            
+            for index, limit in enumerate(limits):
+                field = f"limit_{index}"
+                conditions = LimitService._limit_condition(limit)
+                full_months, partial_ranges = plan_period(
+                    limit.get_period_start(reference_date).strftime("%Y-%m-%d"),
+                    limit.get_period_end(reference_date).strftime("%Y-%m-%d")
+                )
+                
+                if full_months:
+                    all_months.update(full_months)
+                    month_condition = {"$and": [{"$in": ["$honap", full_months]}, *conditions]}
+                    rollup_sums[field] = {"$sum": {"$cond": [month_condition, "$expense_total", 0]}}
+                
+                if partial_ranges:
+                    all_ranges.update(partial_ranges)
+                    date_condition = {"$or": [
+                        {"$and": [{"$gte": ["$date", range_start]}, {"$lte": ["$date", range_end]}]}
+                        for range_start, range_end in partial_ranges
+                    ]}
+                    raw_sums[field] = {"$sum": {"$cond": [
+                        {"$and": [date_condition, *conditions]}, {"$abs": "$amount"}, 0
+                    ]}}
+            
+            results = []
+            if rollup_sums:
+                pipeline = [
+                    {"$match": {"user_id": ObjectId(user_id), "honap": {"$in": sorted(all_months)}}},
+                    {"$group": {"_id": None, **rollup_sums}}
+                ]
+                results += await TransactionMonthlyRollup.get_motor_collection().aggregate(pipeline).to_list(length=1)
+            
+            if raw_sums:
+                pipeline = [
+                    {"$match": {
+                        "user_id": ObjectId(user_id),
+                        "amount": {"$lt": 0},  # Csak kiadások
+                        "$or": [
+                            {"date": {"$gte": range_start, "$lte": range_end}}
+                            for range_start, range_end in sorted(all_ranges)
+                        ]
+                    }},
+                    {"$group": {"_id": None, **raw_sums}}
+                ]
+                results += await Transaction.get_motor_collection().aggregate(pipeline).to_list(length=1)
             
-            # Típus specifikus szűrés
-            if limit.type == LimitType.CATEGORY and limit.category:
-                query_filter["kategoria"] = limit.category
-            elif limit.type == LimitType.ACCOUNT:
-                if limit.main_account:
-                    query_filter["main_account"] = limit.main_account
-                if limit.sub_account_name:
-                    query_filter["sub_account_name"] = limit.sub_account_name
+            for row in results:
+                for index, limit in enumerate(limits):
+                    spending[str(limit.id)] += row.get(f"limit_{index}", 0.0)
             
-            transactions = await Transaction.find(query_filter).to_list()
-            return abs(sum(t.amount for t in transactions))
+            return spending
             
         except Exception as e:
             logger.error(f"Error calculating current spending: {e}")
-            return 0.0
+            return spending
     
     @staticmethod
     def _applies_to_transaction(
@@ -1,8 +1,10 @@
 # app/services/notification_service.py
-from typing import List, Optional
+from typing import List, Optional, Dict, Tuple, Any
 from datetime import datetime, timedelta
 from beanie import PydanticObjectId
 from bson import ObjectId
+import time
+import os
 
 from app.models.notification import (
     NotificationDocument, 
@@ -11,8 +13,73 @@ from app.models.notification import (
     NotificationCreate
 )
 
+# A statisztika cache élettartama (másodperc); létrehozás és olvasottra jelölés érvényteleníti
+NOTIFICATION_STATS_CACHE_SECONDS = float(os.getenv("NOTIFICATION_STATS_CACHE_SECONDS", "15"))
+
+# user_id -> (lejárat, statisztika)
+_stats_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+def _active_filter(user_id: str, now: datetime) -> Dict[str, Any]:
+    """A felhasználó nem lejárt értesítései"""
+    return {
+        "user_id": ObjectId(user_id),
+        "$or": [
+            {"expires_at": {"$gt": now}},
+            {"expires_at": None}
+        ]
+    }
+
 class NotificationService:
     
+    @staticmethod
+    def invalidate_stats(user_id: Optional[str] = None):
+        """Statisztika cache érvénytelenítése (user_id nélkül mindenkié)"""
+        if user_id is None:
+            _stats_cache.clear()
+        else:
+            _stats_cache.pop(str(user_id), None)
+    
+    @staticmethod
+    async def get_stats(user_id: str) -> Dict[str, Any]:
+        """
+        Összes, olvasatlan, prioritás és típus szerinti darabszám egyetlen $facet aggregációval
+        
+        Az eredményt rövid ideig felhasználónként cache-eljük.
+        """
+        cached = _stats_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        pipeline = [
+            {"$match": _active_filter(user_id, datetime.utcnow())},
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "unread": {"$sum": {"$cond": [{"$eq": ["$is_read", False]}, 1, 0]}},
+                }}],
+                "by_priority": [{"$group": {"_id": "$priority", "count": {"$sum": 1}}}],
+                "by_type": [{"$group": {"_id": "$type", "count": {"$sum": 1}}}],
+            }},
+        ]
+        result = await NotificationDocument.get_motor_collection().aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {"totals": [], "by_priority": [], "by_type": []}
+        
+        totals = facets["totals"][0] if facets["totals"] else {"total": 0, "unread": 0}
+        priority_counts = {priority.value: 0 for priority in NotificationPriority}
+        priority_counts.update({row["_id"]: row["count"] for row in facets["by_priority"] if row["_id"] in priority_counts})
+        type_counts = {notification_type.value: 0 for notification_type in NotificationType}
+        type_counts.update({row["_id"]: row["count"] for row in facets["by_type"] if row["_id"] in type_counts})
+        
+        stats = {
+            "total_count": totals["total"],
+            "unread_count": totals["unread"],
+            "priority_counts": priority_counts,
+            "type_counts": type_counts,
+        }
+        _stats_cache[user_id] = (time.monotonic() + NOTIFICATION_STATS_CACHE_SECONDS, stats)
+        return stats
+    
     @staticmethod
     async def create_notification(
         user_id: str,
@@ -35,6 +102,7 @@ class NotificationService:
         )
         
         await new_notification.insert()
+        NotificationService.invalidate_stats(user_id)
         return new_notification
     
     @staticmethod
@@ -194,6 +262,26 @@ class NotificationService:
         
         return await NotificationService.create_notification(user_id, notification)
     
+    @staticmethod
+    async def create_limit_warning_notification(
+        user_id: str,
+        warnings: List[str],
+        transaction_id: Optional[str] = None
+    ) -> NotificationDocument:
+        """Limit küszöb elérése miatti figyelmeztetés"""
+        
+        notification = NotificationCreate(
+            type=NotificationType.BUDGET_EXCEEDED,
+            title="Limit figyelmeztetés",
+            message="; ".join(warnings),
+            priority=NotificationPriority.HIGH,
+            related_transaction_id=transaction_id,
+            action_url="/limits",
+            action_text="Limitek megtekintése"
+        )
+        
+        return await NotificationService.create_notification(user_id, notification)
+    
     @staticmethod
     async def mark_as_read(
         notification_id: str,
@@ -209,28 +297,24 @@ class NotificationService:
         notification.is_read = True
         notification.read_at = datetime.utcnow()
         await notification.save()
+        NotificationService.invalidate_stats(user_id)
         
         return True
     
     @staticmethod
     async def mark_all_as_read(user_id: str) -> int:
-        """Összes értesítés olvasottnak jelölése"""
+        """Összes értesítés olvasottnak jelölése (egyetlen update_many)"""
         
-        unread_notifications = await NotificationDocument.find(
+        result = await NotificationDocument.get_motor_collection().update_many(
             {
                 "user_id": ObjectId(user_id),
                 "is_read": False
-            }
-        ).to_list()
-        
-        count = 0
-        for notification in unread_notifications:
-            notification.is_read = True
-            notification.read_at = datetime.utcnow()
-            await notification.save()
-            count += 1
+            },
+            {"$set": {"is_read": True, "read_at": datetime.utcnow()}}
+        )
         
-        return count
+        NotificationService.invalidate_stats(user_id)
+        return result.modified_count
     
     @staticmethod
     async def delete_notification(
@@ -245,22 +329,23 @@ class NotificationService:
             return False
         
         await notification.delete()
+        NotificationService.invalidate_stats(user_id)
         return True
     
     @staticmethod
-    async def cleanup_expired_notifications():
-        """Lejárt értesítések törlése"""
+    async def cleanup_expired_notifications() -> int:
+        """
+        Lejárt értesítések törlése (egyetlen delete_many)
         
-        now = datetime.utcnow()
-        expired_notifications = await NotificationDocument.find(
+        TTL módban a MongoDB magától törli őket; ez csak a TTL monitor
+        futásai (kb. percenként) között lejártakat takarítja el azonnal.
+        """
+        
+        result = await NotificationDocument.get_motor_collection().delete_many(
             {
-                "expires_at": {"$lte": now}
+                "expires_at": {"$lte": datetime.utcnow()}
             }
-        ).to_list()
-        
-        count = 0
-        for notification in expired_notifications:
-            await notification.delete()
-            count += 1
+        )
         
-        return count
\ No newline at end of file
+        NotificationService.invalidate_stats()
+        return result.deleted_count
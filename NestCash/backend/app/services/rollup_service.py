@@ -0,0 +1,431 @@
+# app/services/rollup_service.py
+from typing import Any, Dict, List, Optional, Tuple, Iterable
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+import calendar
+import logging
+import os
+
+from app.core.job_queue import job_queue
+from app.core.leases import (
+    acquire_lease, lease_generations, mark_dirty, new_owner_id, release_lease, renew_lease, take_dirty_keys
+)
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionMonthlyRollup
+
+logger = logging.getLogger(__name__)
+
+# Olvasási mód (az írások mindkét módban frissítik az összesítőt):
+#   "raw"    - minden összeg a nyers tranzakciókból (a korábbi működés)
+#   "rollup" - a teljes hónapok a havi összesítőből (backfill után kapcsolható be)
+ROLLUP_READ_MODE = os.getenv("ROLLUP_READ_MODE", "raw")
+
+ROLLUP_REBUILD_LEASE_SECONDS = 600
+
+_KEY_FIELDS = ("user_id", "honap", "kategoria", "main_account", "sub_account_name")
+_REBUILD_BATCH_SIZE = 1000
+_ALL_USERS_LEASE = "rollup_rebuild:all"
+
+
+def split_month_range(start_date: str, end_date: str) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Időszak felbontása teljes hónapokra és részleges (szélső) szakaszokra
+
+    Returns:
+        (teljes hónapok "YYYY-MM" listája, részleges (kezdet, vég) dátumpárok)
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+    full_months = []
+    partial_ranges = []
+    month_start = start.replace(day=1)
+
+    while month_start <= end:
+        last_day = calendar.monthrange(month_start.year, month_start.month)[1]
+        month_end = month_start.replace(day=last_day)
+
+        range_start = max(month_start, start)
+        range_end = min(month_end, end)
+        if range_start == month_start and range_end == month_end:
+            full_months.append(month_start.strftime("%Y-%m"))
+        else:
+            partial_ranges.append((range_start.strftime("%Y-%m-%d"), range_end.strftime("%Y-%m-%d")))
+
+        month_start = month_end + timedelta(days=1)
+
+    return full_months, partial_ranges
+
+
+def plan_period(start_date: str, end_date: str) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Időszak felosztása az olvasási mód szerint
+
+    "rollup" módban mint a split_month_range; "raw" módban nincs összesítőből
+    olvasott hónap, az egész időszak a nyers tranzakciókból jön.
+    """
+    if ROLLUP_READ_MODE == "rollup":
+        return split_month_range(start_date, end_date)
+    return [], [(start_date, end_date)]
+
+
+def _rebuild_lease_name(user_id: str) -> str:
+    return f"rollup_rebuild:{user_id}"
+
+
+def _dimension_filter(
+    categories: Optional[List[str]],
+    main_account: Optional[str],
+    sub_accounts: Optional[List[str]]
+) -> Dict:
+    """A rollup és a tranzakció kollekcióban azonos nevű szűrőmezők"""
+    query = {}
+    if categories:
+        query["kategoria"] = {"$in": categories}
+    if main_account:
+        query["main_account"] = main_account
+    if sub_accounts:
+        query["sub_account_name"] = {"$in": sub_accounts}
+    return query
+
+
+class RollupService:
+    """Havi tranzakció összesítők karbantartása és lekérdezése"""
+
+    @staticmethod
+    def _increments(amount: float, sign: int) -> Dict[str, float]:
+        if amount > 0:
+            return {"income_total": sign * amount, "income_count": sign, "transaction_count": sign}
+        if amount < 0:
+            return {"expense_total": sign * abs(amount), "expense_count": sign, "transaction_count": sign}
+        return {"transaction_count": sign}
+
+    @staticmethod
+    def _key(transaction: Transaction) -> Tuple:
+        return (
+            ObjectId(str(transaction.user_id)),
+            transaction.date[:7],
+            transaction.kategoria,
+            transaction.main_account,
+            transaction.sub_account_name,
+        )
+
+    @staticmethod
+    async def apply_transactions(transactions: Iterable[Transaction], sign: int = 1) -> None:
+        """
+        Tranzakciók hozzáadása (sign=1) vagy levonása (sign=-1) az összesítőkből
+
+        A tranzakció írása UTÁN hívandó. Azonos kulcsú tranzakciókat előbb
+        összevonjuk, majd egy bulk_write megy ki. Ha a felhasználó összesítője
+        éppen újraépül, nem $inc-elünk, csak jelezzük az újraépítésnek, hogy
+        a felhasználót még egyszer számolja.
+
+        Ha egy újraépítés az ellenőrzés és az $inc között indult (a zár
+        generation-je közben változott), az $inc a már beszámolt tranzakciót
+        duplán számolhatta: ilyenkor a felhasználót utólag megjelöljük, vagy ha
+        az újraépítés azóta véget ért, külön újraépítést teszünk sorba.
+        Sikertelen írásnál szintén újraépítés kerül sorba.
+        """
+        grouped = defaultdict(lambda: defaultdict(float))
+        for transaction in transactions:
+            increments = RollupService._increments(transaction.amount, sign)
+            bucket = grouped[RollupService._key(transaction)]
+            for field, value in increments.items():
+                bucket[field] += value
+
+        if not grouped:
+            return
+
+        user_ids = {str(key[0]) for key in grouped}
+        lease_names = {user_id: [_rebuild_lease_name(user_id), _ALL_USERS_LEASE] for user_id in user_ids}
+        try:
+            before = await lease_generations(sorted({name for names in lease_names.values() for name in names}))
+            for user_id in list(user_ids):
+                if await mark_dirty(lease_names[user_id], user_id):
+                    user_ids.discard(user_id)
+
+            now = datetime.utcnow()
+            operations = [
+                UpdateOne(
+                    dict(zip(_KEY_FIELDS, key)),
+                    {"$inc": dict(increments), "$set": {"updated_at": now}},
+                    upsert=True
+                )
+                for key, increments in grouped.items()
+                if str(key[0]) in user_ids
+            ]
+            if not operations:
+                return
+            await TransactionMonthlyRollup.get_motor_collection().bulk_write(operations, ordered=False)
+
+            # Indult-e közben újraépítés (az $inc után ellenőrizve)
+            after = await lease_generations(list(before))
+            overlapped = [
+                user_id for user_id in user_ids
+                if any(after[name] != before[name] for name in lease_names[user_id])
+            ]
+            user_ids = set(overlapped)
+            for user_id in overlapped:
+                if await mark_dirty(lease_names[user_id], user_id):
+                    user_ids.discard(user_id)  # Különben már véget ért: külön újraépítés
+            if user_ids:
+                await RollupService._schedule_rebuilds(user_ids)
+        except Exception as e:
+            logger.error(f"Error updating transaction rollups, scheduling rebuild for {sorted(user_ids)}: {e}")
+            await RollupService._schedule_rebuilds(user_ids)
+
+    @staticmethod
+    async def _schedule_rebuilds(user_ids: Iterable[str]) -> None:
+        for user_id in user_ids:
+            try:
+                await job_queue.enqueue("rollups.rebuild_user", {"user_id": user_id})
+            except Exception as enqueue_error:
+                logger.error(f"Failed to schedule rollup rebuild for user {user_id}: {enqueue_error}")
+
+    @staticmethod
+    async def apply_transaction(transaction: Transaction, sign: int = 1) -> None:
+        """Egy tranzakció hozzáadása vagy levonása az összesítőből"""
+        await RollupService.apply_transactions([transaction], sign)
+
+    @staticmethod
+    async def replace_transaction(old_transaction: Transaction, new_transaction: Transaction) -> None:
+        """Módosított tranzakció: a régi értékek levonása, az újak hozzáadása"""
+        await RollupService.apply_transactions([old_transaction], -1)
+        await RollupService.apply_transactions([new_transaction], 1)
+
+    @staticmethod
+    async def clear_user(user_id: str) -> None:
+        """Felhasználó összes összesítőjének törlése"""
+        await TransactionMonthlyRollup.get_motor_collection().delete_many({"user_id": ObjectId(user_id)})
+
+    @staticmethod
+    async def rebuild(user_id: Optional[str] = None) -> int:
+        """
+        Összesítők újraépítése a nyers tranzakciókból (backfill, javítás)
+
+        Zár alatt fut (felhasználónként, illetve mindenkire egy közös zár).
+        Amíg a zár érvényes, az élő írások nem $inc-elnek, hanem megjelölik a
+        felhasználót, akit a futás végén újraszámolunk, amíg van jelölt; a zár
+        megszerzésével átfedő $inc-eket az írók utólag jelölik (lásd
+        apply_transactions). A
+        sorok helyben cserélődnek (ReplaceOne), az olvasók nem látnak üres
+        összesítőt; a kimaradt (már tranzakció nélküli) sorok a végén törlődnek.
+
+        Args:
+            user_id: Csak ennek a felhasználónak; None esetén mindenkinek
+
+        Returns:
+            Az írt összesítő sorok száma (0, ha már fut egy ugyanilyen újraépítés)
+        """
+        lease_name = _rebuild_lease_name(user_id) if user_id else _ALL_USERS_LEASE
+        owner = new_owner_id()
+        if not await acquire_lease(lease_name, owner, ROLLUP_REBUILD_LEASE_SECONDS):
+            if user_id:
+                await mark_dirty([lease_name], user_id)
+            logger.info(f"Rollup rebuild {lease_name} already running, skipped")
+            return 0
+
+        try:
+            written = await RollupService._rebuild_rows(
+                {"user_id": ObjectId(user_id)} if user_id else {}, lease_name, owner
+            )
+            while True:
+                dirty = await take_dirty_keys(lease_name, owner)
+                if not dirty:
+                    if await release_lease(lease_name, owner, only_if_clean=True):
+                        break
+                    continue
+                written += await RollupService._rebuild_rows(
+                    {"user_id": {"$in": [ObjectId(key) for key in dirty]}}, lease_name, owner
+                )
+        except Exception:
+            await release_lease(lease_name, owner)
+            raise
+
+        logger.info(f"Rebuilt {written} transaction rollup rows ({lease_name})")
+        return written
+
+    @staticmethod
+    async def _rebuild_rows(match: Dict[str, Any], lease_name: str, owner: str) -> int:
+        """Az illeszkedő felhasználók összesítő sorainak újraszámolása és cseréje"""
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "user_id": "$user_id",
+                    "honap": {"$substrBytes": ["$date", 0, 7]},
+                    "kategoria": {"$ifNull": ["$kategoria", None]},
+                    "main_account": "$main_account",
+                    "sub_account_name": "$sub_account_name",
+                },
+                "income_total": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}},
+                "expense_total": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, {"$abs": "$amount"}, 0]}},
+                "income_count": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, 1, 0]}},
+                "expense_count": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, 1, 0]}},
+                "transaction_count": {"$sum": 1},
+            }},
+        ]
+
+        collection = TransactionMonthlyRollup.get_motor_collection()
+        started = datetime.utcnow()
+        operations = []
+        written = 0
+        async for row in Transaction.get_motor_collection().aggregate(pipeline, allowDiskUse=True):
+            key = row.pop("_id")
+            operations.append(ReplaceOne(key, {**key, **row, "updated_at": started}, upsert=True))
+            if len(operations) >= _REBUILD_BATCH_SIZE:
+                await collection.bulk_write(operations, ordered=False)
+                written += len(operations)
+                operations = []
+                await renew_lease(lease_name, owner, ROLLUP_REBUILD_LEASE_SECONDS)
+
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+
+        # Ebben a körben nem érintett sorok: a kulcsukhoz már nincs tranzakció
+        await collection.delete_many({**match, "updated_at": {"$lt": started}})
+        return written
+
+    @staticmethod
+    async def get_totals(
+        user_id: str,
+        start_date: str,
+        end_date: str,
+        categories: Optional[List[str]] = None,
+        main_account: Optional[str] = None,
+        sub_accounts: Optional[List[str]] = None,
+        group_by_category: bool = False
+    ) -> Dict[Optional[str], Dict[str, float]]:
+        """
+        Bevétel/kiadás összegek egy időszakra
+
+        "rollup" módban a teljes hónapokat az összesítőből olvassuk, csak a
+        szélső, részleges hónapok napjaihoz fordulunk a nyers tranzakciókhoz
+        (ott is aggregációval); "raw" módban az egész időszak a nyers adatból jön.
+
+        Returns:
+            {kategória vagy None: {"income", "expense", "income_count", "expense_count", "count"}}
+        """
+        return await RollupService._aggregate_totals(
+            ObjectId(user_id), start_date, end_date,
+            _dimension_filter(categories, main_account, sub_accounts),
+            "$kategoria" if group_by_category else None
+        )
+
+    @staticmethod
+    async def get_totals_by_user(
+        user_ids: List[str],
+        start_date: str,
+        end_date: str,
+        categories: Optional[List[str]] = None,
+        main_account: Optional[str] = None,
+        sub_accounts: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Bevétel/kiadás összegek egy időszakra több felhasználóra egyszerre
+
+        Ugyanaz, mint a get_totals, de felhasználónként csoportosítva; a
+        tranzakció nélküli felhasználók kimaradnak az eredményből.
+
+        Returns:
+            {user_id: {"income", "expense", "income_count", "expense_count", "count"}}
+        """
+        if not user_ids:
+            return {}
+        totals = await RollupService._aggregate_totals(
+            {"$in": [ObjectId(user_id) for user_id in user_ids]}, start_date, end_date,
+            _dimension_filter(categories, main_account, sub_accounts),
+            "$user_id"
+        )
+        return {str(user_id): values for user_id, values in totals.items()}
+
+    @staticmethod
+    async def _aggregate_totals(
+        user_match,
+        start_date: str,
+        end_date: str,
+        dimension_filter: Dict,
+        group_key: Optional[str]
+    ) -> Dict:
+        """Teljes hónapok az összesítőből, részleges hónapok a nyers tranzakciókból, group_key szerint"""
+        full_months, partial_ranges = plan_period(start_date, end_date)
+
+        totals = defaultdict(lambda: {"income": 0.0, "expense": 0.0, "income_count": 0, "expense_count": 0, "count": 0})
+
+        if full_months:
+            rollup_pipeline = [
+                {"$match": {"user_id": user_match, "honap": {"$in": full_months}, **dimension_filter}},
+                {"$group": {
+                    "_id": group_key,
+                    "income": {"$sum": "$income_total"},
+                    "expense": {"$sum": "$expense_total"},
+                    "income_count": {"$sum": "$income_count"},
+                    "expense_count": {"$sum": "$expense_count"},
+                    "count": {"$sum": "$transaction_count"},
+                }},
+            ]
+            async for row in TransactionMonthlyRollup.get_motor_collection().aggregate(rollup_pipeline):
+                for field in ("income", "expense", "income_count", "expense_count", "count"):
+                    totals[row["_id"]][field] += row[field]
+
+        if partial_ranges:
+            raw_pipeline = [
+                {"$match": {
+                    "user_id": user_match,
+                    "$or": [{"date": {"$gte": range_start, "$lte": range_end}} for range_start, range_end in partial_ranges],
+                    **dimension_filter
+                }},
+                {"$group": {
+                    "_id": group_key,
+                    "income": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}},
+                    "expense": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, {"$abs": "$amount"}, 0]}},
+                    "income_count": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, 1, 0]}},
+                    "expense_count": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, 1, 0]}},
+                    "count": {"$sum": 1},
+                }},
+            ]
+            async for row in Transaction.get_motor_collection().aggregate(raw_pipeline):
+                for field in ("income", "expense", "income_count", "expense_count", "count"):
+                    totals[row["_id"]][field] += row[field]
+
+        return dict(totals)
+
+    @staticmethod
+    async def get_total(
+        user_id: str,
+        start_date: str,
+        end_date: str,
+        categories: Optional[List[str]] = None,
+        main_account: Optional[str] = None,
+        sub_accounts: Optional[List[str]] = None
+    ) -> Dict[str, float]:
+        """Összesített bevétel/kiadás egy időszakra (kategória bontás nélkül)"""
+        totals = await RollupService.get_totals(
+            user_id, start_date, end_date, categories, main_account, sub_accounts
+        )
+        return totals.get(None, {"income": 0.0, "expense": 0.0, "income_count": 0, "expense_count": 0, "count": 0})
+
+
+@job_queue.register("rollups.rebuild_user")
+async def run_rebuild_user(payload: Dict[str, Any]) -> None:
+    """Egy felhasználó összesítőjének újraépítése (sikertelen inkrementális írás után)"""
+    await RollupService.rebuild(payload["user_id"])
+
+
+# Manuális futtatáshoz (backfill, a ROLLUP_READ_MODE=rollup bekapcsolása előtt):
+#   python -m app.services.rollup_service [user_id]
+if __name__ == "__main__":
+    import sys
+    import asyncio
+    from app.core.db import init_db
+
+    async def main():
+        await init_db()
+        user_id = sys.argv[1] if len(sys.argv) > 1 else None
+        count = await RollupService.rebuild(user_id)
+        print(f"Rebuilt {count} rollup rows")
+
+    asyncio.run(main())
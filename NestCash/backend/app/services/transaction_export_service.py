@@ -0,0 +1,162 @@
+# app/services/transaction_export_service.py
+import csv
+import io
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+# Ennyi sor kerül egy CSV darabba / Parquet row group-ba; a memóriahasználat ettől függ, nem a history hosszától
+EXPORT_BATCH_SIZE = 10000
+
+# Oszlopok és Parquet típusok (pyarrow típusgyár nevek; a Transaction dokumentum mezői, a számított mezők nélkül)
+EXPORT_COLUMNS = [
+    ("id", "string"),
+    ("date", "string"),
+    ("amount", "float64"),
+    ("currency", "string"),
+    ("main_account", "string"),
+    ("sub_account_name", "string"),
+    ("kategoria", "string"),
+    ("type", "string"),
+    ("description", "string"),
+    ("profil", "string"),
+    ("platform", "string"),
+    ("helyszin", "string"),
+    ("ismetlodo", "bool_"),
+    ("fix_koltseg", "bool_"),
+    ("celhoz_kotott", "bool_"),
+    ("honap", "string"),
+    ("het", "string"),
+    ("nap_sorszam", "int64"),
+    ("hour", "int64"),
+    ("year", "int64"),
+    ("month", "int64"),
+    ("day", "int64"),
+    ("weekday", "string"),
+]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Írható "fájl" a ParquetWriter-nek: a kiírt bájtokat darabonként adja tovább, a pozíciót megtartja"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def build_export_filter(
+    user_id: str,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    categories: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Szerver oldali szűrő (a date YYYY-MM-DD string, így a tartomány lexikografikusan is helyes)"""
+    query_filter: Dict[str, Any] = {"user_id": ObjectId(user_id)}
+    if from_date or to_date:
+        query_filter["date"] = {}
+        if from_date:
+            query_filter["date"]["$gte"] = from_date
+        if to_date:
+            query_filter["date"]["$lte"] = to_date
+    if categories:
+        query_filter["kategoria"] = {"$in": categories}
+    return query_filter
+
+
+class TransactionExportService:
+    """Felhasználó tranzakcióinak folyamatos exportja közvetlenül a Motor cursorból"""
+
+    @staticmethod
+    async def _iter_batches(query_filter: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        projection = {name: 1 for name, _ in EXPORT_COLUMNS if name != "id"}
+        cursor = Transaction.get_motor_collection()\
+            .find(query_filter, projection)\
+            .sort([("date", 1), ("_id", 1)])\
+            .batch_size(EXPORT_BATCH_SIZE)
+
+        batch = []
+        async for raw in cursor:
+            raw["id"] = str(raw.pop("_id"))
+            batch.append(raw)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    async def stream_csv(query_filter: Dict[str, Any]) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([name for name, _ in EXPORT_COLUMNS])
+        # BOM, hogy az Excel is helyesen nyissa meg az ékezeteket
+        yield b"\xef\xbb\xbf" + buffer.getvalue().encode("utf-8")
+
+        async for batch in TransactionExportService._iter_batches(query_filter):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([[raw.get(name) for name, _ in EXPORT_COLUMNS] for raw in batch])
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    async def stream_parquet(query_filter: Dict[str, Any]) -> AsyncIterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in EXPORT_COLUMNS])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="snappy")
+        try:
+            async for batch in TransactionExportService._iter_batches(query_filter):
+                columns = {name: [raw.get(name) for raw in batch] for name, _ in EXPORT_COLUMNS}
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            # Üres eredménynél is érvényes (0 soros) Parquet fájl a kimenet
+            writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def stream(query_filter: Dict[str, Any], export_format: str) -> AsyncIterator[bytes]:
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported export format: {export_format}")
+        if export_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+            return TransactionExportService.stream_parquet(query_filter)
+        return TransactionExportService.stream_csv(query_filter)
@@ -0,0 +1,259 @@
+# app/services/transaction_import_service.py
+import csv
+import json
+import time
+import logging
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from beanie import PydanticObjectId
+from fastapi import HTTPException
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.models.transaction import Transaction
+from app.models.transaction_schemas import TransactionCreate, TransactionImportError, TransactionImportResult
+from app.services.account_service import AccountService, MAIN_ACCOUNT_KEYS
+from app.services.rollup_service import RollupService
+from app.services.limit_service import LimitService
+from app.services.badge_service import badge_service
+from app.core.job_queue import job_queue
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 5000
+# A válaszban legfeljebb ennyi soronkénti hibát adunk vissza (a számláló pontos)
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Bájt darabokból sorok (a darabhatáron átnyúló sor és UTF-8 karakter is egyben marad)"""
+    pending = b""
+    async for chunk in stream:
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, str]]:
+    """Fizikai sorok összevonása rekordokká (idézőjelen belüli sortörés esetén)"""
+    record = None
+    record_line = 0
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if record is None:
+            record, record_line = line, line_number
+        else:
+            record += "\n" + line
+        if record.count('"') % 2 == 0:
+            yield record_line, record
+            record = None
+    if record is not None:
+        yield record_line, record
+
+
+async def iter_rows(stream: AsyncIterator[bytes], import_format: str) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    (sorszám, nyers sor) párok a feltöltött adatfolyamból
+
+    NDJSON: soronként egy JSON objektum. CSV: fejléccel, a mezőnevek a
+    TransactionCreate mezői. Üres sorokat kihagyunk; a hibás sor értéke
+    egy Exception példány, amit a validálás soronkénti hibaként jelez.
+    """
+    lines = _iter_lines(stream)
+
+    if import_format == "ndjson":
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+        return
+
+    header = None
+    async for line_number, record in _iter_csv_records(lines):
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        # Üres CSV mező = hiányzó érték (az alapértelmezések érvényesülnek)
+        yield line_number, {name: value for name, value in zip(header, values) if value != ""}
+
+
+class TransactionImportService:
+    """Tranzakciók tömeges importja: darabolt validálás, rendezetlen insert_many, kötegenkénti egyenleg"""
+
+    @staticmethod
+    def _build_transaction(
+        user_id: str,
+        row: Any,
+        currencies: Dict[Tuple[str, str], str]
+    ) -> Transaction:
+        """Egy sor validálása és Transaction dokumentummá alakítása (hiba esetén ValueError)"""
+        if isinstance(row, Exception):
+            raise ValueError(str(row))
+        if not isinstance(row, dict):
+            raise ValueError("Row must be an object")
+
+        data = TransactionCreate.model_validate(row)
+        if data.type == "transfer":
+            raise ValueError("Transfer transactions cannot be imported")
+        if "." in data.sub_account_name or data.sub_account_name.startswith("$"):
+            raise ValueError("Invalid sub-account name")
+
+        # Előjel a típus alapján, mint a POST /transactions/ végponton
+        amount = abs(data.amount) if data.type == "income" else -abs(data.amount)
+
+        return Transaction(
+            **data.model_dump(exclude={"amount"}),
+            id=PydanticObjectId(),
+            user_id=PydanticObjectId(user_id),
+            amount=amount,
+            currency=currencies.get((data.main_account, data.sub_account_name), "HUF")
+        )
+
+    @staticmethod
+    async def _write_batch(user_id: str, batch: List[Tuple[int, Transaction]]) -> Tuple[List[Transaction], List[TransactionImportError]]:
+        """Köteg írása; a sikeresen beszúrt tranzakciókra egyenleg, összesítő és badge számláló frissítés"""
+        transactions = [transaction for _, transaction in batch]
+        failed_indexes = {}
+        try:
+            await Transaction.insert_many(transactions, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed_indexes[write_error["index"]] = write_error.get("errmsg", "Write error")
+
+        errors = [
+            TransactionImportError(line=batch[index][0], error=message)
+            for index, message in failed_indexes.items()
+        ]
+        inserted = [transaction for index, transaction in enumerate(transactions) if index not in failed_indexes]
+        if not inserted:
+            return inserted, errors
+
+        balance_changes = defaultdict(float)
+        for transaction in inserted:
+            balance_changes[(transaction.main_account, transaction.sub_account_name)] += transaction.amount
+
+        await AccountService.apply_balance_changes(user_id, balance_changes)
+        await RollupService.apply_transactions(inserted)
+        await badge_service.apply_transaction_counters(user_id, inserted)
+        return inserted, errors
+
+    @staticmethod
+    async def _enqueue_followups(user_id: str, imported: int) -> None:
+        """Badge és limit ellenőrzés egyszer, az import végén"""
+        try:
+            await job_queue.enqueue("badges.check", {
+                "user_id": user_id,
+                "trigger_event": "transaction_created",
+                "context": {"imported_transactions": imported}
+            })
+
+            warnings = [f"{limit.name}: túllépve" for limit in await LimitService.get_exceeded_limits(user_id)]
+            warnings += [
+                f"{limit.name}: {usage:.1f}% elérve"
+                for limit, usage in await LimitService.get_warning_limits(user_id)
+            ]
+            if warnings:
+                await job_queue.enqueue("transaction.limit_warnings", {
+                    "user_id": user_id,
+                    "warnings": warnings
+                })
+        except Exception as e:
+            logger.error(f"Failed to enqueue post-import jobs for user {user_id}: {e}")
+
+    @staticmethod
+    async def import_stream(
+        user_id: str,
+        stream: AsyncIterator[bytes],
+        import_format: str,
+        batch_size: int = IMPORT_BATCH_SIZE
+    ) -> TransactionImportResult:
+        """
+        Tranzakciók importja NDJSON vagy CSV adatfolyamból
+
+        A sorokat batch_size méretű kötegekben validáljuk és írjuk; a hibás
+        sorok nem állítják meg az importot. Limit ellenőrzés soronként nincs
+        (a korábbi időszakok adatai is betölthetők), a túllépésekről az import
+        végén értesítés megy.
+        """
+        if import_format not in IMPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported import format: {import_format}")
+
+        user_accounts = await AccountService.get_user_accounts(user_id)
+        if not user_accounts:
+            raise HTTPException(status_code=404, detail="Accounts not found for user")
+        currencies = {
+            (main_account, sub_account_name): details.currency
+            for main_account in MAIN_ACCOUNT_KEYS
+            for sub_account_name, details in getattr(user_accounts, main_account).alszamlak.items()
+        }
+
+        started = time.perf_counter()
+        imported = 0
+        failed = 0
+        batches = 0
+        errors: List[TransactionImportError] = []
+
+        def record_error(line: int, message: str) -> None:
+            nonlocal failed
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(TransactionImportError(line=line, error=message))
+
+        async def flush(batch: List[Tuple[int, Transaction]]) -> None:
+            nonlocal imported, batches
+            inserted, write_errors = await TransactionImportService._write_batch(user_id, batch)
+            imported += len(inserted)
+            batches += 1
+            for write_error in write_errors:
+                record_error(write_error.line, write_error.error)
+
+        batch: List[Tuple[int, Transaction]] = []
+        async for line_number, row in iter_rows(stream, import_format):
+            try:
+                batch.append((line_number, TransactionImportService._build_transaction(user_id, row, currencies)))
+            except ValidationError as e:
+                record_error(line_number, "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                ))
+            except ValueError as e:
+                record_error(line_number, str(e))
+
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+
+        if batch:
+            await flush(batch)
+
+        if imported:
+            await TransactionImportService._enqueue_followups(user_id, imported)
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Imported {imported} transactions ({failed} failed) for user {user_id} in {elapsed:.2f}s")
+        return TransactionImportResult(
+            imported=imported,
+            failed=failed,
+            batches=batches,
+            errors=errors,
+            elapsed_ms=round(elapsed * 1000, 1),
+            rows_per_second=round((imported + failed) / elapsed, 1) if elapsed > 0 else None
+        )
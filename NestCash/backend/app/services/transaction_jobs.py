@@ -0,0 +1,33 @@
+# app/services/transaction_jobs.py
+import logging
+from typing import Dict, Any
+
+from app.core.job_queue import job_queue
+from app.services.badge_service import badge_service
+from app.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# A tranzakció létrehozása utáni mellékhatások; a válasz elküldése után futnak
+
+
+@job_queue.register("transaction.badges")
+async def evaluate_transaction_badges(payload: Dict[str, Any]) -> None:
+    """Badge ellenőrzés a tranzakció létrehozása után"""
+    earned_badges = await badge_service.check_and_award_badges(
+        user_id=payload["user_id"],
+        trigger_event="transaction_created",
+        context=payload["context"]
+    )
+    if earned_badges:
+        logger.info(f"User {payload['user_id']} earned {len(earned_badges)} badges")
+
+
+@job_queue.register("transaction.limit_warnings")
+async def notify_limit_warnings(payload: Dict[str, Any]) -> None:
+    """Értesítés a tranzakció miatt elért limit küszöbökről"""
+    await NotificationService.create_limit_warning_notification(
+        user_id=payload["user_id"],
+        warnings=payload["warnings"],
+        transaction_id=payload.get("transaction_id")
+    )
@@ -0,0 +1,263 @@
+# app/services/user_search_service.py
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+import unicodedata
+import logging
+import os
+import re
+
+from app.core.job_queue import job_queue
+from app.core.leases import acquire_lease, new_owner_id, release_lease, renew_lease
+from app.models.seed_state import SeedStateDocument
+from app.models.user import UserDocument
+from app.models.user_search import UserSearchEntry
+
+logger = logging.getLogger(__name__)
+
+# Keresési mód:
+#   "auto"  - a kereső index, ha a teljes feltöltése már lefutott (seed_state),
+#             addig a korábbi regex keresés a users kollekción
+#   "index" - mindig a kereső index
+#   "regex" - mindig a regex keresés
+USER_SEARCH_MODE = os.getenv("USER_SEARCH_MODE", "auto")
+
+# A seed_state bejegyzés neve: a cursor a legutóbbi teljes feltöltés kezdete
+SEARCH_INDEX_SEED_NAME = "user_search_index"
+_BACKFILL_LEASE = "user_search_backfill"
+_BACKFILL_LEASE_SECONDS = 300
+
+# Ennyi karakterig tárolunk prefix tokent; hosszabb keresésnél a trigramok döntenek
+MAX_PREFIX_LENGTH = 20
+MIN_QUERY_LENGTH = 2
+
+_REBUILD_BATCH_SIZE = 1000
+
+# Ebben a folyamatban már láttuk, hogy az index fel van töltve
+_backfilled = False
+
+
+def normalize(text: str) -> str:
+    """Kisbetűs, ékezet és szóköz nélküli alak (a keresés és az index is ezt használja)"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char) and not char.isspace()).lower()
+
+
+def _prefixes(value: str) -> List[str]:
+    return [f"p:{value[:length]}" for length in range(MIN_QUERY_LENGTH, min(len(value), MAX_PREFIX_LENGTH) + 1)]
+
+
+def _trigrams(value: str) -> List[str]:
+    return [f"t:{value[index:index + 3]}" for index in range(len(value) - 2)]
+
+
+def build_tokens(username: str, email: Optional[str]) -> List[str]:
+    """
+    Kereső tokenek egy felhasználóhoz
+
+    A felhasználónévből prefixek és trigramok (részsztring keresés), az
+    emailből csak prefixek, hogy a címek belseje ne legyen kereshető.
+    """
+    normalized_username = normalize(username)
+    tokens = set(_prefixes(normalized_username)) | set(_trigrams(normalized_username))
+    if email:
+        tokens |= set(_prefixes(normalize(email)))
+    return sorted(tokens)
+
+
+def build_search_filter(query: str, exclude_user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Index szűrő egy type-ahead kereséshez (None, ha a normalizált kifejezés túl rövid)
+
+    Prefix találat: egyetlen token egyezés. Részsztring találat (3+ karakter):
+    az összes trigram megléte, majd a jelöltek ellenőrzése a normalizált néven.
+    """
+    normalized = normalize(query)
+    if len(normalized) < MIN_QUERY_LENGTH:
+        return None
+
+    branches = []
+    if len(normalized) <= MAX_PREFIX_LENGTH:
+        branches.append({"tokens": f"p:{normalized}"})
+    if len(normalized) >= 3:
+        branches.append({
+            "tokens": {"$all": _trigrams(normalized)},
+            "username_normalized": {"$regex": re.escape(normalized)}
+        })
+
+    search_filter: Dict[str, Any] = branches[0] if len(branches) == 1 else {"$or": branches}
+    if exclude_user_id:
+        search_filter = {**search_filter, "user_id": {"$ne": ObjectId(exclude_user_id)}}
+    return search_filter
+
+
+class UserSearchService:
+    """A felhasználó kereső index karbantartása és lekérdezése"""
+
+    @staticmethod
+    def _entry_fields(username: str, email: Optional[str]) -> Dict[str, Any]:
+        return {
+            "username": username,
+            "username_normalized": normalize(username),
+            "tokens": build_tokens(username, email),
+            "updated_at": datetime.utcnow(),
+        }
+
+    @staticmethod
+    async def index_user(user_id: Any, username: str, email: Optional[str]) -> None:
+        """Bejegyzés létrehozása / frissítése (regisztráció, név vagy email változás)"""
+        try:
+            await UserSearchEntry.get_motor_collection().update_one(
+                {"user_id": ObjectId(str(user_id))},
+                {"$set": UserSearchService._entry_fields(username, email)},
+                upsert=True
+            )
+        except Exception as e:
+            # A kereső index nem akaszthatja meg a regisztrációt; a rebuild pótolja
+            logger.error(f"Error indexing user {user_id} for search: {e}")
+
+    @staticmethod
+    async def search(
+        query: str,
+        exclude_user_id: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Felhasználók keresése az indexből, felhasználónév szerint rendezve
+
+        Returns:
+            ([{"user_id", "username"}], total_count)
+        """
+        if not await UserSearchService.index_ready():
+            return await UserSearchService._search_regex(query, exclude_user_id, skip, limit)
+
+        search_filter = build_search_filter(query, exclude_user_id)
+        if search_filter is None:
+            return [], 0
+
+        collection = UserSearchEntry.get_motor_collection()
+        cursor = collection.find(search_filter, {"_id": 0, "user_id": 1, "username": 1})\
+            .sort([("username_normalized", 1), ("user_id", 1)])\
+            .skip(skip)\
+            .limit(limit)
+        entries = await cursor.to_list(length=limit)
+        total_count = await collection.count_documents(search_filter)
+        return entries, total_count
+
+    @staticmethod
+    async def _search_regex(
+        query: str,
+        exclude_user_id: Optional[str],
+        skip: int,
+        limit: int
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Korábbi keresés: felhasználónév / email regex a users kollekción (index feltöltése előtt)"""
+        pattern = re.escape(query)
+        search_filter: Dict[str, Any] = {
+            "$or": [
+                {"username": {"$regex": pattern, "$options": "i"}},
+                {"email": {"$regex": pattern, "$options": "i"}}
+            ]
+        }
+        if exclude_user_id:
+            search_filter["_id"] = {"$ne": ObjectId(exclude_user_id)}
+
+        collection = UserDocument.get_motor_collection()
+        cursor = collection.find(search_filter, {"username": 1})\
+            .sort("username", 1)\
+            .skip(skip)\
+            .limit(limit)
+        entries = [{"user_id": user["_id"], "username": user["username"]} async for user in cursor]
+        total_count = await collection.count_documents(search_filter)
+        return entries, total_count
+
+    @staticmethod
+    async def index_ready() -> bool:
+        """Használható-e a kereső index (USER_SEARCH_MODE, illetve lefutott-e a teljes feltöltés)"""
+        global _backfilled
+        if USER_SEARCH_MODE != "auto":
+            return USER_SEARCH_MODE == "index"
+        if not _backfilled:
+            state = await SeedStateDocument.get_motor_collection().find_one(
+                {"name": SEARCH_INDEX_SEED_NAME}, {"cursor": 1}
+            )
+            _backfilled = bool(state and state.get("cursor"))
+        return _backfilled
+
+    @staticmethod
+    async def ensure_backfilled() -> bool:
+        """
+        Az index teljes feltöltése, ha még nem futott le (induláskor)
+
+        Több worker közül csak a zár tartója tölt; a többi addig a regex
+        keresést használja.
+
+        Returns:
+            True, ha ez a hívás töltötte fel az indexet
+        """
+        if await UserSearchService.index_ready() or USER_SEARCH_MODE != "auto":
+            return False
+        owner = new_owner_id()
+        if not await acquire_lease(_BACKFILL_LEASE, owner, _BACKFILL_LEASE_SECONDS):
+            return False
+        try:
+            await UserSearchService.rebuild(lease_owner=owner)
+        finally:
+            await release_lease(_BACKFILL_LEASE, owner)
+        return True
+
+    @staticmethod
+    async def rebuild(lease_owner: Optional[str] = None) -> int:
+        """Index újraépítése a users kollekcióból (backfill, vagy ha elcsúszott)"""
+        collection = UserSearchEntry.get_motor_collection()
+        started = datetime.utcnow()
+        indexed = 0
+        operations = []
+        async for user in UserDocument.get_motor_collection().find({}, {"username": 1, "email": 1}):
+            indexed += 1
+            operations.append(UpdateOne(
+                {"user_id": user["_id"]},
+                {"$set": UserSearchService._entry_fields(user.get("username", ""), user.get("email"))},
+                upsert=True
+            ))
+            if len(operations) >= _REBUILD_BATCH_SIZE:
+                await collection.bulk_write(operations, ordered=False)
+                operations = []
+                if lease_owner:
+                    await renew_lease(_BACKFILL_LEASE, lease_owner, _BACKFILL_LEASE_SECONDS)
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+
+        # Törölt felhasználók bejegyzései (ezeket a mostani futás nem frissítette)
+        await collection.delete_many({"updated_at": {"$lt": started}})
+
+        # Teljes feltöltés megtörtént: "auto" módban innentől az index szolgál ki
+        await SeedStateDocument.get_motor_collection().update_one(
+            {"name": SEARCH_INDEX_SEED_NAME},
+            {"$set": {"cursor": started, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        logger.info(f"User search index rebuilt for {indexed} users")
+        return indexed
+
+
+@job_queue.register("user_search.backfill")
+async def backfill_user_search_index(payload: Dict[str, Any]) -> None:
+    """Induláskor sorba tett feladat: a kereső index feltöltése, ha még nem történt meg"""
+    await UserSearchService.ensure_backfilled()
+
+
+# Manuális futtatáshoz (újraépítés; az első feltöltés induláskor automatikus):
+#   python -m app.services.user_search_service
+if __name__ == "__main__":
+    import asyncio
+    from app.core.db import init_db
+
+    async def main():
+        await init_db()
+        count = await UserSearchService.rebuild()
+        print(f"Indexed {count} users")
+
+    asyncio.run(main())
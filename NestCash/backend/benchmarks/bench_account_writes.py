@@ -0,0 +1,146 @@
+# benchmarks/bench_account_writes.py
+"""
+Számla egyenleg-írások mérése global vs. per_user tárolási módban.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_account_writes --users 10 1000 50000 --writes 2000
+
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+from statistics import quantiles
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from dotenv import load_dotenv
+
+from app.models.account import (
+    AllUserAccountsDocument, UserAccountsDocument, UserAccounts,
+    AccountDetails, SubAccountDetails
+)
+from app.services import account_service
+from app.services.account_service import AccountService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+
+
+def _seed_accounts() -> UserAccounts:
+    return UserAccounts(
+        likvid=AccountDetails(alszamlak={"bank": SubAccountDetails(balance=100000.0)}),
+        befektetes=AccountDetails(alszamlak={}),
+        megtakaritas=AccountDetails(alszamlak={}),
+    )
+
+
+async def _seed(user_count: int) -> tuple:
+    """Seed mindkét tárolási módhoz; a global dokumentum nagy felhasználószámnál túllépheti a 16 MB-os limitet"""
+    await AllUserAccountsDocument.get_motor_collection().delete_many({})
+    await UserAccountsDocument.get_motor_collection().delete_many({})
+
+    user_ids = [f"bench_user_{i}" for i in range(user_count)]
+    seeded = _seed_accounts().model_dump()
+    await UserAccountsDocument.get_motor_collection().insert_many(
+        [{"user_id": user_id, **seeded} for user_id in user_ids], ordered=False
+    )
+
+    try:
+        await AllUserAccountsDocument(
+            accounts_by_user={user_id: _seed_accounts() for user_id in user_ids}
+        ).insert()
+        global_ok = True
+    except Exception as e:
+        print(f"global seed failed for {user_count} users: {e}")
+        global_ok = False
+    return user_ids, global_ok
+
+
+async def _run_writes(mode: str, user_ids: list, writes: int, concurrency: int) -> dict:
+    account_service.ACCOUNT_STORAGE_MODE = mode
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one_write():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await AccountService.apply_balance_change(
+                    random.choice(user_ids), "likvid", "bank", -1.0
+                )
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_write() for _ in range(writes)))
+    elapsed = time.perf_counter() - start
+
+    cuts = quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "mode": mode,
+        "writes": writes,
+        "errors": errors,
+        "throughput_per_s": round(writes / elapsed, 1),
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+    }
+
+
+async def _balance_totals(user_ids: list, global_ok: bool) -> dict:
+    """Végösszegek a két módban; a global mód read-modify-write írása párhuzamosan elveszít frissítéseket"""
+    global_total = None
+    if global_ok:
+        global_doc = await AllUserAccountsDocument.find_one()
+        global_total = sum(
+            global_doc.accounts_by_user[user_id].likvid.alszamlak["bank"].balance for user_id in user_ids
+        )
+    per_user_total = 0.0
+    async for doc in UserAccountsDocument.get_motor_collection().find({}, {"likvid.alszamlak.bank.balance": 1}):
+        per_user_total += doc["likvid"]["alszamlak"]["bank"]["balance"]
+    return {"global": global_total, "per_user": per_user_total}
+
+
+async def main(user_counts: list, writes: int, concurrency: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    db = client[BENCH_DB_NAME]
+    await init_beanie(database=db, document_models=[AllUserAccountsDocument, UserAccountsDocument])
+
+    results = []
+    try:
+        for user_count in user_counts:
+            user_ids, global_ok = await _seed(user_count)
+            global_result = await _run_writes("global", user_ids, writes, concurrency) if global_ok else None
+            per_user_result = await _run_writes("per_user", user_ids, writes, concurrency)
+            totals = await _balance_totals(user_ids, global_ok)
+            expected_total = user_count * 100000.0 - writes
+            results.append({
+                "users": user_count,
+                "global": global_result,
+                "per_user": per_user_result,
+                "lost_updates": {
+                    mode: (round(total - expected_total) if total is not None else None)
+                    for mode, total in totals.items()
+                },
+            })
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Account write benchmark")
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.writes, args.concurrency))
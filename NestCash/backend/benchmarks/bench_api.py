@@ -0,0 +1,383 @@
+# benchmarks/bench_api.py
+"""
+Terheléses benchmark a NestCash API fő végpontjaira szintetikus adatokkal.
+
+Feltölt egy külön adatbázist (felhasználók, számlák, tranzakciók, posztok,
+követések, szokások + logok), majd route-onként --requests kérést küld
+--concurrency párhuzamossággal httpx-szel, és route-onként áteresztőképességet
+és p50/p95/p99 késleltetést ír ki JSON-ban.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_api --users 200 --transactions 2000 --output bench.json
+    python -m benchmarks.bench_api --compare bench.json      # összevetés egy korábbi futással
+
+Alapból az alkalmazás ugyanabban a folyamatban fut (httpx ASGITransport,
+hálózat nélkül). --base-url-lel egy futó szervert is mérhet; ekkor a
+szervert MONGODB_DB_NAME=nestcash_bench környezettel kell indítani, hogy
+ugyanazt az adatbázist lássa. A `nestcash_bench` adatbázist a végén
+eldobja (--keep-data esetén megtartja).
+"""
+import os
+import sys
+import math
+import time
+import json
+import random
+import asyncio
+import argparse
+import subprocess
+from datetime import datetime, timedelta
+
+BENCH_DB_NAME = "nestcash_bench"
+# Az app.core.db modul betöltés előtt: az alkalmazás is a benchmark adatbázist használja
+os.environ["MONGODB_DB_NAME"] = BENCH_DB_NAME
+# A feltöltés újraépíti a havi összesítőt, így az élesben használt olvasási mód mérhető
+os.environ.setdefault("ROLLUP_READ_MODE", "rollup")
+
+import httpx
+from bson import ObjectId
+
+from app.core.db import init_db, get_db
+from app.models.transaction import Transaction
+from app.models.forum_models import ForumPostDocument, FollowDocument, PostCategory, PrivacyLevel
+from app.models.habit import Habit, HabitLog, TrackingType, FrequencyType
+from app.services.auth import create_access_token
+from app.services.account_service import AccountService
+from app.services.rollup_service import RollupService
+from app.services.badge_service import badge_service
+from app.services.forum_timeline_service import ForumTimelineService
+from app.services.user_search_service import UserSearchService
+
+INSERT_BATCH_SIZE = 5000
+CATEGORIES = ["Élelmiszer", "Lakhatás", "Közlekedés", "Szórakozás", "Egészség", "Fizetés"]
+SUB_ACCOUNTS = {"likvid": ["bank", "készpénz"], "megtakaritas": ["lekötött"]}
+
+# (név, metódus, útvonal sablon); a {post_id} / {query} helyére kérésenként véletlen érték kerül
+ROUTES = [
+    ("transactions.list", "GET", "/transactions/?limit=50"),
+    ("transactions.summary", "GET", "/transactions/summary"),
+    ("accounts.me", "GET", "/accounts/me"),
+    ("analysis.basic_stats", "GET", "/analysis/basic-stats"),
+    ("forum.posts.all", "GET", "/forum/posts/?limit=20"),
+    ("forum.posts.following", "GET", "/forum/posts/?feed_type=following&limit=20"),
+    ("forum.follow.search", "GET", "/forum/follow/search?q={query}"),
+    ("habits.list", "GET", "/habits/"),
+    ("habits.overview", "GET", "/habits/overview/stats"),
+    ("knowledge.categories", "GET", "/knowledge/categories"),
+    ("challenges.list", "GET", "/challenges/"),
+    ("badges.my_badges", "GET", "/badges/my-badges"),
+    ("badges.leaderboard", "GET", "/badges/leaderboard"),
+    ("notifications.list", "GET", "/notifications/"),
+    ("forum.posts.like", "POST", "/forum/posts/{post_id}/like"),
+]
+WRITE_ROUTES = {"forum.posts.like"}
+
+
+# ----------- Adatfeltöltés -----------
+
+async def _insert_batched(collection, documents: list) -> None:
+    for start in range(0, len(documents), INSERT_BATCH_SIZE):
+        await collection.insert_many(documents[start:start + INSERT_BATCH_SIZE], ordered=False)
+
+
+async def seed(users: int, transactions: int, posts: int, follows: int, habits: int, days: int) -> dict:
+    """Szintetikus adatok; a tranzakció/szokás számok felhasználónkéntiek"""
+    db = get_db()
+    today = datetime.utcnow().date()
+
+    user_documents = [
+        {
+            "_id": ObjectId(),
+            "username": f"bench_{index:05d}",
+            "email": f"bench_{index:05d}@example.com",
+            "password": "-",  # Bejelentkezés nincs, a tokent közvetlenül állítjuk ki
+            "registration_date": datetime.utcnow() - timedelta(days=random.randint(0, 700)),
+        }
+        for index in range(users)
+    ]
+    await db["users"].insert_many(user_documents)
+    user_ids = [str(document["_id"]) for document in user_documents]
+
+    for user_id in user_ids:
+        await AccountService.get_user_accounts(user_id, create=True)
+
+    transaction_documents = []
+    for user_id in user_ids:
+        for _ in range(transactions):
+            main_account = random.choice(list(SUB_ACCOUNTS))
+            is_income = random.random() < 0.25
+            amount = round(random.uniform(500, 50000), 2)
+            transaction = Transaction(
+                user_id=user_id,
+                date=(today - timedelta(days=random.randint(0, 730))).strftime("%Y-%m-%d"),
+                amount=amount if is_income else -amount,
+                main_account=main_account,
+                sub_account_name=random.choice(SUB_ACCOUNTS[main_account]),
+                kategoria="Fizetés" if is_income else random.choice(CATEGORIES[:-1]),
+                type="income" if is_income else "expense",
+                description="benchmark",
+            )
+            transaction_documents.append(transaction.model_dump(exclude={"id", "revision_id"}))
+    await _insert_batched(Transaction.get_motor_collection(), transaction_documents)
+    await RollupService.rebuild()
+    for user_id in user_ids:
+        await badge_service.rebuild_counters(user_id)
+
+    post_documents = []
+    for index in range(posts):
+        author = random.choice(user_documents)
+        post_documents.append(ForumPostDocument(
+            user_id=author["_id"],
+            username=author["username"],
+            title=f"Benchmark poszt {index}",
+            content="Szintetikus tartalom a terheléses méréshez. " * 5,
+            category=random.choice(list(PostCategory)),
+            privacy_level=random.choice([PrivacyLevel.PUBLIC] * 3 + [PrivacyLevel.FRIENDS]),
+            created_at=datetime.utcnow() - timedelta(minutes=random.randint(0, 60 * 24 * 90)),
+        ).model_dump(exclude={"id", "revision_id"}))
+    await _insert_batched(ForumPostDocument.get_motor_collection(), post_documents)
+    post_ids = [str(post_id) for post_id in await ForumPostDocument.get_motor_collection().distinct("_id")]
+
+    follow_documents = []
+    for follower in user_documents:
+        candidates = [user for user in random.sample(user_documents, min(follows + 1, users)) if user is not follower]
+        for following in candidates[:follows]:
+            follow_documents.append(FollowDocument(
+                follower_id=follower["_id"],
+                following_id=following["_id"],
+                follower_username=follower["username"],
+                following_username=following["username"],
+            ).model_dump(exclude={"id", "revision_id"}))
+    await _insert_batched(FollowDocument.get_motor_collection(), follow_documents)
+    await ForumTimelineService.rebuild()
+
+    habit_documents = []
+    for user_id in user_ids:
+        for index in range(habits):
+            numeric = index % 3 == 0
+            habit_documents.append(Habit(
+                user_id=user_id,
+                title=f"Szokás {index}",
+                tracking_type=TrackingType.NUMERIC if numeric else TrackingType.BOOLEAN,
+                has_goal=True,
+                target_value=5,
+                goal_period=random.choice(list(FrequencyType)),
+            ).model_dump(exclude={"id", "revision_id"}))
+    await _insert_batched(Habit.get_motor_collection(), habit_documents)
+
+    log_documents = []
+    async for habit in Habit.get_motor_collection().find({}, {"user_id": 1, "tracking_type": 1}):
+        for offset in range(days):
+            if random.random() < 0.7:
+                log_documents.append({
+                    "user_id": habit["user_id"],
+                    "habit_id": habit["_id"],
+                    "date": (today - timedelta(days=offset)).strftime("%Y-%m-%d"),
+                    "completed": random.random() < 0.8,
+                    "value": round(random.uniform(1, 10), 1) if habit["tracking_type"] == TrackingType.NUMERIC.value else None,
+                    "created_at": datetime.utcnow(),
+                })
+    await _insert_batched(HabitLog.get_motor_collection(), log_documents)
+
+    await UserSearchService.rebuild()
+
+    return {
+        "user_ids": user_ids,
+        "usernames": [document["username"] for document in user_documents],
+        "post_ids": post_ids,
+        "counts": {
+            "users": users,
+            "transactions": len(transaction_documents),
+            "posts": len(post_documents),
+            "follows": len(follow_documents),
+            "habits": len(habit_documents),
+            "habit_logs": len(log_documents),
+        },
+    }
+
+
+# ----------- Mérés -----------
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Legközelebbi rang szerinti percentilis egy rendezett listából"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _path(template: str, data: dict) -> str:
+    return template.format(
+        post_id=random.choice(data["post_ids"]) if data["post_ids"] else ObjectId(),
+        query=random.choice(data["usernames"])[:random.randint(3, 8)],
+    )
+
+
+async def run_route(client: httpx.AsyncClient, route: tuple, data: dict, tokens: list,
+                    requests: int, concurrency: int, warmup: int) -> dict:
+    name, method, template = route
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async def one(record: bool) -> None:
+        headers = {"Authorization": f"Bearer {random.choice(tokens)}"}
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, _path(template, data), headers=headers)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        if record:
+            latencies.append(elapsed_ms)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(one(False) for _ in range(warmup)))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(True) for _ in range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "route": name,
+        "method": method,
+        "path": template,
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "statuses": statuses,
+        "throughput_rps": round(requests / wall, 1) if wall > 0 else None,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """Route-onkénti eltérés egy korábbi riporthoz képest (pozitív = lassabb)"""
+    previous = {route["route"]: route for route in baseline.get("routes", [])}
+    changes = []
+    for route in report["routes"]:
+        before = previous.get(route["route"])
+        if not before:
+            continue
+        changes.append({
+            "route": route["route"],
+            **{
+                f"{metric}_change_pct": round((route[metric] - before[metric]) / before[metric] * 100, 1)
+                if before[metric] else None
+                for metric in ("p50_ms", "p95_ms", "p99_ms")
+            },
+            "throughput_change_pct": round(
+                (route["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100, 1
+            ) if before.get("throughput_rps") else None,
+        })
+    return changes
+
+
+async def main(args):
+    random.seed(args.seed)
+
+    # Alkalmazás indítás (startup események: adatbázis, badge init, háttérsor)
+    from app.main import app
+    if args.base_url:
+        await init_db()
+    else:
+        await app.router.startup()
+
+    try:
+        seed_started = time.perf_counter()
+        data = await seed(args.users, args.transactions, args.posts, args.follows, args.habits, args.days)
+        seed_seconds = round(time.perf_counter() - seed_started, 1)
+
+        tokens = [
+            create_access_token({"sub": user_id}, expires_delta=timedelta(hours=6))
+            for user_id in data["user_ids"]
+        ]
+        routes = [route for route in ROUTES if not args.routes or route[0] in args.routes]
+        if args.no_writes:
+            routes = [route for route in routes if route[0] not in WRITE_ROUTES]
+
+        transport = None if args.base_url else httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url=args.base_url or "http://bench",
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.concurrency),
+        ) as client:
+            results = []
+            for route in routes:
+                results.append(await run_route(
+                    client, route, data, tokens, args.requests, args.concurrency, args.warmup
+                ))
+
+        report = {
+            "commit": _git_commit(),
+            "generated_at": datetime.utcnow().isoformat(),
+            "target": args.base_url or "in-process",
+            "parameters": {
+                "users": args.users,
+                "transactions_per_user": args.transactions,
+                "posts": args.posts,
+                "follows_per_user": args.follows,
+                "habits_per_user": args.habits,
+                "habit_days": args.days,
+                "requests_per_route": args.requests,
+                "concurrency": args.concurrency,
+                "seed": args.seed,
+            },
+            "data": data["counts"],
+            "seed_seconds": seed_seconds,
+            "routes": results,
+        }
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as baseline_file:
+                report["comparison"] = compare(report, json.load(baseline_file))
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        print(output)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output_file:
+                output_file.write(output)
+    finally:
+        if not args.keep_data:
+            await get_db().client.drop_database(BENCH_DB_NAME)
+        if not args.base_url:
+            await app.router.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NestCash API load benchmark")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--transactions", type=int, default=2000, help="Tranzakció felhasználónként")
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--follows", type=int, default=20, help="Követés felhasználónként")
+    parser.add_argument("--habits", type=int, default=5, help="Szokás felhasználónként")
+    parser.add_argument("--days", type=int, default=90, help="Szokás log napok")
+    parser.add_argument("--requests", type=int, default=500, help="Kérés route-onként")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=20, help="Nem mért kérés route-onként")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--routes", nargs="*", help="Csak ezek a route nevek (pl. transactions.list)")
+    parser.add_argument("--no-writes", action="store_true", help="Író route-ok (like) kihagyása")
+    parser.add_argument("--base-url", help="Futó szerver címe; alapból in-process ASGI")
+    parser.add_argument("--output", help="A JSON riport mentése fájlba")
+    parser.add_argument("--compare", help="Korábbi JSON riport az összevetéshez")
+    parser.add_argument("--keep-data", action="store_true", help="A benchmark adatbázis megtartása")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.users < 2:
+        sys.exit("--users must be at least 2")
+    asyncio.run(main(args))
@@ -0,0 +1,133 @@
+# benchmarks/bench_badge_leaderboard.py
+"""
+Badge leaderboard mérése: teljes UserBadge betöltés + Python számolás vs.
+aggregációs pillanatkép építés vs. cache-elt lekérés.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_badge_leaderboard --badges 100000 --users 5000
+
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from statistics import median
+
+from beanie import init_beanie, PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.badge import BadgeType, UserBadge, BadgeCategory
+from app.models.user import UserDocument
+from app.services.badge_leaderboard import BadgeLeaderboardService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+BADGE_CODES = [f"bench_badge_{index}" for index in range(30)]
+
+
+async def _seed(badge_count: int, user_count: int):
+    await BadgeType.insert_many([
+        BadgeType(
+            code=code,
+            name=code,
+            description="benchmark",
+            icon="🏅",
+            color="#000000",
+            category=BadgeCategory.TRANSACTION,
+            condition_type="transaction_count",
+            points=random.choice([10, 25, 50, 100]),
+        )
+        for code in BADGE_CODES
+    ])
+
+    user_ids = [PydanticObjectId() for _ in range(user_count)]
+    await UserDocument.get_motor_collection().insert_many([
+        {"_id": user_id, "username": f"bench_{index}", "email": f"bench_{index}@example.com"}
+        for index, user_id in enumerate(user_ids)
+    ])
+
+    now = datetime.utcnow()
+    batch = []
+    for _ in range(badge_count):
+        batch.append(UserBadge(
+            user_id=random.choice(user_ids),
+            badge_code=random.choice(BADGE_CODES),
+            earned_at=now - timedelta(minutes=random.randint(0, 500000)),
+            level=random.randint(1, 3),
+        ))
+        if len(batch) >= 5000:
+            await UserBadge.insert_many(batch)
+            batch = []
+    if batch:
+        await UserBadge.insert_many(batch)
+    return user_ids
+
+
+async def _legacy_leaderboard(limit: int):
+    """A korábbi implementáció: minden UserBadge betöltése és Python-os számolás"""
+    user_badges = await UserBadge.find({}).to_list()
+    user_stats = {}
+    for badge in user_badges:
+        stats = user_stats.setdefault(str(badge.user_id), {"total_badges": 0, "recent_badge": badge})
+        stats["total_badges"] += 1
+        if badge.earned_at > stats["recent_badge"].earned_at:
+            stats["recent_badge"] = badge
+    return sorted(user_stats.items(), key=lambda x: x[1]["total_badges"], reverse=True)[:limit]
+
+
+async def _time(coro_factory, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main(badge_count: int, user_count: int, repeat: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(
+        database=client[BENCH_DB_NAME],
+        document_models=[BadgeType, UserBadge, UserDocument]
+    )
+
+    try:
+        user_ids = await _seed(badge_count, user_count)
+        service = BadgeLeaderboardService(ttl_seconds=3600)
+        probe_user = str(random.choice(user_ids))
+
+        legacy_top = await _legacy_leaderboard(10)
+        snapshot_top = (await service.get_leaderboard(probe_user, 10))["leaderboard"]
+        legacy_counts = [stats["total_badges"] for _, stats in legacy_top]
+        snapshot_counts = [entry["total_badges"] for entry in snapshot_top]
+
+        legacy_timings = await _time(lambda: _legacy_leaderboard(10), repeat)
+        build_timings = await _time(service.build_snapshot, repeat)
+        cached_timings = await _time(lambda: service.get_leaderboard(probe_user, 10), repeat)
+
+        print(json.dumps({
+            "badges": badge_count,
+            "users": user_count,
+            "legacy_median_ms": round(median(legacy_timings), 2),
+            "snapshot_build_median_ms": round(median(build_timings), 2),
+            "cached_read_median_ms": round(median(cached_timings), 3),
+            "build_speedup": round(median(legacy_timings) / max(median(build_timings), 0.001), 1),
+            "top_counts_match": legacy_counts == snapshot_counts,
+        }, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Badge leaderboard benchmark")
+    parser.add_argument("--badges", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.badges, args.users, args.repeat))
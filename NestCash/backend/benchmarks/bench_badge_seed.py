@@ -0,0 +1,131 @@
+# benchmarks/bench_badge_seed.py
+"""
+Induláskori badge feltöltés ideje sok felhasználónál: a korábbi út
+(badge-enként és felhasználónként find_one + insert/save) vs. a
+bulk_write / $setOnInsert változat hideg (üres) és meleg (ismételt) indulással.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_badge_seed --users 100000 --legacy-users 10000
+
+A korábbi utat --legacy-users felhasználón mérjük (felhasználónként egy
+round trip miatt a teljes 100k-n percekig tartana), és lineárisan vetítjük.
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import asyncio
+import argparse
+from datetime import datetime
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.badge import BadgeType, UserBadge, BadgeProgress, UserBadgeCounters
+from app.models.seed_state import SeedStateDocument
+from app.models.lease import LeaseDocument
+from app.models.user import UserDocument
+from app.services.badge_init import DEFAULT_BADGES, WELCOME_BADGE_CODE, initialize_badge_system
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+SEED_BATCH_SIZE = 10000
+
+
+async def _seed_users(count: int) -> None:
+    collection = UserDocument.get_motor_collection()
+    for start in range(0, count, SEED_BATCH_SIZE):
+        await collection.insert_many([
+            {
+                "username": f"bench_user_{index}",
+                "email": f"bench_user_{index}@example.com",
+                "password": "x",
+                "registration_date": datetime.utcnow(),
+            }
+            for index in range(start, min(start + SEED_BATCH_SIZE, count))
+        ], ordered=False)
+
+
+async def _reset_badges() -> None:
+    for model in (BadgeType, UserBadge, SeedStateDocument):
+        await model.get_motor_collection().delete_many({})
+
+
+async def _legacy_seed(user_limit: int) -> None:
+    """A korábbi initialize_default_badges + award_welcome_badges lépései"""
+    for badge_data in DEFAULT_BADGES:
+        existing_badge = await BadgeType.find_one({"code": badge_data["code"]})
+        if existing_badge:
+            for key, value in badge_data.items():
+                if key != "condition_config" or not existing_badge.condition_config:
+                    setattr(existing_badge, key, value)
+            existing_badge.updated_at = datetime.utcnow()
+            await existing_badge.save()
+        else:
+            await BadgeType(**badge_data).insert()
+
+    users = await UserDocument.find({}).limit(user_limit).to_list()
+    for user in users:
+        existing = await UserBadge.find_one({"user_id": user.id, "badge_code": WELCOME_BADGE_CODE})
+        if not existing:
+            await UserBadge(
+                user_id=user.id,
+                badge_code=WELCOME_BADGE_CODE,
+                context_data={"registration_date": user.registration_date.isoformat(), "auto_awarded": True}
+            ).insert()
+
+
+async def _seconds(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return round(time.perf_counter() - start, 3)
+
+
+async def main(user_count: int, legacy_users: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(
+        database=client[BENCH_DB_NAME],
+        document_models=[UserDocument, BadgeType, UserBadge, BadgeProgress, UserBadgeCounters, SeedStateDocument, LeaseDocument]
+    )
+
+    try:
+        await _seed_users(user_count)
+
+        legacy_cold = await _seconds(_legacy_seed(legacy_users))
+        legacy_warm = await _seconds(_legacy_seed(legacy_users))
+        await _reset_badges()
+
+        bulk_cold = await _seconds(initialize_badge_system())
+        bulk_warm = await _seconds(initialize_badge_system())
+        welcome_badges = await UserBadge.get_motor_collection().count_documents({"badge_code": WELCOME_BADGE_CODE})
+
+        scale = user_count / legacy_users
+        print(json.dumps({
+            "users": user_count,
+            "badge_definitions": len(DEFAULT_BADGES),
+            "legacy": {
+                "measured_users": legacy_users,
+                "cold_seconds": legacy_cold,
+                "warm_seconds": legacy_warm,
+                "projected_cold_seconds": round(legacy_cold * scale, 1),
+                "projected_warm_seconds": round(legacy_warm * scale, 1),
+            },
+            "bulk": {
+                "cold_seconds": bulk_cold,
+                "warm_seconds": bulk_warm,
+                "welcome_badges": welcome_badges,
+                "exact": welcome_badges == user_count,
+            },
+        }, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Badge startup seeding benchmark")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--legacy-users", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, min(args.legacy_users, args.users)))
@@ -0,0 +1,165 @@
+# benchmarks/bench_forum_feed.py
+"""
+Követési feed terheléses teszt: a korábbi lekérdezés (követettek $in +
+láthatósági szűrő + count) vs. az előre kiszámolt idővonal.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_forum_feed --users 10000 --posts 1000000
+
+Néhány "híresség" felhasználót a küszöbnél több követővel generál, így a
+hybrid pull ág is terhelést kap. Külön `nestcash_bench` adatbázist használ,
+amit a végén eldob.
+"""
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+from beanie import init_beanie
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.forum_models import (
+    ForumPostDocument, FollowDocument, ForumTimelineEntry, PostCategory, PrivacyLevel
+)
+from app.services.forum_service import ForumService
+from app.services import forum_timeline_service
+from app.services.forum_timeline_service import ForumTimelineService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+BATCH_SIZE = 10000
+CELEBRITY_COUNT = 5
+
+
+async def _seed(user_count: int, post_count: int, follows_per_user: int):
+    user_ids = [ObjectId() for _ in range(user_count)]
+    celebrities = user_ids[:CELEBRITY_COUNT]
+    celebrity_followers = min(user_count - 1, forum_timeline_service.FORUM_FANOUT_MAX_FOLLOWERS + 1)
+
+    follows = set()
+    for user_id in user_ids:
+        for followed in random.sample(user_ids, min(follows_per_user, user_count)):
+            if followed != user_id:
+                follows.add((user_id, followed))
+    for celebrity in celebrities:
+        for follower in random.sample(user_ids, celebrity_followers):
+            if follower != celebrity:
+                follows.add((follower, celebrity))
+
+    follow_docs = [
+        {"follower_id": follower, "following_id": following,
+         "follower_username": "bench", "following_username": "bench", "created_at": datetime.utcnow()}
+        for follower, following in follows
+    ]
+    for start in range(0, len(follow_docs), BATCH_SIZE):
+        await FollowDocument.get_motor_collection().insert_many(follow_docs[start:start + BATCH_SIZE], ordered=False)
+
+    now = datetime.utcnow()
+    categories = [category.value for category in PostCategory]
+    privacy_levels = [PrivacyLevel.PUBLIC.value] * 6 + [PrivacyLevel.FRIENDS.value] * 3 + [PrivacyLevel.PRIVATE.value]
+    for start in range(0, post_count, BATCH_SIZE):
+        batch = []
+        for _ in range(min(BATCH_SIZE, post_count - start)):
+            created_at = now - timedelta(seconds=random.randint(0, 365 * 24 * 3600))
+            batch.append({
+                "user_id": random.choice(user_ids),
+                "username": "bench",
+                "title": "benchmark post",
+                "content": "benchmark content",
+                "category": random.choice(categories),
+                "privacy_level": random.choice(privacy_levels),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "like_count": 0,
+                "comment_count": 0,
+            })
+        await ForumPostDocument.get_motor_collection().insert_many(batch, ordered=False)
+
+    return user_ids, len(follows)
+
+
+async def _legacy_feed(user_id: ObjectId, limit: int):
+    """A korábbi FOLLOWING feed: követések betöltése, $in + láthatósági szűrő, count, skip/limit"""
+    following = await FollowDocument.find({"follower_id": user_id}).to_list()
+    query_filter = {"user_id": {"$in": [follow.following_id for follow in following] + [user_id]}}
+    query_filter.update(await ForumService().build_visibility_filter(str(user_id)))
+    await ForumPostDocument.find(query_filter).count()
+    return await ForumPostDocument.find(query_filter).sort([("created_at", -1)]).limit(limit).to_list()
+
+
+async def _timeline_feed(user_id: ObjectId, limit: int):
+    posts, _ = await ForumTimelineService.get_feed(str(user_id), limit)
+    return posts
+
+
+async def _load(feed, user_ids, requests: int, concurrency: int, limit: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await feed(random.choice(user_ids), limit)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(len(latencies) * q))], 2)
+    return {
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+    }
+
+
+async def main(user_count: int, post_count: int, follows_per_user: int, requests: int, concurrency: int, limit: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(
+        database=client[BENCH_DB_NAME],
+        document_models=[ForumPostDocument, FollowDocument, ForumTimelineEntry]
+    )
+
+    try:
+        seed_start = time.perf_counter()
+        user_ids, follow_count = await _seed(user_count, post_count, follows_per_user)
+        seed_seconds = time.perf_counter() - seed_start
+
+        rebuild_start = time.perf_counter()
+        await ForumTimelineService.rebuild()
+        rebuild_seconds = time.perf_counter() - rebuild_start
+
+        print(json.dumps({
+            "users": user_count,
+            "posts": post_count,
+            "follows": follow_count,
+            "timeline_entries": await ForumTimelineEntry.get_motor_collection().estimated_document_count(),
+            "seed_seconds": round(seed_seconds, 1),
+            "timeline_rebuild_seconds": round(rebuild_seconds, 1),
+            "legacy_query": await _load(_legacy_feed, user_ids, requests, concurrency, limit),
+            "timeline": await _load(_timeline_feed, user_ids, requests, concurrency, limit),
+        }, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forum following-feed load test")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--follows", type=int, default=20, help="Követések száma felhasználónként")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.posts, args.follows, args.requests, args.concurrency, args.limit))
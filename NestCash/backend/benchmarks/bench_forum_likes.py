@@ -0,0 +1,107 @@
+# benchmarks/bench_forum_likes.py
+"""
+Like toggle párhuzamos terhelés alatt: a korábbi read-modify-write út
+(find_one + insert/delete + post.save()) vs. ForumInteractionService.toggle_like
+(egyedi index + upsert + atomikus $inc).
+
+Két forgatókönyv, mindkettő --toggles párhuzamos hívással egy posztra:
+  - distinct: minden hívás más felhasználótól -> a like_count pontosan --toggles
+  - contended: --users felhasználó ismételten toggle-öl -> a like_count
+    pontosan a megmaradt like dokumentumok száma
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_forum_likes --toggles 500 --users 50
+
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import asyncio
+import argparse
+
+from beanie import init_beanie, PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.forum_models import ForumPostDocument, LikeDocument, CommentDocument, PostCategory
+from app.models.lease import LeaseDocument
+from app.services.forum_interaction_service import ForumInteractionService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+
+
+async def _legacy_toggle(post_id: PydanticObjectId, user_id: PydanticObjectId) -> None:
+    """A korábbi út: poszt betöltés, like keresés, insert/delete, teljes poszt mentés"""
+    post = await ForumPostDocument.get(post_id)
+    existing_like = await LikeDocument.find_one({"user_id": user_id, "post_id": post_id})
+    if existing_like:
+        await existing_like.delete()
+        post.like_count = max(0, post.like_count - 1)
+    else:
+        await LikeDocument(post_id=post_id, user_id=user_id, username="bench").insert()
+        post.like_count += 1
+    await post.save()
+
+
+async def _atomic_toggle(post_id: PydanticObjectId, user_id: PydanticObjectId) -> None:
+    await ForumInteractionService.toggle_like(post_id, str(user_id), "bench")
+
+
+async def _run(toggle, user_ids: list) -> dict:
+    post = ForumPostDocument(
+        user_id=PydanticObjectId(), username="author", title="bench", content="bench",
+        category=PostCategory.GENERAL
+    )
+    await post.insert()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(toggle(post.id, user_id) for user_id in user_ids), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    stored = await ForumPostDocument.get_motor_collection().find_one({"_id": post.id}, {"like_count": 1})
+    like_documents = await LikeDocument.get_motor_collection().count_documents({"post_id": post.id})
+    return {
+        "seconds": round(elapsed, 3),
+        "errors": sum(1 for result in results if isinstance(result, Exception)),
+        "like_count": stored["like_count"],
+        "like_documents": like_documents,
+        "exact": stored["like_count"] == like_documents,
+    }
+
+
+async def main(toggles: int, users: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(
+        database=client[BENCH_DB_NAME], document_models=[ForumPostDocument, LikeDocument, CommentDocument, LeaseDocument]
+    )
+    # Az app induláskor hozza létre; a mérés is ugyanazzal az egyedi indexszel fut
+    await ForumInteractionService.ensure_unique_like_index()
+
+    try:
+        distinct_users = [PydanticObjectId() for _ in range(toggles)]
+        pool = [PydanticObjectId() for _ in range(users)]
+        contended_users = [pool[index % users] for index in range(toggles)]
+
+        report = {"toggles": toggles, "users": users}
+        for name, toggle in (("legacy", _legacy_toggle), ("atomic", _atomic_toggle)):
+            distinct = await _run(toggle, distinct_users)
+            distinct["expected_like_count"] = toggles
+            distinct["exact"] = distinct["exact"] and distinct["like_count"] == toggles
+            report[name] = {
+                "distinct": distinct,
+                "contended": await _run(toggle, contended_users),
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forum like toggle concurrency benchmark")
+    parser.add_argument("--toggles", type=int, default=500)
+    parser.add_argument("--users", type=int, default=50, help="Felhasználók száma a contended forgatókönyvben")
+    args = parser.parse_args()
+    asyncio.run(main(args.toggles, args.users))
@@ -0,0 +1,139 @@
+# benchmarks/bench_habit_stats.py
+"""
+Szokás statisztikák mérése egy 30 szokásos, egy évnyi logot tartalmazó
+felhasználón: a korábbi szokásonkénti HabitLog.find(...).to_list() hívások
+vs. az egy aggregációs változat (get_period_counts / get_habit_stats).
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_habit_stats --habits 30 --days 365
+
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from statistics import median
+
+from beanie import init_beanie, PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.habit import Habit, HabitLog, TrackingType, FrequencyType
+from app.services.habit_service import HabitService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+
+
+async def _seed(user_id: PydanticObjectId, habit_count: int, days: int) -> list:
+    habits = []
+    for i in range(habit_count):
+        numeric = i % 3 == 0
+        habits.append(Habit(
+            user_id=user_id,
+            title=f"bench habit {i}",
+            tracking_type=TrackingType.NUMERIC if numeric else TrackingType.BOOLEAN,
+            has_goal=True,
+            target_value=5,
+            goal_period=random.choice(list(FrequencyType)),
+        ))
+    for habit in habits:
+        await habit.insert()
+
+    today = datetime.now().date()
+    logs = []
+    for habit in habits:
+        for offset in range(days):
+            if random.random() < 0.8:
+                logs.append({
+                    "user_id": user_id,
+                    "habit_id": habit.id,
+                    "date": (today - timedelta(days=offset)).strftime("%Y-%m-%d"),
+                    "completed": random.random() < 0.85,
+                    "value": round(random.uniform(1, 10), 1) if habit.tracking_type == TrackingType.NUMERIC else None,
+                    "created_at": datetime.utcnow(),
+                })
+    await HabitLog.get_motor_collection().insert_many(logs, ordered=False)
+    return habits
+
+
+async def _legacy_overview_and_list(user_id: str, habits: list):
+    """A korábbi út: mai logok listája + szokásonként mai log és cél-időszak logjai"""
+    today_date = datetime.now().date()
+    today = today_date.strftime("%Y-%m-%d")
+    await HabitLog.find({"user_id": PydanticObjectId(user_id), "date": today, "completed": True}).to_list()
+    for habit in habits:
+        await HabitLog.find_one({"user_id": habit.user_id, "habit_id": habit.id, "date": today})
+        start = today_date - timedelta(days=today_date.weekday()) \
+            if habit.goal_period == FrequencyType.WEEKLY else today_date.replace(day=1)
+        await HabitLog.find({
+            "user_id": habit.user_id,
+            "habit_id": habit.id,
+            "date": {"$gte": start.strftime("%Y-%m-%d"), "$lte": today}
+        }).to_list()
+
+
+async def _legacy_habit_stats(habit: Habit):
+    """A korábbi /habits/{id}/stats: három külön teljes log lekérés"""
+    today = datetime.now().date()
+    for start in (today - timedelta(days=30), today - timedelta(weeks=8), today.replace(day=1) - timedelta(days=180)):
+        await HabitLog.find({
+            "user_id": habit.user_id,
+            "habit_id": habit.id,
+            "date": {"$gte": start.strftime("%Y-%m-%d")}
+        }).to_list()
+
+
+async def _aggregated_overview_and_list(user_id: str, habits: list):
+    counts = await HabitService.get_period_counts(user_id, [habit.id for habit in habits])
+    for habit in habits:
+        HabitService.usage_percentage(habit, counts.get(str(habit.id)))
+
+
+async def _time(coro_factory, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(median(timings), 2)
+
+
+async def main(habit_count: int, days: int, repeat: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(database=client[BENCH_DB_NAME], document_models=[Habit, HabitLog])
+
+    try:
+        user_id = PydanticObjectId()
+        habits = await _seed(user_id, habit_count, days)
+        habit = habits[0]
+
+        print(json.dumps({
+            "habits": habit_count,
+            "days": days,
+            "logs": await HabitLog.get_motor_collection().count_documents({}),
+            "overview_and_list_median_ms": {
+                "legacy": await _time(lambda: _legacy_overview_and_list(str(user_id), habits), repeat),
+                "aggregated": await _time(lambda: _aggregated_overview_and_list(str(user_id), habits), repeat),
+            },
+            "habit_stats_median_ms": {
+                "legacy": await _time(lambda: _legacy_habit_stats(habit), repeat),
+                "aggregated": await _time(lambda: HabitService.get_habit_stats(habit, 30), repeat),
+            },
+        }, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Habit overview / stats benchmark")
+    parser.add_argument("--habits", type=int, default=30)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.habits, args.days, args.repeat))
@@ -0,0 +1,114 @@
+# benchmarks/bench_keyset_pagination.py
+"""
+Mély lapozás mérése a tranzakció listán: skip/limit + count() vs. keyset
+(after token) becsült vagy kihagyott darabszámmal.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_keyset_pagination --transactions 60000 --page 1000
+
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from statistics import median
+
+from beanie import init_beanie, PydanticObjectId
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.transaction import Transaction
+from app.core.pagination import TotalMode, with_keyset, next_cursor, count_total
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+SORT = [("date", -1), ("_id", -1)]
+
+
+async def _seed(user_id: PydanticObjectId, count: int):
+    today = datetime.utcnow()
+    batch = []
+    for _ in range(count):
+        batch.append({
+            "user_id": user_id,
+            "date": (today - timedelta(days=random.randint(0, 3650))).strftime("%Y-%m-%d"),
+            "amount": -round(random.uniform(100, 20000), 2),
+            "main_account": "likvid",
+            "sub_account_name": "bank",
+            "kategoria": "Élelmiszer",
+            "type": "expense",
+        })
+        if len(batch) >= 10000:
+            await Transaction.get_motor_collection().insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await Transaction.get_motor_collection().insert_many(batch, ordered=False)
+
+
+async def _skip_page(query_filter: dict, skip: int, limit: int):
+    """A korábbi lapozás: pontos count() + skip/limit"""
+    await count_total(Transaction, query_filter, TotalMode.EXACT)
+    return await Transaction.find(query_filter).sort(SORT).skip(skip).limit(limit).to_list()
+
+
+async def _keyset_page(query_filter: dict, after: str, limit: int, total: TotalMode):
+    await count_total(Transaction, query_filter, total)
+    return await Transaction.find(with_keyset(query_filter, SORT, after)).sort(SORT).limit(limit + 1).to_list()
+
+
+async def _time(coro_factory, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main(transaction_count: int, page: int, limit: int, repeat: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(database=client[BENCH_DB_NAME], document_models=[Transaction])
+
+    try:
+        user_id = PydanticObjectId()
+        await _seed(user_id, transaction_count)
+        query_filter = {"user_id": ObjectId(user_id)}
+        skip = (page - 1) * limit
+
+        # Az előző oldal utolsó eleméből képzett token (a mérésen kívül)
+        previous_last = await Transaction.find(query_filter).sort(SORT).skip(skip - 1).limit(1).to_list()
+        after = next_cursor(previous_last, SORT, True)
+
+        skip_result = await _skip_page(query_filter, skip, limit)
+        keyset_result = (await _keyset_page(query_filter, after, limit, TotalMode.NONE))[:limit]
+
+        results = {
+            "transactions": transaction_count,
+            "page": page,
+            "limit": limit,
+            "same_page": [doc.id for doc in skip_result] == [doc.id for doc in keyset_result],
+            "skip_exact_count_median_ms": round(median(await _time(lambda: _skip_page(query_filter, skip, limit), repeat)), 2),
+        }
+        for mode in (TotalMode.EXACT, TotalMode.ESTIMATE, TotalMode.NONE):
+            timings = await _time(lambda: _keyset_page(query_filter, after, limit, mode), repeat)
+            results[f"keyset_{mode.value}_count_median_ms"] = round(median(timings), 2)
+
+        print(json.dumps(results, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keyset pagination benchmark")
+    parser.add_argument("--transactions", type=int, default=60000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.transactions, args.page, args.limit, args.repeat))
@@ -0,0 +1,148 @@
+# benchmarks/bench_limit_evaluation.py
+"""
+Limit kiadás-számítás mérése: limitenkénti find().to_list() vs. kötegelt aggregáció.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_limit_evaluation --limits 20 --transactions 10000
+
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from statistics import median
+
+from beanie import init_beanie, PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.lease import LeaseDocument
+from app.models.limit import Limit, LimitType, LimitPeriod
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionMonthlyRollup
+from app.services.limit_service import LimitService
+from app.services import rollup_service
+from app.services.rollup_service import RollupService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+CATEGORIES = ["Élelmiszer", "Lakhatás", "Közlekedés", "Szórakozás", "Ruházat"]
+ACCOUNTS = {"likvid": ["bank", "készpénz"], "megtakaritas": ["betét"]}
+
+
+async def _seed(user_id: PydanticObjectId, limit_count: int, transaction_count: int):
+    today = datetime.utcnow()
+    transactions = []
+    for _ in range(transaction_count):
+        main_account = random.choice(list(ACCOUNTS))
+        transactions.append(Transaction(
+            user_id=user_id,
+            date=(today - timedelta(days=random.randint(0, 400))).strftime("%Y-%m-%d"),
+            amount=-round(random.uniform(100, 20000), 2),
+            main_account=main_account,
+            sub_account_name=random.choice(ACCOUNTS[main_account]),
+            kategoria=random.choice(CATEGORIES),
+            type="expense",
+        ))
+    await Transaction.insert_many(transactions)
+    await RollupService.rebuild(str(user_id))
+
+    limits = []
+    for index in range(limit_count):
+        limit_type = [LimitType.SPENDING, LimitType.CATEGORY, LimitType.ACCOUNT][index % 3]
+        limits.append(Limit(
+            user_id=user_id,
+            name=f"bench limit {index}",
+            type=limit_type,
+            amount=100000,
+            period=list(LimitPeriod)[index % len(LimitPeriod)],
+            category=random.choice(CATEGORIES) if limit_type == LimitType.CATEGORY else None,
+            main_account="likvid" if limit_type == LimitType.ACCOUNT else None,
+            sub_account_name="bank" if limit_type == LimitType.ACCOUNT and index % 2 else None,
+        ))
+    await Limit.insert_many(limits)
+    return await Limit.find(Limit.user_id == user_id).to_list()
+
+
+async def _legacy_spending(user_id: str, limit: Limit) -> float:
+    """A korábbi implementáció: limitenként minden kiadás betöltése és Python-os összegzés"""
+    query_filter = {
+        "user_id": PydanticObjectId(user_id),
+        "date": {
+            "$gte": limit.get_period_start().strftime("%Y-%m-%d"),
+            "$lte": limit.get_period_end().strftime("%Y-%m-%d")
+        },
+        "amount": {"$lt": 0}
+    }
+    if limit.type == LimitType.CATEGORY and limit.category:
+        query_filter["kategoria"] = limit.category
+    elif limit.type == LimitType.ACCOUNT:
+        if limit.main_account:
+            query_filter["main_account"] = limit.main_account
+        if limit.sub_account_name:
+            query_filter["sub_account_name"] = limit.sub_account_name
+    transactions = await Transaction.find(query_filter).to_list()
+    return abs(sum(t.amount for t in transactions))
+
+
+async def _time(coro_factory, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main(limit_count: int, transaction_count: int, repeat: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(
+        database=client[BENCH_DB_NAME],
+        document_models=[Limit, Transaction, TransactionMonthlyRollup, LeaseDocument]
+    )
+    rollup_service.ROLLUP_READ_MODE = "rollup"
+
+    try:
+        user_id = PydanticObjectId()
+        limits = await _seed(user_id, limit_count, transaction_count)
+
+        async def legacy():
+            return {str(limit.id): await _legacy_spending(str(user_id), limit) for limit in limits}
+
+        async def batched():
+            return await LimitService.get_spending_for_limits(str(user_id), limits)
+
+        legacy_values = await legacy()
+        batched_values = await batched()
+        mismatches = [
+            limit_id for limit_id, value in legacy_values.items()
+            if abs(value - batched_values[limit_id]) > 0.01
+        ]
+
+        legacy_timings = await _time(legacy, repeat)
+        batched_timings = await _time(batched, repeat)
+
+        print(json.dumps({
+            "limits": limit_count,
+            "transactions": transaction_count,
+            "legacy_median_ms": round(median(legacy_timings), 2),
+            "batched_median_ms": round(median(batched_timings), 2),
+            "speedup": round(median(legacy_timings) / max(median(batched_timings), 0.001), 1),
+            "mismatched_limits": mismatches,
+        }, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Limit evaluation benchmark")
+    parser.add_argument("--limits", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.limits, args.transactions, args.repeat))
@@ -0,0 +1,104 @@
+# benchmarks/bench_notification_bulk.py
+"""
+Értesítések tömeges műveleteinek mérése: dokumentumonkénti save()/delete()
+vs. update_many/delete_many egy 10k értesítéses felhasználón.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_notification_bulk --notifications 10000
+
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+from beanie import init_beanie, PydanticObjectId
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.notification import NotificationDocument, NotificationType, NotificationPriority
+from app.services.notification_service import NotificationService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+
+
+async def _seed(user_id: PydanticObjectId, count: int, expired_ratio: float = 0.5):
+    await NotificationDocument.get_motor_collection().delete_many({})
+    now = datetime.utcnow()
+    batch = []
+    for index in range(count):
+        expired = random.random() < expired_ratio
+        batch.append(NotificationDocument(
+            user_id=user_id,
+            type=random.choice(list(NotificationType)),
+            title=f"bench {index}",
+            message="benchmark",
+            priority=random.choice(list(NotificationPriority)),
+            expires_at=now - timedelta(days=1) if expired else now + timedelta(days=30),
+        ))
+    await NotificationDocument.insert_many(batch)
+
+
+async def _legacy_mark_all_as_read(user_id: str) -> int:
+    """A korábbi implementáció: minden olvasatlan betöltése és egyenkénti save()"""
+    unread = await NotificationDocument.find({"user_id": ObjectId(user_id), "is_read": False}).to_list()
+    for notification in unread:
+        notification.is_read = True
+        notification.read_at = datetime.utcnow()
+        await notification.save()
+    return len(unread)
+
+
+async def _legacy_cleanup() -> int:
+    """A korábbi implementáció: minden lejárt betöltése és egyenkénti delete()"""
+    expired = await NotificationDocument.find({"expires_at": {"$lte": datetime.utcnow()}}).to_list()
+    for notification in expired:
+        await notification.delete()
+    return len(expired)
+
+
+async def _measure(user_id: PydanticObjectId, count: int, operation) -> dict:
+    await _seed(user_id, count)
+    start = time.perf_counter()
+    affected = await operation()
+    return {"ms": round((time.perf_counter() - start) * 1000, 2), "affected": affected}
+
+
+async def main(count: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(database=client[BENCH_DB_NAME], document_models=[NotificationDocument])
+
+    try:
+        user_id = PydanticObjectId()
+        results = {
+            "notifications": count,
+            "mark_all_as_read": {
+                "legacy": await _measure(user_id, count, lambda: _legacy_mark_all_as_read(str(user_id))),
+                "update_many": await _measure(user_id, count, lambda: NotificationService.mark_all_as_read(str(user_id))),
+            },
+            "cleanup_expired": {
+                "legacy": await _measure(user_id, count, _legacy_cleanup),
+                "delete_many": await _measure(user_id, count, NotificationService.cleanup_expired_notifications),
+            },
+        }
+        for operation in ("mark_all_as_read", "cleanup_expired"):
+            timings = list(results[operation].values())
+            results[operation]["speedup"] = round(timings[0]["ms"] / max(timings[1]["ms"], 0.001), 1)
+
+        print(json.dumps(results, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notification bulk operation benchmark")
+    parser.add_argument("--notifications", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.notifications))
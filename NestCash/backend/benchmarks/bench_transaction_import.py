@@ -0,0 +1,156 @@
+# benchmarks/bench_transaction_import.py
+"""
+Tömeges tranzakció import áteresztőképessége: soronkénti írás (a POST
+/transactions/ útvonal lépései: insert + egyenleg + összesítő + badge számláló)
+vs. TransactionImportService NDJSON és CSV adatfolyamból.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_transaction_import --rows 100000 --per-row 2000
+
+Cél: helyi Mongo-val legalább 10 000 sor/s. Külön `nestcash_bench`
+adatbázist használ, amit a végén eldob.
+"""
+import os
+import csv
+import io
+import time
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+from beanie import init_beanie, PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionMonthlyRollup
+from app.models.account import UserAccountsDocument
+from app.models.badge import BadgeType, UserBadge, BadgeProgress, UserBadgeCounters
+from app.models.lease import LeaseDocument
+from app.models.limit import Limit
+from app.models.notification import NotificationDocument
+from app.models.user import UserDocument
+from app.services import account_service
+from app.services.account_service import AccountService
+from app.services.rollup_service import RollupService
+from app.services.badge_service import badge_service
+from app.services.transaction_import_service import TransactionImportService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+TARGET_ROWS_PER_SECOND = 10000
+CHUNK_SIZE = 64 * 1024
+CATEGORIES = ["Élelmiszer", "Lakhatás", "Közlekedés", "Szórakozás", "Fizetés"]
+SUB_ACCOUNTS = {"likvid": ["bank", "készpénz"], "megtakaritas": ["lekötött"]}
+
+
+def _rows(count: int) -> list:
+    today = datetime.utcnow()
+    rows = []
+    for _ in range(count):
+        main_account = random.choice(list(SUB_ACCOUNTS))
+        is_income = random.random() < 0.3
+        rows.append({
+            "date": (today - timedelta(days=random.randint(0, 730))).strftime("%Y-%m-%d"),
+            "amount": round(random.uniform(500, 50000), 2),
+            "main_account": main_account,
+            "sub_account_name": random.choice(SUB_ACCOUNTS[main_account]),
+            "kategoria": "Fizetés" if is_income else random.choice(CATEGORIES[:-1]),
+            "type": "income" if is_income else "expense",
+            "description": "benchmark",
+        })
+    return rows
+
+
+def _ndjson(rows: list) -> bytes:
+    return "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+
+
+def _csv(rows: list) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def _stream(payload: bytes):
+    for start in range(0, len(payload), CHUNK_SIZE):
+        yield payload[start:start + CHUNK_SIZE]
+
+
+async def _new_user() -> str:
+    user_id = str(PydanticObjectId())
+    await AccountService.get_user_accounts(user_id, create=True)
+    return user_id
+
+
+async def _per_row(user_id: str, rows: list) -> float:
+    """A korábbi út: soronként insert + egyenleg + összesítő + badge számláló"""
+    start = time.perf_counter()
+    for row in rows:
+        amount = row["amount"] if row["type"] == "income" else -row["amount"]
+        transaction = Transaction(**{**row, "amount": amount}, user_id=PydanticObjectId(user_id))
+        await AccountService.apply_balance_change(user_id, row["main_account"], row["sub_account_name"], amount)
+        await transaction.insert()
+        await RollupService.apply_transaction(transaction)
+        await badge_service.apply_transaction_counters(user_id, [transaction])
+    return time.perf_counter() - start
+
+
+async def _import(rows: list, import_format: str, batch_size: int) -> dict:
+    user_id = await _new_user()
+    payload = _ndjson(rows) if import_format == "ndjson" else _csv(rows)
+    start = time.perf_counter()
+    result = await TransactionImportService.import_stream(user_id, _stream(payload), import_format, batch_size)
+    elapsed = time.perf_counter() - start
+    return {
+        "imported": result.imported,
+        "failed": result.failed,
+        "batches": result.batches,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(len(rows) / elapsed, 1),
+        "meets_target": len(rows) / elapsed >= TARGET_ROWS_PER_SECOND,
+    }
+
+
+async def main(row_count: int, per_row_count: int, batch_size: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(
+        database=client[BENCH_DB_NAME],
+        document_models=[
+            Transaction, TransactionMonthlyRollup, UserAccountsDocument, UserDocument,
+            BadgeType, UserBadge, BadgeProgress, UserBadgeCounters, Limit, NotificationDocument, LeaseDocument
+        ]
+    )
+    account_service.ACCOUNT_STORAGE_MODE = "per_user"
+
+    try:
+        rows = _rows(row_count)
+        per_row_seconds = await _per_row(await _new_user(), rows[:per_row_count])
+
+        print(json.dumps({
+            "rows": row_count,
+            "batch_size": batch_size,
+            "target_rows_per_second": TARGET_ROWS_PER_SECOND,
+            "per_row": {
+                "rows": per_row_count,
+                "rows_per_second": round(per_row_count / per_row_seconds, 1),
+            },
+            "import_ndjson": await _import(rows, "ndjson", batch_size),
+            "import_csv": await _import(rows, "csv", batch_size),
+        }, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk transaction import benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--per-row", type=int, default=2000, help="Soronkénti írással mért sorok száma")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.per_row, args.batch_size))
@@ -0,0 +1,111 @@
+# benchmarks/bench_user_search.py
+"""
+Type-ahead felhasználó keresés: a korábbi nem horgonyzott $regex a
+users kollekción (username + email, count) vs. UserSearchService a
+prefix/trigram indexből.
+
+Futtatás (a backend könyvtárból, élő MongoDB-vel):
+    python -m benchmarks.bench_user_search --users 100000
+
+Külön `nestcash_bench` adatbázist használ, amit a végén eldob.
+"""
+import os
+import time
+import json
+import random
+import string
+import asyncio
+import argparse
+from datetime import datetime
+from statistics import median
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.models.user import UserDocument
+from app.models.user_search import UserSearchEntry
+from app.models.seed_state import SeedStateDocument
+from app.services.user_search_service import UserSearchService
+
+load_dotenv()
+
+BENCH_DB_NAME = "nestcash_bench"
+SYLLABLES = ["ko", "va", "cs", "na", "gy", "sza", "bo", "ti", "ler", "mar", "ton", "eri", "ka"]
+
+
+def _username() -> str:
+    return "".join(random.choice(SYLLABLES) for _ in range(random.randint(2, 4))) + \
+        "".join(random.choice(string.digits) for _ in range(3))
+
+
+async def _seed(count: int) -> list:
+    users = []
+    for index in range(count):
+        username = f"{_username()}{index}"
+        users.append({
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "x",
+            "registration_date": datetime.utcnow(),
+        })
+    await UserDocument.get_motor_collection().insert_many(users, ordered=False)
+    await UserSearchService.rebuild()
+    return [user["username"] for user in users]
+
+
+async def _legacy_search(query: str):
+    search_filter = {"$or": [
+        {"username": {"$regex": query, "$options": "i"}},
+        {"email": {"$regex": query, "$options": "i"}},
+    ]}
+    collection = UserDocument.get_motor_collection()
+    await collection.count_documents(search_filter)
+    await collection.find(search_filter).sort("username").limit(20).to_list(length=20)
+
+
+async def _time(search, queries: list) -> dict:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        await search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+    }
+
+
+async def main(user_count: int, query_count: int):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    await init_beanie(database=client[BENCH_DB_NAME], document_models=[UserDocument, UserSearchEntry, SeedStateDocument])
+
+    try:
+        usernames = await _seed(user_count)
+        # Type-ahead: egy létező név első 2-5 karaktere, illetve belső részlete
+        prefixes = [name[:random.randint(2, 5)] for name in random.sample(usernames, query_count)]
+        infixes = [name[1:4] for name in random.sample(usernames, query_count)]
+
+        print(json.dumps({
+            "users": user_count,
+            "queries": query_count,
+            "prefix": {
+                "legacy": await _time(_legacy_search, prefixes),
+                "indexed": await _time(lambda query: UserSearchService.search(query, limit=20), prefixes),
+            },
+            "infix": {
+                "legacy": await _time(_legacy_search, infixes),
+                "indexed": await _time(lambda query: UserSearchService.search(query, limit=20), infixes),
+            },
+        }, indent=2))
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="User search (type-ahead) benchmark")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.queries))
@@ -0,0 +1,36 @@
+# tests/live_mongo.py
+"""
+Élő MongoDB-t igénylő tesztek közös segédje
+
+MONGODB_URI (alapból localhost); ha a szerver nem érhető el, a teszt kimarad.
+Minden futás egy ideiglenes adatbázist kap, amit a végén eldob.
+"""
+import os
+import uuid
+from typing import Any, Awaitable, Callable, List
+
+import pytest
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+async def run_with_database(document_models: List[Any], scenario: Callable[[], Awaitable[Any]]) -> Any:
+    """A scenario futtatása egy eldobható adatbázison (asyncio.run-ból hívandó)"""
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"), serverSelectionTimeoutMS=2000)
+    try:
+        await client.admin.command("ping")
+    except PyMongoError as e:
+        client.close()
+        pytest.skip(f"MongoDB not reachable: {e}")
+
+    database_name = f"nestcash_test_{uuid.uuid4().hex[:8]}"
+    try:
+        await init_beanie(database=client[database_name], document_models=document_models)
+        return await scenario()
+    finally:
+        await client.drop_database(database_name)
+        client.close()
@@ -0,0 +1,173 @@
+# tests/test_analysis_parity.py
+"""
+Az /analysis aggregációs ($facet) útja ugyanazt adja-e, mint a Python-os
+referencia implementáció.
+
+Két szinten:
+  - élő MongoDB-n (tests/live_mongo.py) a valódi AnalysisService.build_pipeline
+    fut a beszúrt szintetikus tranzakciókon; ha nincs szerver, kimarad
+  - szerver nélkül a _*_from_facets függvényeket egy Pythonban kiértékelt
+    $facet eredményen ellenőrizzük (a beszúrási sorrend az _id sorrend)
+
+Mindkettőt a _calculate_basic_stats / _analyze_* eredményével vetjük össze.
+"""
+import random
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.transaction import Transaction
+from app.services.analysis_service import AnalysisService
+from app.routes.analysis import (
+    _calculate_basic_stats, _analyze_cashflow, _analyze_categories, _analyze_time_patterns,
+    _basic_stats_from_facets, _cashflow_from_facets, _categories_from_facets, _time_patterns_from_facets,
+    _weekday_name,
+)
+from tests.live_mongo import run_with_database
+
+CATEGORIES = ["Élelmiszer", "Lakhatás", "Közlekedés", "Szórakozás", "Fizetés", None, ""]
+
+
+def _transactions(seed: int, count: int) -> list:
+    """Szintetikus tranzakciók; model_construct, mert a Beanie dokumentum init adatbázist kérne"""
+    rng = random.Random(seed)
+    user_id = ObjectId()
+    start = date(2024, 1, 1)
+    transactions = []
+    for _ in range(count):
+        amount = round(rng.uniform(-40000, 60000), 2)
+        fields = {
+            "user_id": user_id,
+            "date": (start + timedelta(days=rng.randint(0, 240))).strftime("%Y-%m-%d"),
+            "amount": amount,
+            "main_account": "likvid",
+            "sub_account_name": "bank",
+            "kategoria": rng.choice(CATEGORIES),
+            "type": "income" if amount > 0 else "expense",
+        }
+        if rng.random() < 0.8:  # A többinél a modell alapértéke (12) marad
+            fields["hour"] = rng.randint(0, 23)
+        transactions.append(Transaction.model_construct(**fields))
+    return transactions
+
+
+def _group(rows: list, key, **sums) -> list:
+    """$group: csoportonkénti összegek, darabszám és az első előfordulás (first_id) sorrendje"""
+    groups = {}
+    for index, row in enumerate(rows):
+        group = groups.setdefault(key(row), {"_id": key(row), "count": 0, "first_id": index, **{name: 0 for name in sums}})
+        group["count"] += 1
+        for name, field in sums.items():
+            group[name] += row[field]
+    return list(groups.values())
+
+
+def _facets(transactions: list) -> dict:
+    """Az AnalysisService.build_pipeline $project + $facet lépései Pythonban"""
+    if not transactions:
+        return {"totals": []}
+
+    rows = []
+    for t in transactions:
+        parsed = date.fromisoformat(t.date)
+        rows.append({
+            "date": t.date,
+            "hour": 12 if t.hour is None else t.hour,
+            "category": t.kategoria or "Egyéb",
+            "income": t.amount if t.amount > 0 else 0,
+            "expense": 0 if t.amount > 0 else abs(t.amount),
+            "is_expense": t.amount < 0,
+            "weekday": (parsed.weekday() + 1) % 7 + 1,  # $dayOfWeek: 1 = vasárnap
+            "month": parsed.strftime("%Y-%m"),
+            "week": parsed.strftime("%Y-W%U"),
+        })
+    expenses = [row for row in rows if row["is_expense"]]
+
+    def by_count(groups):
+        return sorted(groups, key=lambda group: (-group["count"], group["first_id"]))
+
+    weekly = sorted(_group(rows, lambda row: row["week"], income="income", expense="expense"), key=lambda group: group["_id"])
+
+    return {
+        "totals": [{
+            "_id": None,
+            "total_income": sum(row["income"] for row in rows),
+            "total_expense": sum(row["expense"] for row in rows),
+            "count": len(rows),
+            "min_date": min(row["date"] for row in rows),
+            "max_date": max(row["date"] for row in rows),
+        }],
+        "weekday_counts": by_count(_group(rows, lambda row: row["weekday"])),
+        "hour_counts": by_count(_group(rows, lambda row: row["hour"])),
+        "monthly": sorted(_group(rows, lambda row: row["month"], income="income", expense="expense"), key=lambda group: group["_id"]),
+        "weekly": weekly[-12:],
+        "categories": _group(rows, lambda row: row["category"], income="income", expense="expense"),
+        "expense_by_weekday": _group(expenses, lambda row: row["weekday"], expense="expense"),
+        "expense_by_hour": _group(expenses, lambda row: row["hour"]),
+    }
+
+
+def test_weekday_name_maps_mongo_day_of_week():
+    # $dayOfWeek: 1 = vasárnap ... 7 = szombat
+    assert [_weekday_name(day) for day in range(1, 8)] == [
+        "Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"
+    ]
+
+
+@pytest.mark.parametrize("seed,count", [(1, 1), (2, 7), (3, 150), (4, 1200)])
+def test_facet_helpers_match_python_implementation(seed, count):
+    transactions = _transactions(seed, count)
+    facets = _facets(transactions)
+
+    assert _basic_stats_from_facets(facets) == asyncio.run(_calculate_basic_stats(transactions))
+    assert _cashflow_from_facets(facets) == asyncio.run(_analyze_cashflow(transactions))
+    assert _categories_from_facets(facets) == asyncio.run(_analyze_categories(transactions))
+    assert _time_patterns_from_facets(facets) == asyncio.run(_analyze_time_patterns(transactions))
+
+
+def test_empty_period_matches_python_implementation():
+    facets = _facets([])
+
+    assert _basic_stats_from_facets(facets) == asyncio.run(_calculate_basic_stats([]))
+    assert _cashflow_from_facets(facets) == asyncio.run(_analyze_cashflow([]))
+    assert _categories_from_facets(facets) == asyncio.run(_analyze_categories([]))
+    assert _time_patterns_from_facets(facets) == asyncio.run(_analyze_time_patterns([]))
+
+
+def _approx(value):
+    """Lebegőpontos összegek összevetése (a Mongo $sum más sorrendben / kompenzáltan összegezhet)"""
+    if isinstance(value, float):
+        return pytest.approx(value, rel=1e-9, abs=1e-6)
+    if isinstance(value, dict):
+        return {key: _approx(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_approx(item) for item in value]
+    return value
+
+
+@pytest.mark.parametrize("seed,count", [(5, 1), (6, 40), (7, 1500)])
+def test_pipeline_matches_python_implementation_on_live_mongo(seed, count):
+    transactions = _transactions(seed, count)
+    user_id = str(transactions[0].user_id)
+
+    async def scenario():
+        # Csak a ténylegesen megadott mezők (a hiányzó óra a pipeline $ifNull ágát teszteli);
+        # a beszúrási sorrend adja az _id sorrendet
+        documents = [t.model_dump(include=t.model_fields_set) for t in transactions]
+        other_user = dict(documents[0], user_id=ObjectId())
+        await Transaction.get_motor_collection().insert_many(documents + [other_user])
+        return await AnalysisService.aggregate(user_id, "2024-01-01", "2024-12-31")
+
+    facets = asyncio.run(run_with_database([Transaction], scenario))
+
+    pairs = [
+        (_basic_stats_from_facets, _calculate_basic_stats),
+        (_cashflow_from_facets, _analyze_cashflow),
+        (_categories_from_facets, _analyze_categories),
+        (_time_patterns_from_facets, _analyze_time_patterns),
+    ]
+    for from_facets, reference in pairs:
+        expected = asyncio.run(reference(transactions)).model_dump()
+        assert _approx(from_facets(facets).model_dump()) == expected
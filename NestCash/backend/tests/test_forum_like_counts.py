@@ -0,0 +1,77 @@
+# tests/test_forum_like_counts.py
+"""
+A like_count párhuzamos like toggle-ök után is pontosan a like dokumentumok
+száma-e (ForumInteractionService.toggle_like).
+
+Élő MongoDB kell hozzá (lásd tests/live_mongo.py); ha nem érhető el, a
+teszt kimarad.
+"""
+import random
+import asyncio
+
+from beanie import PydanticObjectId
+
+from app.models.forum_models import ForumPostDocument, LikeDocument, CommentDocument, PostCategory
+from app.models.lease import LeaseDocument
+from app.services.forum_interaction_service import ForumInteractionService
+from tests.live_mongo import run_with_database
+
+PARALLEL_TOGGLES = 500
+MODELS = [ForumPostDocument, LikeDocument, CommentDocument, LeaseDocument]
+
+
+async def _toggle_in_parallel(user_ids: list) -> tuple:
+    # Az egyedi like indexet induláskor az app hozza létre (nem az init_beanie)
+    assert await ForumInteractionService.ensure_unique_like_index()
+
+    post = ForumPostDocument(
+        user_id=PydanticObjectId(), username="author", title="Like teszt", content="Like teszt",
+        category=PostCategory.GENERAL
+    )
+    await post.insert()
+
+    await asyncio.gather(*(
+        ForumInteractionService.toggle_like(post.id, str(user_id), "tester") for user_id in user_ids
+    ))
+
+    stored = await ForumPostDocument.get_motor_collection().find_one({"_id": post.id}, {"like_count": 1})
+    like_documents = await LikeDocument.get_motor_collection().count_documents({"post_id": post.id})
+    return stored["like_count"], like_documents
+
+
+def test_like_count_exact_with_distinct_users():
+    user_ids = [PydanticObjectId() for _ in range(PARALLEL_TOGGLES)]
+
+    like_count, like_documents = asyncio.run(run_with_database(MODELS, lambda: _toggle_in_parallel(user_ids)))
+
+    assert like_documents == PARALLEL_TOGGLES
+    assert like_count == like_documents
+
+
+def test_like_count_exact_with_repeated_toggles():
+    rng = random.Random(21)
+    pool = [PydanticObjectId() for _ in range(50)]
+    user_ids = [rng.choice(pool) for _ in range(PARALLEL_TOGGLES)]
+
+    like_count, like_documents = asyncio.run(run_with_database(MODELS, lambda: _toggle_in_parallel(user_ids)))
+
+    assert like_count == like_documents
+
+
+def test_unique_like_index_migration_removes_duplicates():
+    async def scenario():
+        post_id, user_id = PydanticObjectId(), PydanticObjectId()
+        await ForumPostDocument.get_motor_collection().insert_one({"_id": post_id, "like_count": 5})
+        await LikeDocument.get_motor_collection().insert_many([
+            {"post_id": post_id, "user_id": user_id, "username": "tester"} for _ in range(3)
+        ])
+
+        created = await ForumInteractionService.ensure_unique_like_index()
+        post = await ForumPostDocument.get_motor_collection().find_one({"_id": post_id})
+        likes = await LikeDocument.get_motor_collection().count_documents({"post_id": post_id})
+        return created, post["like_count"], likes
+
+    created, like_count, like_documents = asyncio.run(run_with_database(MODELS, scenario))
+
+    assert created
+    assert like_count == like_documents == 1
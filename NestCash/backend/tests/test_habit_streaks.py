@@ -0,0 +1,186 @@
+# tests/test_habit_streaks.py
+"""
+Az inkrementális streak karbantartás (HabitService.apply_log_change) ugyanazt
+adja-e, mint a teljes újraszámolás (compute_streak_fields).
+
+Véletlen beszúrás / törlés / teljesítés váltás / dátum áthelyezés sorozatokat
+futtatunk egy memóriabeli log tárolón, azonos napra eső duplikált logokkal
+együtt, és minden lépés után összevetjük a mentett mezőket a referenciával.
+A hívások a /habits útvonalak hívásait követik.
+"""
+import random
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.habit import Habit, HabitLog
+from app.services.habit_service import HabitService
+
+STREAK_FIELDS = ("streak_count", "best_streak", "last_completed", "streak_run_start")
+
+
+def _matches(document: dict, query: dict) -> bool:
+    """Egyszerű Mongo szűrő: egyenlőség, $lt / $gt / $lte / $gte"""
+    for key, condition in query.items():
+        value = document.get(key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$lt" and not value < operand:
+                    return False
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document: dict, projection: dict) -> dict:
+    fields = [key for key, include in projection.items() if include]
+    row = {key: document[key] for key in fields if key in document}
+    if projection.get("_id", 1):
+        row["_id"] = document["_id"]
+    return row
+
+
+class FakeCursor:
+    def __init__(self, rows: list):
+        self._rows = rows
+
+    def sort(self, key, direction=1):
+        self._rows.sort(key=lambda row: row[key], reverse=direction < 0)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self._rows:
+            yield row
+
+
+class FakeCollection:
+    """A HabitService által használt motor műveletek memóriabeli változata"""
+
+    def __init__(self):
+        self.documents = {}
+
+    def find(self, query: dict, projection: dict) -> FakeCursor:
+        return FakeCursor([_project(doc, projection) for doc in self.documents.values() if _matches(doc, query)])
+
+    async def find_one(self, query: dict, projection: dict, sort=None):
+        rows = [_project(doc, projection) for doc in self.documents.values() if _matches(doc, query)]
+        for key, direction in reversed(sort or []):
+            rows.sort(key=lambda row: row[key], reverse=direction < 0)
+        return rows[0] if rows else None
+
+    async def count_documents(self, query: dict, limit: int = 0) -> int:
+        count = sum(1 for doc in self.documents.values() if _matches(doc, query))
+        return min(count, limit) if limit else count
+
+    async def update_one(self, query: dict, update: dict):
+        for doc in self.documents.values():
+            if _matches(doc, query):
+                doc.update(update["$set"])
+                return
+
+
+@pytest.fixture
+def store(monkeypatch):
+    habits, logs = FakeCollection(), FakeCollection()
+
+    async def get_habit(habit_id):
+        document = habits.documents.get(habit_id)
+        return Habit.model_construct(id=document["_id"], **{k: v for k, v in document.items() if k != "_id"}) \
+            if document else None
+
+    monkeypatch.setattr(Habit, "get", staticmethod(get_habit))
+    monkeypatch.setattr(Habit, "get_motor_collection", staticmethod(lambda: habits))
+    monkeypatch.setattr(HabitLog, "get_motor_collection", staticmethod(lambda: logs))
+    return habits, logs
+
+
+def _day(offset: int) -> str:
+    return (date.today() - timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+async def _simulate(habits: FakeCollection, logs: FakeCollection, seed: int, steps: int) -> None:
+    rng = random.Random(seed)
+    user_id = ObjectId()
+    habit_id = ObjectId()
+    habits.documents[habit_id] = {
+        "_id": habit_id, "user_id": user_id, "title": "Napi költségnapló",
+        "streak_count": 0, "best_streak": 0, "last_completed": None, "streak_run_start": None,
+    }
+    # Szűk ablak: sok szomszédos nap és sok azonos napra eső log
+    window = rng.choice([6, 14, 40])
+
+    for step in range(steps):
+        action = rng.choice(["insert", "insert", "duplicate", "toggle", "delete", "move"])
+        existing = list(logs.documents.values())
+
+        if action in ("insert", "duplicate") or not existing:
+            log_date = rng.choice([log["date"] for log in existing]) if action == "duplicate" and existing \
+                else _day(rng.randint(0, window))
+            completed = rng.random() < 0.8
+            log_id = ObjectId()
+            logs.documents[log_id] = {"_id": log_id, "habit_id": habit_id, "date": log_date, "completed": completed}
+            await HabitService.apply_log_change(str(habit_id), str(user_id), log_date, False, completed)
+        elif action == "toggle":
+            log = rng.choice(existing)
+            previous_completed = log["completed"]
+            log["completed"] = not previous_completed
+            await HabitService.apply_log_change(str(habit_id), str(user_id), log["date"], previous_completed, log["completed"])
+        elif action == "delete":
+            log = rng.choice(existing)
+            del logs.documents[log["_id"]]
+            await HabitService.apply_log_change(str(habit_id), str(user_id), log["date"], log["completed"], False)
+        else:
+            # Dátumváltozás: régi nap törlése + új nap felvétele (update_habit_log)
+            log = rng.choice(existing)
+            previous_date, previous_completed = log["date"], log["completed"]
+            log["date"] = _day(rng.randint(0, window))
+            if log["date"] != previous_date:
+                await HabitService.apply_log_change(str(habit_id), str(user_id), previous_date, previous_completed, False)
+                await HabitService.apply_log_change(str(habit_id), str(user_id), log["date"], False, log["completed"])
+            else:
+                await HabitService.apply_log_change(str(habit_id), str(user_id), log["date"], previous_completed, log["completed"])
+
+        stored = {key: habits.documents[habit_id][key] for key in STREAK_FIELDS}
+        expected = await HabitService.compute_streak_fields(habit_id)
+        assert stored == expected, f"seed={seed} step={step} action={action}"
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_incremental_streak_matches_full_recompute(store, seed):
+    habits, logs = store
+    asyncio.run(_simulate(habits, logs, seed, steps=150))
+
+
+def test_removing_one_of_two_same_day_logs_keeps_the_day(store):
+    habits, logs = store
+    user_id, habit_id = ObjectId(), ObjectId()
+    habits.documents[habit_id] = {
+        "_id": habit_id, "user_id": user_id, "title": "Megtakarítás",
+        "streak_count": 0, "best_streak": 0, "last_completed": None, "streak_run_start": None,
+    }
+
+    async def scenario():
+        for offset in (2, 1, 0, 0):
+            log_id = ObjectId()
+            logs.documents[log_id] = {"_id": log_id, "habit_id": habit_id, "date": _day(offset), "completed": True}
+            await HabitService.apply_log_change(str(habit_id), str(user_id), _day(offset), False, True)
+        del logs.documents[log_id]
+        await HabitService.apply_log_change(str(habit_id), str(user_id), _day(0), True, False)
+
+    asyncio.run(scenario())
+    assert habits.documents[habit_id]["streak_count"] == 3
+    assert habits.documents[habit_id]["last_completed"] == _day(0)
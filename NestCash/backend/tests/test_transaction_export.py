@@ -0,0 +1,88 @@
+# tests/test_transaction_export.py
+"""
+A tranzakció export streamek (CSV, Parquet) visszaolvasható, teljes fájlt adnak-e.
+
+A Mongo cursort (_iter_batches) egy kis, több darabra bontott mintával
+helyettesítjük; a kimenetet a csv modullal, illetve pyarrow-val olvassuk vissza.
+"""
+import io
+import csv
+import asyncio
+
+import pytest
+
+from app.services.transaction_export_service import EXPORT_COLUMNS, TransactionExportService
+
+ROWS = [
+    {
+        "id": "65a000000000000000000001", "date": "2024-03-01", "amount": -12500.0, "currency": "HUF",
+        "main_account": "likvid", "sub_account_name": "bank", "kategoria": "Élelmiszer", "type": "expense",
+        "description": "Bevásárlás, \"nagy\"", "ismetlodo": True, "fix_koltseg": False, "celhoz_kotott": False,
+        "honap": "2024-03", "het": "2024-09", "nap_sorszam": 4, "hour": 18, "year": 2024, "month": 3, "day": 1,
+        "weekday": "Friday",
+    },
+    {
+        "id": "65a000000000000000000002", "date": "2024-03-02", "amount": 450000.0, "currency": "HUF",
+        "main_account": "likvid", "sub_account_name": "bank", "kategoria": "Fizetés", "type": "income",
+        "ismetlodo": False, "fix_koltseg": True, "celhoz_kotott": None,
+        "honap": "2024-03", "het": "2024-09", "nap_sorszam": 5, "hour": 9, "year": 2024, "month": 3, "day": 2,
+        "weekday": "Saturday",
+    },
+    {
+        # Régi dokumentum: a legtöbb opcionális mező hiányzik
+        "id": "65a000000000000000000003", "date": "2024-03-03", "amount": -800.0,
+        "main_account": "megtakaritas", "type": "expense",
+    },
+]
+
+
+@pytest.fixture(autouse=True)
+def batches(monkeypatch):
+    async def iter_batches(query_filter):
+        yield [dict(row) for row in ROWS[:2]]
+        yield [dict(row) for row in ROWS[2:]]
+
+    monkeypatch.setattr(TransactionExportService, "_iter_batches", staticmethod(iter_batches))
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+def test_csv_export_round_trip():
+    data = asyncio.run(_collect(TransactionExportService.stream({}, "csv")))
+
+    assert data.startswith(b"\xef\xbb\xbf")
+    rows = list(csv.reader(io.StringIO(data[3:].decode("utf-8"))))
+    assert rows[0] == [name for name, _ in EXPORT_COLUMNS]
+    assert len(rows) == len(ROWS) + 1
+    assert rows[1][[name for name, _ in EXPORT_COLUMNS].index("description")] == "Bevásárlás, \"nagy\""
+    assert [row[0] for row in rows[1:]] == [row["id"] for row in ROWS]
+
+
+def test_parquet_export_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    data = asyncio.run(_collect(TransactionExportService.stream({}, "parquet")))
+    table = pq.read_table(io.BytesIO(data))
+
+    assert table.column_names == [name for name, _ in EXPORT_COLUMNS]
+    assert table.schema.field("ismetlodo").type == pa.bool_()
+    assert table.num_rows == len(ROWS)
+    exported = table.to_pylist()
+    for row, expected in zip(exported, ROWS):
+        assert row == {name: expected.get(name) for name, _ in EXPORT_COLUMNS}
+
+
+def test_parquet_export_of_empty_result_is_valid(monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    async def no_batches(query_filter):
+        return
+        yield
+
+    monkeypatch.setattr(TransactionExportService, "_iter_batches", staticmethod(no_batches))
+    data = asyncio.run(_collect(TransactionExportService.stream({}, "parquet")))
+
+    assert pq.read_table(io.BytesIO(data)).num_rows == 0